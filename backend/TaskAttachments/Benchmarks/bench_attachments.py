@@ -0,0 +1,211 @@
+"""
+Throughput and latency of AttachmentService against the offline fake Supabase.
+
+Run from the TaskAttachments directory:
+
+    python -m Benchmarks.bench_attachments --requests 500 --concurrency 8 --latency-ms 5
+
+Each scenario issues --requests operations from --concurrency threads (one
+AttachmentService per thread, as each Flask request builds its own) and reports
+ops/s plus p50/p95/p99/max latency in milliseconds. --json prints the results
+as JSON for comparing runs.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, List
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Services.AttachmentService import AttachmentService
+    from .fake_supabase import FakeSupabase
+except ImportError:
+    from config import Config
+    from Services.AttachmentService import AttachmentService
+    from Benchmarks.fake_supabase import FakeSupabase
+
+# supabase-py only checks that the key looks like a JWT
+FAKE_SERVICE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.ZmFrZQ"
+
+SCENARIOS = ("upload", "upload_dedup", "list", "list_page", "batch", "sign", "copy", "delete")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(name: str, latencies: List[float], elapsed: float, errors: int) -> dict:
+    values = sorted(latencies)
+    return {
+        "scenario": name,
+        "ops": len(values),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "ops_per_s": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def run_scenario(name: str, operation: Callable[[AttachmentService, int], None], requests: int,
+                 concurrency: int) -> dict:
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(i: int) -> None:
+        nonlocal errors
+        service = getattr(local, "service", None)
+        if service is None:
+            service = local.service = AttachmentService()
+        start = time.perf_counter()
+        try:
+            operation(service, i)
+        except Exception as e:
+            with lock:
+                errors += 1
+                if errors == 1:
+                    print(f"[{name}] first error: {e}", file=sys.stderr)
+            return
+        duration = time.perf_counter() - start
+        with lock:
+            latencies.append(duration)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(requests)))
+    return summarize(name, latencies, time.perf_counter() - started, errors)
+
+
+def _pdf(payload_bytes: int, salt: str) -> bytes:
+    head = f"%PDF-1.7\n% {salt}\n".encode()
+    return head + b"0" * max(0, payload_bytes - len(head))
+
+
+class AttachmentBenchmark:
+    """Seeds the fake backend and defines one operation per scenario."""
+
+    def __init__(self, payload_bytes: int, attachments_per_task: int, batch_size: int):
+        self.payload_bytes = payload_bytes
+        self.attachments_per_task = attachments_per_task
+        self.batch_size = batch_size
+        self.run_id = str(int(time.time() * 1000))
+        self.created: List[dict] = []
+        self.deletable: List[dict] = []
+        self.seed_task = 1_000_000
+        self.copy_target = itertools.count(2_000_000)
+        self.dedup_data = _pdf(payload_bytes, "dedup")
+        self.dedup_digest = hashlib.sha256(self.dedup_data).hexdigest()
+
+    def seed(self, service: AttachmentService) -> None:
+        """Attachments on seed_task (listed, signed, copied) and on the tasks read in batches."""
+        for i in range(self.attachments_per_task):
+            self.created.append(self._store(service, self.seed_task, f"seed-{i}"))
+        for task_id in range(self.batch_size):
+            self._store(service, task_id + 1, f"batch-{task_id}")
+
+    def prepare_delete(self, service: AttachmentService, count: int) -> None:
+        """Attachments consumed by the delete scenario, so the other fixtures stay intact."""
+        self.deletable = [self._store(service, 5_000_000 + i, f"delete-{i}") for i in range(count)]
+
+    def _store(self, service: AttachmentService, task_id: int, salt: str) -> dict:
+        data = _pdf(self.payload_bytes, f"{self.run_id}-{salt}")
+        digest = hashlib.sha256(data).hexdigest()
+        return service.store_attachment(task_id, BytesIO(data), f"{salt}.pdf", "application/pdf",
+                                        len(data), digest, 1)
+
+    def upload(self, service: AttachmentService, i: int) -> None:
+        # A task per upload keeps the per-task quota out of the way
+        self._store(service, 3_000_000 + i, f"upload-{i}")
+
+    def upload_dedup(self, service: AttachmentService, i: int) -> None:
+        service.store_attachment(4_000_000 + i, BytesIO(self.dedup_data), "dedup.pdf", "application/pdf",
+                                 len(self.dedup_data), self.dedup_digest, 1)
+
+    def list(self, service: AttachmentService, i: int) -> None:
+        service.list_attachments_for_task(self.seed_task)
+
+    def list_page(self, service: AttachmentService, i: int) -> None:
+        service.list_attachments_page(self.seed_task, include_urls=False)
+
+    def batch(self, service: AttachmentService, i: int) -> None:
+        service.list_attachments_for_tasks(list(range(1, self.batch_size + 1)))
+
+    def sign(self, service: AttachmentService, i: int) -> None:
+        service.get_download_url(self.created[i % len(self.created)]["id"])
+
+    def copy(self, service: AttachmentService, i: int) -> None:
+        service.copy_attachments_to_task(self.seed_task, next(self.copy_target))
+
+    def delete(self, service: AttachmentService, i: int) -> None:
+        service.delete_attachment(self.deletable.pop()["id"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every backend request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra delay, 0..jitter")
+    parser.add_argument("--payload-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--attachments-per-task", type=int, default=20, help="rows listed/copied per operation")
+    parser.add_argument("--batch-size", type=int, default=50, help="tasks per batch metadata read")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    server = FakeSupabase(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms).start()
+    Config.SUPABASE_URL = server.url
+    Config.SUPABASE_SERVICE_KEY = FAKE_SERVICE_KEY
+    Config.STORAGE_BACKEND = "supabase"
+    try:
+        bench = AttachmentBenchmark(args.payload_bytes, args.attachments_per_task, args.batch_size)
+        seeder = AttachmentService()
+        bench.seed(seeder)
+
+        results: List[Dict] = []
+        for name in scenarios:
+            if name == "delete":
+                bench.prepare_delete(seeder, args.requests)
+            results.append(run_scenario(name, getattr(bench, name), args.requests, args.concurrency))
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps({"settings": vars(args), "results": results}, indent=2))
+    else:
+        header = f"{'scenario':<14}{'ops':>7}{'err':>5}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        print(f"latency={args.latency_ms}ms jitter={args.jitter_ms}ms concurrency={args.concurrency} "
+              f"payload={args.payload_bytes}B")
+        print(header)
+        for r in results:
+            print(f"{r['scenario']:<14}{r['ops']:>7}{r['errors']:>5}{r['ops_per_s']:>10}"
+                  f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
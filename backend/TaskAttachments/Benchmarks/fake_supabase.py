@@ -0,0 +1,557 @@
+"""
+In-process stand-in for the parts of Supabase this service talks to.
+
+Implements the PostgREST table endpoints (select with eq/lt/lte/gt/gte/in/is/or
+filters, order, limit/offset, exact counts and single-object responses; insert,
+upsert, update, delete; the blob refcount RPCs from Migrations/001 and the GC
+claim RPCs from Migrations/004) and the Storage object endpoints (PUT upload,
+authenticated download, signed download/upload URLs, list and bulk remove). State is kept in memory and auth
+headers are accepted without being checked.
+
+Every request sleeps for `latency_ms` (+ up to `jitter_ms`) before it is
+handled so round trips to a remote project can be approximated offline.
+
+    server = FakeSupabase(latency_ms=5).start()
+    Config.SUPABASE_URL = server.url
+    ...
+    server.stop()
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+from werkzeug.wrappers import Request, Response
+
+# Query parameters that are not column filters
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+# Primary keys used as the default upsert conflict target
+PRIMARY_KEYS = {
+    "task_attachments": "id",
+    "attachment_blobs": "digest",
+    "attachment_gc_queue": "file_path",
+}
+
+
+class _RpcError(Exception):
+    """Raised by an rpc handler; returned the way PostgREST reports a RAISE with a SQLSTATE."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split a PostgREST logic expression on commas outside parentheses and quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ',':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+
+def _unquote_value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _coerce(stored: Any, value: str) -> Any:
+    """Convert a filter value to the type of the stored column value."""
+    if isinstance(stored, bool):
+        return value.lower() == "true"
+    if isinstance(stored, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    if isinstance(stored, float):
+        return float(value)
+    return value
+
+
+def _compare(op: str, stored: Any, value: str) -> bool:
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return stored is expected
+    if op == "in":
+        options = [_unquote_value(v) for v in _split_top_level(value.strip()[1:-1])]
+        return stored is not None and stored in [_coerce(stored, v) for v in options]
+    if stored is None:
+        return False
+    value = _coerce(stored, _unquote_value(value))
+    if op == "eq":
+        return stored == value
+    if op == "neq":
+        return stored != value
+    try:
+        if op == "lt":
+            return stored < value
+        if op == "lte":
+            return stored <= value
+        if op == "gt":
+            return stored > value
+        if op == "gte":
+            return stored >= value
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _parse_condition(expr: str) -> Callable[[dict], bool]:
+    """`col.op.value`, `and(...)`, `or(...)` (the syntax of the `or` query parameter)."""
+    for logic in ("and", "or"):
+        if expr.startswith(f"{logic}(") and expr.endswith(")"):
+            children = [_parse_condition(part) for part in _split_top_level(expr[len(logic) + 1:-1])]
+            combine = all if logic == "and" else any
+            return lambda row: combine(child(row) for child in children)
+    column, op, value = expr.split(".", 2)
+    return lambda row: _compare(op, row.get(column), value)
+
+
+def _parse_filters(args) -> List[Callable[[dict], bool]]:
+    filters = []
+    for key, raw in args.items(multi=True):
+        if key in _RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            filters.append(_parse_condition(f"{key}{raw}"))
+            continue
+        op, _, value = raw.partition(".")
+        if op == "not":
+            inner = _parse_condition(f"{key}.{value}")
+            filters.append(lambda row, inner=inner: not inner(row))
+        else:
+            filters.append(lambda row, key=key, op=op, value=value: _compare(op, row.get(key), value))
+    return filters
+
+
+def _order_rows(rows: List[dict], order: Optional[str]) -> List[dict]:
+    if not order:
+        return rows
+    # Stable sorts applied from the last key to the first give a multi-key order
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=desc)
+        # Postgres puts NULLs last ascending and first descending
+        rows = missing + present if desc else present + missing
+    return rows
+
+
+def _project(row: dict, select: Optional[str]) -> dict:
+    if not select or select.strip() == "*":
+        return dict(row)
+    columns = [c.strip().strip('"') for c in select.split(",") if c.strip()]
+    return {c: row.get(c) for c in columns}
+
+
+class FakeSupabase:
+    """PostgREST + Storage stand-in served from a background thread on localhost."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, secret: str = "fake-supabase"):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.secret = secret.encode()
+        self.tables: Dict[str, List[dict]] = {}
+        # bucket -> path -> {"data", "content_type", "created_at"}
+        self.objects: Dict[str, Dict[str, dict]] = {}
+        self.request_count = 0
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+        self.rpcs: Dict[str, Callable[[dict], Any]] = {
+            "acquire_attachment_blob": self._acquire_attachment_blob,
+            "release_attachment_blob": self._release_attachment_blob,
+            "claim_gc_paths": self._claim_gc_paths,
+            "complete_gc_paths": self._complete_gc_paths,
+        }
+
+    # -- lifecycle ---------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeSupabase":
+        self._server = make_server(host, port, self.wsgi_app, threaded=True, request_handler=_QuietRequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-supabase", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tables.clear()
+            self.objects.clear()
+            self.request_count = 0
+
+    def __enter__(self) -> "FakeSupabase":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -- WSGI --------------------------------------------------------------
+
+    def wsgi_app(self, environ, start_response):
+        request = Request(environ)
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000.0)
+        with self._lock:
+            self.request_count += 1
+        try:
+            response = self._dispatch(request)
+        except ValueError as e:
+            response = self._json({"code": "PGRST100", "message": str(e)}, 400)
+        return response(environ, start_response)
+
+    def _dispatch(self, request: Request) -> Response:
+        path = request.path
+        if path.startswith("/rest/v1/rpc/"):
+            return self._rpc(request, path[len("/rest/v1/rpc/"):])
+        if path.startswith("/rest/v1/"):
+            return self._table(request, path[len("/rest/v1/"):])
+        if path.startswith("/storage/v1/object/"):
+            return self._storage(request, unquote(path[len("/storage/v1/object/"):]))
+        return self._json({"message": "Not found"}, 404)
+
+    @staticmethod
+    def _json(body: Any, status: int = 200, headers: Optional[dict] = None) -> Response:
+        return Response(json.dumps(body), status=status, headers=headers, mimetype="application/json")
+
+    # -- PostgREST ---------------------------------------------------------
+
+    def _table(self, request: Request, name: str) -> Response:
+        prefer = request.headers.get("Prefer", "")
+        select = request.args.get("select")
+        filters = _parse_filters(request.args)
+
+        with self._lock:
+            rows = self.tables.setdefault(name, [])
+            if request.method in ("GET", "HEAD"):
+                result = self._select(rows, request.args, filters)
+                total = len([r for r in rows if all(f(r) for f in filters)])
+            elif request.method == "POST":
+                body = request.get_json()
+                payload = body if isinstance(body, list) else [body]
+                inserted = self._insert(name, rows, payload, prefer, request.args.get("on_conflict"))
+                if isinstance(inserted, Response):
+                    return inserted
+                result, total = inserted, len(inserted)
+            elif request.method == "PATCH":
+                changes = request.get_json() or {}
+                result = [r for r in rows if all(f(r) for f in filters)]
+                for row in result:
+                    row.update(changes)
+                total = len(result)
+            elif request.method == "DELETE":
+                result = [r for r in rows if all(f(r) for f in filters)]
+                deleted = {id(r) for r in result}
+                self.tables[name] = [r for r in rows if id(r) not in deleted]
+                total = len(result)
+            else:
+                return self._json({"message": "Method not allowed"}, 405)
+            result = [_project(r, select) for r in result]
+
+        headers = {}
+        if "count=" in prefer:
+            headers["Content-Range"] = f"0-{len(result) - 1}/{total}" if result else f"*/{total}"
+        if request.method == "HEAD":
+            return Response(status=200, headers=headers)
+        if "application/vnd.pgrst.object+json" in request.headers.get("Accept", ""):
+            if len(result) != 1:
+                return self._json({
+                    "code": "PGRST116",
+                    "details": f"The result contains {len(result)} rows",
+                    "hint": None,
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                }, 406)
+            return self._json(result[0], headers=headers)
+        if request.method != "GET" and "return=minimal" in prefer:
+            return Response(status=201 if request.method == "POST" else 204, headers=headers)
+        return self._json(result, 201 if request.method == "POST" else 200, headers)
+
+    @staticmethod
+    def _select(rows: List[dict], args, filters) -> List[dict]:
+        result = _order_rows([r for r in rows if all(f(r) for f in filters)], args.get("order"))
+        offset = int(args.get("offset", 0))
+        limit = args.get("limit")
+        return result[offset:offset + int(limit)] if limit is not None else result[offset:]
+
+    def _insert(self, name: str, rows: List[dict], payload: List[dict], prefer: str, on_conflict: Optional[str]):
+        key = on_conflict or PRIMARY_KEYS.get(name)
+        upsert = "resolution=" in prefer
+        ignore = "resolution=ignore-duplicates" in prefer
+        index = {r.get(key): r for r in rows} if key else {}
+        inserted = []
+        for record in payload:
+            row = self._with_defaults(name, record)
+            existing = index.get(row.get(key)) if key else None
+            if existing is not None:
+                if not upsert:
+                    return self._json({
+                        "code": "23505",
+                        "details": f"Key ({key})=({row.get(key)}) already exists.",
+                        "hint": None,
+                        "message": f'duplicate key value violates unique constraint "{name}_pkey"',
+                    }, 409)
+                if ignore:
+                    continue
+                existing.update(record)
+                inserted.append(existing)
+                continue
+            rows.append(row)
+            if key:
+                index[row.get(key)] = row
+            inserted.append(row)
+        return inserted
+
+    @staticmethod
+    def _with_defaults(name: str, record: dict) -> dict:
+        row = dict(record)
+        if name == "task_attachments":
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("uploaded_at", _now_iso())
+            row.setdefault("is_inherited", False)
+            row.setdefault("original_task_id", None)
+            row.setdefault("content_hash", None)
+        elif name == "attachment_gc_queue":
+            row.setdefault("enqueued_at", _now_iso())
+            row.setdefault("claimed_at", None)
+        elif name == "attachment_blobs":
+            row.setdefault("ref_count", 0)
+            row.setdefault("created_at", _now_iso())
+        return row
+
+    def _rpc(self, request: Request, name: str) -> Response:
+        handler = self.rpcs.get(name)
+        if handler is None:
+            return self._json({"code": "PGRST202", "message": f"Could not find the function public.{name}"}, 404)
+        with self._lock:
+            try:
+                return self._json(handler(request.get_json(silent=True) or {}))
+            except _RpcError as e:
+                return self._json({"code": e.code, "message": e.message, "details": None, "hint": None}, 400)
+
+    def _acquire_attachment_blob(self, params: dict) -> List[dict]:
+        queue = self.tables.setdefault("attachment_gc_queue", [])
+        for row in queue:
+            if row["file_path"] == params["p_file_path"]:
+                if row.get("claimed_at"):
+                    raise _RpcError("GC001", f"storage object {row['file_path']} is being reclaimed")
+                queue.remove(row)
+                break
+        blobs = self.tables.setdefault("attachment_blobs", [])
+        for blob in blobs:
+            if blob["digest"] == params["p_digest"]:
+                blob["ref_count"] += 1
+                return [dict(blob)]
+        blob = self._with_defaults("attachment_blobs", {
+            "digest": params["p_digest"],
+            "file_path": params["p_file_path"],
+            "file_size": params["p_file_size"],
+            "content_type": params.get("p_content_type"),
+            "ref_count": 1,
+        })
+        blobs.append(blob)
+        return [dict(blob)]
+
+    def _release_attachment_blob(self, params: dict) -> Optional[int]:
+        blobs = self.tables.setdefault("attachment_blobs", [])
+        for blob in blobs:
+            if blob["digest"] == params["p_digest"]:
+                blob["ref_count"] = max(blob["ref_count"] - 1, 0)
+                if blob["ref_count"] == 0:
+                    blobs.remove(blob)
+                return blob["ref_count"]
+        return None
+
+    def _claim_gc_paths(self, params: dict) -> List[dict]:
+        cutoff = datetime.fromisoformat(params["p_cutoff"])
+        stale = time.time() - params["p_lease_seconds"]
+        queue = self.tables.setdefault("attachment_gc_queue", [])
+        due = sorted(
+            (row for row in queue
+             if datetime.fromisoformat(row["enqueued_at"]) <= cutoff
+             and (not row.get("claimed_at") or datetime.fromisoformat(row["claimed_at"]).timestamp() < stale)),
+            key=lambda row: row["enqueued_at"],
+        )[:params["p_limit"]]
+        referenced = {row["file_path"] for table in ("task_attachments", "attachment_blobs")
+                      for row in self.tables.get(table, [])}
+        claimed = []
+        for row in due:
+            if row["file_path"] in referenced:
+                queue.remove(row)
+            else:
+                row["claimed_at"] = _now_iso()
+                claimed.append(dict(row))
+        return claimed
+
+    def _complete_gc_paths(self, params: dict) -> None:
+        paths = set(params["p_paths"])
+        queue = self.tables.setdefault("attachment_gc_queue", [])
+        queue[:] = [row for row in queue if not (row["file_path"] in paths and row.get("claimed_at"))]
+        return None
+
+    # -- Storage -----------------------------------------------------------
+
+    def _token(self, purpose: str, object_path: str, expires: int) -> str:
+        signature = hmac.new(self.secret, f"{purpose}:{object_path}:{expires}".encode(), hashlib.sha256).hexdigest()
+        return f"{expires}.{signature}"
+
+    def _check_token(self, purpose: str, object_path: str, token: Optional[str]) -> bool:
+        expires, _, _ = (token or "").partition(".")
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+        return hmac.compare_digest(self._token(purpose, object_path, int(expires)), token)
+
+    @staticmethod
+    def _storage_error(status: int, error: str, message: str) -> Response:
+        # Storage reports the logical status in the body, e.g. 409 duplicates arrive as HTTP 400
+        http_status = 400 if status == 409 else status
+        return FakeSupabase._json({"statusCode": str(status), "error": error, "message": message}, http_status)
+
+    def _storage(self, request: Request, rest: str) -> Response:
+        if rest.startswith("sign/"):
+            object_path = rest[len("sign/"):]
+            if request.method == "POST":
+                expires = int(time.time()) + int((request.get_json(silent=True) or {}).get("expiresIn", 3600))
+                return self._json({"signedURL": f"/object/sign/{object_path}?token={self._token('get', object_path, expires)}"})
+            if not self._check_token("get", object_path, request.args.get("token")):
+                return self._storage_error(400, "InvalidJWT", "Invalid signature")
+            return self._download(object_path)
+        if rest.startswith("upload/sign/"):
+            object_path = rest[len("upload/sign/"):]
+            if request.method == "POST":
+                expires = int(time.time()) + 2 * 60 * 60
+                return self._json({"url": f"/object/upload/sign/{object_path}?token={self._token('put', object_path, expires)}"})
+            if not self._check_token("put", object_path, request.args.get("token")):
+                return self._storage_error(400, "InvalidJWT", "Invalid signature")
+            return self._upload(object_path, request, upsert=False)
+        if rest == "move" and request.method == "POST":
+            return self._move(request.get_json(silent=True) or {})
+        if rest.startswith("list/") and request.method == "POST":
+            return self._list(rest[len("list/"):], request.get_json(silent=True) or {})
+        if rest.startswith("authenticated/"):
+            return self._download(rest[len("authenticated/"):])
+        if request.method == "DELETE" and "/" not in rest:
+            return self._remove(rest, (request.get_json(silent=True) or {}).get("prefixes", []))
+        if request.method in ("POST", "PUT"):
+            upsert = request.headers.get("x-upsert", "false").lower() == "true"
+            return self._upload(rest, request, upsert=upsert)
+        if request.method == "GET":
+            return self._download(rest)
+        return self._storage_error(404, "not_found", "Object not found")
+
+    def _split_object_path(self, object_path: str) -> Tuple[str, str]:
+        bucket, _, path = object_path.partition("/")
+        return bucket, path
+
+    def _upload(self, object_path: str, request: Request, upsert: bool) -> Response:
+        bucket, path = self._split_object_path(object_path)
+        data = request.get_data(cache=False)
+        with self._lock:
+            objects = self.objects.setdefault(bucket, {})
+            if path in objects and not upsert:
+                return self._storage_error(409, "Duplicate", "The resource already exists")
+            objects[path] = {
+                "data": data,
+                "content_type": request.headers.get("Content-Type", "application/octet-stream"),
+                "created_at": _now_iso(),
+            }
+        return self._json({"Key": object_path, "Id": str(uuid.uuid4())})
+
+    def _download(self, object_path: str) -> Response:
+        bucket, path = self._split_object_path(object_path)
+        with self._lock:
+            obj = self.objects.get(bucket, {}).get(path)
+        if obj is None:
+            return self._storage_error(404, "not_found", "Object not found")
+        return Response(obj["data"], mimetype=obj["content_type"])
+
+    def _move(self, body: dict) -> Response:
+        bucket = body.get("bucketId")
+        with self._lock:
+            objects = self.objects.setdefault(bucket, {})
+            if body.get("sourceKey") not in objects:
+                return self._storage_error(404, "not_found", "Object not found")
+            if body.get("destinationKey") in objects:
+                return self._storage_error(409, "Duplicate", "The resource already exists")
+            objects[body["destinationKey"]] = objects.pop(body["sourceKey"])
+        return self._json({"message": "Successfully moved"})
+
+    def _remove(self, bucket: str, paths: List[str]) -> Response:
+        removed = []
+        with self._lock:
+            objects = self.objects.setdefault(bucket, {})
+            for path in paths:
+                obj = objects.pop(path, None)
+                if obj is not None:
+                    removed.append({"name": path, "bucket_id": bucket, "metadata": {"size": len(obj["data"])}})
+        return self._json(removed)
+
+    def _list(self, bucket: str, options: dict) -> Response:
+        prefix = (options.get("prefix") or "").strip("/")
+        search = options.get("search") or ""
+        base = f"{prefix}/" if prefix else ""
+        entries: Dict[str, dict] = {}
+        with self._lock:
+            for path, obj in self.objects.get(bucket, {}).items():
+                if not path.startswith(base):
+                    continue
+                name, slash, _ = path[len(base):].partition("/")
+                if search and not name.startswith(search):
+                    continue
+                if slash:
+                    # Folders are listed once, without an id
+                    entries.setdefault(name, {"name": name, "id": None, "created_at": None, "metadata": None})
+                else:
+                    entries[name] = {
+                        "name": name,
+                        "id": hashlib.md5(path.encode()).hexdigest(),
+                        "created_at": obj["created_at"],
+                        "metadata": {"size": len(obj["data"]), "mimetype": obj["content_type"]},
+                    }
+        items = sorted(entries.values(), key=lambda e: e["name"])
+        offset = int(options.get("offset") or 0)
+        limit = int(options.get("limit") or 100)
+        return self._json(items[offset:offset + limit])
@@ -0,0 +1,153 @@
+from quart import Blueprint, current_app, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+import traceback
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Services.AsyncAttachmentService import AsyncAttachmentService
+    from ..Services.ContentSniffer import spool_multipart_upload, spool_upload
+    from ..exceptions import (
+        InvalidFileTypeError,
+        FileSizeExceededError,
+        StorageQuotaExceededError,
+        AttachmentNotFoundError,
+    )
+except ImportError:
+    from config import Config
+    from Services.AsyncAttachmentService import AsyncAttachmentService
+    from Services.ContentSniffer import spool_multipart_upload, spool_upload
+    from exceptions import (
+        InvalidFileTypeError,
+        FileSizeExceededError,
+        StorageQuotaExceededError,
+        AttachmentNotFoundError,
+    )
+
+# Same routes and responses as AttachmentController, served by asgi.py
+bp = Blueprint('attachments', __name__, url_prefix='/api/task-attachments')
+
+
+def _service() -> AsyncAttachmentService:
+    return AsyncAttachmentService(current_app.extensions['supabase'], current_app.extensions['http'])
+
+
+@bp.route('/upload', methods=['POST'])
+async def upload_attachment():
+    file = None
+    try:
+        # Refuse a declared oversized body before reading any of it; the body is
+        # then streamed into a spool rather than buffered by request.files
+        max_body = current_app.config['MAX_CONTENT_LENGTH']
+        if request.content_length is not None and request.content_length > max_body:
+            raise RequestEntityTooLarge()
+        form, file = await spool_multipart_upload(request.body, request.headers.get('Content-Type', ''), max_body)
+        if file is None:
+            return jsonify({'error': 'File is required'}), 400
+        task_id = form.get('task_id')
+        uploaded_by = form.get('uploaded_by') or request.headers.get('X-User-Id')
+
+        if not task_id:
+            return jsonify({'error': 'task_id is required'}), 400
+        try:
+            task_id = int(task_id)
+        except ValueError:
+            return jsonify({'error': 'task_id must be an integer'}), 400
+
+        if not uploaded_by:
+            return jsonify({'error': 'uploaded_by is required'}), 400
+        try:
+            uploaded_by_int = int(uploaded_by)
+        except ValueError:
+            return jsonify({'error': 'uploaded_by must be an integer'}), 400
+
+        # Already inspected and hashed while the body was read
+        spool, file_size, digest = spool_upload(file)
+        with spool:
+            created = await _service().store_attachment(
+                task_id, spool, file.filename, file.mimetype, file_size, digest, uploaded_by_int
+            )
+        return jsonify(created), 201
+    except (InvalidFileTypeError, FileSizeExceededError, StorageQuotaExceededError) as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        # Body over MAX_CONTENT_LENGTH: same response as a file over the limit on the WSGI app
+        return jsonify({'error': 'File size exceeds 50MB limit.'}), 400
+    except Exception as e:
+        print("[Upload Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+    finally:
+        # Early returns and failed requests leave the spool open
+        if file is not None:
+            file.stream.close()
+
+
+@bp.route('/tasks', methods=['POST'])
+async def list_attachments_for_tasks():
+    try:
+        data = await request.get_json(silent=True) or {}
+        task_ids = data.get('task_ids')
+        if not isinstance(task_ids, list):
+            return jsonify({'error': 'task_ids must be a list'}), 400
+        try:
+            task_ids = list(dict.fromkeys(int(t) for t in task_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'task_ids must be integers'}), 400
+        if len(task_ids) > Config.MAX_BATCH_TASK_IDS:
+            return jsonify({'error': f'At most {Config.MAX_BATCH_TASK_IDS} task_ids per request'}), 400
+
+        results = await _service().list_attachments_for_tasks(task_ids, include_urls=bool(data.get('include_urls')))
+        return jsonify(results)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/task/<int:task_id>', methods=['GET'])
+async def list_attachments(task_id: int):
+    try:
+        return jsonify(await _service().list_attachments_for_task(task_id))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<string:attachment_id>/download', methods=['GET'])
+async def get_download_url(attachment_id: str):
+    try:
+        return jsonify({'url': await _service().get_download_url(attachment_id)})
+    except AttachmentNotFoundError:
+        return jsonify({'error': 'Attachment not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<string:attachment_id>', methods=['GET'])
+async def get_attachment(attachment_id: str):
+    try:
+        return jsonify(await _service().get_attachment(attachment_id))
+    except AttachmentNotFoundError:
+        return jsonify({'error': 'Attachment not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<string:attachment_id>', methods=['DELETE'])
+async def delete_attachment(attachment_id: str):
+    try:
+        await _service().delete_attachment(attachment_id)
+        return jsonify({'success': True})
+    except AttachmentNotFoundError:
+        return jsonify({'error': 'Attachment not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/copy/<int:source_task_id>/<int:target_task_id>', methods=['POST'])
+async def copy_attachments(source_task_id: int, target_task_id: int):
+    try:
+        copied = await _service().copy_attachments_to_task(source_task_id, target_task_id)
+        return jsonify({'copied': copied, 'count': len(copied)}), 201
+    except Exception as e:
+        print("[Copy Attachments Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Copy failed: {str(e)}'}), 500
@@ -1,26 +1,85 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+import re
 import traceback
 
 # Handle both relative and absolute imports
 try:
+    from ..config import Config
     from ..Services.AttachmentService import AttachmentService
+    from ..Services.ResumableUploadService import ResumableUploadService
+    from ..Services.BundleService import BundleService
     from ..exceptions import (
         InvalidFileTypeError,
         FileSizeExceededError,
         StorageQuotaExceededError,
         AttachmentNotFoundError,
+        UploadVerificationError,
+        UploadSessionNotFoundError,
+        UploadOffsetMismatchError,
+        UploadIncompleteError,
     )
 except ImportError:
+    from config import Config
     from Services.AttachmentService import AttachmentService
+    from Services.ResumableUploadService import ResumableUploadService
+    from Services.BundleService import BundleService
     from exceptions import (
         InvalidFileTypeError,
         FileSizeExceededError,
         StorageQuotaExceededError,
         AttachmentNotFoundError,
+        UploadVerificationError,
+        UploadSessionNotFoundError,
+        UploadOffsetMismatchError,
+        UploadIncompleteError,
     )
 
 bp = Blueprint('attachments', __name__, url_prefix='/api/task-attachments')
 
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _parse_upload_metadata(data, require_sha256: bool = True):
+    """Validate the JSON body describing a file to upload. Returns (fields, error)."""
+    if not data:
+        return None, 'Request body is required'
+
+    fields = {}
+    for key in ('task_id', 'file_size'):
+        if data.get(key) is None:
+            return None, f'{key} is required'
+        try:
+            fields[key] = int(data[key])
+        except (TypeError, ValueError):
+            return None, f'{key} must be an integer'
+    if fields['file_size'] < 0:
+        return None, 'file_size must not be negative'
+
+    file_name = data.get('file_name')
+    if not file_name or not isinstance(file_name, str):
+        return None, 'file_name is required'
+    fields['file_name'] = file_name
+    fields['content_type'] = data.get('content_type')
+
+    if require_sha256:
+        sha256 = str(data.get('sha256') or '').lower()
+        if not _SHA256_RE.match(sha256):
+            return None, 'sha256 must be a hex-encoded SHA-256 digest'
+        fields['sha256'] = sha256
+
+    return fields, None
+
+
+def _parse_uploaded_by(data):
+    """uploaded_by from the body or X-User-Id header. Returns (user_id, error)."""
+    uploaded_by = (data or {}).get('uploaded_by') or request.headers.get('X-User-Id')
+    if not uploaded_by:
+        return None, 'uploaded_by is required'
+    try:
+        return int(uploaded_by), None
+    except (TypeError, ValueError):
+        return None, 'uploaded_by must be an integer'
+
 
 @bp.route('/upload', methods=['POST'])
 def upload_attachment():
@@ -61,11 +120,234 @@ def upload_attachment():
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
 
+@bp.route('/upload-url', methods=['POST'])
+def create_upload_url():
+    """Validate an upload and return a signed URL so the client uploads straight to storage."""
+    try:
+        # The digest is declared (and checked) on /confirm, once the bytes are in storage
+        fields, error = _parse_upload_metadata(request.get_json(silent=True), require_sha256=False)
+        if error:
+            return jsonify({'error': error}), 400
+
+        service = AttachmentService()
+        result = service.create_upload_url(
+            fields['task_id'], fields['file_name'], fields['content_type'], fields['file_size']
+        )
+        return jsonify(result)
+    except (InvalidFileTypeError, FileSizeExceededError, StorageQuotaExceededError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("[Upload URL Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Upload URL generation failed: {str(e)}'}), 500
+
+
+@bp.route('/confirm', methods=['POST'])
+def confirm_upload():
+    """Register the attachment once the client has uploaded via /upload-url."""
+    try:
+        data = request.get_json(silent=True)
+        fields, error = _parse_upload_metadata(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        uploaded_by_int, error = _parse_uploaded_by(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        upload_path = data.get('path')
+        if not upload_path or not isinstance(upload_path, str):
+            return jsonify({'error': 'path is required (the path returned by /upload-url)'}), 400
+
+        service = AttachmentService()
+        created = service.confirm_upload(
+            fields['task_id'], fields['file_name'], fields['content_type'], fields['file_size'],
+            fields['sha256'], uploaded_by_int, upload_path
+        )
+        return jsonify(created), 201
+    except (InvalidFileTypeError, FileSizeExceededError, StorageQuotaExceededError, UploadVerificationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("[Confirm Upload Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Confirm failed: {str(e)}'}), 500
+
+
+def _upload_status_response(status: dict, code: int = 200):
+    response = jsonify(status)
+    response.headers['Upload-Offset'] = str(status['offset'])
+    response.headers['Upload-Length'] = str(status['file_size'])
+    return response, code
+
+
+@bp.route('/uploads', methods=['POST'])
+def create_resumable_upload():
+    """Start a resumable upload; the file is then sent in PATCH chunks and completed."""
+    try:
+        data = request.get_json(silent=True)
+        fields, error = _parse_upload_metadata(data, require_sha256=False)
+        if error:
+            return jsonify({'error': error}), 400
+        uploaded_by_int, error = _parse_uploaded_by(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        service = ResumableUploadService()
+        status = service.create(
+            fields['task_id'], fields['file_name'], fields['content_type'], fields['file_size'], uploaded_by_int
+        )
+        return _upload_status_response(status, 201)
+    except (InvalidFileTypeError, FileSizeExceededError, StorageQuotaExceededError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("[Resumable Upload Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+
+
+@bp.route('/uploads/<string:upload_id>', methods=['GET'])
+def get_resumable_upload(upload_id: str):
+    """Current offset of a resumable upload (also answers HEAD)."""
+    try:
+        service = ResumableUploadService()
+        return _upload_status_response(service.status(upload_id))
+    except UploadSessionNotFoundError:
+        return jsonify({'error': 'Upload session not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/uploads/<string:upload_id>', methods=['PATCH'])
+def append_resumable_upload(upload_id: str):
+    """Append the raw request body at the offset given in the Upload-Offset header."""
+    try:
+        offset = request.headers.get('Upload-Offset')
+        if offset is None:
+            return jsonify({'error': 'Upload-Offset header is required'}), 400
+        try:
+            offset = int(offset)
+        except ValueError:
+            return jsonify({'error': 'Upload-Offset must be an integer'}), 400
+
+        service = ResumableUploadService()
+        return _upload_status_response(service.append(upload_id, offset, request.stream))
+    except UploadSessionNotFoundError:
+        return jsonify({'error': 'Upload session not found'}), 404
+    except UploadOffsetMismatchError as e:
+        response = jsonify({'error': str(e), 'offset': e.current_offset})
+        response.headers['Upload-Offset'] = str(e.current_offset)
+        return response, 409
+    except (InvalidFileTypeError, FileSizeExceededError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("[Resumable Upload Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+
+
+@bp.route('/uploads/<string:upload_id>/complete', methods=['POST'])
+def complete_resumable_upload(upload_id: str):
+    """Assemble the staged upload into storage and register the attachment."""
+    try:
+        service = ResumableUploadService()
+        created = service.complete(upload_id)
+        return jsonify(created), 201
+    except UploadSessionNotFoundError:
+        return jsonify({'error': 'Upload session not found'}), 404
+    except UploadIncompleteError as e:
+        return jsonify({'error': str(e), 'offset': e.current_offset}), 409
+    except (InvalidFileTypeError, FileSizeExceededError, StorageQuotaExceededError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print("[Resumable Upload Error]", str(e))
+        print(traceback.format_exc())
+        return jsonify({'error': f'Upload failed: {str(e)}'}), 500
+
+
+@bp.route('/uploads/<string:upload_id>', methods=['DELETE'])
+def abort_resumable_upload(upload_id: str):
+    try:
+        service = ResumableUploadService()
+        service.abort(upload_id)
+        return jsonify({'success': True})
+    except UploadSessionNotFoundError:
+        return jsonify({'error': 'Upload session not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/task/<int:task_id>', methods=['GET'])
 def list_attachments(task_id: int):
+    """
+    All attachments of a task with download URLs. With any of `limit`, `cursor`,
+    `fields` or `urls` the response is one page instead: {"items": [...],
+    "next_cursor": ...}. `fields=a,b` projects items to those columns and
+    `urls=false` skips URL signing.
+    """
+    try:
+        limit = request.args.get('limit')
+        cursor = request.args.get('cursor')
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+        include_urls = request.args.get('urls', 'true').lower() != 'false'
+
+        service = AttachmentService()
+        if not any(k in request.args for k in ('limit', 'cursor', 'fields', 'urls')):
+            results = service.list_attachments_for_task(task_id)
+            return jsonify(results)
+
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        try:
+            page = service.list_attachments_page(task_id, limit=limit, cursor=cursor, fields=fields, include_urls=include_urls)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(page)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/task/<int:task_id>/bundle', methods=['GET'])
+def download_bundle(task_id: int):
+    """All attachments of a task as a ZIP, streamed as it is assembled."""
     try:
+        service = BundleService()
+        attachments = service.get_bundle_attachments(task_id)
+    except AttachmentNotFoundError:
+        return jsonify({'error': 'No attachments for task'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return Response(
+        service.stream_bundle(attachments),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="task-{task_id}-attachments.zip"',
+            # Let nginx pass chunks through instead of buffering the archive
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
+@bp.route('/tasks', methods=['POST'])
+def list_attachments_for_tasks():
+    """Attachment counts and metadata for many tasks: {"task_ids": [...], "include_urls": false}."""
+    try:
+        data = request.get_json(silent=True) or {}
+        task_ids = data.get('task_ids')
+        if not isinstance(task_ids, list):
+            return jsonify({'error': 'task_ids must be a list'}), 400
+        try:
+            # Dedup while keeping the caller's order
+            task_ids = list(dict.fromkeys(int(t) for t in task_ids))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'task_ids must be integers'}), 400
+        if len(task_ids) > Config.MAX_BATCH_TASK_IDS:
+            return jsonify({'error': f'At most {Config.MAX_BATCH_TASK_IDS} task_ids per request'}), 400
+
         service = AttachmentService()
-        results = service.list_attachments_for_task(task_id)
+        results = service.list_attachments_for_tasks(task_ids, include_urls=bool(data.get('include_urls')))
         return jsonify(results)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,68 @@
+from flask import Blueprint, request, jsonify
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..exceptions import FileSizeExceededError
+    from ..Services.StorageBackend import get_storage_backend
+    from ..Services.LocalStorageService import LocalStorageService
+except ImportError:
+    from config import Config
+    from exceptions import FileSizeExceededError
+    from Services.StorageBackend import get_storage_backend
+    from Services.LocalStorageService import LocalStorageService
+
+# Serves signed URLs issued by the local storage backend
+bp = Blueprint('files', __name__, url_prefix='/api/task-attachments/files')
+
+
+def _too_large():
+    # Answered like Supabase Storage's size limit
+    return jsonify({'error': 'Payload too large', 'statusCode': '413'}), 413
+
+
+def _local_storage():
+    storage = get_storage_backend()
+    return storage if isinstance(storage, LocalStorageService) else None
+
+
+@bp.route('/<path:object_path>', methods=['GET'])
+def download_file(object_path: str):
+    storage = _local_storage()
+    if storage is None:
+        return jsonify({'error': 'Not found'}), 404
+
+    download_name = request.args.get('download')
+    if not storage.verify_signature('GET', object_path, request.args.get('expires'),
+                                    request.args.get('signature'), download_name):
+        return jsonify({'error': 'Invalid or expired signature'}), 403
+
+    try:
+        return storage.send(object_path, download_name=download_name)
+    except (FileNotFoundError, ValueError):
+        return jsonify({'error': 'Not found'}), 404
+
+
+@bp.route('/<path:object_path>', methods=['PUT'])
+def upload_file(object_path: str):
+    storage = _local_storage()
+    if storage is None:
+        return jsonify({'error': 'Not found'}), 404
+
+    if not storage.verify_signature('PUT', object_path, request.args.get('expires'),
+                                    request.args.get('signature')):
+        return jsonify({'error': 'Invalid or expired signature'}), 403
+
+    # Declared sizes are refused up front; chunked bodies are counted as they stream
+    if (request.content_length or 0) > Config.MAX_FILE_SIZE_BYTES:
+        return _too_large()
+    try:
+        created = storage.upload_blob(object_path, request.stream, request.content_type, request.content_length or 0,
+                                      max_size=Config.MAX_FILE_SIZE_BYTES)
+    except FileSizeExceededError:
+        return _too_large()
+    except ValueError:
+        return jsonify({'error': 'Not found'}), 404
+    if not created:
+        return jsonify({'error': 'Duplicate', 'statusCode': '409'}), 409
+    return jsonify({'Key': object_path}), 200
@@ -0,0 +1,55 @@
+-- Content-addressed attachment storage.
+--
+-- Every uploaded file is stored once per SHA-256 digest under blobs/<digest>.
+-- attachment_blobs keeps an explicit reference count so deletes no longer
+-- need to scan task_attachments for other rows pointing at the same path.
+
+create table if not exists attachment_blobs (
+    digest       text primary key,
+    file_path    text        not null,
+    file_size    bigint      not null,
+    content_type text,
+    ref_count    integer     not null default 0 check (ref_count >= 0),
+    created_at   timestamptz not null default now()
+);
+
+alter table task_attachments add column if not exists content_hash text;
+create index if not exists task_attachments_content_hash_idx on task_attachments (content_hash);
+
+-- Insert the blob with one reference, or add a reference to the existing row.
+-- Returns the stored row so callers always use the canonical file_path.
+create or replace function acquire_attachment_blob(
+    p_digest text,
+    p_file_path text,
+    p_file_size bigint,
+    p_content_type text
+) returns setof attachment_blobs
+language sql
+as $$
+    insert into attachment_blobs (digest, file_path, file_size, content_type, ref_count)
+    values (p_digest, p_file_path, p_file_size, p_content_type, 1)
+    on conflict (digest) do update set ref_count = attachment_blobs.ref_count + 1
+    returning *;
+$$;
+
+-- Drop one reference. The row is removed once nothing references it and the
+-- remaining count is returned (NULL when the digest is unknown).
+create or replace function release_attachment_blob(p_digest text)
+returns integer
+language plpgsql
+as $$
+declare
+    remaining integer;
+begin
+    update attachment_blobs
+       set ref_count = greatest(ref_count - 1, 0)
+     where digest = p_digest
+    returning ref_count into remaining;
+
+    if remaining = 0 then
+        delete from attachment_blobs where digest = p_digest and ref_count = 0;
+    end if;
+
+    return remaining;
+end;
+$$;
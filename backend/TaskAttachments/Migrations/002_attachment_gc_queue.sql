@@ -0,0 +1,17 @@
+-- Background storage garbage collection.
+--
+-- Deleting an attachment no longer removes the storage object in the request.
+-- Paths that may have become unreferenced are queued here; the reclaimer
+-- (Services/StorageReclaimer.py) re-checks references after a grace period
+-- and removes orphans from storage in batches.
+
+create table if not exists attachment_gc_queue (
+    file_path   text primary key,
+    enqueued_at timestamptz not null default now()
+);
+
+create index if not exists attachment_gc_queue_enqueued_at_idx on attachment_gc_queue (enqueued_at);
+
+-- Reference checks look up many paths at once
+create index if not exists task_attachments_file_path_idx on task_attachments (file_path);
+create index if not exists attachment_blobs_file_path_idx on attachment_blobs (file_path);
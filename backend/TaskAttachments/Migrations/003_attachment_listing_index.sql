@@ -0,0 +1,3 @@
+-- Keyset pagination of a task's attachments (newest first, ties broken by id).
+create index if not exists task_attachments_task_uploaded_idx
+    on task_attachments (task_id, uploaded_at desc, id desc);
@@ -0,0 +1,85 @@
+-- Race-free storage reclaim.
+--
+-- Checking references and deleting the object used to be two separate steps, so
+-- a re-upload of the same content could take a new reference to blobs/<digest>
+-- in between and lose its object. Now the reclaimer claims paths in one
+-- statement that re-checks references under row locks. Taking a reference
+-- cancels a queued reclaim. Taking a reference to a path that is already
+-- claimed fails with SQLSTATE GC001: the object may be gone, so the caller
+-- uploads it again once the reclaimer has released the claim.
+
+alter table attachment_gc_queue add column if not exists claimed_at timestamptz;
+
+-- Claim up to p_limit paths queued before p_cutoff (plus claims older than
+-- p_lease_seconds, left by a reclaimer that died). Paths that are referenced
+-- again are dropped from the queue. Returns the claimed rows. The caller
+-- deletes their objects, then removes the rows with complete_gc_paths.
+create or replace function claim_gc_paths(p_cutoff timestamptz, p_limit integer, p_lease_seconds integer)
+returns setof attachment_gc_queue
+language plpgsql
+as $$
+declare
+    due text[];
+begin
+    select array_agg(file_path) into due
+      from (
+        select file_path
+          from attachment_gc_queue
+         where enqueued_at <= p_cutoff
+           and (claimed_at is null or claimed_at < now() - make_interval(secs => p_lease_seconds))
+         order by enqueued_at
+         limit p_limit
+           for update skip locked
+      ) locked;
+
+    if due is null then
+        return;
+    end if;
+
+    delete from attachment_gc_queue q
+     where q.file_path = any(due)
+       and (exists (select 1 from task_attachments a where a.file_path = q.file_path)
+            or exists (select 1 from attachment_blobs b where b.file_path = q.file_path));
+
+    return query
+        update attachment_gc_queue q
+           set claimed_at = now()
+         where q.file_path = any(due)
+        returning q.*;
+end;
+$$;
+
+-- Remove claimed rows once their objects are deleted
+create or replace function complete_gc_paths(p_paths text[])
+returns void
+language sql
+as $$
+    delete from attachment_gc_queue where file_path = any(p_paths) and claimed_at is not null;
+$$;
+
+-- acquire_attachment_blob (001) now also removes the path's queue row, in the
+-- same transaction. The delete waits for a claim_gc_paths that has the row
+-- locked, so the two cannot interleave.
+create or replace function acquire_attachment_blob(
+    p_digest text,
+    p_file_path text,
+    p_file_size bigint,
+    p_content_type text
+) returns setof attachment_blobs
+language plpgsql
+as $$
+declare
+    claimed timestamptz;
+begin
+    delete from attachment_gc_queue where file_path = p_file_path returning claimed_at into claimed;
+    if claimed is not null then
+        raise exception 'storage object % is being reclaimed', p_file_path using errcode = 'GC001';
+    end if;
+
+    return query
+        insert into attachment_blobs (digest, file_path, file_size, content_type, ref_count)
+        values (p_digest, p_file_path, p_file_size, p_content_type, 1)
+        on conflict (digest) do update set ref_count = attachment_blobs.ref_count + 1
+        returning *;
+end;
+$$;
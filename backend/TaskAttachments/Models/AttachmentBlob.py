@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class AttachmentBlob:
+    digest: str
+    file_path: str
+    file_size: int
+    content_type: Optional[str] = None
+    ref_count: int = 0
+    created_at: Optional[datetime] = None
+
+    @staticmethod
+    def from_record(record: dict) -> "AttachmentBlob":
+        return AttachmentBlob(
+            digest=record.get("digest"),
+            file_path=record.get("file_path"),
+            file_size=record.get("file_size"),
+            content_type=record.get("content_type"),
+            ref_count=record.get("ref_count", 0),
+            created_at=datetime.fromisoformat(record.get("created_at")) if isinstance(record.get("created_at"), str) else record.get("created_at"),
+        )
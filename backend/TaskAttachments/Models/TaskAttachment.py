@@ -15,6 +15,7 @@ class TaskAttachment:
     uploaded_at: datetime
     original_task_id: Optional[int] = None
     is_inherited: bool = False
+    content_hash: Optional[str] = None
 
     @staticmethod
     def from_record(record: dict) -> "TaskAttachment":
@@ -29,6 +30,7 @@ class TaskAttachment:
             uploaded_at=datetime.fromisoformat(record.get("uploaded_at")) if isinstance(record.get("uploaded_at"), str) else record.get("uploaded_at"),
             original_task_id=record.get("original_task_id"),
             is_inherited=record.get("is_inherited", False),
+            content_hash=record.get("content_hash"),
         )
 
     def to_dict(self) -> dict:
@@ -43,6 +45,7 @@ class TaskAttachment:
             "uploaded_at": self.uploaded_at.isoformat() if isinstance(self.uploaded_at, datetime) else self.uploaded_at,
             "original_task_id": self.original_task_id,
             "is_inherited": self.is_inherited,
+            "content_hash": self.content_hash,
         }
 
 
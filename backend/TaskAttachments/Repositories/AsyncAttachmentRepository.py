@@ -0,0 +1,69 @@
+from typing import List
+
+from supabase._async.client import AsyncClient
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Models.TaskAttachment import TaskAttachment
+    from ..exceptions import AttachmentNotFoundError
+except ImportError:
+    from config import Config
+    from Models.TaskAttachment import TaskAttachment
+    from exceptions import AttachmentNotFoundError
+
+
+class AsyncAttachmentRepository:
+    """AttachmentRepository over the async Supabase client (ASGI mode)."""
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    @property
+    def table(self):
+        return self.client.table("task_attachments")
+
+    async def create(self, record: dict) -> TaskAttachment:
+        response = await self.table.insert(record).execute()
+        if not response.data or len(response.data) == 0:
+            raise Exception("Failed to insert attachment record")
+        return TaskAttachment.from_record(response.data[0])
+
+    async def find_by_id(self, attachment_id: str) -> TaskAttachment:
+        response = await self.table.select("*").eq("id", attachment_id).single().execute()
+        if not response.data:
+            raise AttachmentNotFoundError("Attachment not found")
+        return TaskAttachment.from_record(response.data)
+
+    async def find_by_task_id(self, task_id: int) -> List[TaskAttachment]:
+        response = await self.table.select("*").eq("task_id", task_id).order("uploaded_at", desc=True).execute()
+        return [TaskAttachment.from_record(r) for r in (response.data or [])]
+
+    async def find_by_task_ids(self, task_ids: List[int]) -> List[TaskAttachment]:
+        if not task_ids:
+            return []
+        # Paged like AttachmentRepository.find_by_task_ids: responses stop at PostgREST's max-rows
+        page_size = Config.QUERY_PAGE_SIZE
+        records = []
+        while True:
+            start = len(records)
+            response = await (
+                self.table.select("*").in_("task_id", list(task_ids))
+                .order("uploaded_at", desc=True).order("id", desc=True)
+                .range(start, start + page_size - 1).execute()
+            )
+            page = response.data or []
+            records.extend(page)
+            if len(page) < page_size:
+                return [TaskAttachment.from_record(r) for r in records]
+
+    async def delete(self, attachment_id: str) -> TaskAttachment:
+        # DELETE returns the removed rows (Prefer: return=representation)
+        response = await self.table.delete().eq("id", attachment_id).execute()
+        if not response.data:
+            raise AttachmentNotFoundError("Attachment not found")
+        return TaskAttachment.from_record(response.data[0])
+
+    async def get_total_size_by_task(self, task_id: int) -> int:
+        response = await self.table.select("file_size").eq("task_id", task_id).execute()
+        return sum(r["file_size"] for r in (response.data or []) if r.get("file_size"))
@@ -0,0 +1,57 @@
+from typing import List, Optional
+
+from postgrest.exceptions import APIError
+from supabase._async.client import AsyncClient
+
+# Handle both relative and absolute imports
+try:
+    from ..Models.AttachmentBlob import AttachmentBlob
+    from ..Repositories.BlobRepository import BLOB_RECLAIMING_SQLSTATE
+    from ..exceptions import BlobReclaimingError
+except ImportError:
+    from Models.AttachmentBlob import AttachmentBlob
+    from Repositories.BlobRepository import BLOB_RECLAIMING_SQLSTATE
+    from exceptions import BlobReclaimingError
+
+
+class AsyncBlobRepository:
+    """BlobRepository and GC queue writes over the async Supabase client (ASGI mode)."""
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def find_by_digest(self, digest: str) -> Optional[AttachmentBlob]:
+        response = await self.client.table("attachment_blobs").select("*").eq("digest", digest).limit(1).execute()
+        if not response.data:
+            return None
+        return AttachmentBlob.from_record(response.data[0])
+
+    async def acquire(self, digest: str, file_path: str, file_size: int, content_type: str) -> AttachmentBlob:
+        try:
+            response = await self.client.rpc("acquire_attachment_blob", {
+                "p_digest": digest,
+                "p_file_path": file_path,
+                "p_file_size": file_size,
+                "p_content_type": content_type,
+            }).execute()
+        except APIError as e:
+            if e.code == BLOB_RECLAIMING_SQLSTATE:
+                raise BlobReclaimingError(e.message)
+            raise
+        records = response.data if isinstance(response.data, list) else [response.data]
+        if not records or not records[0]:
+            raise Exception("Failed to acquire attachment blob")
+        return AttachmentBlob.from_record(records[0])
+
+    async def release(self, digest: str) -> Optional[int]:
+        response = await self.client.rpc("release_attachment_blob", {"p_digest": digest}).execute()
+        if response.data is None:
+            return None
+        return int(response.data)
+
+    async def enqueue_gc(self, paths: List[str]) -> None:
+        """Queue paths for the storage reclaimer (see GcQueueRepository)."""
+        if not paths:
+            return
+        records = [{"file_path": p} for p in dict.fromkeys(paths)]
+        await self.client.table("attachment_gc_queue").upsert(records, on_conflict="file_path", ignore_duplicates=True).execute()
@@ -1,11 +1,13 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Set, Tuple
 
 # Handle both relative and absolute imports
 try:
+    from ..config import Config
     from ..db import get_supabase_client
     from ..Models.TaskAttachment import TaskAttachment
     from ..exceptions import AttachmentNotFoundError
 except ImportError:
+    from config import Config
     from db import get_supabase_client
     from Models.TaskAttachment import TaskAttachment
     from exceptions import AttachmentNotFoundError
@@ -34,12 +36,55 @@ class AttachmentRepository:
         records = response.data or []
         return [TaskAttachment.from_record(r) for r in records]
 
+    def find_page_by_task_id(self, task_id: int, limit: int, after: Optional[Tuple[str, str]] = None,
+                             columns: str = "*") -> List[dict]:
+        """
+        Up to `limit` attachment records for a task, newest first, ordered by
+        (uploaded_at, id) so pages are stable. `after` is the (uploaded_at, id)
+        of the last record of the previous page. Returns raw records with the
+        selected columns only.
+        """
+        query = self.table.select(columns).eq("task_id", task_id)
+        if after:
+            uploaded_at, last_id = after
+            # Keyset: strictly older, or same timestamp with a smaller id
+            query = query.or_(
+                f'uploaded_at.lt."{uploaded_at}",and(uploaded_at.eq."{uploaded_at}",id.lt."{last_id}")'
+            )
+        response = query.order("uploaded_at", desc=True).order("id", desc=True).limit(limit).execute()
+        return response.data or []
+
+    def _select_all(self, build_query: Callable) -> List[dict]:
+        """
+        Every row of a select, read in ranges of Config.QUERY_PAGE_SIZE until a
+        short page: a single response is cut off at PostgREST's max-rows.
+        `build_query` returns a fresh, fully ordered query for each page.
+        """
+        page_size = Config.QUERY_PAGE_SIZE
+        records = []
+        while True:
+            start = len(records)
+            page = build_query().range(start, start + page_size - 1).execute().data or []
+            records.extend(page)
+            if len(page) < page_size:
+                return records
+
+    def find_by_task_ids(self, task_ids: List[int]) -> List[TaskAttachment]:
+        """All attachments for the given tasks, newest first."""
+        if not task_ids:
+            return []
+        records = self._select_all(
+            lambda: self.table.select("*").in_("task_id", list(task_ids))
+            .order("uploaded_at", desc=True).order("id", desc=True)
+        )
+        return [TaskAttachment.from_record(r) for r in records]
+
     def delete(self, attachment_id: str) -> TaskAttachment:
-        # Return deleted record (Supabase can return if .select after delete)
-        response = self.table.delete().eq("id", attachment_id).select("*").single().execute()
+        # DELETE returns the removed rows (Prefer: return=representation)
+        response = self.table.delete().eq("id", attachment_id).execute()
         if not response.data:
             raise AttachmentNotFoundError("Attachment not found")
-        return TaskAttachment.from_record(response.data)
+        return TaskAttachment.from_record(response.data[0])
 
     def get_total_size_by_task(self, task_id: int) -> int:
         # Supabase: use RPC or aggregate. Here we fetch columns and sum client-side for simplicity.
@@ -47,12 +92,12 @@ class AttachmentRepository:
         sizes = [r["file_size"] for r in (response.data or []) if r.get("file_size")]
         return sum(sizes)
 
-    def count_file_references(self, file_path: str, exclude_id: str = None) -> int:
-        """Count how many attachment records reference this file path."""
-        query = self.table.select("id", count="exact").eq("file_path", file_path)
-        if exclude_id:
-            query = query.neq("id", exclude_id)
-        response = query.execute()
-        return response.count or 0
-
-
+    def find_referenced_paths(self, file_paths: List[str]) -> Set[str]:
+        """The subset of file_paths that at least one attachment row points at."""
+        if not file_paths:
+            return set()
+        # Shared blobs can have many rows per path; page so no path is missed
+        records = self._select_all(
+            lambda: self.table.select("file_path,id").in_("file_path", list(file_paths)).order("id")
+        )
+        return {r["file_path"] for r in records}
@@ -0,0 +1,66 @@
+from typing import List, Optional, Set
+
+from postgrest.exceptions import APIError
+
+# Handle both relative and absolute imports
+try:
+    from ..db import get_supabase_client
+    from ..Models.AttachmentBlob import AttachmentBlob
+    from ..exceptions import BlobReclaimingError
+except ImportError:
+    from db import get_supabase_client
+    from Models.AttachmentBlob import AttachmentBlob
+    from exceptions import BlobReclaimingError
+
+# SQLSTATE raised by acquire_attachment_blob for a path the reclaimer has claimed
+BLOB_RECLAIMING_SQLSTATE = "GC001"
+
+
+class BlobRepository:
+    """Reference-counted content-addressed blobs (see Migrations/001_attachment_blobs.sql)."""
+
+    def __init__(self):
+        self.client = get_supabase_client()
+        self.table = self.client.table("attachment_blobs")
+
+    def find_by_digest(self, digest: str) -> Optional[AttachmentBlob]:
+        response = self.table.select("*").eq("digest", digest).limit(1).execute()
+        if not response.data:
+            return None
+        return AttachmentBlob.from_record(response.data[0])
+
+    def acquire(self, digest: str, file_path: str, file_size: int, content_type: str) -> AttachmentBlob:
+        """
+        Register the blob or add a reference to it, cancelling any queued reclaim
+        of file_path. Returns the stored row. Raises BlobReclaimingError when the
+        reclaimer has already claimed file_path.
+        """
+        try:
+            response = self.client.rpc("acquire_attachment_blob", {
+                "p_digest": digest,
+                "p_file_path": file_path,
+                "p_file_size": file_size,
+                "p_content_type": content_type,
+            }).execute()
+        except APIError as e:
+            if e.code == BLOB_RECLAIMING_SQLSTATE:
+                raise BlobReclaimingError(e.message)
+            raise
+        records = response.data if isinstance(response.data, list) else [response.data]
+        if not records or not records[0]:
+            raise Exception("Failed to acquire attachment blob")
+        return AttachmentBlob.from_record(records[0])
+
+    def release(self, digest: str) -> Optional[int]:
+        """Drop one reference. Returns the remaining count, or None if the digest is unknown."""
+        response = self.client.rpc("release_attachment_blob", {"p_digest": digest}).execute()
+        if response.data is None:
+            return None
+        return int(response.data)
+
+    def find_referenced_paths(self, file_paths: List[str]) -> Set[str]:
+        """The subset of file_paths still registered as blobs (including ones being re-acquired)."""
+        if not file_paths:
+            return set()
+        response = self.table.select("file_path").in_("file_path", list(file_paths)).execute()
+        return {r["file_path"] for r in (response.data or [])}
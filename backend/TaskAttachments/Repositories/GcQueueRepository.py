@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import List
+
+# Handle both relative and absolute imports
+try:
+    from ..db import get_supabase_client
+except ImportError:
+    from db import get_supabase_client
+
+
+class GcQueueRepository:
+    """Storage paths that may no longer be referenced (see Migrations/002_attachment_gc_queue.sql)."""
+
+    def __init__(self):
+        self.client = get_supabase_client()
+        self.table = self.client.table("attachment_gc_queue")
+
+    def enqueue(self, paths: List[str]) -> None:
+        if not paths:
+            return
+        records = [{"file_path": p} for p in dict.fromkeys(paths)]
+        # Keep the original enqueued_at for paths already waiting
+        self.table.upsert(records, on_conflict="file_path", ignore_duplicates=True).execute()
+
+    def claim_due(self, enqueued_before: datetime, limit: int, lease_seconds: int) -> List[str]:
+        """
+        Claim up to `limit` paths queued before `enqueued_before` that nothing
+        references, re-checked in the same statement (Migrations/004_attachment_gc_claims.sql).
+        Referenced paths are dropped from the queue. A claimed path cannot be
+        re-acquired until complete() removes its row.
+        """
+        response = self.client.rpc("claim_gc_paths", {
+            "p_cutoff": enqueued_before.isoformat(),
+            "p_limit": limit,
+            "p_lease_seconds": lease_seconds,
+        }).execute()
+        return [r["file_path"] for r in (response.data or [])]
+
+    def complete(self, paths: List[str]) -> None:
+        """Remove the rows of claimed paths whose objects have been deleted."""
+        if not paths:
+            return
+        self.client.rpc("complete_gc_paths", {"p_paths": list(paths)}).execute()
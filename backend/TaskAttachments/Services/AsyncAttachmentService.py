@@ -0,0 +1,192 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Dict, IO, Iterable, List
+import asyncio
+import mimetypes
+
+import httpx
+from supabase._async.client import AsyncClient
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Models.AttachmentBlob import AttachmentBlob
+    from ..Models.TaskAttachment import TaskAttachment
+    from ..Repositories.AsyncAttachmentRepository import AsyncAttachmentRepository
+    from ..Repositories.AsyncBlobRepository import AsyncBlobRepository
+    from ..Services.AsyncStorageService import AsyncStorageService
+    from ..Services.AttachmentService import AttachmentService
+    from ..exceptions import BlobReclaimingError
+except ImportError:
+    from config import Config
+    from Models.AttachmentBlob import AttachmentBlob
+    from Models.TaskAttachment import TaskAttachment
+    from Repositories.AsyncAttachmentRepository import AsyncAttachmentRepository
+    from Repositories.AsyncBlobRepository import AsyncBlobRepository
+    from Services.AsyncStorageService import AsyncStorageService
+    from Services.AttachmentService import AttachmentService
+    from exceptions import BlobReclaimingError
+
+
+class AsyncAttachmentService:
+    """
+    asyncio counterpart of AttachmentService used by the ASGI app (asgi.py).
+
+    Per-attachment storage and database calls (URL signing, copying) run
+    concurrently, at most ASYNC_FANOUT_CONCURRENCY at a time per request.
+    """
+
+    def __init__(self, client: AsyncClient, http: httpx.AsyncClient):
+        self.repo = AsyncAttachmentRepository(client)
+        self.blobs = AsyncBlobRepository(client)
+        self.storage = AsyncStorageService(client, http)
+
+    async def _gather(self, calls: Iterable[Awaitable]) -> list:
+        semaphore = asyncio.Semaphore(max(1, Config.ASYNC_FANOUT_CONCURRENCY))
+
+        async def bounded(call):
+            async with semaphore:
+                return await call
+
+        return await asyncio.gather(*(bounded(c) for c in calls))
+
+    async def _validate_file(self, filename: str, mime_type: str, file_size: int, task_id: int):
+        AttachmentService._check_type_and_size(filename, mime_type, file_size)
+        AttachmentService._check_quota(await self.repo.get_total_size_by_task(task_id), file_size)
+
+    async def store_attachment(self, task_id: int, data: IO[bytes], filename: str, mime_type: str,
+                               file_size: int, digest: str, uploaded_by: int) -> dict:
+        await self._validate_file(filename, mime_type, file_size, task_id)
+
+        guessed = mimetypes.guess_type(filename)[0]
+        content_type = mime_type or guessed or "application/octet-stream"
+
+        existing = await self.blobs.find_by_digest(digest)
+        if existing:
+            path = existing.file_path
+        else:
+            path = self.storage.generate_blob_path(digest, filename)
+            await self.storage.upload_blob(path, data, content_type, file_size)
+
+        blob = await self._acquire_blob(digest, path, file_size, content_type, data)
+        record = {
+            "task_id": task_id,
+            "file_name": filename,
+            "file_path": blob.file_path,
+            "file_size": file_size,
+            "file_type": mime_type,
+            "uploaded_by": uploaded_by,
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            "content_hash": digest,
+        }
+        try:
+            created = await self.repo.create(record)
+            return created.to_dict()
+        except Exception:
+            try:
+                await self._release_blob(digest, blob.file_path)
+            except Exception:
+                pass
+            raise
+
+    async def _acquire_blob(self, digest: str, path: str, file_size: int, content_type: str,
+                            data: IO[bytes]) -> AttachmentBlob:
+        """See AttachmentService._acquire_blob; a reclaimed object is re-uploaded from ``data``."""
+        reclaimed = False
+        for attempt in range(Config.BLOB_RECLAIM_RETRIES + 1):
+            try:
+                blob = await self.blobs.acquire(digest, path, file_size, content_type)
+            except BlobReclaimingError:
+                if attempt == Config.BLOB_RECLAIM_RETRIES:
+                    raise
+                reclaimed = True
+                await asyncio.sleep(Config.BLOB_RECLAIM_RETRY_SECONDS)
+                continue
+            if reclaimed:
+                data.seek(0)
+                await self.storage.upload_blob(blob.file_path, data, content_type, file_size)
+            return blob
+
+    async def _signed_url(self, att: TaskAttachment) -> str:
+        if att.content_hash:
+            return await self.storage.get_signed_url(att.file_path, expires_in_seconds=3600, download_name=att.file_name)
+        return await self.storage.get_signed_url(att.file_path, expires_in_seconds=3600)
+
+    async def _with_urls(self, attachments: List[TaskAttachment]) -> List[dict]:
+        urls = await self._gather(self._signed_url(a) for a in attachments)
+        results = []
+        for a, url in zip(attachments, urls):
+            item = a.to_dict()
+            item["download_url"] = url
+            results.append(item)
+        return results
+
+    async def list_attachments_for_task(self, task_id: int) -> List[dict]:
+        return await self._with_urls(await self.repo.find_by_task_id(task_id))
+
+    async def list_attachments_for_tasks(self, task_ids: List[int], include_urls: bool = False) -> Dict[str, dict]:
+        requested = set(task_ids)
+        attachments = [a for a in await self.repo.find_by_task_ids(task_ids) if a.task_id in requested]
+        items = await self._with_urls(attachments) if include_urls else [a.to_dict() for a in attachments]
+
+        grouped = {task_id: {"count": 0, "total_size": 0, "attachments": []} for task_id in task_ids}
+        for a, item in zip(attachments, items):
+            group = grouped[a.task_id]
+            group["attachments"].append(item)
+            group["count"] += 1
+            group["total_size"] += a.file_size or 0
+        return {str(task_id): group for task_id, group in grouped.items()}
+
+    async def get_attachment(self, attachment_id: str) -> dict:
+        return (await self.repo.find_by_id(attachment_id)).to_dict()
+
+    async def get_download_url(self, attachment_id: str) -> str:
+        return await self._signed_url(await self.repo.find_by_id(attachment_id))
+
+    async def _release_blob(self, digest: str, file_path: str) -> None:
+        if await self.blobs.release(digest) == 0:
+            await self.blobs.enqueue_gc([file_path])
+
+    async def delete_attachment(self, attachment_id: str) -> None:
+        att = await self.repo.delete(attachment_id)
+        # Storage objects are removed by the background reclaimer (see AttachmentService)
+        try:
+            if att.content_hash:
+                await self._release_blob(att.content_hash, att.file_path)
+            else:
+                await self.blobs.enqueue_gc([att.file_path])
+        except Exception as e:
+            print(f"Error queueing storage cleanup for attachment {attachment_id}: {str(e)}")
+
+    async def _copy_one(self, source_att: TaskAttachment, source_task_id: int, target_task_id: int):
+        original_task_id = source_att.original_task_id if source_att.is_inherited else source_task_id
+        record = {
+            "task_id": target_task_id,
+            "file_name": source_att.file_name,
+            "file_path": source_att.file_path,
+            "file_size": source_att.file_size,
+            "file_type": source_att.file_type,
+            "uploaded_by": source_att.uploaded_by,
+            "uploaded_at": source_att.uploaded_at.isoformat() if isinstance(source_att.uploaded_at, datetime) else source_att.uploaded_at,
+            "original_task_id": original_task_id,
+            "is_inherited": True,
+            "content_hash": source_att.content_hash,
+        }
+        try:
+            if source_att.content_hash:
+                await self.blobs.acquire(source_att.content_hash, source_att.file_path, source_att.file_size, source_att.file_type)
+            try:
+                created = await self.repo.create(record)
+            except Exception:
+                if source_att.content_hash:
+                    await self.blobs.release(source_att.content_hash)
+                raise
+            return created.to_dict()
+        except Exception as e:
+            # Log error but continue with other files
+            print(f"Error copying attachment {source_att.id}: {str(e)}")
+            return None
+
+    async def copy_attachments_to_task(self, source_task_id: int, target_task_id: int) -> List[dict]:
+        source_attachments = await self.repo.find_by_task_id(source_task_id)
+        copied = await self._gather(self._copy_one(a, source_task_id, target_task_id) for a in source_attachments)
+        return [c for c in copied if c is not None]
@@ -0,0 +1,65 @@
+from typing import AsyncIterator, IO, Optional
+from urllib.parse import quote
+import asyncio
+
+import httpx
+from supabase._async.client import AsyncClient
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Services.StorageBackend import StorageBackend
+except ImportError:
+    from config import Config
+    from Services.StorageBackend import StorageBackend
+
+
+class AsyncStorageService:
+    """Supabase Storage over asyncio (ASGI mode). Mirrors StorageService."""
+
+    generate_blob_path = staticmethod(StorageBackend.generate_blob_path)
+
+    def __init__(self, client: AsyncClient, http: httpx.AsyncClient):
+        self.client = client
+        self.http = http
+        self.bucket = Config.STORAGE_BUCKET
+
+    async def _read_chunks(self, file_stream: IO[bytes]) -> AsyncIterator[bytes]:
+        # Spools are local files; yield to the loop between chunks
+        while True:
+            chunk = file_stream.read(Config.UPLOAD_CHUNK_SIZE_BYTES)
+            if not chunk:
+                return
+            yield chunk
+            await asyncio.sleep(0)
+
+    async def upload_blob(self, path: str, file_stream: IO[bytes], content_type: str, content_length: int) -> bool:
+        """Stream a blob to storage. Returns False if the object already exists."""
+        url = f"{Config.SUPABASE_URL}/storage/v1/object/{self.bucket}/{path}"
+        headers = {
+            "Authorization": f"Bearer {Config.SUPABASE_SERVICE_KEY}",
+            "Content-Type": content_type or "application/octet-stream",
+            "Content-Length": str(content_length),
+            "x-upsert": "false",
+        }
+        resp = await self.http.put(url, content=self._read_chunks(file_stream), headers=headers)
+        if resp.status_code >= 400:
+            try:
+                detail = resp.json()
+            except Exception:
+                detail = resp.text
+            if resp.status_code == 409 or (isinstance(detail, dict) and str(detail.get("statusCode")) == "409"):
+                return False
+            raise Exception(f"Supabase REST upload failed ({resp.status_code}): {detail}")
+        return True
+
+    async def get_signed_url(self, path: str, expires_in_seconds: int = 3600, download_name: Optional[str] = None) -> str:
+        res = await self.client.storage.from_(self.bucket).create_signed_url(path, expires_in_seconds)
+        if getattr(res, 'error', None):
+            raise Exception(f"Signed URL generation failed: {res.error.message}")
+        url = res.get('signedURL') if isinstance(res, dict) else getattr(res, 'signed_url', None) or getattr(res, 'signedURL', None)
+        if not url:
+            raise Exception(f"Signed URL generation failed: no URL returned for {path}")
+        if url and download_name:
+            url = f"{url}&download={quote(download_name)}"
+        return url
@@ -1,37 +1,91 @@
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import IO, Callable, Dict, List, Optional, Tuple
+import base64
+import hashlib
+import json
 import mimetypes
+import time
 import uuid
 
 # Handle both relative and absolute imports
 try:
     from ..config import Config
     from ..Repositories.AttachmentRepository import AttachmentRepository
-    from ..Services.StorageService import StorageService
+    from ..Repositories.BlobRepository import BlobRepository
+    from ..Repositories.GcQueueRepository import GcQueueRepository
+    from ..Models.AttachmentBlob import AttachmentBlob
+    from ..Models.TaskAttachment import TaskAttachment
+    from ..Services.StorageBackend import get_storage_backend
+    from ..Services.ContentSniffer import check_content_type, spool_upload
     from ..exceptions import (
         InvalidFileTypeError,
         FileSizeExceededError,
         StorageQuotaExceededError,
         AttachmentNotFoundError,
+        UploadVerificationError,
+        BlobReclaimingError,
     )
 except ImportError:
     from config import Config
     from Repositories.AttachmentRepository import AttachmentRepository
-    from Services.StorageService import StorageService
+    from Repositories.BlobRepository import BlobRepository
+    from Repositories.GcQueueRepository import GcQueueRepository
+    from Models.AttachmentBlob import AttachmentBlob
+    from Models.TaskAttachment import TaskAttachment
+    from Services.StorageBackend import get_storage_backend
+    from Services.ContentSniffer import check_content_type, spool_upload
     from exceptions import (
         InvalidFileTypeError,
         FileSizeExceededError,
         StorageQuotaExceededError,
         AttachmentNotFoundError,
+        UploadVerificationError,
+        BlobReclaimingError,
     )
 
 
+# Columns a listing may be projected to; id and uploaded_at are always included (cursor keys)
+LISTING_COLUMNS = (
+    "id", "task_id", "file_name", "file_path", "file_size", "file_type", "uploaded_by",
+    "uploaded_at", "original_task_id", "is_inherited", "content_hash",
+)
+
+
+def encode_cursor(uploaded_at: str, attachment_id: str) -> str:
+    raw = json.dumps([uploaded_at, attachment_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    (uploaded_at, id) of a page cursor. Both are parsed and re-serialized, since
+    they are interpolated into a PostgREST filter; anything else is a ValueError.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        uploaded_at, attachment_id = json.loads(raw)
+        return datetime.fromisoformat(uploaded_at).isoformat(), str(uuid.UUID(attachment_id))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+
+
 class AttachmentService:
     def __init__(self):
         self.repo = AttachmentRepository()
-        self.storage = StorageService()
+        self.blobs = BlobRepository()
+        self.gc_queue = GcQueueRepository()
+        self.storage = get_storage_backend()
 
-    def _validate_file(self, filename: str, mime_type: str, file_size: int, task_id: int):
+    def _spool_file(self, file_storage) -> Tuple[IO[bytes], int, str]:
+        """
+        Read the upload in chunks into a spooled temp file, checking its content
+        type from the first bytes, enforcing the size limit as it grows and
+        computing its SHA-256 digest on the way through. Returns (spool, size, digest).
+        """
+        return spool_upload(file_storage)
+
+    @staticmethod
+    def _check_type_and_size(filename: str, mime_type: str, file_size: int):
         # Normalize/guess MIME type if missing and compare case-insensitively
         guessed = mimetypes.guess_type(filename)[0]
         effective_mime = (mime_type or guessed or "").lower()
@@ -42,39 +96,170 @@ class AttachmentService:
         if file_size > Config.MAX_FILE_SIZE_BYTES:
             raise FileSizeExceededError("File size exceeds 50MB limit.")
 
-        current_total = self.repo.get_total_size_by_task(task_id)
+    @staticmethod
+    def _check_quota(current_total: int, file_size: int):
         if current_total + file_size > Config.MAX_FILE_SIZE_BYTES:
             raise StorageQuotaExceededError(
                 f"Total storage limit (50MB) exceeded for this task. Current usage: {current_total / (1024 * 1024):.2f} MB",
                 current_usage_bytes=current_total,
             )
 
+    def _validate_file(self, filename: str, mime_type: str, file_size: int, task_id: int):
+        self._check_type_and_size(filename, mime_type, file_size)
+        self._check_quota(self.repo.get_total_size_by_task(task_id), file_size)
+
     def upload_attachment(self, task_id: int, file_storage, uploaded_by: str) -> dict:
         # file_storage: Werkzeug FileStorage
         filename = file_storage.filename
         mime_type = file_storage.mimetype
-        data = file_storage.read()
-        file_size = len(data)
+        spool, file_size, digest = self._spool_file(file_storage)
 
+        with spool:
+            return self.store_attachment(task_id, spool, filename, mime_type, file_size, digest, uploaded_by)
+
+    def store_attachment(self, task_id: int, data: IO[bytes], filename: str, mime_type: str,
+                         file_size: int, digest: str, uploaded_by: int) -> dict:
+        """
+        Validate, store (unless the digest is already stored) and register a file
+        whose bytes are available locally as a seekable stream.
+        """
         self._validate_file(filename, mime_type, file_size, task_id)
 
         # Ensure we pass a reliable content type to storage
         guessed = mimetypes.guess_type(filename)[0]
         content_type = mime_type or guessed or "application/octet-stream"
 
-        # Upload with minimal path (no id in path)
-        path, full_path = self.storage.upload_file(task_id, data, filename, content_type)
+        # Identical content is stored once; skip the transfer if we already have it
+        existing = self.blobs.find_by_digest(digest)
+        if existing:
+            path = existing.file_path
+        else:
+            path = self.storage.generate_blob_path(digest, filename)
+            self.storage.upload_blob(path, data, content_type, file_size)
+
+        def restore(blob_path: str) -> None:
+            data.seek(0)
+            self.storage.upload_blob(blob_path, data, content_type, file_size)
+
+        return self._register_attachment(task_id, filename, mime_type, content_type, file_size, digest, path,
+                                         uploaded_by, restore)
+
+    def create_upload_url(self, task_id: int, filename: str, mime_type: str, file_size: int) -> dict:
+        """
+        Validate an upload up front and return a signed URL the client can upload to
+        directly, so file bytes never pass through this service. The URL points at a
+        random staging path; confirm_upload verifies the stored bytes before they
+        are moved to their content-addressed path.
+        """
+        self._validate_file(filename, mime_type, file_size, task_id)
+
+        signed = self.storage.create_signed_upload_url(self.storage.generate_staging_path())
+        return {"path": signed["path"], "upload_url": signed["upload_url"], "token": signed["token"]}
+
+    def confirm_upload(self, task_id: int, filename: str, mime_type: str, file_size: int, digest: str,
+                       uploaded_by: int, upload_path: str) -> dict:
+        """
+        Register the metadata row for a file the client uploaded via create_upload_url.
+
+        The staged object is read back and hashed here; only content whose size,
+        SHA-256 and type match the declaration is moved to blobs/<digest> (or
+        deduplicated onto the existing blob). Anything else is queued for removal.
+        """
+        # Re-check: quota may have changed since the URL was issued
+        self._validate_file(filename, mime_type, file_size, task_id)
+        if not self.storage.is_staging_path(upload_path):
+            raise UploadVerificationError("path must be the upload path returned by /upload-url")
+
+        guessed = mimetypes.guess_type(filename)[0]
+        content_type = mime_type or guessed or "application/octet-stream"
+
+        stored_size = self.storage.get_object_size(upload_path)
+        if stored_size is None:
+            raise UploadVerificationError("Uploaded file not found in storage")
+        try:
+            if stored_size != file_size:
+                raise UploadVerificationError("Uploaded file size does not match the declared size")
+            head, stored_digest = self._hash_stored_object(upload_path)
+            if stored_digest != digest:
+                raise UploadVerificationError("Uploaded file does not match the declared sha256")
+            check_content_type(head, filename, mime_type)
+        except (UploadVerificationError, InvalidFileTypeError):
+            # Nothing will reference the object; let the reclaimer remove it
+            self.gc_queue.enqueue([upload_path])
+            raise
+
+        moved = False
+
+        def restore(blob_path: str) -> None:
+            nonlocal moved
+            moved = self.storage.move_object(upload_path, blob_path) or moved
+
+        existing = self.blobs.find_by_digest(digest)
+        if existing:
+            path = existing.file_path
+        else:
+            path = self.storage.generate_blob_path(digest, filename)
+            # Only verified bytes reach a digest path; if one is already there (a
+            # concurrent confirm of the same content won), it holds the same bytes
+            restore(path)
+
+        try:
+            return self._register_attachment(task_id, filename, mime_type, content_type, file_size, digest, path,
+                                             uploaded_by, restore)
+        finally:
+            # The staged copy is kept until the blob is registered, in case it has to be restored
+            if not moved:
+                self.gc_queue.enqueue([upload_path])
+
+    def _hash_stored_object(self, path: str) -> Tuple[bytes, str]:
+        """(first CONTENT_SNIFF_BYTES, SHA-256 hex digest) of a stored object, streamed."""
+        hasher = hashlib.sha256()
+        head = b""
+        for chunk in self.storage.iter_object(path, Config.UPLOAD_CHUNK_SIZE_BYTES):
+            hasher.update(chunk)
+            if len(head) < Config.CONTENT_SNIFF_BYTES:
+                head += chunk[:Config.CONTENT_SNIFF_BYTES - len(head)]
+        return head, hasher.hexdigest()
+
+    def _acquire_blob(self, digest: str, path: str, file_size: int, content_type: str,
+                      restore: Callable[[str], None]) -> AttachmentBlob:
+        """
+        Take a reference on a blob. If the reclaimer has claimed its path, wait for
+        the claim to finish and retry; the object may be gone by then, so it is
+        uploaded again through ``restore``.
+        """
+        reclaimed = False
+        for attempt in range(Config.BLOB_RECLAIM_RETRIES + 1):
+            try:
+                blob = self.blobs.acquire(digest, path, file_size, content_type)
+            except BlobReclaimingError:
+                if attempt == Config.BLOB_RECLAIM_RETRIES:
+                    raise
+                reclaimed = True
+                time.sleep(Config.BLOB_RECLAIM_RETRY_SECONDS)
+                continue
+            if reclaimed:
+                # No-op if the object survived (storage refuses to overwrite it)
+                restore(blob.file_path)
+            return blob
+
+    def _register_attachment(self, task_id: int, filename: str, mime_type: str, content_type: str,
+                             file_size: int, digest: str, path: str, uploaded_by: int,
+                             restore: Callable[[str], None]) -> dict:
+        """Take a reference on the stored blob and insert the attachment row."""
+        blob = self._acquire_blob(digest, path, file_size, content_type, restore)
 
         now_iso = datetime.now(timezone.utc).isoformat()
-        # Let DB generate UUID id; keep path minimal
+        # Let DB generate UUID id
         record = {
             "task_id": task_id,
             "file_name": filename,
-            "file_path": path,
+            "file_path": blob.file_path,
             "file_size": file_size,
             "file_type": mime_type,
             "uploaded_by": uploaded_by,
             "uploaded_at": now_iso,
+            "content_hash": digest,
         }
 
         try:
@@ -82,7 +267,7 @@ class AttachmentService:
             return created.to_dict()
         except Exception:
             try:
-                self.storage.delete_file(path)
+                self._release_blob(digest, blob.file_path)
             except Exception:
                 pass
             raise
@@ -91,38 +276,110 @@ class AttachmentService:
         attachments = self.repo.find_by_task_id(task_id)
         results = []
         for a in attachments:
-            signed_url = self.storage.get_signed_url(a.file_path, expires_in_seconds=3600)
+            signed_url = self._signed_url(a)
             item = a.to_dict()
             item["download_url"] = signed_url
             results.append(item)
         return results
 
+    def list_attachments_page(self, task_id: int, limit: int = None, cursor: Optional[str] = None,
+                              fields: Optional[List[str]] = None, include_urls: bool = True) -> dict:
+        """
+        One page of a task's attachments, newest first: {"items": [...], "next_cursor": str|None}.
+        `fields` projects each item to those columns; with include_urls=False no URLs are signed.
+        """
+        limit = max(1, min(limit or Config.LIST_PAGE_SIZE_DEFAULT, Config.LIST_PAGE_SIZE_MAX))
+        after = decode_cursor(cursor) if cursor else None
+
+        if fields:
+            unknown = [f for f in fields if f not in LISTING_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            selected = list(dict.fromkeys(["id", "uploaded_at"] + list(fields)))
+            # Signing needs the path (and the name, for content-addressed blobs)
+            if include_urls:
+                selected += [c for c in ("file_path", "file_name", "content_hash") if c not in selected]
+        else:
+            selected = list(LISTING_COLUMNS)
+
+        # One extra row tells whether another page exists
+        records = self.repo.find_page_by_task_id(task_id, limit + 1, after=after, columns=",".join(selected))
+        has_more = len(records) > limit
+        records = records[:limit]
+
+        items = []
+        for record in records:
+            item = {k: record.get(k) for k in (fields or LISTING_COLUMNS)}
+            if include_urls:
+                item["download_url"] = self._signed_url(TaskAttachment.from_record(record))
+            items.append(item)
+
+        next_cursor = None
+        if has_more and records:
+            last = records[-1]
+            next_cursor = encode_cursor(last["uploaded_at"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+
+    def list_attachments_for_tasks(self, task_ids: List[int], include_urls: bool = False) -> Dict[str, dict]:
+        """
+        Attachment counts and metadata for many tasks, keyed by task id.
+        Download URLs are only signed when include_urls is set; otherwise clients
+        fetch them per file through /<attachment_id>/download when needed.
+        """
+        grouped = {task_id: {"count": 0, "total_size": 0, "attachments": []} for task_id in task_ids}
+        for a in self.repo.find_by_task_ids(task_ids):
+            group = grouped.get(a.task_id)
+            if group is None:
+                continue
+            item = a.to_dict()
+            if include_urls:
+                item["download_url"] = self._signed_url(a)
+            group["attachments"].append(item)
+            group["count"] += 1
+            group["total_size"] += a.file_size or 0
+        # JSON object keys are strings
+        return {str(task_id): group for task_id, group in grouped.items()}
+
     def get_attachment(self, attachment_id: str) -> dict:
         att = self.repo.find_by_id(attachment_id)
         return att.to_dict()
 
     def get_download_url(self, attachment_id: str) -> str:
         att = self.repo.find_by_id(attachment_id)
+        return self._signed_url(att)
+
+    def _signed_url(self, att: TaskAttachment) -> str:
+        if att.content_hash:
+            # Blob paths are digests; have storage serve the original file name
+            return self.storage.get_signed_url(att.file_path, expires_in_seconds=3600, download_name=att.file_name)
         return self.storage.get_signed_url(att.file_path, expires_in_seconds=3600)
 
+    def _release_blob(self, digest: str, file_path: str) -> None:
+        """Drop one reference to a blob; once unreferenced it is queued for the storage reclaimer."""
+        remaining = self.blobs.release(digest)
+        if remaining == 0:
+            self.gc_queue.enqueue([file_path])
+
     def delete_attachment(self, attachment_id: str) -> None:
         att = self.repo.delete(attachment_id)
 
-        # Check if any other tasks reference this file before deleting from storage
-        references_count = self.repo.count_file_references(att.file_path, exclude_id=attachment_id)
-
-        # Only delete from storage if no other tasks reference this file
-        if references_count == 0:
-            try:
-                self.storage.delete_file(att.file_path)
-            except Exception:
-                pass
+        # Storage objects are removed by the background reclaimer, which re-checks
+        # references first; anything not queued here is found by its reconciliation.
+        try:
+            if att.content_hash:
+                self._release_blob(att.content_hash, att.file_path)
+            else:
+                # Legacy rows have no refcount; other tasks may still share this path
+                self.gc_queue.enqueue([att.file_path])
+        except Exception as e:
+            print(f"Error queueing storage cleanup for attachment {attachment_id}: {str(e)}")
 
     def copy_attachments_to_task(self, source_task_id: int, target_task_id: int) -> List[dict]:
         """
         Copy all attachments from source task to target task.
         Used for recurring tasks to inherit parent task attachments.
-        Does NOT duplicate files in storage - only creates new database records.
+        Does NOT duplicate files in storage - only creates new database records
+        (and adds a blob reference for content-addressed attachments).
 
         Returns list of created attachment dictionaries.
         """
@@ -146,10 +403,18 @@ class AttachmentService:
                 "uploaded_at": source_att.uploaded_at.isoformat() if isinstance(source_att.uploaded_at, datetime) else source_att.uploaded_at,
                 "original_task_id": original_task_id,  # Track original source
                 "is_inherited": True,  # Mark as inherited
+                "content_hash": source_att.content_hash,
             }
 
             try:
-                created = self.repo.create(record)
+                if source_att.content_hash:
+                    self.blobs.acquire(source_att.content_hash, source_att.file_path, source_att.file_size, source_att.file_type)
+                try:
+                    created = self.repo.create(record)
+                except Exception:
+                    if source_att.content_hash:
+                        self.blobs.release(source_att.content_hash)
+                    raise
                 copied_attachments.append(created.to_dict())
             except Exception as e:
                 # Log error but continue with other files
@@ -0,0 +1,153 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List
+import os
+import queue
+import threading
+import zipfile
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Models.TaskAttachment import TaskAttachment
+    from ..Services.AttachmentService import AttachmentService
+    from ..exceptions import AttachmentNotFoundError
+except ImportError:
+    from config import Config
+    from Models.TaskAttachment import TaskAttachment
+    from Services.AttachmentService import AttachmentService
+    from exceptions import AttachmentNotFoundError
+
+_DONE = object()
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects zipfile output for the response."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class BundleService:
+    """
+    Streams all attachments of a task as a single ZIP.
+
+    Entries are written with data descriptors (zipfile's non-seekable mode), so the
+    archive is produced chunk by chunk as objects arrive from storage and nothing is
+    staged on disk. Up to BUNDLE_FETCH_CONCURRENCY objects are fetched ahead of the
+    entry being written, each through a queue of BUNDLE_PREFETCH_CHUNKS chunks, which
+    bounds memory regardless of file count or size.
+    """
+
+    def __init__(self, attachment_service: AttachmentService = None):
+        self.attachments = attachment_service or AttachmentService()
+        self.storage = self.attachments.storage
+
+    def get_bundle_attachments(self, task_id: int) -> List[TaskAttachment]:
+        attachments = self.attachments.repo.find_by_task_id(task_id)
+        if not attachments:
+            raise AttachmentNotFoundError("No attachments for task")
+        # Oldest first reads naturally in an archive listing
+        return list(reversed(attachments))
+
+    @staticmethod
+    def _entry_names(attachments: List[TaskAttachment]) -> List[str]:
+        """Flat, unique archive names: "report.pdf", "report (1).pdf", ..."""
+        used = set()
+        names = []
+        for att in attachments:
+            base = os.path.basename((att.file_name or att.id).replace('\\', '/')) or att.id
+            stem, ext = os.path.splitext(base)
+            name, n = base, 1
+            while name.lower() in used:
+                name = f"{stem} ({n}){ext}"
+                n += 1
+            used.add(name.lower())
+            names.append(name)
+        return names
+
+    def _fetch(self, path: str, chunks: queue.Queue, cancelled: threading.Event) -> None:
+        def put(item):
+            # Wake up periodically so an abandoned download releases its worker
+            while not cancelled.is_set():
+                try:
+                    chunks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            for chunk in self.storage.iter_object(path, Config.UPLOAD_CHUNK_SIZE_BYTES):
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(e)
+
+    def stream_bundle(self, attachments: List[TaskAttachment]) -> Iterator[bytes]:
+        names = self._entry_names(attachments)
+        cancelled = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=max(1, Config.BUNDLE_FETCH_CONCURRENCY))
+        pending = deque()
+        upcoming = iter(zip(attachments, names))
+
+        def schedule():
+            for att, name in upcoming:
+                chunks = queue.Queue(maxsize=max(1, Config.BUNDLE_PREFETCH_CHUNKS))
+                pool.submit(self._fetch, att.file_path, chunks, cancelled)
+                pending.append((att, name, chunks))
+                return
+
+        try:
+            for _ in range(max(1, Config.BUNDLE_FETCH_CONCURRENCY)):
+                schedule()
+
+            sink = _ChunkSink()
+            with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                while pending:
+                    att, name, chunks = pending.popleft()
+                    schedule()
+
+                    uploaded_at = att.uploaded_at if isinstance(att.uploaded_at, datetime) else datetime.now()
+                    info = zipfile.ZipInfo(name, date_time=uploaded_at.timetuple()[:6])
+                    # PDF and XLSX are already compressed; storing them keeps CPU per byte flat
+                    info.compress_type = zipfile.ZIP_STORED
+                    info.file_size = att.file_size or 0
+                    with archive.open(info, mode='w') as entry:
+                        while True:
+                            chunk = chunks.get()
+                            if chunk is _DONE:
+                                break
+                            if isinstance(chunk, Exception):
+                                raise chunk
+                            entry.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                    data = sink.drain()
+                    if data:
+                        yield data
+            # Central directory, written when the archive closes
+            yield sink.drain()
+        finally:
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
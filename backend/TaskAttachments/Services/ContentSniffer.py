@@ -0,0 +1,194 @@
+from typing import IO, AsyncIterable, Optional, Tuple
+import hashlib
+import mimetypes
+import tempfile
+
+from werkzeug.datastructures import FileStorage, MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..exceptions import InvalidFileTypeError, FileSizeExceededError
+except ImportError:
+    from config import Config
+    from exceptions import InvalidFileTypeError, FileSizeExceededError
+
+PDF_MIME = "application/pdf"
+XLS_MIME = "application/vnd.ms-excel"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_PDF_MAGIC = b"%PDF-"
+_OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_ZIP_MAGIC = b"PK\x03\x04"
+_SPREADSHEETS = {XLS_MIME, XLSX_MIME}
+
+# Text fields sent alongside the upload (task_id, uploaded_by) are small
+MULTIPART_FIELDS_MAX_BYTES = 64 * 1024
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """Detect PDF, legacy Excel (OLE2) or XLSX (OOXML zip) from the first bytes of a file."""
+    # Readers accept the PDF header anywhere in the first 1024 bytes
+    if _PDF_MAGIC in head[:1024]:
+        return PDF_MIME
+    if head.startswith(_OLE2_MAGIC):
+        return XLS_MIME
+    if head.startswith(_ZIP_MAGIC):
+        # Entry names are stored uncompressed in local headers; tell a workbook from other zips
+        if b"xl/" in head:
+            return XLSX_MIME
+        if b"[Content_Types].xml" in head and b"word/" not in head and b"ppt/" not in head:
+            return XLSX_MIME
+    return None
+
+
+def check_content_type(head: bytes, filename: str, declared_mime: Optional[str]) -> str:
+    """
+    Check that the file's content matches an allowed type and the type it was
+    declared as (header, or extension when no header was sent). Returns the detected type.
+    """
+    detected = sniff_mime_type(head)
+    if detected is None:
+        raise InvalidFileTypeError("Invalid file format. Only PDF and Excel files are allowed.")
+
+    declared = (declared_mime or mimetypes.guess_type(filename or "")[0] or "").lower()
+    # Excel files are often saved with the other Excel extension; treat both as one family
+    if declared != detected and not (declared in _SPREADSHEETS and detected in _SPREADSHEETS):
+        raise InvalidFileTypeError("File content does not match its declared type.")
+    return detected
+
+
+class SniffingSpool(tempfile.SpooledTemporaryFile):
+    """
+    Spooled temp file that inspects an upload while it is written: the first
+    CONTENT_SNIFF_BYTES are checked against the declared type, the size limit is
+    enforced per chunk and the SHA-256 digest is computed on the way through.
+    A bad upload fails on the write that reveals it, before the rest is read.
+    """
+
+    def __init__(self, filename: str, declared_mime: Optional[str]):
+        super().__init__(max_size=Config.UPLOAD_SPOOL_MAX_MEMORY_BYTES)
+        self.filename = filename
+        self.declared_mime = declared_mime
+        self.detected_mime = None
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self._head = b""
+
+        # Reject disallowed declared types before any content arrives
+        guessed = mimetypes.guess_type(filename or "")[0]
+        effective = (declared_mime or guessed or "").lower()
+        if effective not in {m.lower() for m in Config.ALLOWED_MIME_TYPES}:
+            self.close()
+            raise InvalidFileTypeError("Invalid file format. Only PDF and Excel files are allowed.")
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        if self.size > Config.MAX_FILE_SIZE_BYTES:
+            raise FileSizeExceededError("File size exceeds 50MB limit.")
+
+        if self.detected_mime is None:
+            self._head += bytes(data[:Config.CONTENT_SNIFF_BYTES - len(self._head)])
+            if len(self._head) >= Config.CONTENT_SNIFF_BYTES:
+                self._sniff()
+
+        self._hasher.update(data)
+        return super().write(data)
+
+    def _sniff(self) -> None:
+        self.detected_mime = check_content_type(self._head, self.filename, self.declared_mime)
+        self._head = b""
+
+    def finish(self) -> Tuple[int, str]:
+        """Check files shorter than the sniff window and rewind. Returns (size, digest)."""
+        if self.detected_mime is None:
+            self._sniff()
+        self.seek(0)
+        return self.size, self._hasher.hexdigest()
+
+
+def spool_upload(file_storage) -> Tuple[IO[bytes], int, str]:
+    """Inspect, size-check and hash a Werkzeug FileStorage into a spool. Returns (spool, size, digest)."""
+    if isinstance(file_storage.stream, SniffingSpool):
+        # Already inspected and hashed while the request body was parsed
+        spool = file_storage.stream
+        size, digest = spool.finish()
+        return spool, size, digest
+
+    spool = SniffingSpool(file_storage.filename, file_storage.mimetype)
+    try:
+        while True:
+            chunk = file_storage.read(Config.UPLOAD_CHUNK_SIZE_BYTES)
+            if not chunk:
+                break
+            spool.write(chunk)
+        size, digest = spool.finish()
+    except Exception:
+        spool.close()
+        raise
+    return spool, size, digest
+
+
+async def spool_multipart_upload(chunks: AsyncIterable[bytes], content_type: str,
+                                 max_body_bytes: int) -> Tuple[MultiDict, Optional[FileStorage]]:
+    """
+    Parse a multipart/form-data body as it arrives (ASGI uploads). The ``file``
+    part is written straight into a SniffingSpool, so a file of the wrong type or
+    over the size limit fails on the chunk that reveals it and the rest of the
+    body is never read. Returns (form fields, file or None).
+    """
+    mimetype, options = parse_options_header(content_type)
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        return MultiDict(), None
+
+    decoder = MultipartDecoder(boundary.encode(), max_form_memory_size=MULTIPART_FIELDS_MAX_BYTES)
+    fields = []
+    upload = None
+    part = None
+    container = None
+    received = 0
+
+    def consume() -> None:
+        nonlocal part, container, upload
+        event = decoder.next_event()
+        while not isinstance(event, (Epilogue, NeedData)):
+            if isinstance(event, File):
+                part = event
+                if event.name == "file" and upload is None:
+                    # Declared types outside ALLOWED_MIME_TYPES are refused here, before any content
+                    container = SniffingSpool(event.filename, event.headers.get("Content-Type"))
+                    upload = FileStorage(container, event.filename, event.name, headers=event.headers)
+                else:
+                    container = None
+            elif isinstance(event, Field):
+                part = event
+                container = []
+            elif isinstance(event, Data):
+                if isinstance(part, Field):
+                    container.append(event.data)
+                    if sum(len(c) for c in container) > MULTIPART_FIELDS_MAX_BYTES:
+                        raise RequestEntityTooLarge()
+                    if not event.more_data:
+                        fields.append((part.name, b"".join(container).decode("utf-8", "replace")))
+                elif container is not None:
+                    container.write(event.data)
+            event = decoder.next_event()
+
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_body_bytes:
+                raise RequestEntityTooLarge()
+            decoder.receive_data(chunk)
+            consume()
+        decoder.receive_data(None)
+        consume()
+    except Exception:
+        if upload is not None:
+            upload.stream.close()
+        raise
+    return MultiDict(fields), upload
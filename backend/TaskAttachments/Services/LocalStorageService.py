@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote, urlencode
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+
+from flask import send_file
+from werkzeug.security import safe_join
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..exceptions import FileSizeExceededError
+    from ..Services.StorageBackend import StorageBackend
+except ImportError:
+    from config import Config
+    from exceptions import FileSizeExceededError
+    from Services.StorageBackend import StorageBackend
+
+
+class LocalStorageService(StorageBackend):
+    """
+    Local filesystem backend for on-prem deployments and offline tests/benchmarks.
+
+    Objects live under LOCAL_STORAGE_ROOT. Signed URLs point back at this service
+    (/api/task-attachments/files/<path>) with an HMAC over path, method and expiry;
+    downloads are served with send_file so the WSGI server can use sendfile, and
+    Range/If-None-Match/If-Modified-Since are honoured.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.LOCAL_STORAGE_ROOT
+        os.makedirs(self.root, exist_ok=True)
+
+    def _full_path(self, path: str) -> str:
+        full_path = safe_join(self.root, path)
+        if full_path is None:
+            raise ValueError(f"Invalid storage path: {path}")
+        return full_path
+
+    def _signature(self, method: str, path: str, expires: int, download_name: Optional[str] = None) -> str:
+        message = f"{method}\n{path}\n{expires}\n{download_name or ''}".encode()
+        return hmac.new(Config.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+    def _signed_url(self, method: str, path: str, expires_in_seconds: int, download_name: Optional[str] = None) -> str:
+        expires = int(time.time()) + expires_in_seconds
+        params = {"expires": expires, "signature": self._signature(method, path, expires, download_name)}
+        if download_name:
+            params["download"] = download_name
+        base = Config.LOCAL_STORAGE_PUBLIC_URL.rstrip('/')
+        return f"{base}/api/task-attachments/files/{quote(path)}?{urlencode(params)}"
+
+    def verify_signature(self, method: str, path: str, expires: str, signature: str, download_name: Optional[str] = None) -> bool:
+        try:
+            expires_int = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if expires_int < time.time():
+            return False
+        expected = self._signature(method, path, expires_int, download_name)
+        return hmac.compare_digest(expected, signature or '')
+
+    def upload_blob(self, path: str, file_stream, content_type: str, content_length: int,
+                    max_size: Optional[int] = None) -> bool:
+        """
+        Store an object unless `path` exists. With `max_size` (client uploads to a
+        signed URL), FileSizeExceededError is raised once more bytes arrive, however
+        the body is framed, and nothing is stored.
+        """
+        full_path = self._full_path(path)
+        if os.path.exists(full_path):
+            return False
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Write beside the target and link into place so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(prefix=".upload_", dir=os.path.dirname(full_path))
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                if not hasattr(file_stream, 'read'):
+                    tmp_file.write(file_stream)
+                elif max_size is None:
+                    shutil.copyfileobj(file_stream, tmp_file, Config.UPLOAD_CHUNK_SIZE_BYTES)
+                else:
+                    written = 0
+                    while chunk := file_stream.read(Config.UPLOAD_CHUNK_SIZE_BYTES):
+                        written += len(chunk)
+                        if written > max_size:
+                            raise FileSizeExceededError("File size exceeds 50MB limit.")
+                        tmp_file.write(chunk)
+            try:
+                os.link(tmp_path, full_path)
+            except FileExistsError:
+                return False
+        finally:
+            os.remove(tmp_path)
+        return True
+
+    def move_object(self, source: str, destination: str) -> bool:
+        source_path, destination_path = self._full_path(source), self._full_path(destination)
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        # link + remove rather than rename: rename would silently replace an existing object
+        try:
+            os.link(source_path, destination_path)
+        except FileExistsError:
+            return False
+        os.remove(source_path)
+        return True
+
+    def delete_file(self, path: str) -> None:
+        try:
+            os.remove(self._full_path(path))
+        except FileNotFoundError:
+            pass
+
+    def get_signed_url(self, path: str, expires_in_seconds: int = 3600, download_name: Optional[str] = None) -> str:
+        return self._signed_url("GET", path, expires_in_seconds, download_name)
+
+    def create_signed_upload_url(self, path: str) -> dict:
+        url = self._signed_url("PUT", path, 2 * 60 * 60)
+        return {"upload_url": url, "token": url.rsplit("signature=", 1)[-1].split("&")[0], "path": path}
+
+    def get_object_size(self, path: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._full_path(path))
+        except FileNotFoundError:
+            return None
+
+    def iter_object(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        with open(self._full_path(path), 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+
+    def list_objects(self, prefix: str = "") -> Iterator[Tuple[str, Optional[datetime]]]:
+        base = self._full_path(prefix) if prefix else self.root
+        for dirpath, _, filenames in os.walk(base):
+            for name in filenames:
+                # Skip uploads still being written
+                if name.startswith('.upload_'):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                try:
+                    created_at = datetime.fromtimestamp(os.path.getmtime(full_path), tz=timezone.utc)
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(full_path, self.root).replace(os.sep, '/'), created_at
+
+    def send(self, path: str, download_name: Optional[str] = None):
+        """Flask response for an object, with Range and conditional request support."""
+        return send_file(
+            self._full_path(path),
+            download_name=download_name or os.path.basename(path),
+            as_attachment=bool(download_name),
+            conditional=True,
+            etag=True,
+            max_age=3600,
+        )
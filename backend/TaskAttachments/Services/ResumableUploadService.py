@@ -0,0 +1,230 @@
+from datetime import datetime, timezone
+from typing import IO
+import fcntl
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Services.AttachmentService import AttachmentService
+    from ..Services.ContentSniffer import check_content_type
+    from ..exceptions import (
+        InvalidFileTypeError,
+        FileSizeExceededError,
+        UploadSessionNotFoundError,
+        UploadOffsetMismatchError,
+        UploadIncompleteError,
+    )
+except ImportError:
+    from config import Config
+    from Services.AttachmentService import AttachmentService
+    from Services.ContentSniffer import check_content_type
+    from exceptions import (
+        InvalidFileTypeError,
+        FileSizeExceededError,
+        UploadSessionNotFoundError,
+        UploadOffsetMismatchError,
+        UploadIncompleteError,
+    )
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ResumableUploadService:
+    """
+    Create/append/complete uploads staged on local disk.
+
+    Each session is a `<upload_id>.json` metadata file plus a `<upload_id>.part`
+    file holding the bytes received so far. The part file's size is the
+    authoritative offset, so a client whose connection dropped mid-append asks
+    for the offset and resumes from there instead of resending the file.
+    """
+
+    def __init__(self, attachment_service: AttachmentService = None, staging_dir: str = None):
+        self.attachments = attachment_service or AttachmentService()
+        self.staging_dir = staging_dir or Config.UPLOAD_STAGING_DIR
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def _paths(self, upload_id: str):
+        if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+            raise UploadSessionNotFoundError("Upload session not found")
+        base = os.path.join(self.staging_dir, upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    def _load(self, upload_id: str) -> dict:
+        meta_path, part_path = self._paths(upload_id)
+        try:
+            with open(meta_path, 'r') as f:
+                session = json.load(f)
+            session["offset"] = os.path.getsize(part_path)
+        except (FileNotFoundError, ValueError):
+            raise UploadSessionNotFoundError("Upload session not found")
+        return session
+
+    def _status(self, session: dict) -> dict:
+        return {
+            "upload_id": session["upload_id"],
+            "task_id": session["task_id"],
+            "file_name": session["file_name"],
+            "file_size": session["file_size"],
+            "offset": session["offset"],
+        }
+
+    def _open_part(self, upload_id: str, mode: str) -> IO[bytes]:
+        _, part_path = self._paths(upload_id)
+        try:
+            return open(part_path, mode)
+        except FileNotFoundError:
+            # Completed, aborted or purged since it was loaded
+            raise UploadSessionNotFoundError("Upload session not found")
+
+    def purge_expired(self) -> int:
+        """Remove sessions idle for longer than UPLOAD_SESSION_TTL_SECONDS. Returns how many were removed."""
+        cutoff = time.time() - Config.UPLOAD_SESSION_TTL_SECONDS
+        removed = 0
+        for entry in os.scandir(self.staging_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            upload_id = entry.name[:-len('.json')]
+            # Every append writes the part file, so its mtime is the last activity
+            try:
+                last_active = os.stat(os.path.join(self.staging_dir, f"{upload_id}.part")).st_mtime
+            except FileNotFoundError:
+                last_active = entry.stat().st_mtime
+            if last_active < cutoff:
+                self.abort(upload_id)
+                removed += 1
+        return removed
+
+    def create(self, task_id: int, filename: str, mime_type: str, file_size: int, uploaded_by: int) -> dict:
+        # Reject disallowed types, oversize files and quota overruns before any bytes are sent
+        self.attachments._validate_file(filename, mime_type, file_size, task_id)
+
+        try:
+            self.purge_expired()
+        except OSError:
+            pass
+
+        upload_id = uuid.uuid4().hex
+        meta_path, part_path = self._paths(upload_id)
+        session = {
+            "upload_id": upload_id,
+            "task_id": task_id,
+            "file_name": filename,
+            "file_type": mime_type,
+            "file_size": file_size,
+            "uploaded_by": uploaded_by,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w') as f:
+            json.dump(session, f)
+
+        session["offset"] = 0
+        return self._status(session)
+
+    def status(self, upload_id: str) -> dict:
+        return self._status(self._load(upload_id))
+
+    def append(self, upload_id: str, offset: int, stream: IO[bytes]) -> dict:
+        """
+        Append bytes read from `stream` at `offset`, which must equal the current offset.
+        Bytes are written as they arrive, so a dropped connection keeps what was received.
+        """
+        session = self._load(upload_id)
+
+        with self._open_part(upload_id, 'r+b') as part:
+            # Serialise appends to the same session across threads and workers
+            fcntl.flock(part, fcntl.LOCK_EX)
+            try:
+                current = os.fstat(part.fileno()).st_size
+                if offset != current:
+                    raise UploadOffsetMismatchError(
+                        f"Upload offset mismatch: expected {current}, got {offset}",
+                        current_offset=current,
+                    )
+
+                part.seek(current)
+                remaining = session["file_size"] - current
+                sniff_end = min(Config.CONTENT_SNIFF_BYTES, session["file_size"])
+                try:
+                    while True:
+                        chunk = stream.read(Config.UPLOAD_CHUNK_SIZE_BYTES)
+                        if not chunk:
+                            break
+                        if len(chunk) > remaining:
+                            raise FileSizeExceededError("Upload exceeds the declared file size.")
+                        part.write(chunk)
+                        position = session["file_size"] - remaining
+                        remaining -= len(chunk)
+                        # Check the content type as soon as the leading bytes are in
+                        if position < sniff_end <= position + len(chunk):
+                            self._check_head(session, part)
+                except InvalidFileTypeError:
+                    self.abort(upload_id)
+                    raise
+                finally:
+                    part.flush()
+                    session["offset"] = part.tell()
+            finally:
+                fcntl.flock(part, fcntl.LOCK_UN)
+
+        return self._status(session)
+
+    def _check_head(self, session: dict, part) -> None:
+        part.flush()
+        position = part.tell()
+        part.seek(0)
+        head = part.read(Config.CONTENT_SNIFF_BYTES)
+        part.seek(position)
+        check_content_type(head, session["file_name"], session["file_type"])
+
+    def complete(self, upload_id: str) -> dict:
+        """Hash the staged file, store it and register the attachment; the session is then removed."""
+        session = self._load(upload_id)
+        if session["offset"] != session["file_size"]:
+            raise UploadIncompleteError(
+                f"Upload incomplete: received {session['offset']} of {session['file_size']} bytes",
+                current_offset=session["offset"],
+            )
+
+        meta_path, _ = self._paths(upload_id)
+        with self._open_part(upload_id, 'rb') as part:
+            # A concurrent complete of the same session must not register it twice
+            fcntl.flock(part, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(meta_path):
+                    raise UploadSessionNotFoundError("Upload session not found")
+
+                self._check_head(session, part)
+                hasher = hashlib.sha256()
+                for chunk in iter(lambda: part.read(Config.UPLOAD_CHUNK_SIZE_BYTES), b''):
+                    hasher.update(chunk)
+                part.seek(0)
+
+                created = self.attachments.store_attachment(
+                    session["task_id"],
+                    part,
+                    session["file_name"],
+                    session["file_type"],
+                    session["file_size"],
+                    hasher.hexdigest(),
+                    session["uploaded_by"],
+                )
+                self.abort(upload_id)
+            finally:
+                fcntl.flock(part, fcntl.LOCK_UN)
+
+        return created
+
+    def abort(self, upload_id: str) -> None:
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
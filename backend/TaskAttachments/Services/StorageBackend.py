@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+import os
+import re
+import uuid
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+except ImportError:
+    from config import Config
+
+
+# Direct uploads land here, at a random path, until they are verified and moved to blobs/
+STAGING_PREFIX = "uploads/"
+_STAGING_PATH_RE = re.compile(r"^uploads/[0-9a-f]{32}$")
+
+
+class StorageBackend(ABC):
+    """Object storage used for attachment blobs. Paths are relative to the bucket/root."""
+
+    @staticmethod
+    def generate_staging_path() -> str:
+        # Random, not derived from the content: nothing at a digest path is client-written
+        return f"{STAGING_PREFIX}{uuid.uuid4().hex}"
+
+    @staticmethod
+    def is_staging_path(path: str) -> bool:
+        return bool(_STAGING_PATH_RE.match(path or ""))
+
+    @staticmethod
+    def generate_blob_path(digest: str, original_filename: str) -> str:
+        # Content-addressed: identical bytes always map to the same object
+        ext_only = os.path.splitext(original_filename)[1].lstrip('.').lower()
+        name = f"{digest}.{ext_only}" if ext_only else digest
+        return f"blobs/{digest[:2]}/{name}"
+
+    @abstractmethod
+    def upload_blob(self, path: str, file_stream, content_type: str, content_length: int) -> bool:
+        """Store a blob. Returns False if the object already exists."""
+
+    @abstractmethod
+    def move_object(self, source: str, destination: str) -> bool:
+        """Move an object. Returns False (leaving the source) if the destination already exists."""
+
+    @abstractmethod
+    def delete_file(self, path: str) -> None:
+        pass
+
+    def delete_files(self, paths: List[str]) -> None:
+        """Remove several objects. Backends with a multi-object delete override this."""
+        for path in paths:
+            self.delete_file(path)
+
+    @abstractmethod
+    def get_signed_url(self, path: str, expires_in_seconds: int = 3600, download_name: Optional[str] = None) -> str:
+        pass
+
+    @abstractmethod
+    def create_signed_upload_url(self, path: str) -> dict:
+        """Returns {"upload_url", "token", "path"} for a direct client upload."""
+
+    @abstractmethod
+    def get_object_size(self, path: str) -> Optional[int]:
+        """Size in bytes of a stored object, or None if it does not exist."""
+
+    @abstractmethod
+    def iter_object(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        """Stream an object's bytes in chunks of at most chunk_size."""
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "") -> Iterator[Tuple[str, Optional[datetime]]]:
+        """Every object under prefix as (path, created_at)."""
+
+
+def get_storage_backend() -> StorageBackend:
+    """Storage backend selected by STORAGE_BACKEND ("supabase" or "local")."""
+    backend = (Config.STORAGE_BACKEND or "supabase").lower()
+    if backend == "local":
+        try:
+            from ..Services.LocalStorageService import LocalStorageService
+        except ImportError:
+            from Services.LocalStorageService import LocalStorageService
+        return LocalStorageService()
+    if backend == "supabase":
+        try:
+            from ..Services.StorageService import StorageService
+        except ImportError:
+            from Services.StorageService import StorageService
+        return StorageService()
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {Config.STORAGE_BACKEND}")
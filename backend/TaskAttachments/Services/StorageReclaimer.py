@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import os
+import threading
+import time
+import traceback
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Repositories.AttachmentRepository import AttachmentRepository
+    from ..Repositories.BlobRepository import BlobRepository
+    from ..Repositories.GcQueueRepository import GcQueueRepository
+    from ..Services.StorageBackend import StorageBackend, get_storage_backend
+except ImportError:
+    from config import Config
+    from Repositories.AttachmentRepository import AttachmentRepository
+    from Repositories.BlobRepository import BlobRepository
+    from Repositories.GcQueueRepository import GcQueueRepository
+    from Services.StorageBackend import StorageBackend, get_storage_backend
+
+
+class StorageReclaimer:
+    """
+    Removes storage objects that no attachment references.
+
+    drain() works through attachment_gc_queue (filled by deletes); reconcile() walks
+    the storage listing and queues anything unreferenced, catching objects leaked by
+    crashes or failed cleanups. A path is only removed once claim_gc_paths has found
+    that neither task_attachments nor attachment_blobs points at it. The check and
+    the claim are one statement, and a claimed path cannot be re-acquired until
+    its object is gone.
+    """
+
+    def __init__(self, storage: StorageBackend = None, attachments: AttachmentRepository = None,
+                 blobs: BlobRepository = None, gc_queue: GcQueueRepository = None):
+        self.storage = storage or get_storage_backend()
+        self.attachments = attachments or AttachmentRepository()
+        self.blobs = blobs or BlobRepository()
+        self.gc_queue = gc_queue or GcQueueRepository()
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=Config.STORAGE_GC_GRACE_SECONDS)
+
+    def _unreferenced(self, paths: List[str]) -> List[str]:
+        referenced = self.attachments.find_referenced_paths(paths) | self.blobs.find_referenced_paths(paths)
+        return [p for p in paths if p not in referenced]
+
+    def drain(self) -> int:
+        """Remove queued paths past the grace period that are still unreferenced. Returns objects removed."""
+        removed = 0
+        cutoff = self._cutoff()
+        while True:
+            # Referenced paths are dropped by the claim; a later delete queues them again
+            paths = self.gc_queue.claim_due(cutoff, Config.STORAGE_GC_BATCH_SIZE, Config.STORAGE_GC_CLAIM_LEASE_SECONDS)
+            if not paths:
+                break
+            self.storage.delete_files(paths)
+            self.gc_queue.complete(paths)
+            removed += len(paths)
+            if len(paths) < Config.STORAGE_GC_BATCH_SIZE:
+                break
+        return removed
+
+    def reconcile(self) -> int:
+        """Queue stored objects older than the grace period that nothing references. Returns paths queued."""
+        queued = 0
+        cutoff = self._cutoff()
+        batch = []
+        for path, created_at in self.storage.list_objects():
+            if created_at is None or created_at > cutoff:
+                continue
+            batch.append(path)
+            if len(batch) >= Config.STORAGE_GC_BATCH_SIZE:
+                queued += self._queue_orphans(batch)
+                batch = []
+        if batch:
+            queued += self._queue_orphans(batch)
+        return queued
+
+    def _queue_orphans(self, paths: List[str]) -> int:
+        orphans = self._unreferenced(paths)
+        self.gc_queue.enqueue(orphans)
+        return len(orphans)
+
+
+def _try_lock(path: str) -> Optional[int]:
+    """Take an exclusive lock on `path` without waiting. Returns the held descriptor, or None."""
+    import fcntl  # POSIX only, like the forking servers that need the lock
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    # Released by the kernel when this process exits
+    return fd
+
+
+def _run_forever(stop: threading.Event, lock_path: Optional[str] = None) -> None:
+    reclaimer = None
+    lock = None
+    next_reconcile = time.monotonic() + Config.STORAGE_GC_INTERVAL_SECONDS
+    while not stop.wait(Config.STORAGE_GC_INTERVAL_SECONDS):
+        try:
+            if lock_path and lock is None:
+                lock = _try_lock(lock_path)
+                if lock is None:
+                    continue
+            reclaimer = reclaimer or StorageReclaimer()
+            if time.monotonic() >= next_reconcile:
+                reclaimer.reconcile()
+                next_reconcile = time.monotonic() + Config.STORAGE_GC_RECONCILE_INTERVAL_SECONDS
+            reclaimer.drain()
+        except Exception as e:
+            print("[Storage GC Error]", str(e))
+            print(traceback.format_exc())
+
+
+def start_background_reclaimer(lock_path: Optional[str] = None) -> threading.Event:
+    """
+    Run the reclaimer in a daemon thread. Set the returned event to stop it.
+
+    With `lock_path`, passes only run while this process holds an exclusive lock
+    on that file: every worker of a forking server can start the thread after
+    the fork, one of them reclaims, and another takes over when it exits.
+    """
+    stop = threading.Event()
+    thread = threading.Thread(target=_run_forever, args=(stop, lock_path), name="storage-reclaimer", daemon=True)
+    thread.start()
+    return stop
@@ -1,88 +1,137 @@
-import os
-import time
-import tempfile
-import mimetypes
-from typing import Tuple
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
 import requests
 
 # Handle both relative and absolute imports
 try:
     from ..config import Config
     from ..db import get_supabase_client
+    from ..Services.StorageBackend import StorageBackend
 except ImportError:
     from config import Config
     from db import get_supabase_client
+    from Services.StorageBackend import StorageBackend
 
 
-class StorageService:
+class StorageService(StorageBackend):
+    """Supabase Storage backend."""
+
     def __init__(self):
         self.client = get_supabase_client()
         self.bucket = Config.STORAGE_BUCKET
 
-    def _generate_path(self, task_id: int, original_filename: str) -> str:
-        base, ext = os.path.splitext(original_filename)
-        # Sanitize filename to only allow alphanumeric, hyphens, underscores, spaces, and periods
-        # This prevents issues with special characters in Supabase Storage
-        safe_base = ''.join(c if c.isalnum() or c in (' ', '-', '_', '.') else '_' for c in base)
-        # Replace multiple consecutive spaces or underscores with a single one
-        safe_base = ' '.join(safe_base.split())
-        ext_only = ext.lstrip('.')
-        timestamp = int(time.time())
-        return f"{task_id}/{timestamp}-{safe_base}.{ext_only}"
+    def upload_blob(self, path: str, file_stream, content_type: str, content_length: int) -> bool:
+        """
+        Stream a blob to storage without buffering it again.
+        Returns False if the object already exists (a concurrent upload of the same digest won).
+        """
+        url = f"{Config.SUPABASE_URL}/storage/v1/object/{self.bucket}/{path}"
+        headers = {
+            "Authorization": f"Bearer {Config.SUPABASE_SERVICE_KEY}",
+            "Content-Type": content_type or "application/octet-stream",
+            "Content-Length": str(content_length),
+            "x-upsert": "false",
+        }
+        resp = requests.put(url, data=file_stream, headers=headers, timeout=60)
+        if resp.status_code >= 400:
+            try:
+                detail = resp.json()
+            except Exception:
+                detail = resp.text
+            if resp.status_code == 409 or (isinstance(detail, dict) and str(detail.get("statusCode")) == "409"):
+                return False
+            raise Exception(f"Supabase REST upload failed ({resp.status_code}): {detail}")
+        return True
 
-    def upload_file(self, task_id: int, file_stream, original_filename: str, content_type: str) -> Tuple[str, str]:
-        path = self._generate_path(task_id, original_filename)
-        # Normalize to raw bytes
-        if hasattr(file_stream, 'read'):
-            data = file_stream.read()
-        else:
-            data = file_stream
+    def move_object(self, source: str, destination: str) -> bool:
+        """Server-side move within the bucket; False if the destination already exists."""
+        url = f"{Config.SUPABASE_URL}/storage/v1/object/move"
+        headers = {"Authorization": f"Bearer {Config.SUPABASE_SERVICE_KEY}"}
+        body = {"bucketId": self.bucket, "sourceKey": source, "destinationKey": destination}
+        resp = requests.post(url, json=body, headers=headers, timeout=60)
+        if resp.status_code >= 400:
+            try:
+                detail = resp.json()
+            except Exception:
+                detail = resp.text
+            if resp.status_code == 409 or (isinstance(detail, dict) and str(detail.get("statusCode")) == "409"):
+                return False
+            raise Exception(f"Supabase REST move failed ({resp.status_code}): {detail}")
+        return True
 
-        # Write to temp file so SDK infers MIME from extension
-        suffix = os.path.splitext(original_filename)[1] or ""
-        fd, tmp_path = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir="/tmp")
-        try:
-            with os.fdopen(fd, 'wb') as tmp_file:
-                tmp_file.write(data)
+    def create_signed_upload_url(self, path: str) -> dict:
+        """Signed URL the client can PUT the file to directly, bypassing this service."""
+        res = self.client.storage.from_(self.bucket).create_signed_upload_url(path)
+        if getattr(res, 'error', None):
+            raise Exception(f"Signed upload URL generation failed: {res.error.message}")
+        return {"upload_url": res.get('signed_url'), "token": res.get('token'), "path": path}
 
-            # Determine content type from filename if not provided
-            guessed = mimetypes.guess_type(original_filename)[0]
-            ct = content_type or guessed or "application/octet-stream"
+    def get_object_size(self, path: str) -> Optional[int]:
+        """Size in bytes of a stored object, or None if it does not exist."""
+        folder, _, name = path.rpartition('/')
+        res = self.client.storage.from_(self.bucket).list(folder, {"search": name, "limit": 100})
+        for item in res or []:
+            if item.get('name') == name:
+                metadata = item.get('metadata') or {}
+                size = metadata.get('size', metadata.get('contentLength'))
+                return int(size) if size is not None else None
+        return None
 
-            # Canonical upload via Supabase Storage REST API
-            # PUT {SUPABASE_URL}/storage/v1/object/{bucket}/{path}
-            url = f"{Config.SUPABASE_URL}/storage/v1/object/{self.bucket}/{path}"
-            headers = {
-                "Authorization": f"Bearer {Config.SUPABASE_SERVICE_KEY}",
-                "Content-Type": ct,
-                "x-upsert": "false",
-            }
-            with open(tmp_path, 'rb') as f:
-                resp = requests.put(url, data=f, headers=headers, timeout=60)
+    def iter_object(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        """Stream an object from storage without holding it in memory."""
+        url = f"{Config.SUPABASE_URL}/storage/v1/object/authenticated/{self.bucket}/{path}"
+        headers = {"Authorization": f"Bearer {Config.SUPABASE_SERVICE_KEY}"}
+        with requests.get(url, headers=headers, stream=True, timeout=60) as resp:
             if resp.status_code >= 400:
-                try:
-                    detail = resp.json()
-                except Exception:
-                    detail = resp.text
-                raise Exception(f"Supabase REST upload failed ({resp.status_code}): {detail}")
-        finally:
-            try:
-                os.remove(tmp_path)
-            except Exception:
-                pass
-        # REST upload returns 200/201 on success. Nothing else to validate here.
-        return path, f"{self.bucket}/{path}"
+                raise Exception(f"Supabase REST download failed ({resp.status_code}): {resp.text}")
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
 
     def delete_file(self, path: str) -> None:
         res = self.client.storage.from_(self.bucket).remove([path])
         if getattr(res, 'error', None):
             raise Exception(f"Storage delete failed: {res.error.message}")
 
-    def get_signed_url(self, path: str, expires_in_seconds: int = 3600) -> str:
+    def delete_files(self, paths: List[str]) -> None:
+        """Remove many objects with one storage API call (at most 1000 per call)."""
+        if not paths:
+            return
+        res = self.client.storage.from_(self.bucket).remove(list(paths))
+        if getattr(res, 'error', None):
+            raise Exception(f"Storage delete failed: {res.error.message}")
+
+    def list_objects(self, prefix: str = "") -> Iterator[Tuple[str, Optional[datetime]]]:
+        page_size = 1000
+        bucket = self.client.storage.from_(self.bucket)
+        offset = 0
+        while True:
+            items = bucket.list(prefix, {"limit": page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}) or []
+            for item in items:
+                path = f"{prefix}/{item['name']}" if prefix else item['name']
+                # Folders are listed without an id
+                if item.get('id') is None:
+                    yield from self.list_objects(path)
+                    continue
+                created_at = item.get('created_at')
+                try:
+                    created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00')) if created_at else None
+                except ValueError:
+                    created_at = None
+                yield path, created_at
+            if len(items) < page_size:
+                return
+            offset += page_size
+
+    def get_signed_url(self, path: str, expires_in_seconds: int = 3600, download_name: Optional[str] = None) -> str:
         res = self.client.storage.from_(self.bucket).create_signed_url(path, expires_in_seconds)
         if getattr(res, 'error', None):
             raise Exception(f"Signed URL generation failed: {res.error.message}")
         url = res.get('signedURL') if isinstance(res, dict) else getattr(res, 'signed_url', None) or getattr(res, 'signedURL', None)
+        # Blob paths are digests, so ask storage to send the original name in Content-Disposition
+        if url and download_name:
+            url = f"{url}&download={quote(download_name)}"
         return url
 
 
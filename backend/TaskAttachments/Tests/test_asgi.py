@@ -0,0 +1,152 @@
+import pytest
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, Mock, patch
+from io import BytesIO
+
+# ASGI mode is optional: requirements-asgi.txt
+pytest.importorskip("quart")
+pytest.importorskip("quart_cors")
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asgi
+from asgi import create_asgi_app
+from config import Config
+from exceptions import AttachmentNotFoundError
+
+
+# Quart pins its own Flask, so CI runs this module in the separate asgi job
+@pytest.mark.unit
+class TestAsgiApp:
+    """Endpoint tests for the ASGI app with the async service mocked"""
+
+    @pytest.fixture
+    def app(self):
+        app = create_asgi_app()
+        app.config['TESTING'] = True
+        app.extensions['supabase'] = Mock()
+        app.extensions['http'] = Mock()
+        return app
+
+    def _call(self, app, method, path, **kwargs):
+        async def run():
+            client = app.test_client()
+            response = await getattr(client, method)(path, **kwargs)
+            return response.status_code, await response.get_json()
+        return asyncio.run(run())
+
+    def test_health(self, app):
+        status, body = self._call(app, 'get', '/api/task-attachments/health')
+
+        assert status == 200
+        assert body['mode'] == 'asgi'
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_list_attachments(self, mock_service_class, app):
+        mock_service_class.return_value.list_attachments_for_task = AsyncMock(return_value=[{"id": "a"}])
+
+        status, body = self._call(app, 'get', '/api/task-attachments/task/1')
+
+        assert status == 200
+        assert body == [{"id": "a"}]
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_batch_metadata(self, mock_service_class, app):
+        mock_service_class.return_value.list_attachments_for_tasks = AsyncMock(return_value={"1": {"count": 0}})
+
+        status, body = self._call(app, 'post', '/api/task-attachments/tasks', json={"task_ids": [1, 1]})
+
+        assert status == 200
+        mock_service_class.return_value.list_attachments_for_tasks.assert_awaited_once_with([1], include_urls=False)
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_download_url_not_found(self, mock_service_class, app):
+        mock_service_class.return_value.get_download_url = AsyncMock(side_effect=AttachmentNotFoundError("nope"))
+
+        status, body = self._call(app, 'get', '/api/task-attachments/abc/download')
+
+        assert status == 404
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_upload(self, mock_service_class, app):
+        mock_service_class.return_value.store_attachment = AsyncMock(return_value={"id": "new"})
+        from quart.datastructures import FileStorage
+
+        status, body = self._call(
+            app, 'post', '/api/task-attachments/upload',
+            form={'task_id': '1', 'uploaded_by': '2'},
+            files={'file': FileStorage(BytesIO(b'%PDF-1.7\ntest pdf'), filename='a.pdf', content_type='application/pdf')},
+        )
+
+        assert status == 201
+        args = mock_service_class.return_value.store_attachment.call_args[0]
+        assert args[0] == 1
+        assert args[2:5] == ('a.pdf', 'application/pdf', 17)
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_upload_rejects_spoofed_content(self, mock_service_class, app):
+        from quart.datastructures import FileStorage
+
+        status, body = self._call(
+            app, 'post', '/api/task-attachments/upload',
+            form={'task_id': '1', 'uploaded_by': '2'},
+            files={'file': FileStorage(BytesIO(b'MZ not a pdf'), filename='a.pdf', content_type='application/pdf')},
+        )
+
+        assert status == 400
+
+    @patch('Controllers.AsyncAttachmentController.AsyncAttachmentService')
+    def test_upload_over_body_limit(self, mock_service_class, app):
+        from quart.datastructures import FileStorage
+        app.config['MAX_CONTENT_LENGTH'] = 1024
+
+        status, body = self._call(
+            app, 'post', '/api/task-attachments/upload',
+            form={'task_id': '1', 'uploaded_by': '2'},
+            files={'file': FileStorage(BytesIO(b'%PDF-1.7\n' + b'0' * 4096), filename='a.pdf',
+                                       content_type='application/pdf')},
+        )
+
+        assert status == 400
+        assert body == {'error': 'File size exceeds 50MB limit.'}
+        mock_service_class.return_value.store_attachment.assert_not_called()
+
+    @patch('Controllers.AsyncAttachmentController.spool_multipart_upload')
+    def test_upload_declared_too_large_is_not_read(self, mock_spool, app):
+        from quart.datastructures import FileStorage
+        app.config['MAX_CONTENT_LENGTH'] = 1024
+
+        status, body = self._call(
+            app, 'post', '/api/task-attachments/upload',
+            form={'task_id': '1', 'uploaded_by': '2'},
+            files={'file': FileStorage(BytesIO(b'%PDF-1.7\n' + b'0' * 4096), filename='a.pdf',
+                                       content_type='application/pdf')},
+        )
+
+        assert status == 400
+        mock_spool.assert_not_called()
+
+    def test_body_limit_admits_files_up_to_the_size_limit(self, app):
+        assert app.config['MAX_CONTENT_LENGTH'] > Config.MAX_FILE_SIZE_BYTES
+
+    def test_serving_runs_the_storage_reclaimer(self):
+        stop = Mock()
+        with patch.object(asgi, 'acreate_client', AsyncMock()), \
+                patch.object(asgi, 'start_background_reclaimer', return_value=stop) as start, \
+                patch.object(Config, 'ENV', 'prod'), \
+                patch.object(Config, 'STORAGE_GC_ENABLED', True), \
+                patch.object(Config, 'SUPABASE_URL', 'http://supabase'), \
+                patch.object(Config, 'SUPABASE_SERVICE_KEY', 'key'):
+            app = create_asgi_app()
+
+            async def serve():
+                async with app.test_app():
+                    start.assert_called_once_with()
+                    stop.set.assert_not_called()
+            asyncio.run(serve())
+
+        stop.set.assert_called_once_with()
+        assert 'storage_reclaimer' not in app.extensions
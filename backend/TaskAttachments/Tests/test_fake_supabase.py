@@ -0,0 +1,231 @@
+import pytest
+import os
+import sys
+import hashlib
+import threading
+from io import BytesIO
+
+import requests
+
+# Add the parent directory to the path to enable imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Benchmarks.fake_supabase import FakeSupabase
+from Benchmarks.bench_attachments import FAKE_SERVICE_KEY, main, percentile, summarize
+from Services.AttachmentService import AttachmentService
+from Repositories.AttachmentRepository import AttachmentRepository
+from Services.StorageReclaimer import StorageReclaimer
+from config import Config
+from exceptions import AttachmentNotFoundError, BlobReclaimingError, UploadVerificationError
+
+
+def _pdf(salt: str) -> bytes:
+    return f"%PDF-1.7\n{salt}\n".encode()
+
+
+@pytest.mark.integration
+class TestFakeSupabase:
+    """AttachmentService end to end against the offline Supabase stand-in"""
+
+    @pytest.fixture
+    def server(self, monkeypatch):
+        fake = FakeSupabase().start()
+        monkeypatch.setattr(Config, "SUPABASE_URL", fake.url)
+        monkeypatch.setattr(Config, "SUPABASE_SERVICE_KEY", FAKE_SERVICE_KEY)
+        monkeypatch.setattr(Config, "STORAGE_BACKEND", "supabase")
+        yield fake
+        fake.stop()
+
+    @pytest.fixture
+    def service(self, server):
+        return AttachmentService()
+
+    def _store(self, service, task_id, salt, name="doc.pdf"):
+        data = _pdf(salt)
+        return service.store_attachment(task_id, BytesIO(data), name, "application/pdf",
+                                        len(data), hashlib.sha256(data).hexdigest(), 7)
+
+    def test_upload_list_download_delete(self, server, service):
+        """Test a stored file can be listed, downloaded through its signed URL and deleted"""
+        created = self._store(service, 1, "a", name="report.pdf")
+
+        listed = service.list_attachments_for_task(1)
+        assert [a["id"] for a in listed] == [created["id"]]
+        response = requests.get(listed[0]["download_url"], timeout=5)
+        assert response.status_code == 200
+        assert response.content == _pdf("a")
+
+        service.delete_attachment(created["id"])
+
+        assert service.list_attachments_for_task(1) == []
+        assert server.tables["attachment_blobs"] == []
+        assert [r["file_path"] for r in server.tables["attachment_gc_queue"]] == [created["file_path"]]
+        with pytest.raises(AttachmentNotFoundError):
+            service.repo.delete(created["id"])
+
+    def test_identical_content_stored_once(self, server, service):
+        """Test a second upload of the same bytes reuses the blob and adds a reference"""
+        first = self._store(service, 1, "same")
+        second = self._store(service, 2, "same")
+
+        assert first["file_path"] == second["file_path"]
+        assert len(server.objects[Config.STORAGE_BUCKET]) == 1
+        assert server.tables["attachment_blobs"][0]["ref_count"] == 2
+
+    def test_keyset_pages_cover_every_row(self, server, service):
+        """Test following next_cursor returns each attachment exactly once"""
+        ids = {self._store(service, 1, f"p{i}")["id"] for i in range(5)}
+
+        seen, cursor = [], None
+        while True:
+            page = service.list_attachments_page(1, limit=2, cursor=cursor, fields=["file_name"], include_urls=False)
+            seen.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        stored = service.repo.find_by_task_id(1)
+        assert {a.id for a in stored} == ids
+
+    def test_copy_and_reference_count(self, server, service):
+        """Test copying attachments adds blob references and attachment rows for the shared path"""
+        created = self._store(service, 1, "c")
+
+        copied = service.copy_attachments_to_task(1, 2)
+
+        assert len(copied) == 1
+        assert copied[0]["is_inherited"] is True
+        assert server.tables["attachment_blobs"][0]["ref_count"] == 2
+        rows = [r for r in server.tables["task_attachments"] if r["file_path"] == created["file_path"]]
+        assert len(rows) == 2
+        assert AttachmentRepository().find_referenced_paths([created["file_path"]]) == {created["file_path"]}
+
+    def test_storage_listing_and_remove(self, server, service):
+        """Test storage listing walks folders and bulk remove deletes objects"""
+        created = self._store(service, 1, "l")
+
+        listed = [path for path, _ in service.storage.list_objects("blobs")]
+        assert listed == [created["file_path"]]
+        assert service.storage.get_object_size(created["file_path"]) == len(_pdf("l"))
+
+        service.storage.delete_files([created["file_path"]])
+        assert server.objects[Config.STORAGE_BUCKET] == {}
+
+    def test_reclaimer_claims_only_unreferenced_paths(self, server, service, monkeypatch):
+        """Test drain removes orphaned objects and drops queue rows that are referenced again"""
+        monkeypatch.setattr(Config, "STORAGE_GC_GRACE_SECONDS", 0)
+        kept = self._store(service, 1, "kept")
+        gone = self._store(service, 1, "gone")
+        service.delete_attachment(gone["id"])
+        service.gc_queue.enqueue([kept["file_path"]])
+
+        assert StorageReclaimer(storage=service.storage).drain() == 1
+
+        assert list(server.objects[Config.STORAGE_BUCKET]) == [kept["file_path"]]
+        assert server.tables["attachment_gc_queue"] == []
+
+    def test_reupload_racing_the_reclaimer_keeps_its_object(self, server, service, monkeypatch):
+        """Test an acquire between the reclaimer's claim and its remove waits and restores the object"""
+        monkeypatch.setattr(Config, "STORAGE_GC_GRACE_SECONDS", 0)
+        monkeypatch.setattr(Config, "BLOB_RECLAIM_RETRY_SECONDS", 0.2)
+        created = self._store(service, 1, "race")
+        service.delete_attachment(created["id"])
+
+        acquire = service.blobs.acquire
+        refused = threading.Event()
+
+        def observed_acquire(*args):
+            try:
+                return acquire(*args)
+            except BlobReclaimingError:
+                refused.set()
+                raise
+
+        monkeypatch.setattr(service.blobs, "acquire", observed_acquire)
+        reclaimer = StorageReclaimer(storage=service.storage)
+        delete_files = reclaimer.storage.delete_files
+        results = []
+
+        def racing_delete(paths):
+            # The same bytes are uploaded again after the claim, before the remove
+            uploader = threading.Thread(target=lambda: results.append(self._store(service, 2, "race")))
+            uploader.start()
+            assert refused.wait(5)
+            delete_files(paths)
+            results.append(uploader)
+
+        monkeypatch.setattr(reclaimer.storage, "delete_files", racing_delete)
+        assert reclaimer.drain() == 1
+        results.pop().join(5)
+
+        [reuploaded] = results
+        assert reuploaded["file_path"] == created["file_path"]
+        assert server.objects[Config.STORAGE_BUCKET][created["file_path"]]["data"] == _pdf("race")
+        assert server.tables["attachment_blobs"][0]["ref_count"] == 1
+        assert server.tables["attachment_gc_queue"] == []
+
+    def test_duplicate_upload_reports_existing(self, server, service):
+        """Test storage answers an existing object with a conflict"""
+        assert service.storage.upload_blob("blobs/aa/x.pdf", b"%PDF-1", "application/pdf", 6) is True
+        assert service.storage.upload_blob("blobs/aa/x.pdf", b"%PDF-1", "application/pdf", 6) is False
+
+    def test_direct_upload_is_verified_before_it_becomes_a_blob(self, server, service):
+        """Test direct uploads are staged, hashed on confirm and only then moved to the digest path"""
+        data = _pdf("direct")
+        digest = hashlib.sha256(data).hexdigest()
+
+        issued = service.create_upload_url(1, "doc.pdf", "application/pdf", len(data))
+        assert issued["path"].startswith("uploads/")
+        assert service.storage.upload_blob(issued["path"], data, "application/pdf", len(data)) is True
+        created = service.confirm_upload(1, "doc.pdf", "application/pdf", len(data), digest, 7, issued["path"])
+
+        stored = server.objects[Config.STORAGE_BUCKET]
+        assert created["file_path"].startswith(f"blobs/{digest[:2]}/")
+        assert list(stored) == [created["file_path"]]
+
+        # Different bytes declared under the same digest are rejected and never replace the blob
+        forged = service.create_upload_url(2, "doc.pdf", "application/pdf", len(data))
+        service.storage.upload_blob(forged["path"], _pdf("forge!"), "application/pdf", len(data))
+        with pytest.raises(UploadVerificationError):
+            service.confirm_upload(2, "doc.pdf", "application/pdf", len(data), digest, 7, forged["path"])
+        assert stored[created["file_path"]]["data"] == data
+
+    def test_injected_latency(self):
+        """Test every request is delayed by the configured latency"""
+        with FakeSupabase(latency_ms=50) as fake:
+            response = requests.get(f"{fake.url}/rest/v1/task_attachments?select=*", timeout=5)
+        assert response.status_code == 200
+        assert response.elapsed.total_seconds() >= 0.05
+
+
+@pytest.mark.unit
+class TestBenchmarkReport:
+    """Latency summaries reported by the benchmark"""
+
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        assert percentile(values, 50) == 0.05
+        assert percentile(values, 95) == 0.095
+        assert percentile(values, 99) == 0.099
+        assert percentile([], 99) == 0.0
+
+    def test_summarize(self):
+        result = summarize("list", [0.002, 0.001, 0.003], 0.5, 1)
+        assert result["ops"] == 3
+        assert result["errors"] == 1
+        assert result["ops_per_s"] == 6.0
+        assert result["p50_ms"] == 2.0
+        assert result["max_ms"] == 3.0
+
+    @pytest.mark.integration
+    def test_benchmark_runs_all_scenarios(self, monkeypatch, capsys):
+        monkeypatch.setattr(Config, "SUPABASE_URL", Config.SUPABASE_URL)
+        monkeypatch.setattr(Config, "SUPABASE_SERVICE_KEY", Config.SUPABASE_SERVICE_KEY)
+        monkeypatch.setattr(Config, "STORAGE_BACKEND", Config.STORAGE_BACKEND)
+
+        code = main(["--requests", "4", "--concurrency", "2", "--payload-bytes", "256",
+                     "--attachments-per-task", "2", "--batch-size", "2", "--json"])
+
+        assert code == 0
+        assert '"scenario": "delete"' in capsys.readouterr().out
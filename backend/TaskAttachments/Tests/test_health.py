@@ -41,5 +41,13 @@ class TestHealthEndpoint:
         assert response.content_type == 'application/json'
 
 
+    def test_health_endpoint_is_not_compressed(self, client):
+        """Small JSON bodies are sent uncompressed but still vary on Accept-Encoding"""
+        response = client.get('/api/task-attachments/health', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+
 if __name__ == "__main__":
     pytest.main([__file__])
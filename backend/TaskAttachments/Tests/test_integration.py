@@ -6,12 +6,17 @@ from unittest.mock import patch, Mock
 from datetime import datetime, timezone
 from io import BytesIO
 
+from werkzeug.datastructures import FileStorage
+
 # Add the parent directory to the path to enable imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
-from Services.AttachmentService import AttachmentService
+from Services.AttachmentService import AttachmentService, encode_cursor
 from Services.StorageService import StorageService
+from Services.ResumableUploadService import ResumableUploadService
+from Services.LocalStorageService import LocalStorageService
+from config import Config, DEFAULT_SECRET_KEY
 from Repositories.AttachmentRepository import AttachmentRepository
 from Models.TaskAttachment import TaskAttachment
 from exceptions import (
@@ -19,6 +24,7 @@ from exceptions import (
     FileSizeExceededError,
     StorageQuotaExceededError,
     AttachmentNotFoundError,
+    UploadVerificationError,
 )
 
 
@@ -45,7 +51,7 @@ class TestAttachmentIntegration:
         file_storage = Mock()
         file_storage.filename = "test.pdf"
         file_storage.mimetype = "application/pdf"
-        file_storage.read.return_value = b"test file content"
+        file_storage.read.return_value = b"%PDF-1.7\ntest pdf"
         return file_storage
 
     def test_health_endpoint(self, client):
@@ -76,7 +82,7 @@ class TestAttachmentIntegration:
 
         # Create test data
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1',
             'uploaded_by': '1'
         }
@@ -108,7 +114,7 @@ class TestAttachmentIntegration:
     def test_upload_endpoint_missing_task_id(self, client, mock_file_storage):
         """Test upload endpoint with missing task_id"""
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'uploaded_by': '1'
         }
 
@@ -124,7 +130,7 @@ class TestAttachmentIntegration:
     def test_upload_endpoint_invalid_task_id(self, client, mock_file_storage):
         """Test upload endpoint with invalid task_id"""
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': 'invalid',
             'uploaded_by': '1'
         }
@@ -141,7 +147,7 @@ class TestAttachmentIntegration:
     def test_upload_endpoint_missing_uploaded_by(self, client, mock_file_storage):
         """Test upload endpoint with missing uploaded_by"""
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1'
         }
 
@@ -157,7 +163,7 @@ class TestAttachmentIntegration:
     def test_upload_endpoint_invalid_uploaded_by(self, client, mock_file_storage):
         """Test upload endpoint with invalid uploaded_by"""
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1',
             'uploaded_by': 'invalid'
         }
@@ -179,7 +185,7 @@ class TestAttachmentIntegration:
         mock_service.upload_attachment.side_effect = InvalidFileTypeError("Invalid file format. Only PDF and Excel files are allowed.")
 
         data = {
-            'file': (BytesIO(b'test file content'), 'test.txt'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.txt'),
             'task_id': '1',
             'uploaded_by': '1'
         }
@@ -201,7 +207,7 @@ class TestAttachmentIntegration:
         mock_service.upload_attachment.side_effect = FileSizeExceededError("File size exceeds 50MB limit.")
 
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1',
             'uploaded_by': '1'
         }
@@ -226,7 +232,7 @@ class TestAttachmentIntegration:
         )
 
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1',
             'uploaded_by': '1'
         }
@@ -248,7 +254,7 @@ class TestAttachmentIntegration:
         mock_service.upload_attachment.side_effect = Exception("Database connection failed")
 
         data = {
-            'file': (BytesIO(b'test file content'), 'test.pdf'),
+            'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
             'task_id': '1',
             'uploaded_by': '1'
         }
@@ -301,6 +307,42 @@ class TestAttachmentIntegration:
         assert response_data[1]['id'] == 'test-id-2'
         mock_service.list_attachments_for_task.assert_called_once_with(1)
 
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_list_attachments_endpoint_paginated(self, mock_service_class, client):
+        """Test limit/cursor/fields/urls switch the listing to a page"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.list_attachments_page.return_value = {"items": [{"file_name": "a.pdf"}], "next_cursor": "abc"}
+
+        response = client.get('/api/task-attachments/task/1?limit=10&cursor=xyz&fields=file_name,file_size&urls=false')
+
+        assert response.status_code == 200
+        assert response.get_json() == {"items": [{"file_name": "a.pdf"}], "next_cursor": "abc"}
+        mock_service.list_attachments_page.assert_called_once_with(
+            1, limit=10, cursor='xyz', fields=['file_name', 'file_size'], include_urls=False
+        )
+        mock_service.list_attachments_for_task.assert_not_called()
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_list_attachments_endpoint_bad_page_params(self, mock_service_class, client):
+        """Test invalid limit or cursor is a 400"""
+        mock_service_class.return_value.list_attachments_page.side_effect = ValueError("Invalid cursor")
+
+        assert client.get('/api/task-attachments/task/1?limit=abc').status_code == 400
+        assert client.get('/api/task-attachments/task/1?cursor=bad').status_code == 400
+
+    @patch('Services.AttachmentService.get_storage_backend')
+    @patch('Services.AttachmentService.AttachmentRepository')
+    def test_list_attachments_endpoint_rejects_filter_injection(self, mock_repo_class, mock_storage, client):
+        """Test a cursor whose id is not a UUID never reaches the repository filter"""
+        cursor = encode_cursor("2024-01-02T00:00:00+00:00", 'x",id.gt.0)')
+
+        response = client.get(f'/api/task-attachments/task/1?cursor={cursor}')
+
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Invalid cursor'}
+        mock_repo_class.return_value.find_page_by_task_id.assert_not_called()
+
     @patch('Controllers.AttachmentController.AttachmentService')
     def test_list_attachments_endpoint_server_error(self, mock_service_class, client):
         """Test list attachments endpoint with server error"""
@@ -315,6 +357,31 @@ class TestAttachmentIntegration:
         assert 'error' in response_data
         assert 'Database error' in response_data['error']
 
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_list_attachments_for_tasks_endpoint(self, mock_service_class, client):
+        """Test batch metadata endpoint dedups ids and passes include_urls"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.list_attachments_for_tasks.return_value = {
+            "1": {"count": 0, "total_size": 0, "attachments": []},
+            "2": {"count": 0, "total_size": 0, "attachments": []},
+        }
+
+        response = client.post('/api/task-attachments/tasks', json={"task_ids": [1, "2", 1]})
+
+        assert response.status_code == 200
+        assert set(response.get_json().keys()) == {"1", "2"}
+        mock_service.list_attachments_for_tasks.assert_called_once_with([1, 2], include_urls=False)
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_list_attachments_for_tasks_endpoint_validation(self, mock_service_class, client):
+        """Test batch metadata endpoint rejects bad input"""
+        assert client.post('/api/task-attachments/tasks', json={}).status_code == 400
+        assert client.post('/api/task-attachments/tasks', json={"task_ids": ["x"]}).status_code == 400
+        too_many = list(range(Config.MAX_BATCH_TASK_IDS + 1))
+        assert client.post('/api/task-attachments/tasks', json={"task_ids": too_many}).status_code == 400
+        mock_service_class.return_value.list_attachments_for_tasks.assert_not_called()
+
     @patch('Controllers.AttachmentController.AttachmentService')
     def test_get_download_url_endpoint_success(self, mock_service_class, client):
         """Test successful get download URL endpoint"""
@@ -452,6 +519,189 @@ class TestAttachmentIntegration:
         assert 'error' in response_data
         assert 'Database error' in response_data['error']
 
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_upload_url_endpoint_success(self, mock_service_class, client):
+        """Test signed upload URL endpoint"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_upload_url.return_value = {
+            "path": "uploads/" + "0" * 32, "upload_url": "https://storage/upload?token=t", "token": "t"
+        }
+
+        response = client.post('/api/task-attachments/upload-url', json={
+            "task_id": "1", "file_name": "test.pdf", "file_size": 1024, "content_type": "application/pdf",
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()["upload_url"] == "https://storage/upload?token=t"
+        mock_service.create_upload_url.assert_called_once_with(1, "test.pdf", "application/pdf", 1024)
+
+    def test_upload_url_endpoint_validation(self, client):
+        """Test signed upload URL endpoint rejects malformed bodies"""
+        response = client.post('/api/task-attachments/upload-url')
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Request body is required'
+
+        base = {"task_id": 1, "file_name": "test.pdf", "file_size": 1024}
+        for override, message in [
+            ({"task_id": "abc"}, 'task_id must be an integer'),
+            ({"file_size": None}, 'file_size is required'),
+            ({"file_name": ""}, 'file_name is required'),
+        ]:
+            response = client.post('/api/task-attachments/upload-url', json={**base, **override})
+            assert response.status_code == 400
+            assert response.get_json()['error'] == message
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_upload_url_endpoint_quota_exceeded(self, mock_service_class, client):
+        """Test signed upload URL endpoint surfaces quota errors before upload"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.create_upload_url.side_effect = StorageQuotaExceededError("Total storage limit (50MB) exceeded", current_usage_bytes=0)
+
+        response = client.post('/api/task-attachments/upload-url', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024,
+        })
+
+        assert response.status_code == 400
+        assert 'Total storage limit' in response.get_json()['error']
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_confirm_endpoint_success(self, mock_service_class, client):
+        """Test confirm endpoint registers the attachment"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.confirm_upload.return_value = {"id": "test-id", "task_id": 1}
+
+        response = client.post('/api/task-attachments/confirm', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024,
+            "content_type": "application/pdf", "sha256": "ab" * 32, "path": "uploads/" + "0" * 32,
+        }, headers={'X-User-Id': '5'})
+
+        assert response.status_code == 201
+        assert response.get_json()["id"] == "test-id"
+        mock_service.confirm_upload.assert_called_once_with(
+            1, "test.pdf", "application/pdf", 1024, "ab" * 32, 5, "uploads/" + "0" * 32
+        )
+
+    def test_confirm_endpoint_requires_upload_path(self, client):
+        """Test confirm endpoint needs the staged upload path, not just a digest"""
+        response = client.post('/api/task-attachments/confirm', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024, "sha256": "ab" * 32, "uploaded_by": 5,
+        })
+
+        assert response.status_code == 400
+        assert 'path is required' in response.get_json()['error']
+
+    def test_confirm_endpoint_requires_digest(self, client):
+        """Test confirm endpoint rejects a missing or malformed sha256"""
+        response = client.post('/api/task-attachments/confirm', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024, "sha256": "not-a-digest", "uploaded_by": 5,
+            "path": "uploads/" + "0" * 32,
+        })
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'sha256 must be a hex-encoded SHA-256 digest'
+
+    def test_confirm_endpoint_missing_uploaded_by(self, client):
+        """Test confirm endpoint requires uploaded_by"""
+        response = client.post('/api/task-attachments/confirm', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024, "sha256": "ab" * 32,
+        })
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'uploaded_by is required'
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_confirm_endpoint_upload_missing(self, mock_service_class, client):
+        """Test confirm endpoint when the file never reached storage"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.confirm_upload.side_effect = UploadVerificationError("Uploaded file not found in storage")
+
+        response = client.post('/api/task-attachments/confirm', json={
+            "task_id": 1, "file_name": "test.pdf", "file_size": 1024, "sha256": "ab" * 32, "uploaded_by": 5,
+            "path": "uploads/" + "0" * 32,
+        })
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Uploaded file not found in storage'
+
+    def test_resumable_upload_flow(self, client, tmp_path):
+        """Test create, partial append, resume and complete over HTTP"""
+        mock_attachments = Mock(spec=AttachmentService)
+        mock_attachments.store_attachment.return_value = {"id": "test-id", "task_id": 1}
+
+        with patch('Controllers.AttachmentController.ResumableUploadService',
+                   side_effect=lambda: ResumableUploadService(attachment_service=mock_attachments, staging_dir=str(tmp_path))):
+            response = client.post('/api/task-attachments/uploads', json={
+                "task_id": 1, "file_name": "big.pdf", "file_size": 8, "content_type": "application/pdf",
+            }, headers={'X-User-Id': '5'})
+            assert response.status_code == 201
+            upload_id = response.get_json()['upload_id']
+            assert response.headers['Upload-Offset'] == '0'
+
+            response = client.patch(f'/api/task-attachments/uploads/{upload_id}', data=b'%PDF',
+                                    headers={'Upload-Offset': '0', 'Content-Type': 'application/offset+octet-stream'})
+            assert response.status_code == 200
+            assert response.headers['Upload-Offset'] == '4'
+
+            # Retransmitting an already-received chunk is rejected with the real offset
+            response = client.patch(f'/api/task-attachments/uploads/{upload_id}', data=b'%PDF',
+                                    headers={'Upload-Offset': '0'})
+            assert response.status_code == 409
+            assert response.get_json()['offset'] == 4
+
+            response = client.head(f'/api/task-attachments/uploads/{upload_id}')
+            assert response.headers['Upload-Offset'] == '4'
+
+            response = client.post(f'/api/task-attachments/uploads/{upload_id}/complete')
+            assert response.status_code == 409
+
+            client.patch(f'/api/task-attachments/uploads/{upload_id}', data=b'-1.7', headers={'Upload-Offset': '4'})
+            response = client.post(f'/api/task-attachments/uploads/{upload_id}/complete')
+            assert response.status_code == 201
+            assert response.get_json()['id'] == 'test-id'
+
+            response = client.get(f'/api/task-attachments/uploads/{upload_id}')
+            assert response.status_code == 404
+
+    @patch('Controllers.AttachmentController.AttachmentService')
+    def test_upload_endpoint_rejects_spoofed_content_while_parsing(self, mock_service_class, client):
+        """Test a file whose bytes contradict its type is rejected during body parsing"""
+        data = {
+            'file': (BytesIO(b'MZ\x90\x00' + b'\x00' * 20000), 'invoice.pdf', 'application/pdf'),
+            'task_id': '1',
+            'uploaded_by': '1',
+        }
+
+        response = client.post('/api/task-attachments/upload', data=data, content_type='multipart/form-data')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Invalid file format. Only PDF and Excel files are allowed.'
+        mock_service_class.return_value.upload_attachment.assert_not_called()
+
+    def test_resumable_upload_append_requires_offset(self, client):
+        """Test PATCH without Upload-Offset is rejected"""
+        response = client.patch('/api/task-attachments/uploads/' + '0' * 32, data=b'abcd')
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Upload-Offset header is required'
+
+    @patch('Controllers.AttachmentController.ResumableUploadService')
+    def test_resumable_upload_create_validation_error(self, mock_service_class, client):
+        """Test resumable upload creation surfaces validation errors"""
+        mock_service = Mock()
+        mock_service_class.return_value = mock_service
+        mock_service.create.side_effect = FileSizeExceededError("File size exceeds 50MB limit.")
+
+        response = client.post('/api/task-attachments/uploads', json={
+            "task_id": 1, "file_name": "big.pdf", "file_size": 60 * 1024 * 1024, "uploaded_by": 5,
+        })
+
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'File size exceeds 50MB limit.'
+
     def test_upload_endpoint_with_x_user_id_header(self, client):
         """Test upload endpoint using X-User-Id header"""
         with patch('Controllers.AttachmentController.AttachmentService') as mock_service_class:
@@ -469,7 +719,7 @@ class TestAttachmentIntegration:
             }
 
             data = {
-                'file': (BytesIO(b'test file content'), 'test.pdf'),
+                'file': (BytesIO(b'%PDF-1.7\ntest pdf'), 'test.pdf'),
                 'task_id': '1'
             }
 
@@ -489,6 +739,121 @@ class TestAttachmentIntegration:
             assert call_args[0][2] == 1  # uploaded_by parameter
 
 
+@pytest.mark.integration
+class TestLocalStorageFiles:
+    """Integration tests for files served by the local storage backend"""
+
+    @pytest.fixture
+    def local_storage(self, tmp_path):
+        with patch.object(Config, "STORAGE_BACKEND", "local"), patch.object(Config, "LOCAL_STORAGE_ROOT", str(tmp_path)), \
+                patch.object(Config, "SECRET_KEY", "test-signing-key"):
+            yield LocalStorageService()
+
+    @pytest.fixture
+    def client(self, local_storage):
+        app = create_app()
+        app.config['TESTING'] = True
+        return app.test_client()
+
+    def _path_and_query(self, url):
+        return url.split("://", 1)[1].split("/", 1)[1]
+
+    def test_download_with_range_and_conditional(self, client, local_storage):
+        """Test signed downloads support Range and If-None-Match"""
+        local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"0123456789"), "application/pdf", 10)
+        url = "/" + self._path_and_query(local_storage.get_signed_url("blobs/ab/abc.pdf", 60, download_name="Report.pdf"))
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data == b"0123456789"
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert "Report.pdf" in response.headers["Content-Disposition"]
+        etag = response.headers["ETag"]
+        response.close()
+
+        response = client.get(url, headers={"Range": "bytes=2-5"})
+        assert response.status_code == 206
+        assert response.data == b"2345"
+        assert response.headers["Content-Range"] == "bytes 2-5/10"
+        response.close()
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        response.close()
+
+    def test_download_rejects_bad_signature(self, client, local_storage):
+        """Test tampered or missing signatures are rejected"""
+        local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"data"), "application/pdf", 4)
+
+        response = client.get("/api/task-attachments/files/blobs/ab/abc.pdf?expires=9999999999&signature=bad")
+
+        assert response.status_code == 403
+
+    def test_signed_upload_put(self, client, local_storage):
+        """Test direct uploads to a signed local upload URL"""
+        url = "/" + self._path_and_query(local_storage.create_signed_upload_url("blobs/cd/cde.pdf")["upload_url"])
+
+        response = client.put(url, data=b"uploaded", content_type="application/pdf")
+        assert response.status_code == 200
+        assert local_storage.get_object_size("blobs/cd/cde.pdf") == 8
+
+        response = client.put(url, data=b"again", content_type="application/pdf")
+        assert response.status_code == 409
+
+    def test_signed_upload_put_size_limit(self, client, local_storage):
+        """Test signed uploads over MAX_FILE_SIZE_BYTES are refused and not stored"""
+        url = "/" + self._path_and_query(local_storage.create_signed_upload_url("blobs/cd/cde.pdf")["upload_url"])
+
+        with patch.object(Config, "MAX_FILE_SIZE_BYTES", 4):
+            response = client.put(url, data=b"too large", content_type="application/pdf")
+
+        assert response.status_code == 413
+        assert response.get_json()["statusCode"] == "413"
+        assert local_storage.get_object_size("blobs/cd/cde.pdf") is None
+
+    def test_local_backend_requires_secret_key(self, local_storage):
+        """Test the app refuses to sign local URLs with the built-in secret"""
+        with patch.object(Config, "SECRET_KEY", DEFAULT_SECRET_KEY):
+            with pytest.raises(RuntimeError, match="SECRET_KEY"):
+                create_app()
+
+    def test_bundle_download(self, client, local_storage):
+        """Test a task's attachments download as one streamed ZIP"""
+        import zipfile
+        local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"pdf-bytes"), "application/pdf", 9)
+        attachment = TaskAttachment(
+            id="att-1", task_id=1, file_name="Spec.pdf", file_path="blobs/ab/abc.pdf", file_size=9,
+            file_type="application/pdf", uploaded_by=1, uploaded_at=datetime.now(timezone.utc),
+        )
+        with patch('Services.AttachmentService.AttachmentRepository') as mock_repo_class:
+            mock_repo_class.return_value.find_by_task_id.return_value = [attachment]
+            response = client.get('/api/task-attachments/task/1/bundle')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/zip'
+        assert response.is_streamed
+        assert 'task-1-attachments.zip' in response.headers['Content-Disposition']
+        with zipfile.ZipFile(BytesIO(response.data)) as archive:
+            assert archive.read("Spec.pdf") == b"pdf-bytes"
+
+    def test_bundle_download_no_attachments(self, client, local_storage):
+        """Test bundle of a task without attachments returns 404"""
+        with patch('Services.AttachmentService.AttachmentRepository') as mock_repo_class:
+            mock_repo_class.return_value.find_by_task_id.return_value = []
+            response = client.get('/api/task-attachments/task/1/bundle')
+
+        assert response.status_code == 404
+
+    def test_files_not_served_for_supabase_backend(self, tmp_path):
+        """Test the files endpoint is inert unless the local backend is configured"""
+        app = create_app()
+        app.config['TESTING'] = True
+        with patch.object(Config, "STORAGE_BACKEND", "supabase"):
+            response = app.test_client().get("/api/task-attachments/files/blobs/ab/abc.pdf")
+
+        assert response.status_code == 404
+
+
 @pytest.mark.integration
 class TestAttachmentServiceIntegration:
     """Integration tests for AttachmentService with real dependencies"""
@@ -501,14 +866,10 @@ class TestAttachmentServiceIntegration:
     @pytest.fixture
     def sample_file_storage(self):
         """Sample file storage for testing"""
-        file_storage = Mock()
-        file_storage.filename = "test.pdf"
-        file_storage.mimetype = "application/pdf"
-        file_storage.read.return_value = b"test file content"
-        return file_storage
+        return FileStorage(stream=BytesIO(b"%PDF-1.7\ntest pdf"), filename="test.pdf", content_type="application/pdf")
 
     @patch('Services.AttachmentService.AttachmentRepository')
-    @patch('Services.AttachmentService.StorageService')
+    @patch('Services.AttachmentService.get_storage_backend')
     def test_upload_attachment_integration(self, mock_storage_class, mock_repo_class, attachment_service, sample_file_storage):
         """Test upload attachment with mocked dependencies"""
         # Mock repository
@@ -529,13 +890,19 @@ class TestAttachmentServiceIntegration:
         }
         mock_repo.create.return_value = mock_attachment
 
+        # Mock blob refcounts (content not stored yet)
+        mock_blobs = Mock()
+        mock_blobs.find_by_digest.return_value = None
+        mock_blobs.acquire.return_value = Mock(file_path="blobs/ab/abc.pdf")
+
         # Mock storage
         mock_storage = Mock()
         mock_storage_class.return_value = mock_storage
-        mock_storage.upload_file.return_value = ("1/1234567890-test.pdf", "bucket/1/1234567890-test.pdf")
+        mock_storage.generate_blob_path.return_value = "blobs/ab/abc.pdf"
 
         # Replace the service's dependencies with mocks
         attachment_service.repo = mock_repo
+        attachment_service.blobs = mock_blobs
         attachment_service.storage = mock_storage
 
         result = attachment_service.upload_attachment(1, sample_file_storage, 1)
@@ -547,11 +914,12 @@ class TestAttachmentServiceIntegration:
         assert "id" in result
         assert "uploaded_at" in result
         mock_repo.get_total_size_by_task.assert_called_once_with(1)
-        mock_storage.upload_file.assert_called_once()
+        mock_storage.upload_blob.assert_called_once()
+        mock_blobs.acquire.assert_called_once()
         mock_repo.create.assert_called_once()
 
     @patch('Services.AttachmentService.AttachmentRepository')
-    @patch('Services.AttachmentService.StorageService')
+    @patch('Services.AttachmentService.get_storage_backend')
     def test_list_attachments_integration(self, mock_storage_class, mock_repo_class, attachment_service):
         """Test list attachments with mocked dependencies"""
         # Mock repository
@@ -588,7 +956,7 @@ class TestAttachmentServiceIntegration:
         mock_storage.get_signed_url.assert_called_once()
 
     @patch('Services.AttachmentService.AttachmentRepository')
-    @patch('Services.AttachmentService.StorageService')
+    @patch('Services.AttachmentService.get_storage_backend')
     def test_delete_attachment_integration(self, mock_storage_class, mock_repo_class, attachment_service):
         """Test delete attachment with mocked dependencies"""
         # Mock repository
@@ -606,25 +974,23 @@ class TestAttachmentServiceIntegration:
             uploaded_at=datetime.now(timezone.utc)
         )
         mock_repo.delete.return_value = sample_attachment
-        # Mock reference counting to return 0 (no other references)
-        mock_repo.count_file_references.return_value = 0
 
-        # Mock storage
+        # Mock storage and the reclaimer queue
         mock_storage = Mock()
         mock_storage_class.return_value = mock_storage
+        mock_gc_queue = Mock()
 
         # Replace the service's dependencies with mocks
         attachment_service.repo = mock_repo
         attachment_service.storage = mock_storage
+        attachment_service.gc_queue = mock_gc_queue
 
         attachment_service.delete_attachment("test-id")
 
         mock_repo.delete.assert_called_once_with("test-id")
-        mock_repo.count_file_references.assert_called_once_with(
-            sample_attachment.file_path,
-            exclude_id="test-id"
-        )
-        mock_storage.delete_file.assert_called_once_with(sample_attachment.file_path)
+        # Storage is cleaned up by the background reclaimer
+        mock_gc_queue.enqueue.assert_called_once_with([sample_attachment.file_path])
+        mock_storage.delete_file.assert_not_called()
 
 
 if __name__ == "__main__":
@@ -2,23 +2,48 @@ import pytest
 import tempfile
 import os
 import sys
-from unittest.mock import Mock, patch, MagicMock
-from datetime import datetime, timezone
+from unittest.mock import Mock, AsyncMock, patch
+from datetime import datetime, timedelta, timezone
 from io import BytesIO
+import asyncio
+import hashlib
+import httpx
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Add the parent directory to the path to enable imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from Services.AttachmentService import AttachmentService
+from Services.AttachmentService import AttachmentService, encode_cursor, decode_cursor
 from Services.StorageService import StorageService
+from Services.ResumableUploadService import ResumableUploadService
+from Services.BundleService import BundleService
+from Services.StorageReclaimer import StorageReclaimer, _run_forever, _try_lock
+from Services.ContentSniffer import SniffingSpool, sniff_mime_type, check_content_type, spool_multipart_upload
+from Services.AsyncAttachmentService import AsyncAttachmentService
+from Services.AsyncStorageService import AsyncStorageService
+from Services.LocalStorageService import LocalStorageService
+from Services.StorageBackend import get_storage_backend
+from config import Config
 from Repositories.AttachmentRepository import AttachmentRepository
+from Repositories.BlobRepository import BlobRepository
+from Repositories.GcQueueRepository import GcQueueRepository
 from Models.TaskAttachment import TaskAttachment
+from Models.AttachmentBlob import AttachmentBlob
 from exceptions import (
     InvalidFileTypeError,
     FileSizeExceededError,
     StorageQuotaExceededError,
     AttachmentNotFoundError,
+    UploadVerificationError,
+    UploadSessionNotFoundError,
+    UploadOffsetMismatchError,
+    UploadIncompleteError,
+    BlobReclaimingError,
 )
+from postgrest.exceptions import APIError
 
 
 @pytest.mark.unit
@@ -36,21 +61,33 @@ class TestAttachmentService:
         return Mock(spec=StorageService)
 
     @pytest.fixture
-    def attachment_service(self, mock_repo, mock_storage):
+    def mock_blobs(self):
+        """Mock BlobRepository"""
+        return Mock(spec=BlobRepository)
+
+    @pytest.fixture
+    def mock_gc_queue(self):
+        """Mock GcQueueRepository"""
+        return Mock(spec=GcQueueRepository)
+
+    @pytest.fixture
+    def attachment_service(self, mock_repo, mock_blobs, mock_storage, mock_gc_queue):
         """AttachmentService with mocked dependencies"""
         service = AttachmentService()
         service.repo = mock_repo
+        service.blobs = mock_blobs
         service.storage = mock_storage
+        service.gc_queue = mock_gc_queue
         return service
 
     @pytest.fixture
     def sample_file_storage(self):
-        """Mock file storage object"""
-        file_storage = Mock()
-        file_storage.filename = "test.pdf"
-        file_storage.mimetype = "application/pdf"
-        file_storage.read.return_value = b"test file content"
-        return file_storage
+        """Werkzeug file storage object"""
+        return FileStorage(stream=BytesIO(b"%PDF-1.7\ntest pdf"), filename="test.pdf", content_type="application/pdf")
+
+    @pytest.fixture
+    def sample_digest(self):
+        return hashlib.sha256(b"%PDF-1.7\ntest pdf").hexdigest()
 
     @pytest.fixture
     def sample_attachment(self):
@@ -108,11 +145,14 @@ class TestAttachmentService:
         with pytest.raises(StorageQuotaExceededError, match="Total storage limit \\(50MB\\) exceeded"):
             attachment_service._validate_file("test.pdf", "application/pdf", 15 * 1024 * 1024, 1)
 
-    def test_upload_attachment_success(self, attachment_service, sample_file_storage):
+    def test_upload_attachment_success(self, attachment_service, sample_file_storage, sample_digest):
         """Test successful attachment upload"""
         # Mock repository and storage responses
+        blob_path = f"blobs/{sample_digest[:2]}/{sample_digest}.pdf"
         attachment_service.repo.get_total_size_by_task.return_value = 0
-        attachment_service.storage.upload_file.return_value = ("1/1234567890-test.pdf", "bucket/1/1234567890-test.pdf")
+        attachment_service.blobs.find_by_digest.return_value = None
+        attachment_service.storage.generate_blob_path.return_value = blob_path
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=sample_digest, file_path=blob_path, file_size=17, ref_count=1)
         
         mock_attachment = Mock()
         mock_attachment.to_dict.return_value = {
@@ -132,32 +172,255 @@ class TestAttachmentService:
         assert result["id"] == "test-id"
         assert result["task_id"] == 1
         assert result["file_name"] == "test.pdf"
-        attachment_service.storage.upload_file.assert_called_once()
-        attachment_service.repo.create.assert_called_once()
+        attachment_service.storage.upload_blob.assert_called_once()
+        assert attachment_service.storage.upload_blob.call_args[0][0] == blob_path
+        attachment_service.blobs.acquire.assert_called_once_with(sample_digest, blob_path, 17, "application/pdf")
+        record = attachment_service.repo.create.call_args[0][0]
+        assert record["content_hash"] == sample_digest
+        assert record["file_path"] == blob_path
+        assert record["file_size"] == 17
+
+    def test_upload_attachment_existing_digest_skips_upload(self, attachment_service, sample_file_storage, sample_digest):
+        """Test uploading content that is already stored only adds a reference"""
+        existing = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/existing.pdf", file_size=17, ref_count=3)
+        attachment_service.repo.get_total_size_by_task.return_value = 0
+        attachment_service.blobs.find_by_digest.return_value = existing
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/existing.pdf", file_size=17, ref_count=4)
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "test-id"}))
+
+        attachment_service.upload_attachment(2, sample_file_storage, 1)
+
+        attachment_service.storage.upload_blob.assert_not_called()
+        attachment_service.blobs.find_by_digest.assert_called_once_with(sample_digest)
+        assert attachment_service.repo.create.call_args[0][0]["file_path"] == "blobs/ab/existing.pdf"
+
+    @patch("Services.AttachmentService.time.sleep")
+    def test_upload_attachment_waits_out_a_reclaim(self, mock_sleep, attachment_service, sample_file_storage, sample_digest):
+        """Test a blob claimed by the reclaimer is acquired again and its object re-uploaded"""
+        existing = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/existing.pdf", file_size=17, ref_count=0)
+        attachment_service.repo.get_total_size_by_task.return_value = 0
+        attachment_service.blobs.find_by_digest.return_value = existing
+        attachment_service.blobs.acquire.side_effect = [
+            BlobReclaimingError("being reclaimed"),
+            AttachmentBlob(digest=sample_digest, file_path="blobs/ab/existing.pdf", file_size=17, ref_count=1),
+        ]
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "test-id"}))
+        restored = {}
+        attachment_service.storage.upload_blob.side_effect = lambda path, stream, *_: restored.setdefault(path, stream.read())
+
+        attachment_service.upload_attachment(2, sample_file_storage, 1)
+
+        assert attachment_service.blobs.acquire.call_count == 2
+        mock_sleep.assert_called_once_with(Config.BLOB_RECLAIM_RETRY_SECONDS)
+        assert list(restored) == ["blobs/ab/existing.pdf"]
+        assert hashlib.sha256(restored["blobs/ab/existing.pdf"]).hexdigest() == sample_digest
+
+    @patch("Services.AttachmentService.time.sleep")
+    def test_upload_attachment_gives_up_on_a_stuck_reclaim(self, mock_sleep, attachment_service, sample_file_storage, sample_digest):
+        """Test acquiring stops after BLOB_RECLAIM_RETRIES and nothing is recorded"""
+        attachment_service.repo.get_total_size_by_task.return_value = 0
+        attachment_service.blobs.find_by_digest.return_value = None
+        attachment_service.blobs.acquire.side_effect = BlobReclaimingError("being reclaimed")
+
+        with patch.object(Config, "BLOB_RECLAIM_RETRIES", 2):
+            with pytest.raises(BlobReclaimingError):
+                attachment_service.upload_attachment(1, sample_file_storage, 1)
+
+        assert attachment_service.blobs.acquire.call_count == 3
+        attachment_service.repo.create.assert_not_called()
+
+    def test_upload_attachment_validation_failure_stores_nothing(self, attachment_service):
+        """Test a rejected file is neither uploaded nor referenced"""
+        attachment_service.repo.get_total_size_by_task.return_value = 0
+        file_storage = FileStorage(stream=BytesIO(b"plain text"), filename="notes.txt", content_type="text/plain")
+
+        with pytest.raises(InvalidFileTypeError):
+            attachment_service.upload_attachment(1, file_storage, 1)
+
+        attachment_service.storage.upload_blob.assert_not_called()
+        attachment_service.blobs.acquire.assert_not_called()
 
-    def test_upload_attachment_repo_failure_cleanup(self, attachment_service, sample_file_storage):
-        """Test attachment upload with repository failure triggers storage cleanup"""
+    def test_upload_attachment_repo_failure_cleanup(self, attachment_service, sample_file_storage, sample_digest):
+        """Test attachment upload with repository failure releases the blob reference"""
         attachment_service.repo.get_total_size_by_task.return_value = 0
-        attachment_service.storage.upload_file.return_value = ("1/1234567890-test.pdf", "bucket/1/1234567890-test.pdf")
+        attachment_service.blobs.find_by_digest.return_value = None
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/test.pdf", file_size=17, ref_count=1)
+        attachment_service.blobs.release.return_value = 0
         attachment_service.repo.create.side_effect = Exception("Database error")
 
         with pytest.raises(Exception, match="Database error"):
             attachment_service.upload_attachment(1, sample_file_storage, 1)
 
-        # Verify storage cleanup was attempted
-        attachment_service.storage.delete_file.assert_called_once_with("1/1234567890-test.pdf")
+        # Verify the reference was dropped and the now-unreferenced blob queued for the reclaimer
+        attachment_service.blobs.release.assert_called_once_with(sample_digest)
+        attachment_service.gc_queue.enqueue.assert_called_once_with(["blobs/ab/test.pdf"])
 
-    def test_upload_attachment_storage_cleanup_failure(self, attachment_service, sample_file_storage):
+    def test_upload_attachment_storage_cleanup_failure(self, attachment_service, sample_file_storage, sample_digest):
         """Test attachment upload with storage cleanup failure doesn't mask original error"""
         attachment_service.repo.get_total_size_by_task.return_value = 0
-        attachment_service.storage.upload_file.return_value = ("1/1234567890-test.pdf", "bucket/1/1234567890-test.pdf")
+        attachment_service.blobs.find_by_digest.return_value = None
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/test.pdf", file_size=17, ref_count=1)
+        attachment_service.blobs.release.return_value = 0
         attachment_service.repo.create.side_effect = Exception("Database error")
-        attachment_service.storage.delete_file.side_effect = Exception("Storage cleanup failed")
+        attachment_service.gc_queue.enqueue.side_effect = Exception("Storage cleanup failed")
 
         # Original database error should still be raised
         with pytest.raises(Exception, match="Database error"):
             attachment_service.upload_attachment(1, sample_file_storage, 1)
 
+    STAGED = "uploads/" + "0" * 32
+
+    @staticmethod
+    def _stage(service, data, digest=None):
+        """Make `data` the staged object and return its digest"""
+        service.repo.get_total_size_by_task.return_value = 0
+        service.storage.is_staging_path.side_effect = StorageService.is_staging_path
+        service.storage.get_object_size.return_value = len(data)
+        service.storage.iter_object.side_effect = lambda path, size: iter([data[i:i + 4] for i in range(0, len(data), 4)])
+        return digest or hashlib.sha256(data).hexdigest()
+
+    def test_create_upload_url_stages_at_random_path(self, attachment_service):
+        """Test the signed upload URL points at a staging path, never at the digest path"""
+        attachment_service.repo.get_total_size_by_task.return_value = 0
+        attachment_service.storage.generate_staging_path.return_value = self.STAGED
+        attachment_service.storage.create_signed_upload_url.return_value = {
+            "upload_url": "https://storage/upload?token=t", "token": "t", "path": self.STAGED
+        }
+
+        result = attachment_service.create_upload_url(1, "test.pdf", "application/pdf", 1024)
+
+        assert result == {"path": self.STAGED, "upload_url": "https://storage/upload?token=t", "token": "t"}
+        attachment_service.storage.create_signed_upload_url.assert_called_once_with(self.STAGED)
+        attachment_service.storage.generate_blob_path.assert_not_called()
+        attachment_service.blobs.find_by_digest.assert_not_called()
+        attachment_service.repo.create.assert_not_called()
+
+    def test_staging_paths_are_random_and_recognised(self):
+        """Test staging paths are unguessable and distinct from blob paths"""
+        first, second = StorageService.generate_staging_path(), StorageService.generate_staging_path()
+
+        assert first != second
+        assert StorageService.is_staging_path(first)
+        assert not StorageService.is_staging_path(StorageService.generate_blob_path("ab" * 32, "x.pdf"))
+        assert not StorageService.is_staging_path("uploads/../blobs/ab/x.pdf")
+
+    def test_create_upload_url_validates_up_front(self, attachment_service):
+        """Test type, size and quota are rejected before any URL is issued"""
+        attachment_service.repo.get_total_size_by_task.return_value = 45 * 1024 * 1024
+
+        with pytest.raises(StorageQuotaExceededError):
+            attachment_service.create_upload_url(1, "test.pdf", "application/pdf", 10 * 1024 * 1024)
+        with pytest.raises(InvalidFileTypeError):
+            attachment_service.create_upload_url(1, "test.exe", "application/x-msdownload", 10)
+
+        attachment_service.storage.create_signed_upload_url.assert_not_called()
+
+    def test_confirm_upload_verifies_and_moves_to_blob_path(self, attachment_service):
+        """Test confirm hashes the staged object and moves it to its digest path"""
+        data = b"%PDF-1.7\n" + b"x" * 40
+        digest = self._stage(attachment_service, data)
+        attachment_service.blobs.find_by_digest.return_value = None
+        attachment_service.storage.generate_blob_path.return_value = "blobs/ab/abc.pdf"
+        attachment_service.storage.move_object.return_value = True
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=digest, file_path="blobs/ab/abc.pdf", file_size=len(data), ref_count=1)
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "new-id"}))
+
+        result = attachment_service.confirm_upload(1, "test.pdf", "application/pdf", len(data), digest, 7, self.STAGED)
+
+        assert result == {"id": "new-id"}
+        attachment_service.storage.move_object.assert_called_once_with(self.STAGED, "blobs/ab/abc.pdf")
+        attachment_service.blobs.acquire.assert_called_once_with(digest, "blobs/ab/abc.pdf", len(data), "application/pdf")
+        record = attachment_service.repo.create.call_args[0][0]
+        assert record["content_hash"] == digest
+        assert record["uploaded_by"] == 7
+        attachment_service.gc_queue.enqueue.assert_not_called()
+
+    @patch("Services.AttachmentService.time.sleep")
+    def test_confirm_upload_restores_a_reclaimed_blob_from_staging(self, mock_sleep, attachment_service):
+        """Test a deduplicated confirm that races the reclaimer moves its staged copy into place"""
+        data = b"%PDF-1.7\n" + b"x" * 40
+        digest = self._stage(attachment_service, data)
+        attachment_service.blobs.find_by_digest.return_value = AttachmentBlob(digest=digest, file_path="blobs/ab/abc.pdf", file_size=len(data))
+        attachment_service.blobs.acquire.side_effect = [
+            BlobReclaimingError("being reclaimed"),
+            AttachmentBlob(digest=digest, file_path="blobs/ab/abc.pdf", file_size=len(data), ref_count=1),
+        ]
+        attachment_service.storage.move_object.return_value = True
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "new-id"}))
+
+        attachment_service.confirm_upload(1, "test.pdf", "application/pdf", len(data), digest, 7, self.STAGED)
+
+        attachment_service.storage.move_object.assert_called_once_with(self.STAGED, "blobs/ab/abc.pdf")
+        attachment_service.gc_queue.enqueue.assert_not_called()
+
+    def test_confirm_upload_digest_mismatch(self, attachment_service, sample_digest):
+        """Test bytes that do not hash to the declared digest never reach a blob"""
+        data = b"%PDF-1.7\n" + b"x" * 40
+        self._stage(attachment_service, data)
+        attachment_service.blobs.find_by_digest.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/abc.pdf", file_size=len(data))
+
+        with pytest.raises(UploadVerificationError, match="sha256"):
+            attachment_service.confirm_upload(1, "test.pdf", "application/pdf", len(data), sample_digest, 7, self.STAGED)
+
+        attachment_service.gc_queue.enqueue.assert_called_once_with([self.STAGED])
+        attachment_service.storage.move_object.assert_not_called()
+        attachment_service.blobs.acquire.assert_not_called()
+
+    def test_confirm_upload_requires_staging_path(self, attachment_service, sample_digest):
+        """Test a known digest alone (or a blob path) cannot be confirmed onto a task"""
+        self._stage(attachment_service, b"%PDF-1.7\n")
+
+        for path in (None, "", "blobs/ab/abc.pdf"):
+            with pytest.raises(UploadVerificationError, match="upload path"):
+                attachment_service.confirm_upload(1, "test.pdf", "application/pdf", 9, sample_digest, 7, path)
+
+        attachment_service.storage.get_object_size.assert_not_called()
+        attachment_service.blobs.acquire.assert_not_called()
+
+    def test_confirm_upload_content_mismatch(self, attachment_service):
+        """Test confirm sniffs the stored object and queues it for removal if it is not what was declared"""
+        data = b"MZ\x90\x00 not a pdf"
+        digest = self._stage(attachment_service, data)
+
+        with pytest.raises(InvalidFileTypeError):
+            attachment_service.confirm_upload(1, "test.pdf", "application/pdf", len(data), digest, 7, self.STAGED)
+
+        attachment_service.gc_queue.enqueue.assert_called_once_with([self.STAGED])
+        attachment_service.blobs.acquire.assert_not_called()
+
+    def test_confirm_upload_missing_object(self, attachment_service, sample_digest):
+        """Test confirm fails if the client never uploaded the file"""
+        self._stage(attachment_service, b"")
+        attachment_service.storage.get_object_size.return_value = None
+
+        with pytest.raises(UploadVerificationError, match="not found"):
+            attachment_service.confirm_upload(1, "test.pdf", "application/pdf", 1024, sample_digest, 7, self.STAGED)
+
+        attachment_service.blobs.acquire.assert_not_called()
+
+    def test_confirm_upload_size_mismatch(self, attachment_service, sample_digest):
+        """Test confirm fails if the stored object size differs from the declared size"""
+        self._stage(attachment_service, b"%PDF-1.7\n")
+
+        with pytest.raises(UploadVerificationError, match="size does not match"):
+            attachment_service.confirm_upload(1, "test.pdf", "application/pdf", 1024, sample_digest, 7, self.STAGED)
+
+        attachment_service.gc_queue.enqueue.assert_called_once_with([self.STAGED])
+
+    def test_confirm_upload_existing_content_is_deduplicated(self, attachment_service):
+        """Test verified content already stored only adds a reference; the staged copy is reclaimed"""
+        data = b"%PDF-1.7\n" + b"y" * 20
+        digest = self._stage(attachment_service, data)
+        attachment_service.blobs.find_by_digest.return_value = AttachmentBlob(digest=digest, file_path="blobs/ab/abc.pdf", file_size=len(data))
+        attachment_service.blobs.acquire.return_value = AttachmentBlob(digest=digest, file_path="blobs/ab/abc.pdf", file_size=len(data), ref_count=2)
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "new-id"}))
+
+        attachment_service.confirm_upload(1, "test.pdf", "application/pdf", len(data), digest, 7, self.STAGED)
+
+        attachment_service.storage.move_object.assert_not_called()
+        attachment_service.gc_queue.enqueue.assert_called_once_with([self.STAGED])
+        assert attachment_service.blobs.acquire.call_args[0][1] == "blobs/ab/abc.pdf"
+
     def test_list_attachments_for_task(self, attachment_service, sample_attachment):
         """Test listing attachments for a task"""
         attachment_service.repo.find_by_task_id.return_value = [sample_attachment]
@@ -171,6 +434,110 @@ class TestAttachmentService:
         attachment_service.repo.find_by_task_id.assert_called_once_with(1)
         attachment_service.storage.get_signed_url.assert_called_once()
 
+    @staticmethod
+    def _id(i):
+        return f"00000000-0000-4000-8000-{i:012d}"
+
+    def _records(self, n):
+        return [
+            {"id": self._id(i), "uploaded_at": f"2024-01-{i + 1:02d}T00:00:00+00:00", "file_name": f"f{i}.pdf",
+             "file_path": f"1/f{i}.pdf", "file_size": i, "content_hash": None}
+            for i in range(n)
+        ]
+
+    def test_list_attachments_page_first_page(self, attachment_service):
+        """Test a page fetches one extra row to detect more and returns a cursor"""
+        attachment_service.repo.find_page_by_task_id.return_value = self._records(3)
+        attachment_service.storage.get_signed_url.return_value = "https://signed-url.com/file"
+
+        page = attachment_service.list_attachments_page(1, limit=2)
+
+        assert [i["id"] for i in page["items"]] == [self._id(0), self._id(1)]
+        assert page["items"][0]["download_url"] == "https://signed-url.com/file"
+        assert decode_cursor(page["next_cursor"]) == ("2024-01-02T00:00:00+00:00", self._id(1))
+        args, kwargs = attachment_service.repo.find_page_by_task_id.call_args
+        assert args == (1, 3)
+        assert kwargs["after"] is None
+        assert attachment_service.storage.get_signed_url.call_count == 2
+
+    def test_list_attachments_page_last_page_and_cursor(self, attachment_service):
+        """Test the cursor is passed through and the last page has no next cursor"""
+        attachment_service.repo.find_page_by_task_id.return_value = self._records(1)
+        cursor = encode_cursor("2024-01-02T00:00:00+00:00", self._id(1))
+
+        page = attachment_service.list_attachments_page(1, limit=2, cursor=cursor, include_urls=False)
+
+        assert page["next_cursor"] is None
+        assert attachment_service.repo.find_page_by_task_id.call_args[1]["after"] == ("2024-01-02T00:00:00+00:00", self._id(1))
+        attachment_service.storage.get_signed_url.assert_not_called()
+
+    def test_list_attachments_page_projection(self, attachment_service):
+        """Test metadata-only projection selects only the requested columns plus cursor keys"""
+        attachment_service.repo.find_page_by_task_id.return_value = [{"id": "a", "uploaded_at": "2024-01-01T00:00:00+00:00", "file_name": "a.pdf"}]
+
+        page = attachment_service.list_attachments_page(1, fields=["file_name"], include_urls=False)
+
+        assert page["items"] == [{"file_name": "a.pdf"}]
+        assert attachment_service.repo.find_page_by_task_id.call_args[1]["columns"] == "id,uploaded_at,file_name"
+        attachment_service.storage.get_signed_url.assert_not_called()
+
+    def test_list_attachments_page_limits_and_validation(self, attachment_service):
+        """Test page size is clamped and bad fields or cursors are rejected"""
+        attachment_service.repo.find_page_by_task_id.return_value = []
+
+        attachment_service.list_attachments_page(1, limit=100000, include_urls=False)
+        assert attachment_service.repo.find_page_by_task_id.call_args[0][1] == Config.LIST_PAGE_SIZE_MAX + 1
+
+        with pytest.raises(ValueError, match="Unknown fields"):
+            attachment_service.list_attachments_page(1, fields=["password"])
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            attachment_service.list_attachments_page(1, cursor="not-a-cursor")
+
+    @pytest.mark.parametrize("uploaded_at, attachment_id", [
+        ("2024-01-02T00:00:00+00:00", 'x",id.gt.0)'),
+        ("2024-01-02T00:00:00+00:00", 7),
+        ('2024-01-02",id.neq.0)', "00000000-0000-4000-8000-000000000001"),
+        (None, "00000000-0000-4000-8000-000000000001"),
+    ])
+    def test_decode_cursor_rejects_anything_but_timestamp_and_uuid(self, uploaded_at, attachment_id):
+        """Test cursor values that would reach the PostgREST filter unparsed are rejected"""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(encode_cursor(uploaded_at, attachment_id))
+
+    def test_decode_cursor_normalises_values(self):
+        """Test decoded cursor values are re-serialized from their parsed form"""
+        cursor = encode_cursor("2024-01-02T00:00:00Z", "{00000000-0000-4000-8000-0000000000AB}")
+
+        assert decode_cursor(cursor) == ("2024-01-02T00:00:00+00:00", "00000000-0000-4000-8000-0000000000ab")
+
+    def test_list_attachments_for_tasks_groups_without_signing(self, attachment_service, sample_attachment):
+        """Test batch listing groups per task and skips URL signing by default"""
+        other = TaskAttachment(
+            id="other-id", task_id=2, file_name="b.pdf", file_path="2/b.pdf", file_size=2048,
+            file_type="application/pdf", uploaded_by=1, uploaded_at=datetime.now(timezone.utc),
+        )
+        attachment_service.repo.find_by_task_ids.return_value = [sample_attachment, other]
+
+        result = attachment_service.list_attachments_for_tasks([1, 2, 3])
+
+        assert result["1"]["count"] == 1
+        assert result["1"]["total_size"] == 1024
+        assert result["1"]["attachments"][0]["id"] == "test-attachment-id"
+        assert "download_url" not in result["1"]["attachments"][0]
+        assert result["2"]["count"] == 1
+        assert result["3"] == {"count": 0, "total_size": 0, "attachments": []}
+        attachment_service.repo.find_by_task_ids.assert_called_once_with([1, 2, 3])
+        attachment_service.storage.get_signed_url.assert_not_called()
+
+    def test_list_attachments_for_tasks_with_urls(self, attachment_service, sample_attachment):
+        """Test batch listing signs URLs when asked"""
+        attachment_service.repo.find_by_task_ids.return_value = [sample_attachment]
+        attachment_service.storage.get_signed_url.return_value = "https://signed-url.com/file"
+
+        result = attachment_service.list_attachments_for_tasks([1], include_urls=True)
+
+        assert result["1"]["attachments"][0]["download_url"] == "https://signed-url.com/file"
+
     def test_get_attachment(self, attachment_service, sample_attachment):
         """Test getting a single attachment"""
         attachment_service.repo.find_by_id.return_value = sample_attachment
@@ -192,46 +559,62 @@ class TestAttachmentService:
         attachment_service.repo.find_by_id.assert_called_once_with("test-attachment-id")
         attachment_service.storage.get_signed_url.assert_called_once_with(sample_attachment.file_path, expires_in_seconds=3600)
 
-    def test_delete_attachment_with_no_references(self, attachment_service, sample_attachment):
-        """Test attachment deletion when no other tasks reference the file"""
+    def test_delete_legacy_attachment_queues_path(self, attachment_service, sample_attachment):
+        """Test legacy attachment deletion leaves storage cleanup to the reclaimer"""
         attachment_service.repo.delete.return_value = sample_attachment
-        attachment_service.repo.count_file_references.return_value = 0
 
         attachment_service.delete_attachment("test-attachment-id")
 
         attachment_service.repo.delete.assert_called_once_with("test-attachment-id")
-        attachment_service.repo.count_file_references.assert_called_once_with(
-            sample_attachment.file_path,
-            exclude_id="test-attachment-id"
-        )
-        attachment_service.storage.delete_file.assert_called_once_with(sample_attachment.file_path)
+        attachment_service.gc_queue.enqueue.assert_called_once_with([sample_attachment.file_path])
+        # No reference scan or storage call in the request path
+        attachment_service.storage.delete_file.assert_not_called()
 
-    def test_delete_attachment_with_references(self, attachment_service, sample_attachment):
-        """Test attachment deletion when other tasks still reference the file"""
+    def test_delete_attachment_queue_failure_ignored(self, attachment_service, sample_attachment):
+        """Test attachment deletion succeeds even if queueing cleanup fails (reconciliation catches it)"""
         attachment_service.repo.delete.return_value = sample_attachment
-        attachment_service.repo.count_file_references.return_value = 2  # 2 other tasks still reference this file
+        attachment_service.gc_queue.enqueue.side_effect = Exception("Queue insert failed")
 
+        # Should not raise exception even if queueing fails
         attachment_service.delete_attachment("test-attachment-id")
 
         attachment_service.repo.delete.assert_called_once_with("test-attachment-id")
-        attachment_service.repo.count_file_references.assert_called_once_with(
-            sample_attachment.file_path,
-            exclude_id="test-attachment-id"
-        )
-        # Storage delete should NOT be called because other tasks reference the file
+
+    def test_delete_content_addressed_attachment_last_reference(self, attachment_service, sample_attachment):
+        """Test deleting the last reference to a blob queues it for removal without a reference scan"""
+        sample_attachment.content_hash = "abc123"
+        sample_attachment.file_path = "blobs/ab/abc123.pdf"
+        attachment_service.repo.delete.return_value = sample_attachment
+        attachment_service.blobs.release.return_value = 0
+
+        attachment_service.delete_attachment("test-attachment-id")
+
+        attachment_service.blobs.release.assert_called_once_with("abc123")
+        attachment_service.gc_queue.enqueue.assert_called_once_with(["blobs/ab/abc123.pdf"])
         attachment_service.storage.delete_file.assert_not_called()
 
-    def test_delete_attachment_storage_failure_ignored(self, attachment_service, sample_attachment):
-        """Test attachment deletion with storage failure is ignored"""
+    def test_delete_content_addressed_attachment_still_referenced(self, attachment_service, sample_attachment):
+        """Test deleting one of several references keeps the blob"""
+        sample_attachment.content_hash = "abc123"
         attachment_service.repo.delete.return_value = sample_attachment
-        attachment_service.repo.count_file_references.return_value = 0
-        attachment_service.storage.delete_file.side_effect = Exception("Storage delete failed")
+        attachment_service.blobs.release.return_value = 2
 
-        # Should not raise exception even if storage delete fails
         attachment_service.delete_attachment("test-attachment-id")
 
-        attachment_service.repo.delete.assert_called_once_with("test-attachment-id")
-        attachment_service.storage.delete_file.assert_called_once_with(sample_attachment.file_path)
+        attachment_service.gc_queue.enqueue.assert_not_called()
+        attachment_service.storage.delete_file.assert_not_called()
+
+    def test_get_download_url_content_addressed_uses_original_name(self, attachment_service, sample_attachment):
+        """Test signed URLs for digest paths carry the original file name"""
+        sample_attachment.content_hash = "abc123"
+        attachment_service.repo.find_by_id.return_value = sample_attachment
+        attachment_service.storage.get_signed_url.return_value = "https://signed-url.com/file"
+
+        attachment_service.get_download_url("test-attachment-id")
+
+        attachment_service.storage.get_signed_url.assert_called_once_with(
+            sample_attachment.file_path, expires_in_seconds=3600, download_name="test.pdf"
+        )
 
     def test_copy_attachments_to_task_success(self, attachment_service):
         """Test successful attachment copying from source to target task"""
@@ -464,12 +847,192 @@ class TestAttachmentService:
         attachment_service.copy_attachments_to_task(1, 2)
 
         # Storage service should NOT be called at all
-        attachment_service.storage.upload_file.assert_not_called()
 
         # Verify the created record uses the same file_path
         call_args = attachment_service.repo.create.call_args[0][0]
         assert call_args["file_path"] == "1/123-file.pdf"
 
+    def test_copy_content_addressed_attachment_adds_blob_reference(self, attachment_service):
+        """Test copying a content-addressed attachment increments the blob refcount"""
+        source_attachment = TaskAttachment(
+            id="att-1",
+            task_id=1,
+            file_name="file.pdf",
+            file_path="blobs/ab/abc123.pdf",
+            file_size=1024,
+            file_type="application/pdf",
+            uploaded_by=5,
+            uploaded_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
+            content_hash="abc123"
+        )
+        attachment_service.repo.find_by_task_id.return_value = [source_attachment]
+        attachment_service.repo.create.return_value = Mock(to_dict=Mock(return_value={"id": "new-att"}))
+
+        attachment_service.copy_attachments_to_task(1, 2)
+
+        attachment_service.blobs.acquire.assert_called_once_with("abc123", "blobs/ab/abc123.pdf", 1024, "application/pdf")
+        assert attachment_service.repo.create.call_args[0][0]["content_hash"] == "abc123"
+
+    def test_copy_content_addressed_attachment_failure_releases_reference(self, attachment_service):
+        """Test a failed copy gives back the blob reference it took"""
+        source_attachment = TaskAttachment(
+            id="att-1",
+            task_id=1,
+            file_name="file.pdf",
+            file_path="blobs/ab/abc123.pdf",
+            file_size=1024,
+            file_type="application/pdf",
+            uploaded_by=5,
+            uploaded_at=datetime(2023, 1, 1, tzinfo=timezone.utc),
+            content_hash="abc123"
+        )
+        attachment_service.repo.find_by_task_id.return_value = [source_attachment]
+        attachment_service.repo.create.side_effect = Exception("Database error")
+
+        result = attachment_service.copy_attachments_to_task(1, 2)
+
+        assert result == []
+        attachment_service.blobs.release.assert_called_once_with("abc123")
+
+
+@pytest.mark.unit
+class TestResumableUploadService:
+    """Test ResumableUploadService functionality"""
+
+    @pytest.fixture
+    def mock_attachments(self):
+        """Mock AttachmentService"""
+        return Mock(spec=AttachmentService)
+
+    @pytest.fixture
+    def upload_service(self, mock_attachments, tmp_path):
+        """ResumableUploadService staging into a temp dir"""
+        return ResumableUploadService(attachment_service=mock_attachments, staging_dir=str(tmp_path))
+
+    def test_create_validates_and_starts_at_zero(self, upload_service, mock_attachments):
+        """Test creating a session validates up front and starts at offset 0"""
+        status = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)
+
+        mock_attachments._validate_file.assert_called_once_with("big.pdf", "application/pdf", 10, 1)
+        assert status["offset"] == 0
+        assert status["file_size"] == 10
+        assert upload_service.status(status["upload_id"])["offset"] == 0
+
+    def test_create_rejected_file_creates_no_session(self, upload_service, mock_attachments, tmp_path):
+        """Test validation errors surface before any staging happens"""
+        mock_attachments._validate_file.side_effect = InvalidFileTypeError("Invalid file format.")
+
+        with pytest.raises(InvalidFileTypeError):
+            upload_service.create(1, "virus.exe", "application/x-msdownload", 10, 5)
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_append_and_resume(self, upload_service):
+        """Test chunks append in order and a resumed client continues from the stored offset"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+
+        assert upload_service.append(upload_id, 0, BytesIO(b"%PDF-"))["offset"] == 5
+        # Client lost the response and asks where to continue from
+        assert upload_service.status(upload_id)["offset"] == 5
+        assert upload_service.append(upload_id, 5, BytesIO(b"56789"))["offset"] == 10
+
+    def test_append_offset_mismatch(self, upload_service):
+        """Test appending at the wrong offset is rejected with the current offset"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        upload_service.append(upload_id, 0, BytesIO(b"012"))
+
+        with pytest.raises(UploadOffsetMismatchError) as exc_info:
+            upload_service.append(upload_id, 0, BytesIO(b"012"))
+
+        assert exc_info.value.current_offset == 3
+
+    def test_append_rejects_wrong_content_and_aborts(self, upload_service):
+        """Test the first bytes are sniffed during append and a mismatch ends the session"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+
+        with pytest.raises(InvalidFileTypeError):
+            upload_service.append(upload_id, 0, BytesIO(b"MZ-not-pdf"))
+
+        with pytest.raises(UploadSessionNotFoundError):
+            upload_service.status(upload_id)
+
+    def test_append_beyond_declared_size(self, upload_service):
+        """Test a session cannot grow past the size that was validated"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 4, 5)["upload_id"]
+
+        with pytest.raises(FileSizeExceededError):
+            upload_service.append(upload_id, 0, BytesIO(b"0123456789"))
+
+    def test_complete_registers_attachment_and_removes_session(self, upload_service, mock_attachments):
+        """Test completion hashes the staged bytes and hands them to the attachment service"""
+        mock_attachments.store_attachment.return_value = {"id": "new-id"}
+        upload_id = upload_service.create(3, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        upload_service.append(upload_id, 0, BytesIO(b"%PDF-56789"))
+
+        result = upload_service.complete(upload_id)
+
+        assert result == {"id": "new-id"}
+        args = mock_attachments.store_attachment.call_args[0]
+        assert args[0] == 3
+        assert args[2:] == ("big.pdf", "application/pdf", 10, hashlib.sha256(b"%PDF-56789").hexdigest(), 5)
+        with pytest.raises(UploadSessionNotFoundError):
+            upload_service.status(upload_id)
+
+    def test_complete_incomplete_upload(self, upload_service, mock_attachments):
+        """Test completing before all bytes arrived is rejected"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        upload_service.append(upload_id, 0, BytesIO(b"01234"))
+
+        with pytest.raises(UploadIncompleteError) as exc_info:
+            upload_service.complete(upload_id)
+
+        assert exc_info.value.current_offset == 5
+        mock_attachments.store_attachment.assert_not_called()
+
+    def test_unknown_or_malformed_upload_id(self, upload_service):
+        """Test unknown ids and path-like ids are not found"""
+        with pytest.raises(UploadSessionNotFoundError):
+            upload_service.status("0" * 32)
+        with pytest.raises(UploadSessionNotFoundError):
+            upload_service.status("../../etc/passwd")
+
+    def test_purge_expired(self, upload_service):
+        """Test stale sessions are purged"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        old = 0
+        for suffix in (".json", ".part"):
+            os.utime(os.path.join(upload_service.staging_dir, upload_id + suffix), (old, old))
+
+        assert upload_service.purge_expired() == 1
+        with pytest.raises(UploadSessionNotFoundError):
+            upload_service.status(upload_id)
+
+    def test_purge_keeps_sessions_with_recent_appends(self, upload_service):
+        """Test expiry counts from the last append, not from session creation"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        for suffix in (".json", ".part"):
+            os.utime(os.path.join(upload_service.staging_dir, upload_id + suffix), (0, 0))
+
+        upload_service.append(upload_id, 0, BytesIO(b"%PDF-"))
+
+        assert upload_service.purge_expired() == 0
+        assert upload_service.status(upload_id)["offset"] == 5
+
+    def test_complete_after_session_removed(self, upload_service, mock_attachments):
+        """Test a complete racing a purge or another complete reports the session as gone"""
+        upload_id = upload_service.create(1, "big.pdf", "application/pdf", 10, 5)["upload_id"]
+        upload_service.append(upload_id, 0, BytesIO(b"%PDF-56789"))
+        loaded = upload_service._load(upload_id)
+        upload_service.abort(upload_id)
+
+        with patch.object(upload_service, "_load", return_value=loaded):
+            with pytest.raises(UploadSessionNotFoundError):
+                upload_service.complete(upload_id)
+            with pytest.raises(UploadSessionNotFoundError):
+                upload_service.append(upload_id, 10, BytesIO(b""))
+
+        mock_attachments.store_attachment.assert_not_called()
+
 
 @pytest.mark.unit
 class TestStorageService:
@@ -487,72 +1050,6 @@ class TestStorageService:
         service.client = mock_client
         return service
 
-    def test_generate_path(self, storage_service):
-        """Test path generation"""
-        with patch('time.time', return_value=1234567890):
-            path = storage_service._generate_path(1, "test file.pdf")
-            assert path == "1/1234567890-test file.pdf"
-
-    def test_generate_path_with_special_characters(self, storage_service):
-        """Test path generation with special characters"""
-        with patch('time.time', return_value=1234567890):
-            path = storage_service._generate_path(1, "test/file\\name.pdf")
-            assert path == "1/1234567890-test_file_name.pdf"
-
-    def test_generate_path_with_unicode_dash(self, storage_service):
-        """Test path generation with unicode dash characters like en-dash"""
-        with patch('time.time', return_value=1761919616):
-            path = storage_service._generate_path(144, "Week 11 Lab – Refactoring.pdf")
-            assert path == "144/1761919616-Week 11 Lab _ Refactoring.pdf"
-
-    def test_generate_path_no_extension(self, storage_service):
-        """Test path generation without file extension"""
-        with patch('time.time', return_value=1234567890):
-            path = storage_service._generate_path(1, "testfile")
-            assert path == "1/1234567890-testfile."
-
-    @patch('time.time')
-    @patch('builtins.open')
-    @patch('requests.put')
-    @patch('os.fdopen')
-    @patch('tempfile.mkstemp')
-    def test_upload_file_success(self, mock_mkstemp, mock_fdopen, mock_put, mock_open, mock_time, storage_service):
-        """Test successful file upload"""
-        mock_time.return_value = 1234567890
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_put.return_value = mock_response
-        
-        mock_mkstemp.return_value = (1, "/tmp/test_file.pdf")
-        mock_file = Mock()
-        mock_fdopen.return_value.__enter__.return_value = mock_file
-        mock_open.return_value.__enter__.return_value = Mock()
-
-        path, full_path = storage_service.upload_file(1, b"test data", "test.pdf", "application/pdf")
-
-        assert path == "1/1234567890-test.pdf"
-        assert full_path == "task-attachments/1/1234567890-test.pdf"
-        mock_put.assert_called_once()
-
-    @patch('builtins.open')
-    @patch('requests.put')
-    @patch('os.fdopen')
-    @patch('tempfile.mkstemp')
-    def test_upload_file_failure(self, mock_mkstemp, mock_fdopen, mock_put, mock_open, storage_service):
-        """Test file upload failure"""
-        mock_response = Mock()
-        mock_response.status_code = 400
-        mock_response.json.return_value = {"error": "Upload failed"}
-        mock_put.return_value = mock_response
-        
-        mock_mkstemp.return_value = (1, "/tmp/test_file.pdf")
-        mock_file = Mock()
-        mock_fdopen.return_value.__enter__.return_value = mock_file
-        mock_open.return_value.__enter__.return_value = Mock()
-
-        with pytest.raises(Exception, match="Supabase REST upload failed \\(400\\)"):
-            storage_service.upload_file(1, b"test data", "test.pdf", "application/pdf")
-
     def test_delete_file_success(self, storage_service):
         """Test successful file deletion"""
         mock_response = Mock()
@@ -597,6 +1094,79 @@ class TestStorageService:
         with pytest.raises(Exception, match="Signed URL generation failed: URL generation failed"):
             storage_service.get_signed_url("test/path.pdf", 3600)
 
+    def test_get_signed_url_with_download_name(self, storage_service):
+        """Test signed URL requests the original file name for download"""
+        storage_service.client.storage.from_.return_value.create_signed_url.return_value = {
+            "signedURL": "https://signed-url.com/file?token=abc"
+        }
+
+        result = storage_service.get_signed_url("blobs/ab/abc.pdf", 3600, download_name="Q1 report.pdf")
+
+        assert result == "https://signed-url.com/file?token=abc&download=Q1%20report.pdf"
+
+    def test_create_signed_upload_url(self, storage_service):
+        """Test signed upload URL generation"""
+        storage_service.client.storage.from_.return_value.create_signed_upload_url.return_value = {
+            "signed_url": "https://storage/upload?token=t", "token": "t", "path": "blobs/ab/abc.pdf"
+        }
+
+        result = storage_service.create_signed_upload_url("blobs/ab/abc.pdf")
+
+        assert result == {"upload_url": "https://storage/upload?token=t", "token": "t", "path": "blobs/ab/abc.pdf"}
+
+    def test_get_object_size(self, storage_service):
+        """Test object size lookup via folder listing"""
+        storage_service.client.storage.from_.return_value.list.return_value = [
+            {"name": "abc.pdf", "metadata": {"size": 1024}},
+        ]
+
+        assert storage_service.get_object_size("blobs/ab/abc.pdf") == 1024
+        storage_service.client.storage.from_.return_value.list.assert_called_once_with("blobs/ab", {"search": "abc.pdf", "limit": 100})
+
+    def test_get_object_size_missing(self, storage_service):
+        """Test object size lookup for an object that does not exist"""
+        storage_service.client.storage.from_.return_value.list.return_value = [
+            {"name": "abc.pdf.old", "metadata": {"size": 1}},
+        ]
+
+        assert storage_service.get_object_size("blobs/ab/abc.pdf") is None
+
+    def test_generate_blob_path(self, storage_service):
+        """Test blob paths are derived from the digest, not the file name or time"""
+        digest = "ab" + "0" * 62
+        assert storage_service.generate_blob_path(digest, "Report.PDF") == f"blobs/ab/{digest}.pdf"
+        assert storage_service.generate_blob_path(digest, "noext") == f"blobs/ab/{digest}"
+
+    @patch('requests.put')
+    def test_upload_blob_success(self, mock_put, storage_service):
+        """Test blob upload streams the file object to storage"""
+        mock_put.return_value = Mock(status_code=200)
+        stream = BytesIO(b"data")
+
+        assert storage_service.upload_blob("blobs/ab/abc.pdf", stream, "application/pdf", 4) is True
+
+        args, kwargs = mock_put.call_args
+        assert args[0].endswith("/storage/v1/object/task-attachments/blobs/ab/abc.pdf")
+        assert kwargs["data"] is stream
+        assert kwargs["headers"]["Content-Length"] == "4"
+
+    @patch('requests.put')
+    def test_upload_blob_already_exists(self, mock_put, storage_service):
+        """Test a duplicate blob (concurrent upload of same content) is not an error"""
+        mock_put.return_value = Mock(status_code=400)
+        mock_put.return_value.json.return_value = {"statusCode": "409", "error": "Duplicate"}
+
+        assert storage_service.upload_blob("blobs/ab/abc.pdf", BytesIO(b"data"), "application/pdf", 4) is False
+
+    @patch('requests.put')
+    def test_upload_blob_failure(self, mock_put, storage_service):
+        """Test blob upload failure raises"""
+        mock_put.return_value = Mock(status_code=500)
+        mock_put.return_value.json.return_value = {"error": "boom"}
+
+        with pytest.raises(Exception, match="Supabase REST upload failed \\(500\\)"):
+            storage_service.upload_blob("blobs/ab/abc.pdf", BytesIO(b"data"), "application/pdf", 4)
+
 
 @pytest.mark.unit
 class TestAttachmentRepository:
@@ -738,10 +1308,63 @@ class TestAttachmentRepository:
 
         assert len(result) == 0
 
+    def test_find_page_by_task_id_keyset(self, attachment_repo):
+        """Test pages are ordered by (uploaded_at, id) and continue after the cursor"""
+        chain = attachment_repo.table.select.return_value.eq.return_value
+        chain.or_.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[{"id": "a"}])
+
+        result = attachment_repo.find_page_by_task_id(1, 51, after=("2024-01-01T00:00:00+00:00", "id-9"), columns="id,uploaded_at")
+
+        assert result == [{"id": "a"}]
+        attachment_repo.table.select.assert_called_once_with("id,uploaded_at")
+        chain.or_.assert_called_once_with(
+            'uploaded_at.lt."2024-01-01T00:00:00+00:00",and(uploaded_at.eq."2024-01-01T00:00:00+00:00",id.lt."id-9")'
+        )
+        chain.or_.return_value.order.return_value.order.return_value.limit.assert_called_once_with(51)
+
+    def test_find_by_task_ids(self, attachment_repo):
+        """Test attachments for many tasks are fetched with one IN query"""
+        mock_response = Mock()
+        mock_response.data = [
+            {"id": "a", "task_id": 1, "file_name": "a.pdf", "file_path": "1/a.pdf", "file_size": 1,
+             "file_type": "application/pdf", "uploaded_by": 1, "uploaded_at": "2023-01-01T00:00:00Z"},
+            {"id": "b", "task_id": 2, "file_name": "b.pdf", "file_path": "2/b.pdf", "file_size": 2,
+             "file_type": "application/pdf", "uploaded_by": 1, "uploaded_at": "2023-01-01T00:00:00Z"},
+        ]
+        ordered = attachment_repo.table.select.return_value.in_.return_value.order.return_value.order.return_value
+        ordered.range.return_value.execute.return_value = mock_response
+
+        result = attachment_repo.find_by_task_ids([1, 2])
+
+        assert [a.task_id for a in result] == [1, 2]
+        attachment_repo.table.select.return_value.in_.assert_called_once_with("task_id", [1, 2])
+        ordered.range.assert_called_once_with(0, Config.QUERY_PAGE_SIZE - 1)
+
+    def test_find_by_task_ids_reads_every_page(self, attachment_repo):
+        """Test results past PostgREST's max-rows are fetched with further ranges"""
+        def record(n):
+            return {"id": f"id-{n}", "task_id": 1, "file_name": "a.pdf", "file_path": f"1/{n}.pdf", "file_size": 1,
+                    "file_type": "application/pdf", "uploaded_by": 1, "uploaded_at": "2023-01-01T00:00:00Z"}
+        ordered = attachment_repo.table.select.return_value.in_.return_value.order.return_value.order.return_value
+        ordered.range.return_value.execute.side_effect = [
+            Mock(data=[record(1), record(2)]), Mock(data=[record(3), record(4)]), Mock(data=[record(5)]),
+        ]
+
+        with patch.object(Config, "QUERY_PAGE_SIZE", 2):
+            result = attachment_repo.find_by_task_ids([1])
+
+        assert [a.id for a in result] == [f"id-{n}" for n in range(1, 6)]
+        assert [c.args for c in ordered.range.call_args_list] == [(0, 1), (2, 3), (4, 5)]
+
+    def test_find_by_task_ids_empty_list(self, attachment_repo):
+        """Test no query is made for an empty id list"""
+        assert attachment_repo.find_by_task_ids([]) == []
+        attachment_repo.table.select.assert_not_called()
+
     def test_delete_success(self, attachment_repo):
         """Test successful attachment deletion"""
         mock_response = Mock()
-        mock_response.data = {
+        mock_response.data = [{
             "id": "test-id",
             "task_id": 1,
             "file_name": "test.pdf",
@@ -750,8 +1373,8 @@ class TestAttachmentRepository:
             "file_type": "application/pdf",
             "uploaded_by": 1,
             "uploaded_at": "2023-01-01T00:00:00Z"
-        }
-        attachment_repo.table.delete.return_value.eq.return_value.select.return_value.single.return_value.execute.return_value = mock_response
+        }]
+        attachment_repo.table.delete.return_value.eq.return_value.execute.return_value = mock_response
 
         result = attachment_repo.delete("test-id")
 
@@ -762,8 +1385,8 @@ class TestAttachmentRepository:
     def test_delete_not_found(self, attachment_repo):
         """Test attachment deletion when not found"""
         mock_response = Mock()
-        mock_response.data = None
-        attachment_repo.table.delete.return_value.eq.return_value.select.return_value.single.return_value.execute.return_value = mock_response
+        mock_response.data = []
+        attachment_repo.table.delete.return_value.eq.return_value.execute.return_value = mock_response
 
         with pytest.raises(AttachmentNotFoundError, match="Attachment not found"):
             attachment_repo.delete("nonexistent-id")
@@ -795,6 +1418,744 @@ class TestAttachmentRepository:
         assert result == 0
 
 
+@pytest.mark.unit
+class TestBundleService:
+    """Test BundleService functionality"""
+
+    def _attachment(self, att_id, name, path, size):
+        return TaskAttachment(
+            id=att_id, task_id=1, file_name=name, file_path=path, file_size=size,
+            file_type="application/pdf", uploaded_by=1, uploaded_at=datetime(2024, 1, 2, 3, 4, 6),
+        )
+
+    @pytest.fixture
+    def bundle_service(self, tmp_path):
+        """BundleService over local storage in a temp dir"""
+        attachment_service = Mock()
+        attachment_service.storage = LocalStorageService(root=str(tmp_path))
+        return BundleService(attachment_service=attachment_service)
+
+    def test_stream_bundle_builds_valid_zip(self, bundle_service):
+        """Test the streamed archive contains every attachment with unique names"""
+        contents = {"blobs/aa/a.pdf": b"A" * 200000, "blobs/bb/b.pdf": b"B" * 10, "blobs/cc/c.pdf": b""}
+        for path, data in contents.items():
+            bundle_service.storage.upload_blob(path, BytesIO(data), "application/pdf", len(data))
+        attachments = [
+            self._attachment("1", "report.pdf", "blobs/aa/a.pdf", 200000),
+            self._attachment("2", "Report.pdf", "blobs/bb/b.pdf", 10),
+            self._attachment("3", "../../etc/empty.pdf", "blobs/cc/c.pdf", 0),
+        ]
+
+        chunks = list(bundle_service.stream_bundle(attachments))
+
+        assert len(chunks) > 2
+        with zipfile.ZipFile(BytesIO(b"".join(chunks))) as archive:
+            assert archive.namelist() == ["report.pdf", "Report (1).pdf", "empty.pdf"]
+            assert archive.read("report.pdf") == b"A" * 200000
+            assert archive.read("Report (1).pdf") == b"B" * 10
+            assert archive.read("empty.pdf") == b""
+            assert archive.getinfo("report.pdf").date_time == (2024, 1, 2, 3, 4, 6)
+            assert archive.testzip() is None
+
+    def test_stream_bundle_storage_error_propagates(self, bundle_service):
+        """Test a failed storage fetch aborts the stream"""
+        attachments = [self._attachment("1", "missing.pdf", "blobs/aa/missing.pdf", 10)]
+
+        with pytest.raises(FileNotFoundError):
+            list(bundle_service.stream_bundle(attachments))
+
+    def test_get_bundle_attachments_empty(self, bundle_service):
+        """Test a task without attachments has no bundle"""
+        bundle_service.attachments.repo.find_by_task_id.return_value = []
+
+        with pytest.raises(AttachmentNotFoundError):
+            bundle_service.get_bundle_attachments(1)
+
+    def test_get_bundle_attachments_oldest_first(self, bundle_service):
+        """Test bundle entries are ordered oldest first"""
+        newer = self._attachment("2", "b.pdf", "b", 1)
+        older = self._attachment("1", "a.pdf", "a", 1)
+        bundle_service.attachments.repo.find_by_task_id.return_value = [newer, older]
+
+        assert bundle_service.get_bundle_attachments(1) == [older, newer]
+
+
+@pytest.mark.unit
+class TestAsyncAttachmentService:
+    """Test AsyncAttachmentService functionality"""
+
+    def _attachment(self, att_id, task_id=1, content_hash=None):
+        return TaskAttachment(
+            id=att_id, task_id=task_id, file_name=f"{att_id}.pdf", file_path=f"{task_id}/{att_id}.pdf", file_size=10,
+            file_type="application/pdf", uploaded_by=1, uploaded_at=datetime.now(timezone.utc), content_hash=content_hash,
+        )
+
+    @pytest.fixture
+    def async_service(self):
+        """AsyncAttachmentService with mocked dependencies"""
+        service = AsyncAttachmentService(Mock(), Mock())
+        service.repo = AsyncMock()
+        service.blobs = AsyncMock()
+        service.storage = AsyncMock()
+        service.storage.generate_blob_path = Mock(return_value="blobs/ab/abc.pdf")
+        return service
+
+    def test_list_signs_urls_concurrently(self, async_service):
+        """Test signing fans out, bounded by ASYNC_FANOUT_CONCURRENCY"""
+        async_service.repo.find_by_task_id.return_value = [self._attachment(str(i)) for i in range(10)]
+        in_flight = {"now": 0, "max": 0}
+
+        async def sign(path, expires_in_seconds=3600, download_name=None):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return f"https://signed/{path}"
+
+        async_service.storage.get_signed_url.side_effect = sign
+
+        with patch.object(Config, "ASYNC_FANOUT_CONCURRENCY", 4):
+            result = asyncio.run(async_service.list_attachments_for_task(1))
+
+        assert [r["download_url"] for r in result] == [f"https://signed/1/{i}.pdf" for i in range(10)]
+        assert in_flight["max"] == 4
+
+    def test_list_for_tasks_groups_without_signing(self, async_service):
+        """Test batch listing groups per task and signs nothing by default"""
+        async_service.repo.find_by_task_ids.return_value = [self._attachment("a", 1), self._attachment("b", 2)]
+
+        result = asyncio.run(async_service.list_attachments_for_tasks([1, 2, 3]))
+
+        assert result["1"]["count"] == 1
+        assert result["2"]["attachments"][0]["id"] == "b"
+        assert result["3"]["count"] == 0
+        async_service.storage.get_signed_url.assert_not_called()
+
+    def test_store_attachment_uploads_new_content(self, async_service):
+        """Test new content is uploaded, referenced and registered"""
+        sample_digest = hashlib.sha256(b"x").hexdigest()
+        async_service.repo.get_total_size_by_task.return_value = 0
+        async_service.blobs.find_by_digest.return_value = None
+        async_service.blobs.acquire.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/abc.pdf", file_size=1)
+        async_service.repo.create.return_value = self._attachment("new", content_hash=sample_digest)
+
+        result = asyncio.run(async_service.store_attachment(1, BytesIO(b"x"), "a.pdf", "application/pdf", 1, sample_digest, 7))
+
+        assert result["id"] == "new"
+        async_service.storage.upload_blob.assert_awaited_once()
+        record = async_service.repo.create.call_args[0][0]
+        assert record["file_path"] == "blobs/ab/abc.pdf"
+        assert record["uploaded_by"] == 7
+
+    def test_store_attachment_waits_out_a_reclaim(self, async_service):
+        """Test a blob claimed by the reclaimer is acquired again and re-uploaded"""
+        sample_digest = hashlib.sha256(b"x").hexdigest()
+        async_service.repo.get_total_size_by_task.return_value = 0
+        async_service.blobs.find_by_digest.return_value = AttachmentBlob(digest=sample_digest, file_path="blobs/ab/abc.pdf", file_size=1)
+        async_service.blobs.acquire.side_effect = [
+            BlobReclaimingError("being reclaimed"),
+            AttachmentBlob(digest=sample_digest, file_path="blobs/ab/abc.pdf", file_size=1, ref_count=1),
+        ]
+        async_service.repo.create.return_value = self._attachment("new", content_hash=sample_digest)
+
+        with patch.object(Config, "BLOB_RECLAIM_RETRY_SECONDS", 0):
+            asyncio.run(async_service.store_attachment(1, BytesIO(b"x"), "a.pdf", "application/pdf", 1, sample_digest, 7))
+
+        assert async_service.blobs.acquire.await_count == 2
+        async_service.storage.upload_blob.assert_awaited_once()
+        assert async_service.storage.upload_blob.call_args[0][0] == "blobs/ab/abc.pdf"
+
+    def test_store_attachment_quota_exceeded(self, async_service):
+        """Test the task quota is enforced before any storage call"""
+        async_service.repo.get_total_size_by_task.return_value = Config.MAX_FILE_SIZE_BYTES
+
+        with pytest.raises(StorageQuotaExceededError):
+            asyncio.run(async_service.store_attachment(1, BytesIO(b"x"), "a.pdf", "application/pdf", 1, "d", 7))
+
+        async_service.storage.upload_blob.assert_not_called()
+
+    def test_copy_runs_concurrently_and_skips_failures(self, async_service):
+        """Test copies fan out and one failing row does not stop the others"""
+        async_service.repo.find_by_task_id.return_value = [self._attachment("a", content_hash="h1"), self._attachment("b")]
+
+        async def create(record):
+            if record["file_name"] == "b.pdf":
+                raise Exception("insert failed")
+            return self._attachment("copy-a", task_id=2)
+
+        async_service.repo.create.side_effect = create
+
+        result = asyncio.run(async_service.copy_attachments_to_task(1, 2))
+
+        assert [c["id"] for c in result] == ["copy-a"]
+        async_service.blobs.acquire.assert_awaited_once_with("h1", "1/a.pdf", 10, "application/pdf")
+
+    def test_delete_queues_last_blob_reference(self, async_service):
+        """Test deleting the last reference queues the blob for the reclaimer"""
+        async_service.repo.delete.return_value = self._attachment("a", content_hash="h1")
+        async_service.blobs.release.return_value = 0
+
+        asyncio.run(async_service.delete_attachment("a"))
+
+        async_service.blobs.enqueue_gc.assert_awaited_once_with(["1/a.pdf"])
+
+    def test_async_signed_url_failure(self):
+        """Test a storage error or missing URL is raised, as in StorageService"""
+        client = Mock()
+        failed = Mock(error=Mock(message="URL generation failed"))
+        client.storage.from_.return_value.create_signed_url = AsyncMock(side_effect=[failed, {}])
+        storage = AsyncStorageService(client, Mock())
+
+        with pytest.raises(Exception, match="Signed URL generation failed: URL generation failed"):
+            asyncio.run(storage.get_signed_url("blobs/ab/abc.pdf"))
+        with pytest.raises(Exception, match="Signed URL generation failed"):
+            asyncio.run(storage.get_signed_url("blobs/ab/abc.pdf"))
+
+    def test_async_storage_upload_blob(self):
+        """Test async uploads stream the file and treat 409 as already stored"""
+        received = []
+
+        def handler(request):
+            received.append(request.read())
+            return httpx.Response(409 if len(received) > 1 else 200, json={})
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                storage = AsyncStorageService(Mock(), http)
+                first = await storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"%PDF-data"), "application/pdf", 9)
+                second = await storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"%PDF-data"), "application/pdf", 9)
+                return first, second
+
+        assert asyncio.run(run()) == (True, False)
+        assert received[0] == b"%PDF-data"
+
+
+@pytest.mark.unit
+class TestContentSniffer:
+    """Test magic-byte content detection"""
+
+    XLSX_HEAD = b"PK\x03\x04" + b"\x00" * 26 + b"[Content_Types].xml" + b"\x00" * 40 + b"xl/workbook.xml"
+    XLS_HEAD = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 100
+
+    def test_sniff_known_types(self):
+        """Test PDF, OLE2 and OOXML signatures are recognised"""
+        assert sniff_mime_type(b"%PDF-1.7\n...") == "application/pdf"
+        assert sniff_mime_type(b"\xef\xbb\xbf junk %PDF-1.4") == "application/pdf"
+        assert sniff_mime_type(self.XLS_HEAD) == "application/vnd.ms-excel"
+        assert sniff_mime_type(self.XLSX_HEAD) == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def test_sniff_rejects_other_content(self):
+        """Test non-workbook zips and arbitrary bytes are not recognised"""
+        docx = b"PK\x03\x04" + b"\x00" * 26 + b"[Content_Types].xml" + b"word/document.xml"
+        assert sniff_mime_type(docx) is None
+        assert sniff_mime_type(b"PK\x03\x04plain.zip") is None
+        assert sniff_mime_type(b"MZ\x90\x00") is None
+        assert sniff_mime_type(b"") is None
+        assert sniff_mime_type(b"\x00" * 2000 + b"%PDF-") is None
+
+    def test_check_content_type_declared_mismatch(self):
+        """Test content must match its declared type (Excel types are interchangeable)"""
+        assert check_content_type(b"%PDF-1.7", "a.pdf", None) == "application/pdf"
+        assert check_content_type(self.XLS_HEAD, "a.xlsx", None) == "application/vnd.ms-excel"
+        with pytest.raises(InvalidFileTypeError, match="does not match"):
+            check_content_type(self.XLS_HEAD, "a.pdf", "application/pdf")
+        with pytest.raises(InvalidFileTypeError):
+            check_content_type(b"hello", "a.pdf", "application/pdf")
+
+    def test_spool_rejects_on_first_chunk(self):
+        """Test a mismatching upload fails as soon as the sniff window is filled"""
+        with patch.object(Config, "CONTENT_SNIFF_BYTES", 16):
+            spool = SniffingSpool("fake.pdf", "application/pdf")
+            with pytest.raises(InvalidFileTypeError):
+                spool.write(b"MZ" + b"\x00" * 20)
+            assert spool.size == 22
+            spool.close()
+
+    def test_spool_enforces_size_incrementally(self):
+        """Test the size limit is enforced while writing, not after"""
+        with patch.object(Config, "MAX_FILE_SIZE_BYTES", 10):
+            spool = SniffingSpool("a.pdf", "application/pdf")
+            spool.write(b"%PDF-")
+            with pytest.raises(FileSizeExceededError):
+                spool.write(b"123456")
+            spool.close()
+
+    def test_spool_rejects_disallowed_declared_type_before_content(self):
+        """Test a disallowed declared type fails before any bytes are written"""
+        with pytest.raises(InvalidFileTypeError):
+            SniffingSpool("notes.txt", "text/plain")
+
+    def test_spool_finish_checks_short_files_and_hashes(self):
+        """Test files shorter than the sniff window are checked on finish"""
+        spool = SniffingSpool("a.pdf", "application/pdf")
+        spool.write(b"%PDF-1.7")
+
+        size, digest = spool.finish()
+
+        assert size == 8
+        assert digest == hashlib.sha256(b"%PDF-1.7").hexdigest()
+        assert spool.read() == b"%PDF-1.7"
+        spool.close()
+
+        empty = SniffingSpool("a.pdf", "application/pdf")
+        with pytest.raises(InvalidFileTypeError):
+            empty.finish()
+        empty.close()
+
+
+@pytest.mark.unit
+class TestSpoolMultipartUpload:
+    """Test streaming multipart parsing for ASGI uploads"""
+
+    BOUNDARY = "----spool"
+    CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+    def _head(self, filename="a.pdf", content_type="application/pdf"):
+        return (
+            f"--{self.BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="task_id"\r\n\r\n1\r\n'
+            f"--{self.BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+    def _body(self, content):
+        return self._head() + content + f"\r\n--{self.BOUNDARY}--\r\n".encode()
+
+    def _stream(self, first, filler=b"0" * 65536):
+        """Async body of `first` followed by endless filler; records chunks read."""
+        read = []
+
+        async def chunks():
+            read.append(first)
+            yield first
+            while True:
+                read.append(filler)
+                yield filler
+
+        return chunks(), read
+
+    def _parse(self, chunks, max_body=Config.MAX_FILE_SIZE_BYTES + 65536):
+        return asyncio.run(spool_multipart_upload(chunks, self.CONTENT_TYPE, max_body))
+
+    def test_parses_fields_and_spools_the_file(self):
+        """Test fields are returned and the file is hashed while it is read"""
+        data = b"%PDF-1.7\n" + b"x" * 100
+
+        async def chunks():
+            body = self._body(data)
+            for i in range(0, len(body), 7):
+                yield body[i:i + 7]
+
+        form, upload = self._parse(chunks())
+
+        assert form["task_id"] == "1"
+        assert upload.filename == "a.pdf"
+        assert upload.mimetype == "application/pdf"
+        size, digest = upload.stream.finish()
+        assert (size, digest) == (len(data), hashlib.sha256(data).hexdigest())
+        assert upload.stream.read() == data
+        upload.stream.close()
+
+    def test_wrong_content_rejected_on_first_chunk(self):
+        """Test content that does not match its declared type stops the read at the sniff window"""
+        chunks, read = self._stream(self._head() + b"MZ" + b"\0" * Config.CONTENT_SNIFF_BYTES)
+
+        with pytest.raises(InvalidFileTypeError):
+            self._parse(chunks)
+
+        assert len(read) == 1
+
+    def test_disallowed_declared_type_rejected_before_content(self):
+        """Test a disallowed declared type fails as soon as the part headers arrive"""
+        chunks, read = self._stream(self._head("a.exe", "application/x-msdownload"))
+
+        with pytest.raises(InvalidFileTypeError):
+            self._parse(chunks)
+
+        assert len(read) == 1
+
+    def test_oversized_file_rejected_at_the_size_limit(self):
+        """Test reading stops once the file passes MAX_FILE_SIZE_BYTES"""
+        chunks, read = self._stream(self._head() + b"%PDF-1.7\n" + b"0" * Config.CONTENT_SNIFF_BYTES)
+
+        with patch.object(Config, "MAX_FILE_SIZE_BYTES", 200 * 1024):
+            with pytest.raises(FileSizeExceededError):
+                self._parse(chunks)
+
+        assert len(read) <= 5
+
+    def test_body_over_limit_rejected(self):
+        """Test a body past max_body_bytes is refused even when no part is over its limit"""
+        chunks, read = self._stream(self._head() + b"%PDF-1.7\n")
+
+        with pytest.raises(RequestEntityTooLarge):
+            self._parse(chunks, max_body=100 * 1024)
+
+        assert len(read) == 2
+
+    def test_non_multipart_body_has_no_file(self):
+        """Test other content types are not parsed"""
+        async def chunks():
+            yield b"{}"
+
+        form, upload = asyncio.run(spool_multipart_upload(chunks(), "application/json", 1024))
+
+        assert upload is None
+        assert not form
+
+
+@pytest.mark.unit
+class TestStorageReclaimer:
+    """Test StorageReclaimer functionality"""
+
+    @pytest.fixture
+    def reclaimer(self):
+        """StorageReclaimer with mocked dependencies"""
+        return StorageReclaimer(
+            storage=Mock(spec=StorageService),
+            attachments=Mock(spec=AttachmentRepository),
+            blobs=Mock(spec=BlobRepository),
+            gc_queue=Mock(spec=GcQueueRepository),
+        )
+
+    def test_drain_removes_claimed_paths(self, reclaimer):
+        """Test claimed paths are removed in one batch and then released from the queue"""
+        reclaimer.gc_queue.claim_due.return_value = ["c"]
+
+        removed = reclaimer.drain()
+
+        assert removed == 1
+        reclaimer.storage.delete_files.assert_called_once_with(["c"])
+        reclaimer.gc_queue.complete.assert_called_once_with(["c"])
+        reclaimer.attachments.find_referenced_paths.assert_not_called()
+
+    def test_drain_keeps_claim_when_delete_fails(self, reclaimer):
+        """Test a failed remove leaves the claim in place for the lease to expire"""
+        reclaimer.gc_queue.claim_due.return_value = ["c"]
+        reclaimer.storage.delete_files.side_effect = Exception("storage down")
+
+        with pytest.raises(Exception, match="storage down"):
+            reclaimer.drain()
+
+        reclaimer.gc_queue.complete.assert_not_called()
+
+    def test_drain_respects_grace_period(self, reclaimer):
+        """Test only entries older than the grace period are considered"""
+        reclaimer.gc_queue.claim_due.return_value = []
+
+        with patch.object(Config, "STORAGE_GC_GRACE_SECONDS", 3600):
+            assert reclaimer.drain() == 0
+
+        cutoff = reclaimer.gc_queue.claim_due.call_args[0][0]
+        age = (datetime.now(timezone.utc) - cutoff).total_seconds()
+        assert 3590 < age < 3610
+        reclaimer.storage.delete_files.assert_not_called()
+
+    def test_drain_processes_full_batches_until_empty(self, reclaimer):
+        """Test draining continues while batches come back full"""
+        reclaimer.gc_queue.claim_due.side_effect = [["a", "b"], ["c"]]
+
+        with patch.object(Config, "STORAGE_GC_BATCH_SIZE", 2):
+            removed = reclaimer.drain()
+
+        assert removed == 3
+        assert reclaimer.storage.delete_files.call_count == 2
+
+    def test_reconcile_queues_old_orphans(self, reclaimer):
+        """Test reconciliation queues unreferenced objects past the grace period"""
+        old = datetime.now(timezone.utc) - timedelta(days=2)
+        new = datetime.now(timezone.utc)
+        reclaimer.storage.list_objects.return_value = iter([
+            ("blobs/aa/old.pdf", old),
+            ("blobs/bb/kept.pdf", old),
+            ("blobs/cc/new.pdf", new),
+            ("blobs/dd/unknown.pdf", None),
+        ])
+        reclaimer.attachments.find_referenced_paths.return_value = {"blobs/bb/kept.pdf"}
+        reclaimer.blobs.find_referenced_paths.return_value = set()
+
+        queued = reclaimer.reconcile()
+
+        assert queued == 1
+        reclaimer.attachments.find_referenced_paths.assert_called_once_with(["blobs/aa/old.pdf", "blobs/bb/kept.pdf"])
+        reclaimer.gc_queue.enqueue.assert_called_once_with(["blobs/aa/old.pdf"])
+        reclaimer.storage.delete_files.assert_not_called()
+
+    def test_supabase_delete_files_single_call(self):
+        """Test Supabase multi-object removal uses one remove call"""
+        storage = StorageService()
+        storage.client = Mock()
+        storage.client.storage.from_.return_value.remove.return_value = []
+
+        storage.delete_files(["a", "b"])
+
+        storage.client.storage.from_.return_value.remove.assert_called_once_with(["a", "b"])
+
+    def test_supabase_list_objects_recurses_folders(self):
+        """Test Supabase listing walks folders and parses timestamps"""
+        storage = StorageService()
+        storage.client = Mock()
+        listings = {
+            "": [{"name": "blobs", "id": None}],
+            "blobs": [{"name": "ab", "id": None}],
+            "blobs/ab": [{"name": "abc.pdf", "id": "1", "created_at": "2024-01-01T00:00:00Z"}],
+        }
+        storage.client.storage.from_.return_value.list.side_effect = lambda prefix, options: listings[prefix]
+
+        result = list(storage.list_objects())
+
+        assert result == [("blobs/ab/abc.pdf", datetime(2024, 1, 1, tzinfo=timezone.utc))]
+
+    def test_local_list_objects(self, tmp_path):
+        """Test local listing returns relative paths and skips in-progress uploads"""
+        storage = LocalStorageService(root=str(tmp_path))
+        storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"x"), "application/pdf", 1)
+        (tmp_path / "blobs" / "ab" / ".upload_tmp").write_bytes(b"partial")
+
+        result = list(storage.list_objects())
+
+        assert [path for path, _ in result] == ["blobs/ab/abc.pdf"]
+        assert result[0][1].tzinfo is not None
+
+    def test_reclaimer_lock_is_held_by_one_process(self, tmp_path):
+        """Test the reclaimer lock is exclusive and released with its holder"""
+        lock_path = str(tmp_path / "gc.lock")
+
+        held = _try_lock(lock_path)
+        assert held is not None
+        assert _try_lock(lock_path) is None
+
+        os.close(held)
+        again = _try_lock(lock_path)
+        assert again is not None
+        os.close(again)
+
+    @patch("Services.StorageReclaimer.StorageReclaimer")
+    def test_reclaimer_waits_for_the_lock(self, mock_reclaimer_class, tmp_path):
+        """Test a reclaimer thread without the lock skips its passes"""
+        lock_path = str(tmp_path / "gc.lock")
+        stop = Mock()
+        held = _try_lock(lock_path)
+        try:
+            stop.wait.side_effect = [False, False, True]
+            _run_forever(stop, lock_path)
+            mock_reclaimer_class.assert_not_called()
+        finally:
+            os.close(held)
+
+        stop.wait.side_effect = [False, True]
+        _run_forever(stop, lock_path)
+        mock_reclaimer_class.return_value.drain.assert_called_once_with()
+
+
+@pytest.mark.unit
+class TestGcQueueRepository:
+    """Test GcQueueRepository functionality"""
+
+    @pytest.fixture
+    def gc_repo(self):
+        """GcQueueRepository with mocked table"""
+        repo = GcQueueRepository()
+        repo.client = Mock()
+        repo.table = Mock()
+        return repo
+
+    def test_enqueue_dedups_and_ignores_existing(self, gc_repo):
+        """Test enqueue upserts unique paths without resetting enqueued_at"""
+        gc_repo.enqueue(["a", "b", "a"])
+
+        gc_repo.table.upsert.assert_called_once_with(
+            [{"file_path": "a"}, {"file_path": "b"}], on_conflict="file_path", ignore_duplicates=True
+        )
+
+    def test_enqueue_empty_is_noop(self, gc_repo):
+        """Test nothing is written for an empty list"""
+        gc_repo.enqueue([])
+
+        gc_repo.table.upsert.assert_not_called()
+
+    def test_claim_due_and_complete(self, gc_repo):
+        """Test due paths are claimed and released through the GC rpcs"""
+        gc_repo.client.rpc.return_value.execute.return_value = Mock(data=[{"file_path": "a", "claimed_at": "x"}])
+
+        assert gc_repo.claim_due(datetime(2024, 1, 1, tzinfo=timezone.utc), 10, 600) == ["a"]
+        gc_repo.client.rpc.assert_called_once_with("claim_gc_paths", {
+            "p_cutoff": "2024-01-01T00:00:00+00:00", "p_limit": 10, "p_lease_seconds": 600,
+        })
+
+        gc_repo.complete(["a"])
+        gc_repo.client.rpc.assert_called_with("complete_gc_paths", {"p_paths": ["a"]})
+
+
+@pytest.mark.unit
+class TestLocalStorageService:
+    """Test LocalStorageService functionality"""
+
+    @pytest.fixture
+    def local_storage(self, tmp_path):
+        """LocalStorageService rooted in a temp dir"""
+        return LocalStorageService(root=str(tmp_path))
+
+    def test_upload_blob_and_size(self, local_storage, tmp_path):
+        """Test blobs are written under the root and sized"""
+        assert local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"hello"), "application/pdf", 5) is True
+
+        assert (tmp_path / "blobs" / "ab" / "abc.pdf").read_bytes() == b"hello"
+        assert local_storage.get_object_size("blobs/ab/abc.pdf") == 5
+        assert local_storage.get_object_size("blobs/ab/missing.pdf") is None
+        # No temp files left behind
+        assert [p.name for p in (tmp_path / "blobs" / "ab").iterdir()] == ["abc.pdf"]
+
+    def test_upload_blob_existing_is_not_overwritten(self, local_storage, tmp_path):
+        """Test an existing object is kept (same semantics as x-upsert: false)"""
+        local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"first"), "application/pdf", 5)
+
+        assert local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"second"), "application/pdf", 6) is False
+        assert (tmp_path / "blobs" / "ab" / "abc.pdf").read_bytes() == b"first"
+
+    def test_move_object(self, local_storage):
+        """Test a move never replaces an existing object"""
+        local_storage.upload_blob("uploads/one", BytesIO(b"verified"), "application/pdf", 8)
+        local_storage.upload_blob("uploads/two", BytesIO(b"other"), "application/pdf", 5)
+
+        assert local_storage.move_object("uploads/one", "blobs/ab/abc.pdf") is True
+        assert local_storage.get_object_size("uploads/one") is None
+        assert local_storage.move_object("uploads/two", "blobs/ab/abc.pdf") is False
+        assert b"".join(local_storage.iter_object("blobs/ab/abc.pdf", 64)) == b"verified"
+        assert local_storage.get_object_size("uploads/two") == 5
+
+    def test_upload_blob_max_size(self, local_storage):
+        """Test a size-limited upload stops at the limit and leaves nothing behind"""
+        with patch.object(Config, "UPLOAD_CHUNK_SIZE_BYTES", 4):
+            assert local_storage.upload_blob("uploads/ok", BytesIO(b"12345678"), "application/pdf", 0, max_size=8)
+            with pytest.raises(FileSizeExceededError):
+                local_storage.upload_blob("uploads/big", BytesIO(b"123456789"), "application/pdf", 0, max_size=8)
+
+        assert local_storage.get_object_size("uploads/ok") == 8
+        assert local_storage.get_object_size("uploads/big") is None
+        assert [p for p, _ in local_storage.list_objects()] == ["uploads/ok"]
+
+    def test_delete_file(self, local_storage):
+        """Test deleting existing and missing objects"""
+        local_storage.upload_blob("blobs/ab/abc.pdf", BytesIO(b"hello"), "application/pdf", 5)
+
+        local_storage.delete_file("blobs/ab/abc.pdf")
+        local_storage.delete_file("blobs/ab/abc.pdf")
+
+        assert local_storage.get_object_size("blobs/ab/abc.pdf") is None
+
+    def test_path_traversal_rejected(self, local_storage):
+        """Test paths cannot escape the storage root"""
+        with pytest.raises(ValueError):
+            local_storage.upload_blob("../outside.pdf", BytesIO(b"x"), "application/pdf", 1)
+
+    def test_signed_url_round_trip(self, local_storage):
+        """Test signed URLs verify only for the same method, path and download name"""
+        from urllib.parse import urlparse, parse_qs
+        url = local_storage.get_signed_url("blobs/ab/abc.pdf", 60, download_name="report.pdf")
+        parsed = urlparse(url)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        assert parsed.path == "/api/task-attachments/files/blobs/ab/abc.pdf"
+        assert local_storage.verify_signature("GET", "blobs/ab/abc.pdf", params["expires"], params["signature"], "report.pdf")
+        assert not local_storage.verify_signature("PUT", "blobs/ab/abc.pdf", params["expires"], params["signature"], "report.pdf")
+        assert not local_storage.verify_signature("GET", "blobs/ab/other.pdf", params["expires"], params["signature"], "report.pdf")
+        assert not local_storage.verify_signature("GET", "blobs/ab/abc.pdf", params["expires"], params["signature"], "other.pdf")
+
+    def test_expired_signature_rejected(self, local_storage):
+        """Test expired signatures are rejected"""
+        signature = local_storage._signature("GET", "blobs/ab/abc.pdf", 1)
+
+        assert not local_storage.verify_signature("GET", "blobs/ab/abc.pdf", "1", signature)
+
+    def test_get_storage_backend_selects_implementation(self, tmp_path):
+        """Test STORAGE_BACKEND selects the backend"""
+        with patch.object(Config, "STORAGE_BACKEND", "local"), patch.object(Config, "LOCAL_STORAGE_ROOT", str(tmp_path)):
+            assert isinstance(get_storage_backend(), LocalStorageService)
+        with patch.object(Config, "STORAGE_BACKEND", "supabase"):
+            assert isinstance(get_storage_backend(), StorageService)
+        with patch.object(Config, "STORAGE_BACKEND", "ftp"):
+            with pytest.raises(RuntimeError, match="Unknown STORAGE_BACKEND"):
+                get_storage_backend()
+
+
+@pytest.mark.unit
+class TestBlobRepository:
+    """Test BlobRepository functionality"""
+
+    @pytest.fixture
+    def blob_repo(self):
+        """BlobRepository with mocked client"""
+        repo = BlobRepository()
+        repo.client = Mock()
+        repo.table = Mock()
+        return repo
+
+    def test_find_by_digest(self, blob_repo):
+        """Test finding an existing blob"""
+        blob_repo.table.select.return_value.eq.return_value.limit.return_value.execute.return_value = Mock(
+            data=[{"digest": "abc", "file_path": "blobs/ab/abc.pdf", "file_size": 10, "ref_count": 2}]
+        )
+
+        blob = blob_repo.find_by_digest("abc")
+
+        assert isinstance(blob, AttachmentBlob)
+        assert blob.file_path == "blobs/ab/abc.pdf"
+        assert blob.ref_count == 2
+
+    def test_find_by_digest_missing(self, blob_repo):
+        """Test unknown digest returns None"""
+        blob_repo.table.select.return_value.eq.return_value.limit.return_value.execute.return_value = Mock(data=[])
+
+        assert blob_repo.find_by_digest("abc") is None
+
+    def test_acquire(self, blob_repo):
+        """Test acquire calls the upsert RPC and returns the stored row"""
+        blob_repo.client.rpc.return_value.execute.return_value = Mock(
+            data=[{"digest": "abc", "file_path": "blobs/ab/abc.pdf", "file_size": 10, "ref_count": 1}]
+        )
+
+        blob = blob_repo.acquire("abc", "blobs/ab/abc.pdf", 10, "application/pdf")
+
+        assert blob.ref_count == 1
+        blob_repo.client.rpc.assert_called_once_with("acquire_attachment_blob", {
+            "p_digest": "abc",
+            "p_file_path": "blobs/ab/abc.pdf",
+            "p_file_size": 10,
+            "p_content_type": "application/pdf",
+        })
+
+    def test_acquire_reclaiming_path(self, blob_repo):
+        """Test the reclaimer's GC001 error is raised as BlobReclaimingError"""
+        blob_repo.client.rpc.return_value.execute.side_effect = APIError(
+            {"code": "GC001", "message": "storage object blobs/ab/abc.pdf is being reclaimed"}
+        )
+
+        with pytest.raises(BlobReclaimingError, match="being reclaimed"):
+            blob_repo.acquire("abc", "blobs/ab/abc.pdf", 10, "application/pdf")
+
+    def test_acquire_other_errors_propagate(self, blob_repo):
+        """Test unrelated database errors are not mistaken for a reclaim"""
+        blob_repo.client.rpc.return_value.execute.side_effect = APIError({"code": "23505", "message": "duplicate"})
+
+        with pytest.raises(APIError):
+            blob_repo.acquire("abc", "blobs/ab/abc.pdf", 10, "application/pdf")
+
+    def test_release(self, blob_repo):
+        """Test release returns the remaining reference count"""
+        blob_repo.client.rpc.return_value.execute.return_value = Mock(data=0)
+
+        assert blob_repo.release("abc") == 0
+        blob_repo.client.rpc.assert_called_once_with("release_attachment_blob", {"p_digest": "abc"})
+
+    def test_release_unknown_digest(self, blob_repo):
+        """Test releasing an unknown digest returns None"""
+        blob_repo.client.rpc.return_value.execute.return_value = Mock(data=None)
+
+        assert blob_repo.release("abc") is None
+
+
 @pytest.mark.unit
 class TestTaskAttachmentModel:
     """Test TaskAttachment model functionality"""
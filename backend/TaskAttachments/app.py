@@ -1,27 +1,61 @@
-from flask import Flask
+from flask import Flask, Request
 from flask_cors import CORS
 
 # Handle both relative and absolute imports
 try:
-    from .config import Config
+    from .config import Config, DEFAULT_SECRET_KEY
+    from .http_encoding import init_http_encoding
     from .Controllers.AttachmentController import bp as attachment_bp
+    from .Controllers.FileController import bp as file_bp
+    from .Services.StorageReclaimer import start_background_reclaimer
+    from .Services.ContentSniffer import SniffingSpool
 except ImportError:
-    from config import Config
+    from config import Config, DEFAULT_SECRET_KEY
+    from http_encoding import init_http_encoding
     from Controllers.AttachmentController import bp as attachment_bp
+    from Controllers.FileController import bp as file_bp
+    from Services.StorageReclaimer import start_background_reclaimer
+    from Services.ContentSniffer import SniffingSpool
 
 
-def create_app():
+class UploadRequest(Request):
+    """
+    Multipart file parts are written straight into a SniffingSpool, so a file of
+    the wrong type or over the size limit fails on its first chunks, before the
+    rest of the body is read.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SniffingSpool(filename, content_type)
+
+
+def create_app(start_reclaimer: bool = True):
+    # Anyone who knows the key can forge signed local-storage URLs
+    if (Config.STORAGE_BACKEND or "supabase").lower() == "local" and Config.SECRET_KEY == DEFAULT_SECRET_KEY:
+        raise RuntimeError("STORAGE_BACKEND=local requires SECRET_KEY to be set")
+
     app = Flask(__name__)
+    app.request_class = UploadRequest
     app.config.from_object(Config)
 
     # Allow all origins for CORS
     CORS(app, origins="*", supports_credentials=True)
 
+    # orjson responses, gzip/brotli compression
+    init_http_encoding(app)
+
     @app.get("/api/task-attachments/health")
     def health():
         return {"status": "ok", "service": "task-attachments"}
 
     app.register_blueprint(attachment_bp)
+    app.register_blueprint(file_bp)
+
+    # Orphaned storage objects are reclaimed off the request path. gunicorn
+    # (wsgi.py) starts it in the workers instead: a thread in the preloaded
+    # master would be forked into every worker.
+    if start_reclaimer and Config.STORAGE_GC_ENABLED and Config.ENV != "test":
+        app.extensions["storage_reclaimer"] = start_background_reclaimer()
 
     return app
 
@@ -0,0 +1,74 @@
+"""
+ASGI entry point for TaskAttachments (async I/O mode).
+
+Serves the core attachment routes (upload, list, batch metadata, download URL,
+get, delete, copy) with the async Supabase client and a pooled httpx client,
+so one process can keep hundreds of uploads/downloads in flight. Resumable,
+direct-to-storage, bundle and local-storage routes stay on the WSGI app.
+
+    pip install -r requirements-asgi.txt
+    hypercorn asgi:app --bind 0.0.0.0:8005
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from quart import Quart
+from quart_cors import cors
+from supabase import acreate_client
+
+from config import Config
+from Controllers.AsyncAttachmentController import bp as attachment_bp
+from Services.StorageReclaimer import start_background_reclaimer
+
+# Room for the multipart boundaries and form fields around a file at the size limit
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def create_asgi_app() -> Quart:
+    if (Config.STORAGE_BACKEND or "supabase").lower() != "supabase":
+        raise RuntimeError("ASGI mode requires STORAGE_BACKEND=supabase")
+
+    app = Quart(__name__)
+    app.config.from_object(Config)
+    # Quart's default body limit (16 MiB) is below MAX_FILE_SIZE_BYTES; larger
+    # bodies are refused before they are read, as a 400 from the upload route
+    app.config["MAX_CONTENT_LENGTH"] = Config.MAX_FILE_SIZE_BYTES + MULTIPART_OVERHEAD_BYTES
+    app = cors(app, allow_origin="*")
+
+    @app.before_serving
+    async def open_clients():
+        if not Config.SUPABASE_URL or not Config.SUPABASE_SERVICE_KEY:
+            raise RuntimeError("Supabase configuration missing: SUPABASE_URL or SUPABASE_SERVICE_KEY")
+        app.extensions["supabase"] = await acreate_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_KEY)
+        app.extensions["http"] = httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS),
+        )
+
+    # Deletes queue storage paths in attachment_gc_queue; reclaim them off the event loop
+    @app.before_serving
+    async def start_reclaimer():
+        if Config.STORAGE_GC_ENABLED and Config.ENV != "test":
+            app.extensions["storage_reclaimer"] = start_background_reclaimer()
+
+    @app.after_serving
+    async def close_clients():
+        stop = app.extensions.pop("storage_reclaimer", None)
+        if stop is not None:
+            stop.set()
+        await app.extensions["http"].aclose()
+
+    @app.get("/api/task-attachments/health")
+    async def health():
+        return {"status": "ok", "service": "task-attachments", "mode": "asgi"}
+
+    app.register_blueprint(attachment_bp)
+
+    return app
+
+
+app = create_asgi_app()
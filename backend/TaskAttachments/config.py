@@ -1,24 +1,74 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_SECRET_KEY = "task-attachments-secret"
+
 
 class Config:
     # Environment
     ENV = os.getenv("ENV", "dev")
     FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 
-    # Flask secret
-    SECRET_KEY = os.getenv("SECRET_KEY", "task-attachments-secret")
+    # Flask secret. It also signs local-storage URLs, so create_app refuses to start
+    # with STORAGE_BACKEND=local while it is unset or the public default.
+    SECRET_KEY = os.getenv("SECRET_KEY") or DEFAULT_SECRET_KEY
 
     # Supabase
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
     # Storage config
+    # "supabase" (default) or "local" (files under LOCAL_STORAGE_ROOT, served by this service)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+    LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "/var/lib/task-attachments")
+    # Public base URL for signed local-storage URLs (the nginx proxy)
+    LOCAL_STORAGE_PUBLIC_URL = os.getenv("LOCAL_STORAGE_PUBLIC_URL", "http://localhost:8000")
     STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "task-attachments")
     MAX_FILE_SIZE_BYTES = int(os.getenv("MAX_FILE_SIZE_BYTES", str(50 * 1024 * 1024)))  # 50MB
+    MAX_BATCH_TASK_IDS = int(os.getenv("MAX_BATCH_TASK_IDS", "500"))
+    # Rows per request when reading unbounded result sets; must not exceed PostgREST's
+    # max-rows (1000 on Supabase), which truncates larger responses without an error
+    QUERY_PAGE_SIZE = int(os.getenv("QUERY_PAGE_SIZE", "1000"))
+    # Paginated attachment listing
+    LIST_PAGE_SIZE_DEFAULT = int(os.getenv("LIST_PAGE_SIZE_DEFAULT", "50"))
+    LIST_PAGE_SIZE_MAX = int(os.getenv("LIST_PAGE_SIZE_MAX", "200"))
+    # Uploads are hashed in chunks and spooled to disk past this size
+    UPLOAD_CHUNK_SIZE_BYTES = int(os.getenv("UPLOAD_CHUNK_SIZE_BYTES", str(64 * 1024)))
+    UPLOAD_SPOOL_MAX_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY_BYTES", str(1024 * 1024)))
+    # Leading bytes inspected to detect the real file type
+    CONTENT_SNIFF_BYTES = int(os.getenv("CONTENT_SNIFF_BYTES", str(8 * 1024)))
+    # Resumable uploads: parts are staged here until complete. Must be shared by all
+    # workers serving the same uploads (a single container's local disk is enough).
+    UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(tempfile.gettempdir(), "task-attachments-uploads"))
+    UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", str(24 * 60 * 60)))
+    # ZIP bundles: objects fetched ahead of the one being written, and chunks buffered per object
+    BUNDLE_FETCH_CONCURRENCY = int(os.getenv("BUNDLE_FETCH_CONCURRENCY", "4"))
+    BUNDLE_PREFETCH_CHUNKS = int(os.getenv("BUNDLE_PREFETCH_CHUNKS", "8"))
+    # ASGI mode (asgi.py): concurrent storage/DB calls per request and pooled connections
+    ASYNC_FANOUT_CONCURRENCY = int(os.getenv("ASYNC_FANOUT_CONCURRENCY", "16"))
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "200"))
+    # Background storage reclaimer. Objects younger than the grace period are never
+    # removed, which covers direct uploads that are not confirmed yet.
+    STORAGE_GC_ENABLED = os.getenv("STORAGE_GC_ENABLED", "true").lower() == "true"
+    STORAGE_GC_INTERVAL_SECONDS = int(os.getenv("STORAGE_GC_INTERVAL_SECONDS", "60"))
+    STORAGE_GC_RECONCILE_INTERVAL_SECONDS = int(os.getenv("STORAGE_GC_RECONCILE_INTERVAL_SECONDS", str(6 * 60 * 60)))
+    STORAGE_GC_GRACE_SECONDS = int(os.getenv("STORAGE_GC_GRACE_SECONDS", str(3 * 60 * 60)))
+    STORAGE_GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", "100"))
+    # A claim not completed within this time (the reclaimer died) is taken over
+    STORAGE_GC_CLAIM_LEASE_SECONDS = int(os.getenv("STORAGE_GC_CLAIM_LEASE_SECONDS", "600"))
+    # Uploads that find their blob path claimed by the reclaimer wait for it and store again
+    BLOB_RECLAIM_RETRIES = int(os.getenv("BLOB_RECLAIM_RETRIES", "5"))
+    BLOB_RECLAIM_RETRY_SECONDS = float(os.getenv("BLOB_RECLAIM_RETRY_SECONDS", "1"))
+    # Under gunicorn every worker runs a reclaimer thread; only the holder of this lock works
+    STORAGE_GC_LOCK_FILE = os.getenv("STORAGE_GC_LOCK_FILE", os.path.join(tempfile.gettempdir(), "task-attachments-gc.lock"))
+    # Response compression (http_encoding.py)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
     ALLOWED_MIME_TYPES = {
         "application/pdf",
         "application/vnd.ms-excel",
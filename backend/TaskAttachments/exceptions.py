@@ -16,3 +16,28 @@ class AttachmentNotFoundError(Exception):
     pass
 
 
+class UploadVerificationError(Exception):
+    pass
+
+
+class BlobReclaimingError(Exception):
+    """The storage reclaimer has claimed the blob's path; its object may already be deleted."""
+    pass
+
+
+class UploadSessionNotFoundError(Exception):
+    pass
+
+
+class UploadOffsetMismatchError(Exception):
+    def __init__(self, message: str, current_offset: int):
+        super().__init__(message)
+        self.current_offset = current_offset
+
+
+class UploadIncompleteError(Exception):
+    def __init__(self, message: str, current_offset: int):
+        super().__init__(message)
+        self.current_offset = current_offset
+
+
@@ -0,0 +1,115 @@
+"""
+JSON encoding and response compression on a realistic task list: what
+GET /api/tasks returns, serialized rows with the assigned users expanded
+into user objects.
+
+Run from the Tasks directory:
+
+    python -m Benchmarks.bench_json_encoding --rows 5000 --repeat 5
+
+Encoders: Flask's stdlib provider (json.dumps with its default hook) and the
+orjson provider installed by init_http_encoding. Codecs: gzip at levels 1, 6
+and 9 and, when the brotli package is installed, brotli at qualities 1, 4 and
+11, each applied to the orjson body. Median and best time plus output size
+are reported; missing optional packages are skipped.
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from Benchmarks.bench_task_lists import synthetic_tasks, time_runs
+from Models.Task import TASK_FIELD_ATTRIBUTES, serialize_task_row
+from http_encoding import OrjsonProvider, brotli, orjson
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 11)
+
+
+def _user(user_id: int) -> dict:
+    return {
+        "userId": user_id,
+        "name": f"User {user_id}",
+        "email": f"user{user_id}@example.com",
+        "role": "staff",
+        "department": "Engineering",
+    }
+
+
+def task_payload(rows: int) -> List[dict]:
+    """Serialized tasks with assigned users expanded, as the list endpoints send them."""
+    payload = []
+    for task_id, values in enumerate(synthetic_tasks(rows, "bench"), start=1):
+        values = {"id": task_id, "parent_id": None, **values}
+        task = serialize_task_row(tuple(values[attr] for attr in TASK_FIELD_ATTRIBUTES))
+        task["assignedUsers"] = [_user(user_id) for user_id in task["assignedUsers"]]
+        payload.append(task)
+    return payload
+
+
+def _measure(name: str, run: Callable[[], bytes], repeat: int, baseline: Optional[int] = None) -> dict:
+    output = run()
+    durations = sorted(time_runs(run, repeat))
+    result = {
+        "name": name,
+        "median_ms": round(durations[len(durations) // 2] * 1000, 2),
+        "best_ms": round(durations[0] * 1000, 2),
+        "bytes": len(output),
+    }
+    if baseline:
+        result["ratio"] = round(baseline / len(output), 2)
+    return result
+
+
+def bench_encoders(payload: List[dict], repeat: int) -> List[Dict]:
+    app = Flask(__name__)
+    providers = {"stdlib": DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+    return [
+        _measure(name, lambda provider=provider: provider.dumps(payload).encode(), repeat)
+        for name, provider in providers.items()
+    ]
+
+
+def bench_codecs(body: bytes, repeat: int) -> List[Dict]:
+    runs = {f"gzip-{level}": (lambda level=level: gzip.compress(body, compresslevel=level, mtime=0))
+            for level in GZIP_LEVELS}
+    if brotli is not None:
+        runs.update({f"br-{quality}": (lambda quality=quality: brotli.compress(body, quality=quality))
+                     for quality in BROTLI_QUALITIES})
+    return [_measure(name, run, repeat, baseline=len(body)) for name, run in runs.items()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="tasks in the payload")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per encoder/codec")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    payload = task_payload(args.rows)
+    encoders = bench_encoders(payload, args.repeat)
+    body = (OrjsonProvider(Flask(__name__)).dumps(payload) if orjson is not None
+            else json.dumps(payload, default=str)).encode()
+    codecs = bench_codecs(body, args.repeat)
+
+    if args.json:
+        print(json.dumps({"settings": vars(args), "encoders": encoders, "codecs": codecs}, indent=2))
+    else:
+        print(f"rows={args.rows} repeat={args.repeat} body={len(body)} bytes")
+        print(f"{'name':<10}{'median ms':>12}{'best ms':>12}{'bytes':>12}{'ratio':>8}")
+        for r in encoders + codecs:
+            print(f"{r['name']:<10}{r['median_ms']:>12}{r['best_ms']:>12}{r['bytes']:>12}{r.get('ratio', ''):>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
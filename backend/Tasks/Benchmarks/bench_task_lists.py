@@ -0,0 +1,155 @@
+"""
+ORM list path (Task objects + Task.to_dict) against the Core read path
+(select(*TASK_LIST_COLUMNS) rows + serialize_task_row) used by the list endpoints.
+
+Run from the Tasks directory:
+
+    python -m Benchmarks.bench_task_lists --rows 10000 --repeat 5
+
+Synthetic tasks are inserted into the configured database (--database-url,
+default Config.SQLALCHEMY_DATABASE_URI) inside a transaction that is rolled
+back at the end, so nothing is left behind. Each path reads and serializes all
+rows --repeat times with a fresh session per run, as a request would; the
+median, best and rows/s are reported. User enrichment is left out: both paths
+share it.
+
+--offline needs no database: it times serialization alone, Task.to_dict on
+in-memory Task objects against serialize_task_row on tuples.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from config import Config
+from Models.Task import Task, TASK_FIELD_ATTRIBUTES, TASK_LIST_COLUMNS, serialize_task_row
+
+PATHS = ("orm", "core")
+
+
+def synthetic_tasks(count: int, project_name: str) -> List[dict]:
+    """Column values for `count` tasks with every list field populated."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "title": f"Task {i}",
+            "description": "Benchmark task " * 4,
+            "start_date": start + timedelta(hours=i),
+            "completed_date": start + timedelta(days=3, hours=i) if i % 3 == 0 else None,
+            "due_date": start + timedelta(days=7, hours=i),
+            "priority": i % 10 + 1,
+            "tags": ["bench", f"t{i % 7}"],
+            "status": ("To Do", "In Progress", "Completed", "Blocked")[i % 4],
+            "project_name": project_name,
+            "assigned_users": [i % 50 + 1, i % 13 + 100],
+            "departments": ["Engineering"] if i % 2 else ["Sales", "HR"],
+            "comments": [{"author": 1, "text": "looks good"}] if i % 5 == 0 else [],
+            "recurrence_frequency": None,
+            "recurrence_interval": None,
+            "is_replicate_from_completed_subtask": False,
+        }
+        for i in range(count)
+    ]
+
+
+def time_runs(run: Callable[[], int], repeat: int) -> List[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(path: str, rows: int, durations: List[float]) -> dict:
+    median = statistics.median(durations)
+    return {
+        "path": path,
+        "rows": rows,
+        "runs": len(durations),
+        "median_ms": round(median * 1000, 2),
+        "best_ms": round(min(durations) * 1000, 2),
+        "rows_per_s": round(rows / median, 1) if median > 0 else 0.0,
+    }
+
+
+def bench_database(database_url: str, rows: int, repeat: int) -> List[Dict]:
+    engine = create_engine(database_url, future=True)
+    marker = f"__bench__{uuid.uuid4().hex}"
+    try:
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            try:
+                connection.execute(insert(Task), synthetic_tasks(rows, marker))
+
+                def orm() -> int:
+                    with Session(bind=connection) as session:
+                        tasks = session.query(Task).filter(Task.project_name == marker).all()
+                        return len([task.to_dict(fetch_users=False) for task in tasks])
+
+                def core() -> int:
+                    with Session(bind=connection) as session:
+                        statement = select(*TASK_LIST_COLUMNS).where(Task.project_name == marker)
+                        return len([serialize_task_row(row) for row in session.execute(statement).all()])
+
+                runs = {"orm": orm, "core": core}
+                for run in runs.values():
+                    run()  # warm up statement caches
+                return [summarize(path, rows, time_runs(runs[path], repeat)) for path in PATHS]
+            finally:
+                transaction.rollback()
+    finally:
+        engine.dispose()
+
+
+def bench_offline(rows: int, repeat: int) -> List[Dict]:
+    values = synthetic_tasks(rows, "offline")
+    tasks = [Task(id=i, **task_values) for i, task_values in enumerate(values, start=1)]
+    tuples = [tuple(getattr(task, attr) for attr in TASK_FIELD_ATTRIBUTES) for task in tasks]
+
+    runs = {
+        "orm": lambda: len([task.to_dict(fetch_users=False) for task in tasks]),
+        "core": lambda: len([serialize_task_row(row) for row in tuples]),
+    }
+    return [summarize(path, rows, time_runs(runs[path], repeat)) for path in PATHS]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="tasks read and serialized per run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per path")
+    parser.add_argument("--database-url", default=Config.SQLALCHEMY_DATABASE_URI)
+    parser.add_argument("--offline", action="store_true", help="serialization only, no database")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        results = bench_offline(args.rows, args.repeat)
+    else:
+        results = bench_database(args.database_url, args.rows, args.repeat)
+    speedup = results[0]["median_ms"] / results[1]["median_ms"] if results[1]["median_ms"] else 0.0
+
+    if args.json:
+        settings = {k: v for k, v in vars(args).items() if k != "database_url"}
+        print(json.dumps({"settings": settings, "results": results, "speedup": round(speedup, 2)}, indent=2))
+    else:
+        print(f"rows={args.rows} repeat={args.repeat} mode={'offline' if args.offline else 'database'}")
+        print(f"{'path':<8}{'median ms':>12}{'best ms':>12}{'rows/s':>14}")
+        for r in results:
+            print(f"{r['path']:<8}{r['median_ms']:>12}{r['best_ms']:>12}{r['rows_per_s']:>14}")
+        print(f"core speedup: {speedup:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,100 +1,79 @@
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, Response, current_app, jsonify, request, g, send_file, stream_with_context
 from datetime import datetime
+import tempfile
 from sqlalchemy.exc import SQLAlchemyError
+from Models.Task import serialize_task_row
 from Repositories.TaskRepository import TaskRepository
+from Services.TaskExport import EXPORT_FORMATS, iter_csv, write_xlsx
 from Services.TaskService import TaskService
+from Services.UsersClient import fetch_users_by_ids
 from exceptions import TaskNotFoundError, TaskValidationError, InvalidTaskStatusError
-import requests
-import os
 
 bp = Blueprint("tasks", __name__, url_prefix="/api/tasks")
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
 def _task_service() -> TaskService:
     repo = TaskRepository(g.db_session)
     return TaskService(repo)
 
-def _batch_fetch_users_for_tasks(tasks):
+def _attach_users(task_dicts):
     """
-    Efficiently fetch user details for multiple tasks in a single batch request.
-    This prevents N+1 HTTP calls to the Users service.
-
-    Returns a dict mapping user_id -> user_data
+    Replace the assigned user ids in serialized tasks with user details, fetched
+    for all tasks in a single batch request (no N+1 HTTP calls to the Users
+    service). Ids the Users service does not return are kept as ids.
     """
-    if not tasks:
-        return {}
+    user_ids = {user_id for task_dict in task_dicts for user_id in task_dict['assignedUsers']}
+    if not user_ids:
+        return task_dicts
 
-    # Collect all unique user IDs from all tasks
-    user_ids = set()
-    for task in tasks:
-        if task.assigned_users:
-            user_ids.update(task.assigned_users)
+    users_map = fetch_users_by_ids(user_ids)
+    for task_dict in task_dicts:
+        if task_dict['assignedUsers']:
+            task_dict['assignedUsers'] = [users_map.get(user_id, user_id) for user_id in task_dict['assignedUsers']]
+    return task_dicts
 
-    if not user_ids:
-        return {}
+def _serialize_rows_with_users(rows):
+    """
+    Serialize read-only task rows (TaskService.list_task_rows) with user details.
+    Rows skip ORM hydration and are turned into dicts by the precompiled
+    serialize_task_row.
+    """
+    return _attach_users([serialize_task_row(row) for row in rows])
 
-    # Make a single batch request to Users service
-    try:
-        users_service_url = os.getenv('USERS_SERVICE_URL', 'http://users:8003')
-        response = requests.post(
-            f"{users_service_url}/api/users/filter",
-            json={"userIds": list(user_ids)},
-            headers={"Content-Type": "application/json"},
-            timeout=5
-        )
-
-        if response.status_code == 200:
-            users_list = response.json()
-            # Create a lookup map: user_id -> user_data
-            return {user.get('userId') or user.get('user_id'): user for user in users_list}
-        else:
-            print(f"Warning: Failed to batch fetch users (status {response.status_code})")
-            return {}
-    except requests.exceptions.RequestException as e:
-        print(f"Warning: Failed to batch fetch users: {e}")
-        return {}
+def _wants_ndjson() -> bool:
+    best = request.accept_mimetypes.best_match(('application/json', NDJSON_MIMETYPE))
+    return best == NDJSON_MIMETYPE
+
+def _ndjson_chunks(row_chunks):
+    # One write per chunk of rows: serialized, enriched with one users batch, one task per line
+    dumps = current_app.json.dumps
+    for rows in row_chunks:
+        yield ''.join(dumps(task_dict) + '\n' for task_dict in _serialize_rows_with_users(rows))
 
-def _serialize_tasks_with_users(tasks):
+def _ndjson_response(row_chunks) -> Response:
     """
-    Serialize multiple tasks with a single batch user fetch.
-    Returns list of task dictionaries with user data populated.
+    Stream task rows as newline-delimited JSON. Rows come from a server-side
+    cursor a chunk at a time, so the first bytes go out after the first chunk
+    and memory stays bounded by the chunk size, whatever the result size.
     """
-    # Batch fetch all users needed for these tasks
-    users_map = _batch_fetch_users_for_tasks(tasks)
-
-    # Serialize each task with user data from the map
-    result = []
-    for task in tasks:
-        task_dict = task.to_dict(g.db_session, fetch_users=False)  # Don't fetch users individually
-
-        # Populate assigned users from our batch-fetched map
-        if task.assigned_users:
-            assigned_users_data = []
-            for user_id in task.assigned_users:
-                if user_id in users_map:
-                    assigned_users_data.append(users_map[user_id])
-                else:
-                    # Fallback to just the user ID if not found
-                    assigned_users_data.append(user_id)
-            task_dict['assignedUsers'] = assigned_users_data
-        else:
-            task_dict['assignedUsers'] = []
+    return Response(stream_with_context(_ndjson_chunks(row_chunks)), mimetype=NDJSON_MIMETYPE)
 
-        result.append(task_dict)
+def _chunk_size() -> int:
+    return current_app.config['TASK_STREAM_CHUNK_SIZE']
 
-    return result
+def _task_list_response(filters):
+    """Tasks matching `filters` as a JSON array, or as NDJSON when the client accepts it."""
+    if _wants_ndjson():
+        return _ndjson_response(_task_service().stream_task_rows(filters, _chunk_size()))
+    rows = _task_service().list_task_rows(filters)
+    return jsonify(_serialize_rows_with_users(rows))
 
 @bp.get("")
 def list_tasks():
     try:
         filters = request.args.to_dict()
-
-        if filters:
-            tasks = _task_service().search_tasks(filters)
-        else:
-            tasks = _task_service().list_tasks()
-
-        # Use batch serialization to avoid N+1 HTTP calls
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response(filters)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -196,40 +175,35 @@ def delete_task(task_id: int):
 @bp.get("/status/<string:status>")
 def get_tasks_by_status(status: str):
     try:
-        tasks = _task_service().get_tasks_by_status(status)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'status': status})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.get("/project/<string:project_name>")
 def get_tasks_by_project(project_name: str):
     try:
-        tasks = _task_service().get_tasks_by_project(project_name)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'project_name': project_name})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.get("/user/<int:user_id>")
 def get_tasks_by_user(user_id: int):
     try:
-        tasks = _task_service().get_tasks_by_user(user_id)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'assigned_user': user_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.get("/priority/<int:priority>")
 def get_tasks_by_priority(priority: int):
     try:
-        tasks = _task_service().get_tasks_by_priority(priority)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'priority': priority})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @bp.get("/overdue")
 def get_overdue_tasks():
     try:
-        tasks = _task_service().get_overdue_tasks()
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'overdue': True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -323,8 +297,10 @@ def remove_user_from_task(task_id: int):
 @bp.get("/<int:parent_id>/subtasks")
 def get_subtasks(parent_id: int):
     try:
-        tasks = _task_service().get_subtasks(parent_id)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        if _wants_ndjson():
+            return _ndjson_response(_task_service().stream_subtask_rows(parent_id, _chunk_size()))
+        rows = _task_service().get_subtask_rows(parent_id)
+        return jsonify(_serialize_rows_with_users(rows))
     except TaskNotFoundError as e:
         return jsonify({"error": str(e)}), 404
     except Exception as e:
@@ -333,8 +309,7 @@ def get_subtasks(parent_id: int):
 @bp.get("/root")
 def get_root_tasks():
     try:
-        tasks = _task_service().get_root_tasks()
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response({'root': True})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -346,13 +321,62 @@ def filter_tasks():
             return jsonify({"error": "No filter data provided"}), 400
 
         filters = _parse_filter_data(data)
-        tasks = _task_service().search_tasks(filters)
-        return jsonify(_serialize_tasks_with_users(tasks))
+        return _task_list_response(filters)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.get("/export")
+def export_tasks():
+    """
+    Tasks matching the /filter filters (given as query parameters) as a CSV or
+    XLSX download. Rows are read from a server-side cursor a chunk at a time:
+    CSV is streamed as it is written, XLSX is written in constant memory to a
+    temporary file that is then sent.
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+        filters = _parse_filter_data(_export_filter_data())
+        row_chunks = _task_service().stream_task_rows(filters, _chunk_size())
+        task_chunks = (_serialize_rows_with_users(rows) for rows in row_chunks)
+        filename = f"tasks-{datetime.now():%Y%m%d-%H%M%S}.{export_format}"
+
+        if export_format == 'xlsx':
+            file = tempfile.TemporaryFile()
+            try:
+                write_xlsx(task_chunks, file)
+            except Exception:
+                file.close()
+                raise
+            file.seek(0)
+            return send_file(file, mimetype=EXPORT_FORMATS['xlsx'], as_attachment=True, download_name=filename)
+
+        response = Response(stream_with_context(iter_csv(task_chunks)), mimetype=EXPORT_FORMATS['csv'])
+        response.headers.set('Content-Disposition', 'attachment', filename=filename)
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _export_filter_data() -> dict:
+    # Query parameters in the /filter body shape; departments may repeat or be comma-separated
+    data = {key: value for key, value in request.args.items() if key not in ('format', 'departments')}
+    departments = [name.strip() for value in request.args.getlist('departments')
+                   for name in value.split(',') if name.strip()]
+    if departments:
+        data['departments'] = departments
+    if 'priority' in data:
+        try:
+            data['priority'] = int(data['priority'])
+        except ValueError:
+            raise ValueError("priority must be an integer")
+    return data
+
 def _parse_filter_data(data: dict):
     filters = {}
 
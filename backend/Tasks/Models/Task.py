@@ -5,7 +5,6 @@ from typing import Optional, List, Dict, Any
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import os
 from db import Base
 
 # Create a module-level HTTP session with connection pooling
@@ -60,57 +59,82 @@ class Task(Base):
         # Fetch assigned users via HTTP call to Users service
         assigned_users_data = []
         if fetch_users and self.assigned_users:
-            try:
-                # Get Users service URL from environment or use default
-                users_service_url = os.getenv(
-                    'USERS_SERVICE_URL', 'http://users:8003')
-
-                # Use persistent HTTP session with connection pooling
-                session = get_http_session()
-                response = session.post(
-                    f"{users_service_url}/api/users/filter",
-                    json={"userIds": self.assigned_users},
-                    headers={"Content-Type": "application/json"},
-                    timeout=5  # Increased timeout for better reliability
-                )
-
-                if response.status_code == 200:
-                    assigned_users_data = response.json()
-                else:
-                    # Failed to fetch users, fall back to user IDs
-                    print(f"Warning: Failed to fetch users (status {response.status_code})")
-                    assigned_users_data = self.assigned_users
-
-                # If no users were fetched successfully, fall back to user IDs
-                if not assigned_users_data:
-                    assigned_users_data = self.assigned_users
-            except requests.exceptions.RequestException as e:
-                # If fetching users fails, fall back to returning user IDs
-                print(f"Warning: Failed to fetch user details: {e}")
-                assigned_users_data = self.assigned_users if self.assigned_users else []
+            # Cached, conditional GET /api/users/batch (imported here: Services import this module)
+            from Services.UsersClient import fetch_users_by_ids
+            users_by_id = fetch_users_by_ids(self.assigned_users)
+            assigned_users_data = [users_by_id[user_id] for user_id in self.assigned_users if user_id in users_by_id]
+
+            # If no users were fetched successfully, fall back to user IDs
+            if not assigned_users_data:
+                assigned_users_data = self.assigned_users
         else:
             # If fetch_users is False, return user IDs only
             assigned_users_data = self.assigned_users if self.assigned_users else []
 
-        return {
-            "taskId": self.id,
-            "title": self.title,
-            "description": self.description,
-            "startDate": self.start_date.isoformat() if self.start_date else None,
-            "completedDate": self.completed_date.isoformat() if self.completed_date else None,
-            "dueDate": self.due_date.isoformat() if self.due_date else None,
-            "priority": self.priority,
-            "tags": self.tags if self.tags else [],
-            "status": self.status,
-            "project_name": self.project_name,
-            "assignedUsers": assigned_users_data,
-            "parentTaskId": self.parent_id,
-            "departments": self.departments if self.departments else [],
-            "comments": self.comments if self.comments else [],
-            "recurrenceFrequency": self.recurrence_frequency,
-            "recurrenceInterval": self.recurrence_interval,
-            "IsReplicateFromCompletedSubtask": self.is_replicate_from_completed_subtask if self.is_replicate_from_completed_subtask is not None else False
-        }
+        task_dict = serialize_task_row(tuple(getattr(self, attr) for attr in TASK_FIELD_ATTRIBUTES))
+        task_dict["assignedUsers"] = assigned_users_data
+        return task_dict
 
     def __repr__(self):
         return f"<Task(id={self.id}, title='{self.title}', status='{self.status}')>"
+
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _list_or_empty(value):
+    return value if value else []
+
+
+def _false_if_none(value):
+    return value if value is not None else False
+
+
+# Public task shape: (key, Task attribute, converter or None to pass the value through)
+TASK_FIELDS = (
+    ("taskId", "id", None),
+    ("title", "title", None),
+    ("description", "description", None),
+    ("startDate", "start_date", _isoformat),
+    ("completedDate", "completed_date", _isoformat),
+    ("dueDate", "due_date", _isoformat),
+    ("priority", "priority", None),
+    ("tags", "tags", _list_or_empty),
+    ("status", "status", None),
+    ("project_name", "project_name", None),
+    ("assignedUsers", "assigned_users", _list_or_empty),
+    ("parentTaskId", "parent_id", None),
+    ("departments", "departments", _list_or_empty),
+    ("comments", "comments", _list_or_empty),
+    ("recurrenceFrequency", "recurrence_frequency", None),
+    ("recurrenceInterval", "recurrence_interval", None),
+    ("IsReplicateFromCompletedSubtask", "is_replicate_from_completed_subtask", _false_if_none),
+)
+TASK_FIELD_ATTRIBUTES = tuple(attr for _, attr, _ in TASK_FIELDS)
+# Columns for Core reads, in TASK_FIELDS order: select(*TASK_LIST_COLUMNS) rows feed serialize_task_row
+TASK_LIST_COLUMNS = tuple(getattr(Task, attr) for attr in TASK_FIELD_ATTRIBUTES)
+
+
+def compile_row_serializer(fields=TASK_FIELDS):
+    """
+    Build a function turning a row (values in `fields` order) into a task dict.
+
+    Keys and converters are resolved once here; per row the dict is built with
+    dict(zip(...)) and only the converted fields are touched again.
+    """
+    keys = tuple(key for key, _, _ in fields)
+    converted = tuple((index, key, convert) for index, (key, _, convert) in enumerate(fields) if convert)
+
+    def serialize(row) -> Dict[str, Any]:
+        result = dict(zip(keys, row))
+        for index, key, convert in converted:
+            result[key] = convert(row[index])
+        return result
+
+    return serialize
+
+
+# Row of TASK_LIST_COLUMNS -> the Task.to_dict shape with assignedUsers as ids
+serialize_task_row = compile_row_serializer()
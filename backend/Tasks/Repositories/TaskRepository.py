@@ -1,8 +1,9 @@
-from typing import Iterable, Optional, Dict, Any, List
+from typing import Iterable, Iterator, Optional, Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
+from sqlalchemy.engine import Row
 from datetime import datetime
-from Models.Task import Task
+from Models.Task import Task, TASK_LIST_COLUMNS
 
 class TaskRepository:
     def __init__(self, session: Session):
@@ -56,31 +57,58 @@ class TaskRepository:
         ).all()
 
     def find_by_criteria(self, filters: Dict[str, Any]) -> Iterable[Task]:
-        query = self.session.query(Task)
-
+        return self.session.query(Task).filter(*self._criteria_conditions(filters)).all()
+
+    def find_rows(self, filters: Dict[str, Any]) -> List[Row]:
+        """
+        Read-only variant of find_by_criteria: plain rows of TASK_LIST_COLUMNS
+        (see Models.Task.serialize_task_row) without ORM objects or the identity
+        map. Besides the find_by_criteria filters it accepts 'overdue' and
+        'root' (True to apply) for the overdue and root task lists.
+        """
+        statement = select(*TASK_LIST_COLUMNS).where(*self._criteria_conditions(filters))
+        return self.session.execute(statement).all()
+
+    def stream_rows(self, filters: Dict[str, Any], chunk_size: int) -> Iterator[List[Row]]:
+        """
+        find_rows as chunks of at most `chunk_size` rows, read through a
+        server-side cursor (stream_results) so only one chunk is held at a time.
+        The query runs here; the cursor stays open on the session until the
+        chunks are exhausted or the session is closed.
+        """
+        statement = (select(*TASK_LIST_COLUMNS)
+                     .where(*self._criteria_conditions(filters))
+                     .execution_options(stream_results=True, yield_per=chunk_size))
+        return self.session.execute(statement).partitions()
+
+    def _criteria_conditions(self, filters: Dict[str, Any]) -> List:
+        conditions = []
         if 'status' in filters:
-            query = query.filter(Task.status == filters['status'])
+            conditions.append(Task.status == filters['status'])
         if 'project_name' in filters:
-            query = query.filter(Task.project_name == filters['project_name'])
+            conditions.append(Task.project_name == filters['project_name'])
         if 'priority' in filters:
-            query = query.filter(Task.priority == filters['priority'])
+            conditions.append(Task.priority == filters['priority'])
         if 'assigned_user' in filters:
-            query = query.filter(Task.assigned_users.any(filters['assigned_user']))
+            conditions.append(Task.assigned_users.any(filters['assigned_user']))
         if 'due_before' in filters:
-            query = query.filter(Task.due_date <= filters['due_before'])
+            conditions.append(Task.due_date <= filters['due_before'])
         if 'due_after' in filters:
-            query = query.filter(Task.due_date >= filters['due_after'])
+            conditions.append(Task.due_date >= filters['due_after'])
         if 'start_date_after' in filters:
-            query = query.filter(Task.start_date >= filters['start_date_after'])
+            conditions.append(Task.start_date >= filters['start_date_after'])
         if 'start_date_before' in filters:
-            query = query.filter(Task.start_date <= filters['start_date_before'])
+            conditions.append(Task.start_date <= filters['start_date_before'])
         if 'parent_id' in filters:
-            query = query.filter(Task.parent_id == filters['parent_id'])
+            conditions.append(Task.parent_id == filters['parent_id'])
         if 'departments' in filters:
             # Use PostgreSQL array overlap operator &&
-            query = query.filter(Task.departments.op('&&')(filters['departments']))
-
-        return query.all()
+            conditions.append(Task.departments.op('&&')(filters['departments']))
+        if filters.get('overdue') is True:
+            conditions.append(and_(Task.due_date < datetime.now(), Task.status != 'Completed'))
+        if filters.get('root') is True:
+            conditions.append(Task.parent_id == None)
+        return conditions
 
     def find_by_parent(self, parent_id: int) -> Iterable[Task]:
         return self.session.query(Task).filter(Task.parent_id == parent_id).all()
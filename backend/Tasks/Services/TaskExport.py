@@ -0,0 +1,108 @@
+from typing import BinaryIO, Iterable, Iterator, List
+import csv
+import io
+
+try:
+    import xlsxwriter
+except ImportError:  # optional: only CSV exports are offered
+    xlsxwriter = None
+
+# (header, serialized task key) of each exported column, in order
+EXPORT_COLUMNS = (
+    ("Task ID", "taskId"),
+    ("Title", "title"),
+    ("Description", "description"),
+    ("Status", "status"),
+    ("Priority", "priority"),
+    ("Project", "project_name"),
+    ("Start Date", "startDate"),
+    ("Due Date", "dueDate"),
+    ("Completed Date", "completedDate"),
+    ("Parent Task ID", "parentTaskId"),
+    ("Assigned Users", "assignedUsers"),
+    ("Departments", "departments"),
+    ("Tags", "tags"),
+)
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+# Export format -> mimetype; xlsx only when xlsxwriter is installed
+EXPORT_FORMATS = {"csv": "text/csv"}
+if xlsxwriter is not None:
+    EXPORT_FORMATS["xlsx"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# A worksheet holds 1,048,576 rows; one is the header
+XLSX_MAX_ROWS = 1048575
+
+# Leading characters that make spreadsheet applications evaluate a CSV cell
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _user_label(user) -> str:
+    # Users the Users service did not return are left as ids
+    if isinstance(user, dict):
+        return str(user.get("name") or user.get("email") or user.get("userId"))
+    return str(user)
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_record(task: dict) -> list:
+    """Cell values of one serialized task (with users attached), in EXPORT_COLUMNS order."""
+    record = []
+    for _, key in EXPORT_COLUMNS:
+        value = task.get(key)
+        if key == "assignedUsers":
+            value = ", ".join(_user_label(user) for user in value or [])
+        elif isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        record.append(value)
+    return record
+
+
+def iter_csv(task_chunks: Iterable[List[dict]]) -> Iterator[str]:
+    """CSV text: the header row, then one piece per chunk of serialized tasks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+    for tasks in task_chunks:
+        writer.writerows([_cell(value) for value in export_record(task)] for task in tasks)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx(task_chunks: Iterable[List[dict]], file: BinaryIO) -> int:
+    """
+    Write the tasks as a single-sheet workbook to `file`; returns the number of
+    tasks. xlsxwriter's constant_memory mode flushes each row to a temporary
+    file once the next one starts, so memory does not grow with the row count.
+    Raises ValueError past XLSX_MAX_ROWS tasks rather than writing a truncated sheet.
+    """
+    if xlsxwriter is None:
+        raise RuntimeError("XLSX export needs the xlsxwriter package")
+
+    # Cells are written as typed: no formulas or hyperlinks from user text
+    workbook = xlsxwriter.Workbook(file, {"constant_memory": True, "in_memory": False,
+                                          "strings_to_formulas": False, "strings_to_urls": False})
+    try:
+        sheet = workbook.add_worksheet("Tasks")
+        sheet.write_row(0, 0, EXPORT_HEADERS, workbook.add_format({"bold": True}))
+        row_number = 0
+        for tasks in task_chunks:
+            for task in tasks:
+                row_number += 1
+                if row_number > XLSX_MAX_ROWS:
+                    # write_row would return -1 and drop every further row
+                    raise ValueError(f"XLSX exports are limited to {XLSX_MAX_ROWS} tasks; use format=csv")
+                sheet.write_row(row_number, 0, export_record(task))
+        sheet.freeze_panes(1, 0)
+    finally:
+        workbook.close()
+    return row_number
@@ -1,5 +1,6 @@
-from typing import Iterable, Optional, Dict, Any, List
+from typing import Iterable, Iterator, Optional, Dict, Any, List
 from datetime import datetime
+from sqlalchemy.engine import Row
 from Repositories.TaskRepository import TaskRepository
 from Models.Task import Task
 from exceptions import TaskNotFoundError, TaskValidationError, InvalidTaskStatusError
@@ -162,6 +163,24 @@ class TaskService:
     def search_tasks(self, filters: Dict[str, Any]) -> Iterable[Task]:
         return self.repo.find_by_criteria(filters)
 
+    def list_task_rows(self, filters: Optional[Dict[str, Any]] = None) -> List[Row]:
+        """Read-only task rows for list responses (see TaskRepository.find_rows)."""
+        return self.repo.find_rows(filters or {})
+
+    def get_subtask_rows(self, parent_id: int) -> List[Row]:
+        if not self.repo.get(parent_id):
+            raise TaskNotFoundError(f"Parent task with id {parent_id} not found")
+        return self.repo.find_rows({'parent_id': parent_id})
+
+    def stream_task_rows(self, filters: Optional[Dict[str, Any]], chunk_size: int) -> Iterator[List[Row]]:
+        """list_task_rows in chunks, for streamed responses (see TaskRepository.stream_rows)."""
+        return self.repo.stream_rows(filters or {}, chunk_size)
+
+    def stream_subtask_rows(self, parent_id: int, chunk_size: int) -> Iterator[List[Row]]:
+        if not self.repo.get(parent_id):
+            raise TaskNotFoundError(f"Parent task with id {parent_id} not found")
+        return self.repo.stream_rows({'parent_id': parent_id}, chunk_size)
+
     def get_subtasks(self, parent_id: int) -> Iterable[Task]:
         parent_task = self.repo.get(parent_id)
         if not parent_task:
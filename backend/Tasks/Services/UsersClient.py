@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+import re
+import threading
+import time
+
+import requests
+
+from Models.Task import get_http_session
+from config import Config
+
+# Batch responses kept for revalidation, keyed by the canonical request URL
+MAX_CACHED_BATCHES = 256
+# Ids per request; matches the Users service's USER_BATCH_MAX_IDS default
+MAX_IDS_PER_BATCH = 500
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _batch_url(user_ids: List[int]) -> str:
+    return f"{Config.USERS_SERVICE_URL}/api/users/batch?ids={','.join(map(str, user_ids))}"
+
+
+def _store(url: str, entry: dict) -> None:
+    with _cache_lock:
+        _cache[url] = entry
+        _cache.move_to_end(url)
+        while len(_cache) > MAX_CACHED_BATCHES:
+            _cache.popitem(last=False)
+
+
+def _fresh_until(response: requests.Response) -> float:
+    match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+    return time.monotonic() + (int(match.group(1)) if match else 0)
+
+
+def fetch_users_by_ids(user_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Users keyed by id from GET /api/users/batch. Ids the Users service did not
+    return (unknown, or the request failed) are missing from the result.
+
+    Responses are reused while fresh (Cache-Control max-age) and then revalidated
+    with If-None-Match / If-Modified-Since, so an unchanged set costs a 304.
+    """
+    # Sorted, deduplicated ids give one URL (and one cache entry) per set of users
+    ids = sorted({int(i) for i in user_ids})
+    users: Dict[int, dict] = {}
+    for start in range(0, len(ids), MAX_IDS_PER_BATCH):
+        users.update(_fetch_batch(ids[start:start + MAX_IDS_PER_BATCH]) or {})
+    return users
+
+
+def _fetch_batch(user_ids: List[int]) -> Optional[Dict[int, dict]]:
+    url = _batch_url(user_ids)
+    with _cache_lock:
+        cached = _cache.get(url)
+    if cached and cached['fresh_until'] > time.monotonic():
+        return cached['users']
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    try:
+        response = get_http_session().get(url, headers=headers, timeout=5)
+    except requests.exceptions.RequestException as e:
+        print(f"Warning: Failed to batch fetch users: {e}")
+        return None
+
+    if response.status_code == 304 and cached:
+        _store(url, {**cached, 'fresh_until': _fresh_until(response)})
+        return cached['users']
+
+    if response.status_code != 200:
+        print(f"Warning: Failed to batch fetch users (status {response.status_code})")
+        return None
+
+    users = {user.get('userId') or user.get('user_id'): user for user in response.json()}
+    _store(url, {
+        'users': users,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fresh_until': _fresh_until(response),
+    })
+    return users
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
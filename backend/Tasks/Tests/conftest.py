@@ -0,0 +1,80 @@
+import os
+from datetime import datetime, timezone
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from sqlalchemy.dialects import postgresql
+
+from Models.Task import Task, TASK_FIELD_ATTRIBUTES
+from Repositories.TaskRepository import TaskRepository
+from app import create_app  # noqa: E402
+
+# Task rows, a recording session and an app client wired to it, shared by the
+# row-serialization and export tests
+
+DUE = datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc)
+
+
+def _task(**values):
+    defaults = dict(id=1, title="Write report", description="", start_date=datetime(2024, 2, 1), due_date=DUE,
+                    priority=5, tags=["q1"], status="To Do", project_name="Ops", assigned_users=[1, 2],
+                    parent_id=None, departments=None, comments=None)
+    return Task(**{**defaults, **values})
+
+
+def _row(task):
+    return tuple(getattr(task, attr) for attr in TASK_FIELD_ATTRIBUTES)
+
+
+class RecordingSession:
+    """Session stand-in that records statements and returns canned rows"""
+
+    def __init__(self, rows=(), tasks=None):
+        self.rows = list(rows)
+        self.tasks = tasks or {}
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        rows = self.rows
+
+        class Result:
+            def all(self):
+                return rows
+
+            def partitions(self):
+                size = statement.get_execution_options().get("yield_per") or len(rows)
+                for start in range(0, len(rows), size):
+                    yield rows[start:start + size]
+
+        return Result()
+
+    def get(self, model, task_id):
+        return self.tasks.get(task_id)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def session():
+    return RecordingSession()
+
+
+@pytest.fixture
+def client(monkeypatch, session):
+    import Controllers.TaskController as controller
+
+    monkeypatch.setattr(controller, "TaskRepository", lambda _session: TaskRepository(session))
+    monkeypatch.setattr(controller, "fetch_users_by_ids", lambda ids: {1: {"userId": 1, "name": "Ann"}})
+    app = create_app()
+    app.testing = True
+    with app.test_client() as client:
+        yield client
+
+
+def _sql(statement):
+    return " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
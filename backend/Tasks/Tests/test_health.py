@@ -5,6 +5,9 @@ import pytest
 os.environ["FLASK_ENV"] = "test"
 os.environ["ENV"] = "test"
 
+from flask import g
+
+import app as app_module  # noqa: E402
 from app import create_app  # noqa: E402
 
 @pytest.mark.unit
@@ -18,3 +21,52 @@ def test_health_ok():
         assert data == {"status": "ok", "service": "tasks"}
 
 
+
+
+class CountingSessions:
+    """SessionLocal stand-in counting sessions created and registry removals"""
+
+    def __init__(self):
+        self.created = 0
+        self.removed = 0
+
+    def __call__(self):
+        self.created += 1
+        return object()
+
+    def remove(self):
+        self.removed += 1
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    sessions = CountingSessions()
+    monkeypatch.setattr(app_module, "SessionLocal", sessions)
+    return sessions
+
+
+@pytest.mark.unit
+def test_health_and_preflight_never_create_a_session(sessions):
+    app = create_app()
+    with app.test_client() as client:
+        client.get("/api/tasks/health")
+        client.options("/api/tasks/health", headers={"Origin": "http://localhost:3000",
+                                                   "Access-Control-Request-Method": "GET"})
+
+    assert sessions.created == 0
+    assert sessions.removed == 0
+
+
+@pytest.mark.unit
+def test_db_session_is_created_on_first_use(sessions):
+    app = create_app()
+
+    @app.get("/uses-db")
+    def uses_db():
+        return {"same": g.db_session is g.db_session}
+
+    with app.test_client() as client:
+        assert client.get("/uses-db").get_json() == {"same": True}
+
+    assert sessions.created == 1
+    assert sessions.removed == 1
@@ -0,0 +1,174 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from flask import Flask, Response, jsonify, request
+
+import http_encoding
+from http_encoding import OrjsonProvider, init_http_encoding
+
+BIG = [{"taskId": i, "title": f"Task {i}", "status": "To Do"} for i in range(200)]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(COMPRESS_ENABLED=True, COMPRESS_MIN_BYTES=1024, COMPRESS_GZIP_LEVEL=6,
+                      COMPRESS_BROTLI_QUALITY=4)
+    init_http_encoding(app)
+
+    @app.get("/big")
+    def big():
+        return jsonify(BIG)
+
+    @app.get("/small")
+    def small():
+        return jsonify({"ok": True})
+
+    @app.get("/tagged")
+    def tagged():
+        response = jsonify(BIG)
+        response.set_etag("v1")
+        return response.make_conditional(request)
+
+    @app.get("/text")
+    def text():
+        return "x" * 5000, 200, {"Content-Type": "application/pdf"}
+
+    @app.get("/stream")
+    def stream():
+        return Response((json.dumps(row) + "\n" for row in BIG), mimetype="application/x-ndjson")
+
+    @app.post("/echo")
+    def echo():
+        return jsonify(request.get_json())
+
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# ============ JSON Provider Tests ============
+
+@pytest.mark.unit
+def test_provider_encodes_dates_decimals_and_int_keys(app):
+    pytest.importorskip("orjson")
+    assert isinstance(app.json, OrjsonProvider)
+
+    with app.app_context():
+        body = app.json.dumps({"at": datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc), "cost": Decimal("1.50"),
+                               1: "one"})
+
+    assert body == '{"at":"2024-03-01T09:30:00+00:00","cost":"1.50","1":"one"}'
+
+
+@pytest.mark.unit
+def test_provider_round_trips_requests(client):
+    resp = client.post("/echo", json={"title": "Ünïcode", "n": [1, 2.5, None]})
+
+    assert resp.get_json() == {"title": "Ünïcode", "n": [1, 2.5, None]}
+    assert resp.data.endswith(b"\n")
+
+
+@pytest.mark.unit
+def test_provider_rejects_unknown_types(app):
+    pytest.importorskip("orjson")
+    with app.app_context(), pytest.raises(TypeError):
+        app.json.dumps({"value": object()})
+
+
+# ============ Compression Tests ============
+
+@pytest.mark.unit
+def test_gzip_when_accepted(client):
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert int(resp.headers["Content-Length"]) == len(resp.data)
+    assert len(resp.data) < len(gzip.decompress(resp.data)) / 5
+    assert gzip.decompress(resp.data).startswith(b'[{"taskId":0')
+
+
+@pytest.mark.unit
+def test_brotli_preferred_when_available(client):
+    brotli = pytest.importorskip("brotli")
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+    assert resp.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(resp.data).startswith(b'[{"taskId":0')
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("path, accept", [
+    ("/big", None),
+    ("/big", "gzip;q=0"),
+    ("/big", "identity"),
+    ("/small", "gzip"),
+    ("/text", "gzip"),
+])
+def test_left_uncompressed(client, path, accept):
+    headers = {"Accept-Encoding": accept} if accept else {}
+    resp = client.get(path, headers=headers)
+
+    assert "Content-Encoding" not in resp.headers
+
+
+@pytest.mark.unit
+def test_streamed_response_is_passed_through(client):
+    resp = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in resp.headers
+    assert resp.data.startswith(b'{"taskId": 0')
+
+
+@pytest.mark.unit
+def test_big_response_varies_even_uncompressed(client):
+    assert "Accept-Encoding" in client.get("/big").headers["Vary"]
+
+
+@pytest.mark.unit
+def test_disabled(app, client):
+    app.config["COMPRESS_ENABLED"] = False
+    assert "Content-Encoding" not in client.get("/big", headers={"Accept-Encoding": "gzip"}).headers
+
+
+@pytest.mark.unit
+def test_compressed_etag_is_weak_and_still_revalidates(client):
+    first = client.get("/tagged", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["ETag"] == 'W/"v1"'
+
+    again = client.get("/tagged", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert "Content-Encoding" not in again.headers
+
+
+@pytest.mark.unit
+def test_falls_back_to_stdlib_json_without_orjson(monkeypatch):
+    monkeypatch.setattr(http_encoding, "orjson", None)
+    app = Flask(__name__)
+    init_http_encoding(app)
+
+    assert not isinstance(app.json, OrjsonProvider)
+
+
+@pytest.mark.unit
+def test_encoding_benchmark_reports_encoders_and_codecs(capsys):
+    from Benchmarks.bench_json_encoding import main
+
+    assert main(["--rows", "50", "--repeat", "1", "--json"]) == 0
+
+    report = json.loads(capsys.readouterr().out)
+    assert [r["name"] for r in report["encoders"]][0] == "stdlib"
+    assert {"gzip-1", "gzip-6", "gzip-9"} <= {r["name"] for r in report["codecs"]}
+    assert all(r["ratio"] > 1 for r in report["codecs"])
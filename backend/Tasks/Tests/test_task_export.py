@@ -0,0 +1,128 @@
+import csv
+import io
+import os
+import zipfile
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Services import TaskExport
+from Services.TaskExport import EXPORT_HEADERS, export_record, iter_csv, write_xlsx
+from Tests.conftest import _row, _sql, _task
+
+
+def _csv_rows(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+# ============ Writer Tests ============
+
+@pytest.mark.unit
+def test_export_record_flattens_lists_and_users():
+    record = export_record({
+        "taskId": 1, "title": "Report", "assignedUsers": [{"userId": 1, "name": "Ann"}, 9],
+        "departments": ["HR", "Sales"], "tags": [],
+    })
+
+    assert record[0] == 1
+    assert record[EXPORT_HEADERS.index("Assigned Users")] == "Ann, 9"
+    assert record[EXPORT_HEADERS.index("Departments")] == "HR, Sales"
+    assert record[EXPORT_HEADERS.index("Tags")] == ""
+    assert record[EXPORT_HEADERS.index("Due Date")] is None
+
+
+@pytest.mark.unit
+def test_csv_is_written_per_chunk_and_escapes_formulas():
+    chunks = [[{"taskId": 1, "title": "=HYPERLINK(\"x\")"}], [{"taskId": 2, "title": "Plain"}]]
+
+    pieces = list(iter_csv(chunks))
+
+    assert len(pieces) == 2
+    rows = _csv_rows("".join(pieces))
+    assert rows[0] == EXPORT_HEADERS
+    assert rows[1][1] == "'=HYPERLINK(\"x\")"
+    assert rows[2][:2] == ["2", "Plain"]
+    assert _csv_rows("".join(iter_csv([]))) == [EXPORT_HEADERS]
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(TaskExport.xlsxwriter is None, reason="xlsxwriter is not installed")
+def test_xlsx_workbook_has_header_and_rows():
+    file = io.BytesIO()
+
+    count = write_xlsx([[{"taskId": 1, "title": "=1+1"}], [{"taskId": 2, "title": "Two"}]], file)
+
+    assert count == 2
+    with zipfile.ZipFile(file) as workbook:
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+    # constant_memory writes strings inline in the sheet
+    assert "<f>" not in sheet
+    assert "=1+1" in sheet and "Task ID" in sheet
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(TaskExport.xlsxwriter is None, reason="xlsxwriter is not installed")
+def test_xlsx_refuses_more_rows_than_a_sheet_holds(monkeypatch):
+    monkeypatch.setattr(TaskExport, "XLSX_MAX_ROWS", 2)
+
+    assert write_xlsx([[{"taskId": 1}, {"taskId": 2}]], io.BytesIO()) == 2
+    with pytest.raises(ValueError, match="format=csv"):
+        write_xlsx([[{"taskId": 1}, {"taskId": 2}], [{"taskId": 3}]], io.BytesIO())
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_csv_export_streams_filtered_tasks(client, session):
+    client.application.config["TASK_STREAM_CHUNK_SIZE"] = 1
+    session.rows = [_row(_task(id=1, assigned_users=[1])), _row(_task(id=2, assigned_users=None))]
+
+    resp = client.get("/api/tasks/export?format=csv&status=To Do&departments=HR,Sales&priority=5")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert resp.is_streamed
+    assert resp.headers["Content-Disposition"].startswith("attachment; filename=tasks-")
+    rows = _csv_rows(resp.get_data(as_text=True))
+    assert [row[0] for row in rows[1:]] == ["1", "2"]
+    assert rows[1][EXPORT_HEADERS.index("Assigned Users")] == "Ann"
+
+    sql = _sql(session.statements[0])
+    assert "tasks.status = " in sql and "tasks.priority = " in sql and "tasks.departments && " in sql
+    assert session.statements[0].get_execution_options()["stream_results"] is True
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(TaskExport.xlsxwriter is None, reason="xlsxwriter is not installed")
+def test_xlsx_export_is_an_attachment(client, session):
+    session.rows = [_row(_task(id=1))]
+
+    resp = client.get("/api/tasks/export?format=xlsx")
+
+    assert resp.status_code == 200
+    assert resp.mimetype == TaskExport.EXPORT_FORMATS["xlsx"]
+    assert ".xlsx" in resp.headers["Content-Disposition"]
+    assert zipfile.is_zipfile(io.BytesIO(resp.get_data()))
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(TaskExport.xlsxwriter is None, reason="xlsxwriter is not installed")
+def test_xlsx_export_over_the_sheet_limit_is_rejected(client, session, monkeypatch):
+    monkeypatch.setattr(TaskExport, "XLSX_MAX_ROWS", 1)
+    session.rows = [_row(_task(id=1)), _row(_task(id=2))]
+
+    resp = client.get("/api/tasks/export?format=xlsx")
+
+    assert resp.status_code == 400
+    assert "format=csv" in resp.get_json()["error"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["format=pdf", "due_before=yesterday", "priority=high"])
+def test_export_validation(client, query):
+    resp = client.get(f"/api/tasks/export?{query}")
+
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
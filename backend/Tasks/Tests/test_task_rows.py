@@ -0,0 +1,148 @@
+import json
+import os
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Models.Task import serialize_task_row
+from Repositories.TaskRepository import TaskRepository
+from Tests.conftest import _row, _sql, _task
+
+
+# ============ Serializer Tests ============
+
+@pytest.mark.unit
+def test_row_serializer_matches_to_dict():
+    task = _task(completed_date=None, comments=[{"text": "hi"}], is_replicate_from_completed_subtask=None)
+
+    assert serialize_task_row(_row(task)) == task.to_dict(fetch_users=False)
+    assert list(serialize_task_row(_row(task))) == list(task.to_dict(fetch_users=False))
+
+
+@pytest.mark.unit
+def test_row_serializer_formats_values():
+    task_dict = serialize_task_row(_row(_task(tags=None, assigned_users=None)))
+
+    assert task_dict["dueDate"] == "2024-03-01T09:30:00+00:00"
+    assert task_dict["completedDate"] is None
+    assert task_dict["tags"] == []
+    assert task_dict["assignedUsers"] == []
+    assert task_dict["IsReplicateFromCompletedSubtask"] is False
+
+
+# ============ Repository Tests ============
+
+@pytest.mark.unit
+def test_find_rows_selects_columns_not_entities(session):
+    TaskRepository(session).find_rows({"status": "To Do", "root": True})
+
+    sql = _sql(session.statements[0])
+    assert sql.startswith("SELECT tasks.id, tasks.title, tasks.description, tasks.start_date")
+    assert 'tasks."IsReplicateFromCompletedSubtask" FROM tasks' in sql
+    assert 'WHERE tasks.status = %(status_1)s AND tasks."parentID" IS NULL' in sql
+
+
+@pytest.mark.unit
+def test_find_rows_overdue(session):
+    TaskRepository(session).find_rows({"overdue": True, "root": "true"})
+
+    sql = _sql(session.statements[0])
+    assert "tasks.due_date < %(due_date_1)s AND tasks.status != %(status_1)s" in sql
+    assert "parentID" not in sql.split("FROM tasks")[1]
+
+
+@pytest.mark.unit
+def test_stream_rows_uses_server_side_cursor(session):
+    session.rows = [_row(_task(id=i)) for i in range(1, 6)]
+
+    chunks = list(TaskRepository(session).stream_rows({"status": "To Do"}, chunk_size=2))
+
+    options = session.statements[0].get_execution_options()
+    assert options["stream_results"] is True
+    assert options["yield_per"] == 2
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_list_endpoints_serialize_rows_with_users(client, session):
+    session.rows = [_row(_task(id=1, assigned_users=[1, 9])), _row(_task(id=2, assigned_users=None))]
+
+    resp = client.get("/api/tasks/status/To Do")
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [t["taskId"] for t in body] == [1, 2]
+    assert body[0]["assignedUsers"] == [{"userId": 1, "name": "Ann"}, 9]
+    assert body[1]["assignedUsers"] == []
+    assert "tasks.status" in _sql(session.statements[0])
+
+
+@pytest.mark.unit
+def test_subtasks_require_parent(client, session):
+    assert client.get("/api/tasks/5/subtasks").status_code == 404
+
+    session.tasks[5] = _task(id=5)
+    session.rows = [_row(_task(id=6, parent_id=5))]
+    resp = client.get("/api/tasks/5/subtasks")
+
+    assert resp.status_code == 200
+    assert resp.get_json()[0]["parentTaskId"] == 5
+
+
+@pytest.mark.unit
+def test_list_endpoints_stream_ndjson_in_chunks(client, session, monkeypatch):
+    import Controllers.TaskController as controller
+
+    batches = []
+    monkeypatch.setattr(controller, "fetch_users_by_ids", lambda ids: batches.append(set(ids)) or {})
+    client.application.config["TASK_STREAM_CHUNK_SIZE"] = 2
+    session.rows = [_row(_task(id=i, assigned_users=[i])) for i in range(1, 6)]
+
+    resp = client.get("/api/tasks/project/Ops", headers={"Accept": "application/x-ndjson"})
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    assert resp.is_streamed
+    lines = resp.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["taskId"] for line in lines] == [1, 2, 3, 4, 5]
+    assert batches == [{1, 2}, {3, 4}, {5}]
+
+
+@pytest.mark.unit
+def test_list_endpoints_default_to_json_array(client, session):
+    session.rows = [_row(_task(id=1))]
+
+    resp = client.get("/api/tasks/root", headers={"Accept": "application/json, application/x-ndjson;q=0.5"})
+
+    assert resp.mimetype == "application/json"
+    assert [t["taskId"] for t in resp.get_json()] == [1]
+
+
+@pytest.mark.unit
+def test_streamed_subtasks_require_parent(client, session):
+    headers = {"Accept": "application/x-ndjson"}
+    assert client.get("/api/tasks/5/subtasks", headers=headers).status_code == 404
+
+    session.tasks[5] = _task(id=5)
+    session.rows = [_row(_task(id=6, parent_id=5))]
+    resp = client.get("/api/tasks/5/subtasks", headers=headers)
+
+    assert json.loads(resp.get_data(as_text=True))["parentTaskId"] == 5
+
+
+# ============ Benchmark Tests ============
+
+@pytest.mark.unit
+def test_offline_benchmark_reports_both_paths(capsys):
+    from Benchmarks.bench_task_lists import main
+
+    assert main(["--offline", "--rows", "20", "--repeat", "2", "--json"]) == 0
+
+    output = capsys.readouterr().out
+    assert '"path": "orm"' in output
+    assert '"path": "core"' in output
+    assert '"speedup"' in output
@@ -0,0 +1,90 @@
+from unittest.mock import Mock
+import pytest
+
+from Services import UsersClient
+from Services.UsersClient import fetch_users_by_ids
+from Models.Task import Task
+
+
+def _response(status, users=None, headers=None):
+    response = Mock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.json.return_value = users or []
+    return response
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = Mock()
+    monkeypatch.setattr(UsersClient, "get_http_session", lambda: session)
+    UsersClient.clear_cache()
+    yield session
+    UsersClient.clear_cache()
+
+
+@pytest.mark.unit
+def test_fetch_uses_canonical_batch_url(session):
+    session.get.return_value = _response(200, [{"userId": 1}, {"userId": 2}], {"Cache-Control": "public, max-age=30"})
+
+    users = fetch_users_by_ids([2, 1, 2])
+
+    assert set(users) == {1, 2}
+    url = session.get.call_args[0][0]
+    assert url.endswith("/api/users/batch?ids=1,2")
+
+
+@pytest.mark.unit
+def test_fresh_response_is_reused(session):
+    session.get.return_value = _response(200, [{"userId": 1}], {"Cache-Control": "max-age=30"})
+
+    fetch_users_by_ids([1])
+    fetch_users_by_ids([1])
+
+    assert session.get.call_count == 1
+
+
+@pytest.mark.unit
+def test_stale_response_is_revalidated(session):
+    session.get.return_value = _response(200, [{"userId": 1}], {
+        "Cache-Control": "max-age=0", "ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    })
+    fetch_users_by_ids([1])
+
+    session.get.return_value = _response(304)
+    users = fetch_users_by_ids([1])
+
+    assert users == {1: {"userId": 1}}
+    headers = session.get.call_args[1]["headers"]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.mark.unit
+def test_large_sets_are_split(session, monkeypatch):
+    monkeypatch.setattr(UsersClient, "MAX_IDS_PER_BATCH", 2)
+    session.get.side_effect = [
+        _response(200, [{"userId": 1}, {"userId": 2}]),
+        _response(200, [{"userId": 3}]),
+    ]
+
+    assert set(fetch_users_by_ids([3, 2, 1])) == {1, 2, 3}
+    assert session.get.call_count == 2
+
+
+@pytest.mark.unit
+def test_failure_returns_empty_and_task_falls_back_to_ids(session):
+    session.get.return_value = _response(503)
+
+    assert fetch_users_by_ids([1]) == {}
+    task = Task(id=1, title="t", status="pending", assigned_users=[1, 2])
+    assert task.to_dict()["assignedUsers"] == [1, 2]
+
+
+@pytest.mark.unit
+def test_task_to_dict_keeps_assignment_order(session):
+    session.get.return_value = _response(200, [{"userId": 1}, {"userId": 2}])
+
+    task = Task(id=1, title="t", status="pending", assigned_users=[2, 1])
+
+    assert task.to_dict()["assignedUsers"] == [{"userId": 2}, {"userId": 1}]
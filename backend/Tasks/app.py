@@ -1,10 +1,27 @@
 from flask import Flask, g
+from flask.ctx import _AppCtxGlobals
 from flask_cors import CORS
 import os
 from config import Config
 from db import SessionLocal, init_db
+from http_encoding import init_http_encoding
 from Controllers.TaskController import bp as task_bp
 
+class RequestGlobals(_AppCtxGlobals):
+    """
+    flask.g whose db_session is created on first use, from the scoped_session
+    registry, so requests that never query (health checks, CORS preflights,
+    cache hits) never touch it. A session checks out a pool connection only
+    when its first statement runs.
+    """
+
+    def __getattr__(self, name):
+        if name == 'db_session':
+            # Stored as a plain attribute: later lookups no longer get here
+            self.db_session = SessionLocal()
+            return self.db_session
+        return super().__getattr__(name)
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
@@ -12,21 +29,17 @@ def create_app():
     
     # Allow all origins for CORS
     CORS(app, origins="*", supports_credentials=True)
+
+    # orjson responses, gzip/brotli compression
+    init_http_encoding(app)
     
-    @app.before_request
-    def before_request():
-        g.db_session = SessionLocal()
-    
-    @app.after_request
-    def after_request(response):
-        if hasattr(g, 'db_session'):
-            g.db_session.close()
-        return response
-    
+    app.app_ctx_globals_class = RequestGlobals
+
     @app.teardown_appcontext
-    def close_db_session(error):
-        if hasattr(g, 'db_session'):
-            g.db_session.close()
+    def remove_db_session(error):
+        # Only when the request used one; streamed bodies finish before teardown
+        if g.pop('db_session', None) is not None:
+            SessionLocal.remove()
     
     @app.get("/api/tasks/health")
     def health():
@@ -16,4 +16,12 @@ class Config:
 
     # Users Service Configuration
     USERS_SERVICE_URL = os.getenv("USERS_SERVICE_URL", "http://users:8003")
-    
\ No newline at end of file
+    
+    # Rows per chunk of streamed (NDJSON) task lists; users are fetched once per chunk
+    TASK_STREAM_CHUNK_SIZE = int(os.getenv("TASK_STREAM_CHUNK_SIZE", "500"))
+
+    # Response compression (http_encoding.py)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
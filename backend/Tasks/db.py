@@ -27,6 +27,15 @@ SessionLocal = scoped_session(
 )
 Base = declarative_base()
 
+def reset_after_fork():
+    """
+    Forget database connections inherited from a parent process (a preloading
+    server's master) without closing them, as they still belong to the parent;
+    the pool then opens fresh ones in this process.
+    """
+    SessionLocal.remove()
+    engine.dispose(close=False)
+
 def init_db(engine_to_use=None):
     # import models here so Base.metadata is populated
     from Models.Task import Task  # noqa
@@ -0,0 +1,78 @@
+"""
+Gunicorn settings for production serving; the Dockerfile runs
+
+    gunicorn wsgi:app
+
+from this directory, which picks this file up. Every setting can be changed
+through the environment:
+
+    PORT                       listen port (8001)
+    GUNICORN_WORKERS           worker processes (2 x available CPUs + 1)
+    GUNICORN_THREADS           threads per worker (4)
+    GUNICORN_WORKER_CLASS      gthread, or gevent when gevent is installed
+    GUNICORN_WORKER_CONNECTIONS  concurrent requests per gevent worker (100)
+    GUNICORN_TIMEOUT           seconds before a silent worker is restarted (60)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds workers get to finish on reload/stop (30)
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (0: never)
+    GUNICORN_LOG_LEVEL         gunicorn log level (info)
+
+The app is imported once in the master (preload_app) and forked into the
+workers; each worker then drops the database connections it inherited and
+opens its own. Send HUP to the master for a graceful restart of the workers
+(in-flight requests finish first). With preload_app a HUP does not re-import
+code, so deploy new code by restarting the container.
+"""
+import math
+import os
+
+
+def _int(name, default):
+    # Unset and empty (e.g. "${GUNICORN_WORKERS:-}" in docker-compose) both mean the default
+    return int(os.getenv(name) or default)
+
+
+def _cpu_count():
+    # CPUs this container may use: its cpuset, further limited by a cgroup v2 CPU
+    # quota (docker --cpus). multiprocessing.cpu_count() counts every host CPU.
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = f"0.0.0.0:{os.getenv('PORT') or '8001'}"
+workers = _int("GUNICORN_WORKERS", _cpu_count() * 2 + 1)
+threads = _int("GUNICORN_THREADS", 4)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS") or "gthread"
+worker_connections = _int("GUNICORN_WORKER_CONNECTIONS", 100)
+timeout = _int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = _int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = 5
+max_requests = _int("GUNICORN_MAX_REQUESTS", 0)
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+# Worker heartbeats on tmpfs: a disk-backed /tmp in containers can stall them
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL") or "info"
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        # psycopg2 blocks the whole gevent worker unless its waits are made cooperative
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen is not installed; database calls will block gevent workers")
+
+    from db import reset_after_fork
+    reset_after_fork()
@@ -1,24 +1,94 @@
-from flask import Blueprint, request, jsonify, g
+from datetime import datetime, timezone
+import csv
+import hashlib
+import io
+
+from flask import Blueprint, Response, request, jsonify, g
+
+try:
+    import msgpack
+except ImportError:  # optional: snapshots are then only served as JSON
+    msgpack = None
 
 # Handle both relative and absolute imports
 try:
+    from ..config import Config
+    from ..Models.User import FIELD_COLUMNS, serialize_user
     from ..Repositories.UserRepository import UserRepository
+    from ..Services.UserCache import user_cache
+    from ..Services.DirectorySnapshot import build_delta, build_snapshot, decode_version, encode_version
+    from ..Services.UserImport import prepare_import, read_csv, read_json, read_jsonl
+    from ..Services.LoginTracker import login_tracker
 except ImportError:
+    from config import Config
+    from Models.User import FIELD_COLUMNS, serialize_user
     from Repositories.UserRepository import UserRepository
+    from Services.UserCache import user_cache
+    from Services.DirectorySnapshot import build_delta, build_snapshot, decode_version, encode_version
+    from Services.UserImport import prepare_import, read_csv, read_json, read_jsonl
+    from Services.LoginTracker import login_tracker
 
 bp = Blueprint('users', __name__, url_prefix='/api/users')
 
+
+def _sync_cache() -> None:
+    """Drop cached users that any worker changed since this worker last checked."""
+    user_cache.sync(UserRepository(g.db_session))
+
+
+def _lookup_users(user_ids: list, emails: list) -> list:
+    """User payloads matching any of the ids or emails, from the cache where possible."""
+    # Serve what is cached and only query the database for the rest
+    _sync_cache()
+    cached, missing_ids, missing_emails = user_cache.get_many(user_ids or [], emails or [])
+    fetched = []
+    if missing_ids or missing_emails:
+        user_repo = UserRepository(g.db_session)
+        users = user_repo.get_users_by_filter(user_ids=missing_ids, emails=missing_emails)
+        fetched = [user.to_dict() for user in users]
+        user_cache.put_many(fetched)
+
+    seen = set()
+    results = []
+    for payload in cached + fetched:
+        if payload['userId'] not in seen:
+            seen.add(payload['userId'])
+            results.append(payload)
+    return results
+
+
 @bp.route('/<int:user_id>', methods=['GET'])
 def get_user_by_id(user_id: int):
     """Get user by ID"""
     try:
+        _sync_cache()
+        cached = user_cache.get_by_id(user_id)
+        if cached is not None:
+            return jsonify(cached)
+
         user_repo = UserRepository(g.db_session)
         user = user_repo.get_user_by_id(user_id)
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        return jsonify(user.to_dict())
+        payload = user.to_dict()
+        user_cache.put(payload)
+        return jsonify(payload)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:user_id>/login', methods=['POST'])
+def record_login(user_id: int):
+    """Record a sign-in
+
+    last_login is written in the background within LOGIN_FLUSH_INTERVAL_SECONDS,
+    so this never waits on the database. Returns 202 with the recorded time.
+    """
+    try:
+        at = login_tracker.record(user_id)
+        return jsonify({'userId': user_id, 'lastLogin': at.isoformat()}), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -27,25 +97,160 @@ def get_user_by_id(user_id: int):
 def get_user_by_email(email: str):
     """Get user by email"""
     try:
+        _sync_cache()
+        cached = user_cache.get_by_email(email)
+        if cached is not None:
+            return jsonify(cached)
+
         user_repo = UserRepository(g.db_session)
         user = user_repo.get_user_by_email(email)
 
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        return jsonify(user.to_dict())
+        payload = user.to_dict()
+        user_cache.put(payload)
+        return jsonify(payload)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+DIRECTORY_PARAMS = ('limit', 'cursor', 'q', 'department', 'role', 'is_active', 'fields')
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ('true', '1', 'yes'):
+        return True
+    if lowered in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
+
+
+def _parse_fields(value) -> list:
+    """Requested public fields (comma-separated string or list), or None for all; ValueError if unknown."""
+    if isinstance(value, str):
+        value = value.split(',')
+    fields = [str(f).strip() for f in value or [] if str(f).strip()] or None
+    unknown = [f for f in fields or [] if f not in FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
 @bp.route('/', methods=['GET'])
 def get_all_users():
-    """Get all users"""
+    """Get all users
+
+    With any of limit, cursor, q, department, role, is_active or fields the
+    response is one page ordered by id: {"items": [...], "nextCursor": ...}.
+    q matches the start of the email or name (any part from 3 characters);
+    fields=userId,name,... returns only those fields.
+    """
     try:
+        if not any(param in request.args for param in DIRECTORY_PARAMS):
+            user_repo = UserRepository(g.db_session)
+            users = user_repo.get_all_users()
+            return jsonify([user.to_dict() for user in users])
+
+        try:
+            limit = int(request.args.get('limit', Config.USER_PAGE_SIZE_DEFAULT))
+            after_id = int(request.args['cursor']) if request.args.get('cursor') else None
+            is_active = _parse_bool(request.args['is_active']) if 'is_active' in request.args else None
+        except ValueError:
+            return jsonify({'error': 'limit and cursor must be integers and is_active a boolean'}), 400
+        limit = max(1, min(limit, Config.USER_PAGE_SIZE_MAX))
+
+        try:
+            fields = _parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         user_repo = UserRepository(g.db_session)
-        users = user_repo.get_all_users()
+        # One extra row tells whether another page exists
+        rows = user_repo.search_users(
+            q=request.args.get('q') or None,
+            department=request.args.get('department'),
+            role=request.args.get('role'),
+            is_active=is_active,
+            after_id=after_id,
+            limit=limit + 1,
+            fields=fields,
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return jsonify({
+            'items': [serialize_user(row, fields) for row in rows],
+            'nextCursor': str(rows[-1].id) if has_more and rows else None,
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _department_rosters(departments: list, include_inactive: bool, fields: list) -> dict:
+    """{department: [user, ...]} for each requested department, from one query."""
+    user_repo = UserRepository(g.db_session)
+    rows = user_repo.get_users_by_departments(departments, include_inactive=include_inactive, fields=fields)
+    rosters = {department: [] for department in departments}
+    for row in rows:
+        rosters[row.department].append(serialize_user(row, fields))
+    return rosters
+
+
+@bp.route('/department/<path:name>', methods=['GET'])
+def get_department_users(name: str):
+    """Users in a department, ordered by id
+
+    Query: include_inactive=true to also list inactive users; fields=userId,name,...
+    """
+    try:
+        try:
+            include_inactive = _parse_bool(request.args.get('include_inactive', 'false'))
+            fields = _parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(_department_rosters([name], include_inactive, fields)[name])
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/departments', methods=['POST'])
+def get_departments_users():
+    """Users of several departments in one call
+
+    Request body:
+    {
+        "departments": ["Engineering", "Sales"],
+        "includeInactive": false,  # optional
+        "fields": ["userId", "name"]  # optional
+    }
+
+    Returns {"Engineering": [...], "Sales": [...]} with every requested
+    department present (empty if it has no members), users ordered by id.
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if data is None:
+            return jsonify({'error': 'Request body is required'}), 400
 
-        return jsonify([user.to_dict() for user in users])
+        departments = data.get('departments')
+        if not isinstance(departments, list) or not departments:
+            return jsonify({'error': 'departments must be a non-empty array'}), 400
+        if not all(isinstance(d, str) for d in departments):
+            return jsonify({'error': 'departments must be strings'}), 400
+        departments = list(dict.fromkeys(departments))
+        if len(departments) > Config.USER_DEPARTMENTS_MAX:
+            return jsonify({'error': f'At most {Config.USER_DEPARTMENTS_MAX} departments are allowed'}), 400
+
+        try:
+            fields = _parse_fields(data.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify(_department_rosters(departments, bool(data.get('includeInactive')), fields))
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -82,10 +287,195 @@ def filter_users():
         if emails and not isinstance(emails, list):
             return jsonify({'error': 'emails must be an array'}), 400
 
+        return jsonify(_lookup_users(user_ids, emails))
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/batch', methods=['GET'])
+def batch_users():
+    """Get users by IDs with HTTP caching
+
+    Query: ?ids=3,1,2 (duplicates and order are ignored; clients should send the
+    ids sorted and deduplicated so shared caches see one URL per set).
+
+    Returns the matching users sorted by id with Cache-Control, ETag and
+    Last-Modified (the newest updatedAt); conditional requests that still match
+    get 304 Not Modified.
+    """
+    try:
+        raw_ids = request.args.get('ids', '')
+        try:
+            user_ids = sorted({int(part) for part in raw_ids.split(',') if part.strip()})
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+
+        if not user_ids:
+            return jsonify({'error': 'ids is required'}), 400
+        if len(user_ids) > Config.USER_BATCH_MAX_IDS:
+            return jsonify({'error': f'At most {Config.USER_BATCH_MAX_IDS} ids are allowed'}), 400
+
+        users = sorted(_lookup_users(user_ids, []), key=lambda u: u['userId'])
+
+        # The validator changes whenever a user in the set is updated, added or removed
+        versions = ','.join(f"{u['userId']}:{u.get('updatedAt') or ''}" for u in users)
+        etag = hashlib.sha1(f"{','.join(map(str, user_ids))}|{versions}".encode()).hexdigest()
+        updated = [datetime.fromisoformat(u['updatedAt']) for u in users if u.get('updatedAt')]
+        updated = [d if d.tzinfo else d.replace(tzinfo=timezone.utc) for d in updated]
+
+        response = jsonify(users)
+        response.set_etag(etag)
+        if updated:
+            response.last_modified = max(updated)
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.USER_BATCH_MAX_AGE_SECONDS
+        response.headers['Content-Location'] = f"{bp.url_prefix}/batch?ids={','.join(map(str, user_ids))}"
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+JSONL_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines', 'application/json-lines')
+CSV_MIMETYPES = ('text/csv', 'application/csv')
+
+
+def _import_records():
+    """(line, record) pairs from the request body, chosen by Content-Type; None if unsupported."""
+    if request.mimetype == 'application/json':
+        data = request.get_json(silent=True)
+        if data is None:
+            raise ValueError('Request body must be valid JSON')
+        return read_json(data)
+    if request.mimetype in JSONL_MIMETYPES + CSV_MIMETYPES:
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        return read_csv(stream) if request.mimetype in CSV_MIMETYPES else read_jsonl(stream)
+    return None
+
+
+@bp.route('/bulk', methods=['POST'])
+def bulk_upsert_users():
+    """Create or update users in bulk, matched by email
+
+    Body: JSON lines (application/x-ndjson), CSV with a header row (text/csv)
+    or a JSON array/object (application/json). Fields: email (required),
+    firstName, lastName or name, role, department, isActive, isVerified.
+    Fields left out or empty keep their current value on existing users.
+
+    Valid rows are written even when others fail. Returns
+    {"received", "inserted", "updated", "failed", "errors": [{"line", "email", "error"}]}.
+    """
+    try:
+        try:
+            records = _import_records()
+            if records is None:
+                return jsonify({'error': 'Content-Type must be text/csv, application/x-ndjson or application/json'}), 415
+            rows, errors = prepare_import(records, Config.USER_IMPORT_MAX_ROWS)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': str(e)}), 400
+
+        user_repo = UserRepository(g.db_session)
+        result = user_repo.bulk_upsert(rows)
+        # The merge bypasses the ORM, so its cache invalidation hooks never run
+        for user_id, email in result['users']:
+            user_cache.invalidate(user_id=user_id, email=email)
+
+        return jsonify({
+            'received': len(rows) + len(errors),
+            'inserted': result['inserted'],
+            'updated': result['updated'],
+            'failed': len(errors),
+            'errors': errors[:Config.USER_IMPORT_MAX_ERRORS],
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def _wants_msgpack() -> bool:
+    if msgpack is None:
+        return False
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best in MSGPACK_MIMETYPES
+
+
+def _snapshot_response(body: dict, etag: str) -> Response:
+    """JSON, or MessagePack when the client asks for it; always revalidated by ETag."""
+    if _wants_msgpack():
+        response = Response(msgpack.packb(body, use_bin_type=True), mimetype=MSGPACK_MIMETYPES[0])
+        etag = f"{etag}.msgpack"
+    else:
+        response = jsonify(body)
+    response.vary.add('Accept')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@bp.route('/snapshot', methods=['GET'])
+def directory_snapshot():
+    """Compact directory of all active users
+
+    Returns {"version", "count", "columns": {"userId": [...], "name": [...],
+    "email": [...], "department": [...], "role": [...]}} where the arrays are
+    parallel. Send Accept: application/msgpack for MessagePack. Keep `version`
+    and poll /snapshot/delta?since=<version> to stay current.
+    """
+    try:
         user_repo = UserRepository(g.db_session)
-        users = user_repo.get_users_by_filter(user_ids=user_ids, emails=emails)
+        max_updated_at, active_count = user_repo.get_directory_version()
+        version = encode_version(max_updated_at, active_count)
+
+        # Unchanged directory: answer from the version alone
+        etag = f"{version}.msgpack" if _wants_msgpack() else version
+        # Weak comparison: compressed responses carry the ETag as W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.vary.add('Accept')
+            response.set_etag(etag)
+            return response
+
+        rows = user_repo.get_directory_rows()
+        return _snapshot_response(build_snapshot(rows, version, active_count), version)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return jsonify([user.to_dict() for user in users])
+@bp.route('/snapshot/delta', methods=['GET'])
+def directory_snapshot_delta():
+    """Changes to the directory since a snapshot version
+
+    Returns {"version", "since", "count", "columns": {...}, "removed": [ids]}:
+    upsert the users in `columns`, drop the ids in `removed` (deactivated), then
+    keep the new `version`. If the local count then differs from `count`, users
+    were deleted outright and a full snapshot is needed.
+    """
+    try:
+        since = request.args.get('since')
+        if not since:
+            return jsonify({'error': 'since is required'}), 400
+        try:
+            updated_since, _ = decode_version(since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        user_repo = UserRepository(g.db_session)
+        # Read the version first: rows changed in between are sent again next time
+        max_updated_at, active_count = user_repo.get_directory_version()
+        version = encode_version(max_updated_at, active_count)
+        rows = user_repo.get_directory_rows(updated_since=updated_since)
+        return _snapshot_response(build_delta(rows, since, version, active_count), f"{since}:{version}")
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@bp.route('/logins/stats', methods=['GET'])
+def login_tracker_stats():
+    """Buffered sign-ins waiting to be written and flush counters"""
+    return jsonify(login_tracker.stats())
+
+@bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and size of the in-process user cache"""
+    return jsonify(user_cache.stats())
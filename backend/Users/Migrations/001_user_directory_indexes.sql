@@ -0,0 +1,17 @@
+-- Indexes behind GET /api/users/ filters and search.
+--
+-- create_all() only creates indexes together with a new table, so existing
+-- databases need these applied once.
+
+create index if not exists ix_users_department on users (department);
+create index if not exists ix_users_role on users (role);
+create index if not exists ix_users_is_active on users (is_active);
+
+-- q=: prefix and substring matches on email and full name use trigram GIN
+-- indexes. The expressions must match UserRepository.search_users exactly.
+create extension if not exists pg_trgm;
+
+create index if not exists ix_users_email_trgm
+    on users using gin (lower(email) gin_trgm_ops);
+create index if not exists ix_users_name_trgm
+    on users using gin (lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops);
@@ -0,0 +1,2 @@
+-- Directory snapshot deltas select users by updated_at (GET /api/users/snapshot/delta).
+create index if not exists ix_users_updated_at on users (updated_at);
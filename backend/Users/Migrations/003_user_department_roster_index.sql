@@ -0,0 +1,5 @@
+-- Department rosters (GET /api/users/department/<name>, POST /api/users/departments)
+-- read active members ordered by id. ix_users_department (Migrations/001) serves
+-- rosters that include inactive users.
+create index if not exists ix_users_active_department
+    on users (department, id) where is_active;
@@ -0,0 +1,8 @@
+-- Case-insensitive email lookups (UserRepository compares lower(email)).
+--
+-- Emails are stored normalized (trimmed, lowercased) from now on; normalize
+-- existing rows first. This fails if two users differ only in the case of
+-- their email: merge or rename those before running it.
+update users set email = lower(btrim(email)) where email <> lower(btrim(email));
+
+create unique index if not exists ux_users_email_lower on users (lower(email));
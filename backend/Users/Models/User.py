@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Index, text
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 # Handle both relative and absolute imports
 try:
@@ -10,6 +11,17 @@ from datetime import datetime
 class User(Base):
     """User model for user management service"""
     __tablename__ = 'users'
+    # Directory filters (GET /api/users/); trigram search indexes are in Migrations/001
+    __table_args__ = (
+        Index('ix_users_department', 'department'),
+        Index('ix_users_role', 'role'),
+        Index('ix_users_is_active', 'is_active'),
+        # Department rosters (GET /api/users/department/<name>) list active users by id
+        Index('ix_users_active_department', 'department', 'id',
+              postgresql_where=text('is_active'), sqlite_where=text('is_active')),
+        # Snapshot deltas (GET /api/users/snapshot/delta)
+        Index('ix_users_updated_at', 'updated_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -23,24 +35,50 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     last_login = Column(DateTime(timezone=True), nullable=True)
 
+    @validates('email')
+    def _normalize_email(self, key, email):
+        return normalize_email(email)
+
     def to_dict(self):
-        # Combine first_name and last_name into single name field
-        name_parts = []
-        if self.first_name:
-            name_parts.append(self.first_name)
-        if self.last_name:
-            name_parts.append(self.last_name)
-        full_name = ' '.join(name_parts) if name_parts else None
-
-        return {
-            'userId': self.id,
-            'email': self.email,
-            'name': full_name,
-            'role': self.role,
-            'department': self.department,
-            'isActive': self.is_active,
-            'isVerified': self.is_verified,
-            'createdAt': self.created_at.isoformat() if self.created_at else None,
-            'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
-            'lastLogin': self.last_login.isoformat() if self.last_login else None
-        }
+        return serialize_user(self)
+
+
+# Case-insensitive uniqueness and lookups; queries compare func.lower(User.email)
+Index('ux_users_email_lower', func.lower(User.email), unique=True)
+
+
+def normalize_email(email):
+    """Stored and compared form of an email address: trimmed and lowercased."""
+    return email.strip().lower() if isinstance(email, str) else email
+
+
+# Public field -> the columns it is built from; used to project queries to a subset of fields
+FIELD_COLUMNS = {
+    'userId': ('id',),
+    'email': ('email',),
+    'name': ('first_name', 'last_name'),
+    'role': ('role',),
+    'department': ('department',),
+    'isActive': ('is_active',),
+    'isVerified': ('is_verified',),
+    'createdAt': ('created_at',),
+    'updatedAt': ('updated_at',),
+    'lastLogin': ('last_login',),
+}
+
+
+def serialize_user(row, fields=None) -> dict:
+    """
+    Public representation of a user. `row` is a User or a query row with the
+    columns in FIELD_COLUMNS for the requested `fields` (all fields by default).
+    """
+    result = {}
+    for field in fields or FIELD_COLUMNS:
+        if field == 'name':
+            # Combine first_name and last_name into single name field
+            name_parts = [part for part in (row.first_name, row.last_name) if part]
+            result['name'] = ' '.join(name_parts) if name_parts else None
+            continue
+        value = getattr(row, FIELD_COLUMNS[field][0])
+        result[field] = value.isoformat() if isinstance(value, datetime) else value
+    return result
@@ -1,12 +1,60 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import (Boolean, Column, DateTime, Integer, MetaData, String, Table, any_, bindparam, column, func,
+                        literal, or_, select, true, update, values)
+from sqlalchemy.dialects import postgresql
 
 # Handle both relative and absolute imports
 try:
-    from ..Models.User import User
+    from ..Models.User import User, FIELD_COLUMNS, normalize_email
+    from ..Services.UserImport import IMPORT_COLUMNS
 except ImportError:
-    from Models.User import User
-from datetime import datetime
+    from Models.User import User, FIELD_COLUMNS, normalize_email
+    from Services.UserImport import IMPORT_COLUMNS
+from datetime import datetime, timezone
+import csv
+import io
+
+# Shortest query that also matches inside names/emails (trigram indexes need 3 characters)
+MIN_SUBSTRING_QUERY = 3
+
+
+def _like_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+# Staging table for bulk imports; a separate MetaData keeps it out of create_all()
+users_import = Table(
+    'users_import', MetaData(),
+    Column('line', Integer, nullable=False),
+    Column('email', String(255), primary_key=True),
+    Column('first_name', String(100)),
+    Column('last_name', String(100)),
+    Column('role', String(50)),
+    Column('department', String(100)),
+    Column('is_active', Boolean),
+    Column('is_verified', Boolean),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='drop',
+)
+
+# Rows per UPDATE ... FROM (VALUES ...) when flushing buffered logins
+LAST_LOGIN_BATCH_SIZE = 1000
+
+
+def _copy_value(value):
+    # COPY ... (FORMAT csv) reads an unquoted empty field as NULL
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
+def _full_name_expr():
+    # Must match ix_users_name_trgm in Migrations/001_user_directory_indexes.sql
+    return func.lower(func.coalesce(User.first_name, '') + ' ' + func.coalesce(User.last_name, ''))
+
 
 class UserRepository:
     """Repository for User model operations"""
@@ -14,9 +62,22 @@ class UserRepository:
     def __init__(self, db_session: Session):
         self.db_session = db_session
 
+    def _is_postgresql(self) -> bool:
+        return self.db_session.get_bind().dialect.name == 'postgresql'
+
+    def _matches_any(self, column, values: list, element_type):
+        """
+        `column` equal to any of `values`. On PostgreSQL this is `= ANY(:array)`:
+        one bound array whatever the list length, so the statement (and its plan)
+        is the same for every batch and stays an index probe per value.
+        """
+        if self._is_postgresql():
+            return column == any_(bindparam(None, list(values), type_=postgresql.ARRAY(element_type)))
+        return column.in_(values)
+
     def get_user_by_email(self, email: str) -> User:
-        """Get user by email"""
-        return self.db_session.query(User).filter(User.email == email).first()
+        """Get user by email (case-insensitive)"""
+        return self.db_session.query(User).filter(func.lower(User.email) == normalize_email(email)).first()
 
     def get_user_by_id(self, user_id: int) -> User:
         """Get user by ID"""
@@ -33,10 +94,12 @@ class UserRepository:
         filters = []
 
         if user_ids:
-            filters.append(User.id.in_(user_ids))
+            filters.append(self._matches_any(User.id, user_ids, Integer))
 
         if emails:
-            filters.append(User.email.in_(emails))
+            # Case-insensitive, served by ux_users_email_lower
+            normalized = list(dict.fromkeys(normalize_email(email) for email in emails))
+            filters.append(self._matches_any(func.lower(User.email), normalized, String))
 
         if filters:
             # Use OR condition if both filters are provided
@@ -44,3 +107,206 @@ class UserRepository:
             query = query.filter(or_(*filters))
 
         return query.all()
+
+    def search_users(self, q: str = None, department: str = None, role: str = None, is_active: bool = None,
+                     after_id: int = None, limit: int = 50, fields: list = None):
+        """
+        Up to `limit` users ordered by id, starting after `after_id`.
+
+        `q` matches a prefix of the email or full name and, from three characters
+        on, any part of them. With `fields` only the columns those fields need
+        (plus id) are selected and rows are returned instead of User objects.
+        """
+        if fields:
+            names = ['id'] + [c for f in fields for c in FIELD_COLUMNS[f] if c != 'id']
+            query = self.db_session.query(*[getattr(User, c) for c in dict.fromkeys(names)])
+        else:
+            query = self.db_session.query(User)
+
+        if q:
+            term = _like_escape(q.strip().lower())
+            email, name = func.lower(User.email), _full_name_expr()
+            conditions = [email.like(f"{term}%", escape='\\'), name.like(f"{term}%", escape='\\')]
+            if len(term) >= MIN_SUBSTRING_QUERY:
+                conditions += [email.like(f"%{term}%", escape='\\'), name.like(f"%{term}%", escape='\\')]
+            query = query.filter(or_(*conditions))
+        if department is not None:
+            query = query.filter(User.department == department)
+        if role is not None:
+            query = query.filter(User.role == role)
+        if is_active is not None:
+            query = query.filter(User.is_active.is_(is_active))
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+
+        return query.order_by(User.id).limit(limit).all()
+
+    def get_users_by_departments(self, departments: list, include_inactive: bool = False, fields: list = None):
+        """
+        Members of any of `departments` in one query, ordered by department then
+        id; active users only unless `include_inactive`. With `fields` rows with
+        just those columns (plus department) are returned, as in search_users.
+        """
+        if fields:
+            names = ['id', 'department'] + [c for f in fields for c in FIELD_COLUMNS[f]]
+            query = self.db_session.query(*[getattr(User, c) for c in dict.fromkeys(names)])
+        else:
+            query = self.db_session.query(User)
+
+        query = query.filter(User.department.in_(departments))
+        if not include_inactive:
+            # Same predicate as ix_users_active_department so the partial index is used
+            query = query.filter(User.is_active)
+        return query.order_by(User.department, User.id).all()
+
+    def update_last_logins(self, logins: dict) -> int:
+        """
+        Set last_login from {user_id: datetime} and commit; a newer stored value
+        is kept. On PostgreSQL each batch is one UPDATE ... FROM (VALUES ...).
+
+        updated_at is bumped on the rows written, as the ORM would: lastLogin is
+        part of the user payload, so batch ETags, snapshot deltas and other
+        workers' caches (UserCache.sync) must see the change.
+        """
+        items = sorted(logins.items())  # consistent lock order across concurrent flushes
+        now = datetime.now(timezone.utc)
+        updated = 0
+        try:
+            for start in range(0, len(items), LAST_LOGIN_BATCH_SIZE):
+                batch = items[start:start + LAST_LOGIN_BATCH_SIZE]
+                if self._is_postgresql():
+                    logins_table = values(
+                        column('id', Integer), column('last_login', DateTime(timezone=True)), name='logins'
+                    ).data(batch)
+                    statement = (
+                        update(User)
+                        .where(User.id == logins_table.c.id)
+                        .where(or_(User.last_login.is_(None), User.last_login < logins_table.c.last_login))
+                        .values(last_login=logins_table.c.last_login, updated_at=now)
+                    )
+                    updated += self.db_session.execute(statement).rowcount
+                else:
+                    statement = (
+                        update(User.__table__)
+                        .where(User.id == bindparam('b_id'))
+                        .where(or_(User.last_login.is_(None), User.last_login < bindparam('b_last_login')))
+                        .values(last_login=bindparam('b_last_login'), updated_at=now)
+                    )
+                    result = self.db_session.execute(
+                        statement, [{'b_id': user_id, 'b_last_login': at} for user_id, at in batch]
+                    )
+                    updated += result.rowcount
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+        return updated
+
+    def get_directory_rows(self, updated_since: datetime = None):
+        """
+        Columns of the compact directory snapshot, ordered by id: all active users,
+        or every user (active or not) updated at or after `updated_since`.
+        """
+        query = self.db_session.query(
+            User.id, User.first_name, User.last_name, User.email, User.department, User.role, User.is_active
+        )
+        if updated_since is None:
+            query = query.filter(User.is_active.is_(True))
+        else:
+            query = query.filter(User.updated_at >= updated_since)
+        return query.order_by(User.id).all()
+
+    def get_changed_users(self, updated_since: datetime):
+        """(id, email, updated_at) of users updated at or after `updated_since`; used to sync UserCache."""
+        return (
+            self.db_session.query(User.id, User.email, User.updated_at)
+            .filter(User.updated_at >= updated_since)
+            .all()
+        )
+
+    def get_directory_version(self):
+        """(newest updated_at over all users, number of active users)."""
+        max_updated_at, active_count = self.db_session.query(
+            func.max(User.updated_at),
+            func.count(User.id).filter(User.is_active.is_(True)),
+        ).one()
+        return max_updated_at, active_count or 0
+
+    def bulk_upsert(self, rows: list) -> dict:
+        """
+        Insert or update users by (normalized) email from staged import rows (see
+        Services/UserImport.prepare_import) in one transaction.
+
+        Rows are loaded into a temporary table (COPY on PostgreSQL) and merged
+        with a single INSERT ... SELECT ... ON CONFLICT (lower(email)) DO UPDATE. A None
+        value keeps the existing user's column; new users get the model defaults.
+        Returns {"inserted", "updated", "users": [(id, email), ...]}.
+        """
+        if not rows:
+            return {'inserted': 0, 'updated': 0, 'users': []}
+
+        connection = self.db_session.connection()
+        try:
+            users_import.create(connection)
+            self._stage_rows(connection, rows)
+
+            users = User.__table__
+            existing = users.alias('existing')
+            staged = users_import.c
+            updated = connection.execute(
+                select(func.count()).select_from(users_import.join(existing, func.lower(existing.c.email) == staged.email))
+            ).scalar_one()
+
+            # Omitted values resolve against the current row, so the conflict
+            # branch can take the whole proposed row from EXCLUDED
+            now = datetime.now(timezone.utc)
+            source = select(
+                staged.email,
+                func.coalesce(staged.first_name, existing.c.first_name),
+                func.coalesce(staged.last_name, existing.c.last_name),
+                func.coalesce(staged.role, existing.c.role, 'user'),
+                func.coalesce(staged.department, existing.c.department),
+                func.coalesce(staged.is_active, existing.c.is_active, true()),
+                func.coalesce(staged.is_verified, existing.c.is_verified, False),
+                func.coalesce(existing.c.created_at, literal(now, User.created_at.type)),
+                literal(now, User.updated_at.type),
+            ).select_from(
+                users_import.outerjoin(existing, func.lower(existing.c.email) == staged.email)
+            ).where(true())  # SQLite needs a WHERE to parse INSERT ... SELECT ... ON CONFLICT
+
+            merged = ('email', 'first_name', 'last_name', 'role', 'department',
+                      'is_active', 'is_verified', 'created_at', 'updated_at')
+            # PostgreSQL only in production; SQLite (the unit-test database) compiles the same ON CONFLICT clause
+            statement = postgresql.insert(users).from_select(merged, source)
+            # Conflicts are detected on ux_users_email_lower; updating email too
+            # normalizes addresses stored before emails were lowercased
+            statement = statement.on_conflict_do_update(
+                index_elements=[func.lower(users.c.email)],
+                set_={column: statement.excluded[column] for column in merged if column != 'created_at'},
+            ).returning(users.c.id, users.c.email)
+            written = [tuple(row) for row in connection.execute(statement)]
+
+            users_import.drop(connection)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        return {'inserted': len(written) - updated, 'updated': updated, 'users': written}
+
+    def _stage_rows(self, connection, rows: list) -> None:
+        columns = ('line',) + IMPORT_COLUMNS
+        if connection.dialect.name != 'postgresql':
+            connection.execute(users_import.insert(), [{c: row[c] for c in columns} for row in rows])
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[c]) for c in columns])
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY users_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
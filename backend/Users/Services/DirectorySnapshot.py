@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+# Handle both relative and absolute imports
+try:
+    from ..Models.User import serialize_user
+except ImportError:
+    from Models.User import serialize_user
+
+# Columns of the compact directory, in order; each is sent as one parallel array
+SNAPSHOT_FIELDS = ('userId', 'name', 'email', 'department', 'role')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def encode_version(max_updated_at: Optional[datetime], active_count: int) -> str:
+    """Opaque version: newest updated_at (microseconds since epoch) and the number of active users."""
+    micros = (_as_utc(max_updated_at) - _EPOCH) // _MICROSECOND if max_updated_at else 0
+    return f"{micros}-{active_count}"
+
+
+def decode_version(version: str) -> Tuple[datetime, int]:
+    try:
+        micros, count = version.split('-', 1)
+        return _EPOCH + int(micros) * _MICROSECOND, int(count)
+    except (AttributeError, ValueError, OverflowError):
+        raise ValueError("Invalid version")
+
+
+def build_columns(rows: Iterable) -> dict:
+    """Parallel arrays (one per SNAPSHOT_FIELDS entry) from user rows."""
+    columns = {field: [] for field in SNAPSHOT_FIELDS}
+    for row in rows:
+        payload = serialize_user(row, SNAPSHOT_FIELDS)
+        for field in SNAPSHOT_FIELDS:
+            columns[field].append(payload[field])
+    return columns
+
+
+def build_snapshot(rows: List, version: str, active_count: int) -> dict:
+    return {'version': version, 'count': active_count, 'columns': build_columns(rows)}
+
+
+def build_delta(rows: List, since: str, version: str, active_count: int) -> dict:
+    """
+    Users changed at or after `since`: active ones as columns to upsert, the rest
+    (deactivated) as ids to remove. `count` lets clients detect hard deletes,
+    which leave no updated_at behind: if their count differs after applying the
+    delta they should fetch a full snapshot.
+    """
+    active = [row for row in rows if row.is_active]
+    removed = [row.id for row in rows if not row.is_active]
+    return {
+        'version': version,
+        'since': since,
+        'count': active_count,
+        'columns': build_columns(active),
+        'removed': removed,
+    }
+
@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import atexit
+import threading
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Repositories.UserRepository import UserRepository
+    from ..Services.UserCache import user_cache
+except ImportError:
+    from config import Config
+    from Repositories.UserRepository import UserRepository
+    from Services.UserCache import user_cache
+
+
+class LoginTracker:
+    """
+    Write-behind buffer of last-login timestamps.
+
+    record() only updates an in-memory map (latest timestamp per user), so a
+    sign-in never waits on the database. A background thread writes the map
+    every `flush_interval_seconds` in one set-based UPDATE, and earlier once
+    `max_pending` users are waiting; a crash loses at most one interval of
+    logins. Failed flushes keep their entries for the next attempt.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, flush_interval_seconds: float = 2.0,
+                 max_pending: int = 10000, enabled: bool = True):
+        self.session_factory = session_factory
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self.recorded = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, user_id: int, at: Optional[datetime] = None) -> datetime:
+        """Buffer a sign-in of `user_id` at `at` (now by default) and return the timestamp."""
+        at = at or datetime.now(timezone.utc)
+        if not self.enabled:
+            return at
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or previous < at:
+                self._pending[user_id] = at
+            self.recorded += 1
+            pending = len(self._pending)
+        self._ensure_started()
+        if pending >= self.max_pending:
+            self._wake.set()
+        return at
+
+    def _merge_locked(self, logins: Dict[int, datetime]) -> None:
+        for user_id, at in logins.items():
+            previous = self._pending.get(user_id)
+            if previous is None or previous < at:
+                self._pending[user_id] = at
+
+    def flush(self) -> int:
+        """Write buffered logins now; returns how many users were written."""
+        with self._flush_lock:
+            with self._lock:
+                logins, self._pending = self._pending, {}
+            if not logins:
+                return 0
+
+            session = self._new_session()
+            try:
+                UserRepository(session).update_last_logins(logins)
+            except Exception as e:
+                with self._lock:
+                    self._merge_locked(logins)
+                    self.failed_flushes += 1
+                print(f"Warning: Failed to flush {len(logins)} last logins: {e}")
+                return 0
+            finally:
+                session.close()
+
+            # The set-based UPDATE bypasses the ORM hooks that invalidate the cache
+            for user_id in logins:
+                user_cache.invalidate(user_id=user_id)
+            with self._lock:
+                self.flushed += len(logins)
+            return len(logins)
+
+    def _new_session(self):
+        if self.session_factory is None:
+            # Imported late: the engine is only needed once something is flushed
+            try:
+                from ..db import SessionLocal
+            except ImportError:
+                from db import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    def _ensure_started(self) -> None:
+        # Started on first use so a forking server starts it in each worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._stopping or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name='login-tracker', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self) -> None:
+        """Stop the background thread and write what is still buffered."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending': len(self._pending),
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'failedFlushes': self.failed_flushes,
+                'flushIntervalSeconds': self.flush_interval_seconds,
+            }
+
+
+login_tracker = LoginTracker(
+    flush_interval_seconds=Config.LOGIN_FLUSH_INTERVAL_SECONDS,
+    max_pending=Config.LOGIN_MAX_PENDING,
+    enabled=Config.LOGIN_TRACKING_ENABLED,
+)
+atexit.register(login_tracker.stop)
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy import event, inspect
+
+# Handle both relative and absolute imports
+try:
+    from ..config import Config
+    from ..Models.User import User
+except ImportError:
+    from config import Config
+    from Models.User import User
+
+# Changes are re-read this far behind the newest updated_at seen: a row's
+# updated_at is set before its transaction commits, so it can appear late
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class UserCache:
+    """
+    Bounded LRU cache of `User.to_dict()` payloads with a per-entry TTL.
+
+    Entries are keyed by user id; a secondary index maps the lowercased email to
+    the id so lookups by either share one entry. Writes made through this
+    process's ORM invalidate entries at once (see _invalidate_user below).
+
+    Each gunicorn worker has its own cache, so readers call sync() first: at
+    most every `sync_interval_seconds` it drops the entries of users whose
+    updated_at moved since the last check, whichever process wrote them. Other
+    workers therefore see a change within `sync_interval_seconds`. The TTL
+    bounds writes that leave updated_at alone (raw SQL, hard deletes).
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0, enabled: bool = True,
+                 sync_interval_seconds: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.sync_interval_seconds = sync_interval_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[float, dict]]" = OrderedDict()
+        self._ids_by_email: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._synced_at: Optional[float] = None
+        self._watermark = None
+
+    def _get_locked(self, user_id: int) -> Optional[dict]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at < time.monotonic():
+            self._drop_locked(user_id)
+            return None
+        self._entries.move_to_end(user_id)
+        return payload
+
+    def _drop_locked(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        email = (entry[1].get('email') or '').lower()
+        if self._ids_by_email.get(email) == user_id:
+            del self._ids_by_email[email]
+
+    def _count(self, hits: int, misses: int) -> None:
+        self.hits += hits
+        self.misses += misses
+
+    def get_by_id(self, user_id: int) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            payload = self._get_locked(user_id)
+            self._count(payload is not None, payload is None)
+            return payload
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        if not self.enabled or not email:
+            return None
+        with self._lock:
+            user_id = self._ids_by_email.get(email.lower())
+            payload = self._get_locked(user_id) if user_id is not None else None
+            self._count(payload is not None, payload is None)
+            return payload
+
+    def get_many(self, user_ids: Iterable[int] = (), emails: Iterable[str] = ()) -> Tuple[List[dict], List[int], List[str]]:
+        """Cached payloads for the given ids/emails plus the ids and emails that missed."""
+        user_ids, emails = list(user_ids), list(emails)
+        found: Dict[int, dict] = {}
+        missing_ids: List[int] = []
+        missing_emails: List[str] = []
+        if not self.enabled:
+            return [], user_ids, emails
+        with self._lock:
+            for user_id in user_ids:
+                payload = self._get_locked(user_id)
+                if payload is None:
+                    missing_ids.append(user_id)
+                else:
+                    found[user_id] = payload
+            for email in emails:
+                user_id = self._ids_by_email.get(str(email).lower())
+                payload = self._get_locked(user_id) if user_id is not None else None
+                if payload is None:
+                    missing_emails.append(email)
+                else:
+                    found[user_id] = payload
+            misses = len(missing_ids) + len(missing_emails)
+            self._count(len(user_ids) + len(emails) - misses, misses)
+        return list(found.values()), missing_ids, missing_emails
+
+    def put(self, payload: dict) -> None:
+        if not self.enabled or payload.get('userId') is None:
+            return
+        user_id = payload['userId']
+        with self._lock:
+            self._drop_locked(user_id)
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, payload)
+            if payload.get('email'):
+                self._ids_by_email[payload['email'].lower()] = user_id
+            while len(self._entries) > self.max_entries:
+                self._drop_locked(next(iter(self._entries)))
+
+    def put_many(self, payloads: Iterable[dict]) -> None:
+        for payload in payloads:
+            self.put(payload)
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None) -> None:
+        with self._lock:
+            if user_id is not None:
+                self._drop_locked(user_id)
+            if email:
+                cached_id = self._ids_by_email.pop(email.lower(), None)
+                if cached_id is not None:
+                    self._drop_locked(cached_id)
+
+    def sync(self, user_repo) -> None:
+        """
+        Drop entries of users changed in the database since the last sync (by
+        any process), at most once per `sync_interval_seconds`. `user_repo` is a
+        UserRepository; the query is a range scan on ix_users_updated_at.
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._synced_at is not None and now - self._synced_at < self.sync_interval_seconds:
+                return
+            # Claimed up front so concurrent readers do not query as well
+            previous, self._synced_at = self._synced_at, now
+            watermark = self._watermark
+
+        try:
+            if watermark is None:
+                # Nothing cached before the first sync; start from the newest change
+                newest, _ = user_repo.get_directory_version()
+                changed = []
+            else:
+                changed = user_repo.get_changed_users(watermark - SYNC_OVERLAP)
+                newest = max((row.updated_at for row in changed), default=watermark)
+        except Exception:
+            with self._lock:
+                self._synced_at = previous
+            raise
+
+        with self._lock:
+            for row in changed:
+                self._drop_locked(row.id)
+                if row.email:
+                    cached_id = self._ids_by_email.pop(row.email.lower(), None)
+                    if cached_id is not None:
+                        self._drop_locked(cached_id)
+            if newest is not None and (self._watermark is None or newest > self._watermark):
+                self._watermark = newest
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ids_by_email.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'syncIntervalSeconds': self.sync_interval_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+user_cache = UserCache(
+    max_entries=Config.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.USER_CACHE_TTL_SECONDS,
+    enabled=Config.USER_CACHE_ENABLED,
+    sync_interval_seconds=Config.USER_CACHE_SYNC_SECONDS,
+)
+
+
+def _invalidate_user(mapper, connection, target: User) -> None:
+    """Drop a user's entry whenever the ORM inserts, updates or deletes the row."""
+    user_cache.invalidate(user_id=target.id, email=target.email)
+    # A changed email must also stop resolving through the old address
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        user_cache.invalidate(email=old_email)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(User, _event_name, _invalidate_user)
@@ -0,0 +1,140 @@
+import csv
+import json
+import re
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Handle both relative and absolute imports
+try:
+    from ..Models.User import normalize_email
+except ImportError:
+    from Models.User import normalize_email
+
+# Input field (public camelCase name or column name) -> users column
+IMPORT_FIELDS = {
+    'email': 'email',
+    'firstName': 'first_name',
+    'first_name': 'first_name',
+    'lastName': 'last_name',
+    'last_name': 'last_name',
+    'role': 'role',
+    'department': 'department',
+    'isActive': 'is_active',
+    'is_active': 'is_active',
+    'isVerified': 'is_verified',
+    'is_verified': 'is_verified',
+}
+# Staged columns, in COPY order
+IMPORT_COLUMNS = ('email', 'first_name', 'last_name', 'role', 'department', 'is_active', 'is_verified')
+
+_MAX_LENGTHS = {'email': 255, 'first_name': 100, 'last_name': 100, 'role': 50, 'department': 100}
+_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+_EMAIL_RE = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+
+
+def _clean(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _boolean(column: str, value) -> Optional[bool]:
+    if value is None or isinstance(value, bool):
+        return value
+    text = _clean(value)
+    if text is None:
+        return None
+    if text.lower() not in _BOOLEANS:
+        raise ValueError(f"{column} must be a boolean")
+    return _BOOLEANS[text.lower()]
+
+
+def normalize_record(record: dict) -> dict:
+    """
+    Staged row (IMPORT_COLUMNS) from one input record, or ValueError.
+
+    `name` is split into first and last name when those are not given. Empty
+    and missing values are None, meaning "leave unchanged" for existing users.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+
+    row = dict.fromkeys(IMPORT_COLUMNS)
+    for key, value in record.items():
+        column = IMPORT_FIELDS.get(key)
+        if column in ('is_active', 'is_verified'):
+            row[column] = _boolean(key, value)
+        elif column:
+            row[column] = _clean(value)
+
+    name = _clean(record.get('name'))
+    if name and row['first_name'] is None and row['last_name'] is None:
+        first, _, last = name.partition(' ')
+        row['first_name'], row['last_name'] = first, _clean(last)
+
+    if row['email'] is None:
+        raise ValueError("email is required")
+    row['email'] = normalize_email(row['email'])
+    if not _EMAIL_RE.match(row['email']):
+        raise ValueError("email is invalid")
+    for column, max_length in _MAX_LENGTHS.items():
+        if row[column] is not None and len(row[column]) > max_length:
+            raise ValueError(f"{column} is longer than {max_length} characters")
+    return row
+
+
+def read_jsonl(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    """(line number, record or ValueError) for each non-blank line of JSON lines."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def read_csv(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    """(line number, record) for each CSV row; the header row names the fields."""
+    reader = csv.DictReader(stream)
+    if not reader.fieldnames or 'email' not in [name.strip() for name in reader.fieldnames]:
+        raise ValueError("CSV header must include an email column")
+    reader.fieldnames = [name.strip() for name in reader.fieldnames]
+    for record in reader:
+        # The header is line 1; line_num is where the row ends (quoted fields may span lines)
+        yield reader.line_num, record
+
+
+def read_json(data) -> Iterator[Tuple[int, object]]:
+    """(position, record) for a JSON array of records or a single record; positions start at 1."""
+    records = data if isinstance(data, list) else [data]
+    return enumerate(records, start=1)
+
+
+def prepare_import(records: Iterable[Tuple[int, object]], max_rows: int) -> Tuple[List[dict], List[dict]]:
+    """
+    Validated rows to stage and per-row errors ({"line", "email", "error"}).
+
+    Each staged row carries its `line`. An email may appear once per import;
+    later occurrences are reported as errors. More than `max_rows` records
+    raise ValueError before anything is written.
+    """
+    rows: List[dict] = []
+    errors: List[dict] = []
+    seen = {}
+    for count, (line, record) in enumerate(records, start=1):
+        if count > max_rows:
+            raise ValueError(f"At most {max_rows} rows can be imported at once")
+        email = record.get('email') if isinstance(record, dict) else None
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            row = normalize_record(record)
+            if row['email'] in seen:
+                raise ValueError(f"Duplicate email (first seen on line {seen[row['email']]})")
+        except ValueError as e:
+            errors.append({'line': line, 'email': email, 'error': str(e)})
+            continue
+        seen[row['email']] = line
+        rows.append({'line': line, **row})
+    return rows, errors
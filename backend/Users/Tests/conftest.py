@@ -3,3 +3,57 @@ import os
 
 # Add parent directory to path so we can import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def sqlite_session():
+    """Session on an in-memory SQLite database with the users table."""
+    from db import Base
+    from Models.User import User  # noqa: F401
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_client(sqlite_session, monkeypatch):
+    """Test client whose UserRepository runs against sqlite_session."""
+    from app import create_app
+    from Repositories.UserRepository import UserRepository
+    from Services.UserCache import user_cache
+
+    monkeypatch.setattr("Controllers.UserController.UserRepository", lambda _session: UserRepository(sqlite_session))
+    user_cache.clear()
+    app = create_app()
+    app.testing = True
+    with app.test_client() as client:
+        yield client
+    user_cache.clear()
+
+
+@pytest.fixture
+def add_users(sqlite_session):
+    """Insert users from dicts of column values into sqlite_session and return them."""
+    from Models.User import User
+
+    def add(rows):
+        users = []
+        for values in rows:
+            values = {"is_active": True, "role": "user", "created_at": datetime(2024, 1, 1),
+                      "updated_at": datetime(2024, 1, 1), **values}
+            users.append(User(**values))
+        sqlite_session.add_all(users)
+        sqlite_session.commit()
+        return users
+
+    return add
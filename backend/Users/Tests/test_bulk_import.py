@@ -0,0 +1,146 @@
+import os
+import json
+import pytest
+from datetime import datetime
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Models.User import User
+from Services.UserCache import user_cache
+from Services.UserImport import normalize_record, prepare_import, read_csv, read_jsonl
+
+
+def _jsonl(*records):
+    return "\n".join(json.dumps(r) for r in records)
+
+
+# ============ Parsing Tests ============
+
+@pytest.mark.unit
+def test_normalize_record_maps_fields():
+    row = normalize_record({"email": " ann@example.com ", "name": "Ann Marie Lee", "isActive": "no",
+                            "department": "", "unknown": "x"})
+
+    assert row == {"email": "ann@example.com", "first_name": "Ann", "last_name": "Marie Lee", "role": None,
+                   "department": None, "is_active": False, "is_verified": None}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("record, message", [
+    ({}, "email is required"),
+    ({"email": "not-an-email"}, "email is invalid"),
+    ({"email": "a@example.com", "isActive": "maybe"}, "isActive must be a boolean"),
+    ({"email": "a@example.com", "role": "r" * 51}, "role is longer than 50 characters"),
+    (["a@example.com"], "Row must be an object"),
+])
+def test_normalize_record_rejects(record, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_record(record)
+
+
+@pytest.mark.unit
+def test_prepare_import_reports_rows_by_line():
+    import io
+    body = '{"email": "a@example.com"}\n\n{bad json\n{"email": "a@example.com"}\n{"email": "b@example.com"}\n'
+
+    rows, errors = prepare_import(read_jsonl(io.StringIO(body)), max_rows=10)
+
+    assert [(r["line"], r["email"]) for r in rows] == [(1, "a@example.com"), (5, "b@example.com")]
+    assert [(e["line"], e["error"]) for e in errors] == [
+        (3, "Invalid JSON: Expecting property name enclosed in double quotes"),
+        (4, "Duplicate email (first seen on line 1)"),
+    ]
+
+
+@pytest.mark.unit
+def test_prepare_import_row_limit():
+    import io
+    body = "email\na@example.com\nb@example.com\nc@example.com\n"
+    with pytest.raises(ValueError, match="At most 2 rows"):
+        prepare_import(read_csv(io.StringIO(body)), max_rows=2)
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_bulk_jsonl_inserts_and_updates(sqlite_client, sqlite_session, add_users):
+    add_users([{"id": 1, "email": "old@example.com", "first_name": "Old", "last_name": "Name",
+                "department": "HR", "role": "admin"}])
+
+    resp = sqlite_client.post("/api/users/bulk", data=_jsonl(
+        {"email": "old@example.com", "department": "Sales"},
+        {"email": "new@example.com", "firstName": "New", "lastName": "User"},
+        {"email": "broken"},
+    ), content_type="application/x-ndjson")
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert (body["received"], body["inserted"], body["updated"], body["failed"]) == (3, 1, 1, 1)
+    assert body["errors"] == [{"line": 3, "email": "broken", "error": "email is invalid"}]
+
+    sqlite_session.expire_all()
+    old = sqlite_session.query(User).filter_by(email="old@example.com").one()
+    assert (old.first_name, old.last_name, old.role, old.department) == ("Old", "Name", "admin", "Sales")
+    assert old.created_at.replace(tzinfo=None) == datetime(2024, 1, 1)
+    assert old.updated_at.replace(tzinfo=None) > datetime(2024, 1, 1)
+
+    new = sqlite_session.query(User).filter_by(email="new@example.com").one()
+    assert (new.first_name, new.role, new.is_active, new.is_verified) == ("New", "user", True, False)
+    assert new.created_at is not None
+
+
+@pytest.mark.unit
+def test_bulk_csv(sqlite_client, sqlite_session):
+    body = "email,name,department,isActive\na@example.com,Ann Lee,Sales,true\nb@example.com,Bob,,0\n"
+
+    resp = sqlite_client.post("/api/users/bulk", data=body, content_type="text/csv")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["inserted"] == 2
+    users = {u.email: u for u in sqlite_session.query(User).all()}
+    assert (users["a@example.com"].last_name, users["a@example.com"].department) == ("Lee", "Sales")
+    assert users["b@example.com"].is_active is False
+
+
+@pytest.mark.unit
+def test_bulk_json_array(sqlite_client):
+    resp = sqlite_client.post("/api/users/bulk", json=[{"email": "a@example.com", "name": "Ann"}])
+
+    assert resp.status_code == 200
+    assert resp.get_json()["inserted"] == 1
+
+
+@pytest.mark.unit
+def test_bulk_invalidates_cache(sqlite_client, add_users):
+    add_users([{"id": 1, "email": "a@example.com", "department": "HR"}])
+    assert sqlite_client.get("/api/users/1").get_json()["department"] == "HR"
+
+    sqlite_client.post("/api/users/bulk", data=_jsonl({"email": "a@example.com", "department": "Sales"}),
+                       content_type="application/x-ndjson")
+
+    assert user_cache.get_by_id(1) is None
+    assert sqlite_client.get("/api/users/1").get_json()["department"] == "Sales"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("data, content_type, status", [
+    ("email\n", "text/plain", 415),
+    ("name\nAnn\n", "text/csv", 400),
+    ("{", "application/json", 400),
+])
+def test_bulk_rejects_payload(sqlite_client, data, content_type, status):
+    resp = sqlite_client.post("/api/users/bulk", data=data, content_type=content_type)
+    assert resp.status_code == status
+    assert "error" in resp.get_json()
+
+
+@pytest.mark.unit
+def test_bulk_row_limit(sqlite_client, sqlite_session, monkeypatch):
+    monkeypatch.setattr("config.Config.USER_IMPORT_MAX_ROWS", 1)
+
+    resp = sqlite_client.post("/api/users/bulk", data="email\na@example.com\nb@example.com\n", content_type="text/csv")
+
+    assert resp.status_code == 400
+    assert sqlite_session.query(User).count() == 0
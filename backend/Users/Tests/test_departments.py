@@ -0,0 +1,102 @@
+import os
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Repositories.UserRepository import UserRepository
+
+
+@pytest.fixture
+def directory(sqlite_session, add_users):
+    add_users([
+        {"id": 1, "email": "a@example.com", "first_name": "Ann", "department": "Engineering"},
+        {"id": 2, "email": "b@example.com", "first_name": "Bob", "department": "Sales"},
+        {"id": 3, "email": "c@example.com", "first_name": "Cid", "department": "Engineering", "is_active": False},
+        {"id": 4, "email": "d@example.com", "first_name": "Dee", "department": "Engineering"},
+        {"id": 5, "email": "e@example.com", "first_name": "Eve", "department": "R&D/Labs"},
+    ])
+    return UserRepository(sqlite_session)
+
+
+# ============ Repository Tests ============
+
+@pytest.mark.unit
+def test_departments_in_one_query_ordered(directory):
+    users = directory.get_users_by_departments(["Sales", "Engineering"])
+
+    assert [(u.department, u.id) for u in users] == [("Engineering", 1), ("Engineering", 4), ("Sales", 2)]
+
+
+@pytest.mark.unit
+def test_departments_include_inactive_and_fields(directory):
+    rows = directory.get_users_by_departments(["Engineering"], include_inactive=True, fields=["email"])
+
+    assert [r.id for r in rows] == [1, 3, 4]
+    assert rows[0]._fields == ("id", "department", "email")
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_get_department_users(sqlite_client, directory):
+    resp = sqlite_client.get("/api/users/department/Engineering")
+
+    assert resp.status_code == 200
+    assert [u["userId"] for u in resp.get_json()] == [1, 4]
+
+
+@pytest.mark.unit
+def test_get_department_users_options(sqlite_client, directory):
+    everyone = sqlite_client.get("/api/users/department/Engineering?include_inactive=true&fields=userId,name")
+    slashed = sqlite_client.get("/api/users/department/R&D/Labs")
+
+    assert everyone.get_json() == [{"userId": 1, "name": "Ann"}, {"userId": 3, "name": "Cid"},
+                                   {"userId": 4, "name": "Dee"}]
+    assert [u["userId"] for u in slashed.get_json()] == [5]
+    assert sqlite_client.get("/api/users/department/Nobody").get_json() == []
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["?include_inactive=maybe", "?fields=password"])
+def test_get_department_users_validation(sqlite_client, query):
+    assert sqlite_client.get(f"/api/users/department/Engineering{query}").status_code == 400
+
+
+@pytest.mark.unit
+def test_departments_batch(sqlite_client, directory):
+    resp = sqlite_client.post("/api/users/departments", json={
+        "departments": ["Sales", "Engineering", "Sales", "Empty"],
+        "fields": ["userId"],
+    })
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "Sales": [{"userId": 2}],
+        "Engineering": [{"userId": 1}, {"userId": 4}],
+        "Empty": [],
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("body", [
+    None,
+    {},
+    {"departments": []},
+    {"departments": "Sales"},
+    {"departments": [1]},
+    {"departments": ["Sales"], "fields": ["nope"]},
+])
+def test_departments_batch_validation(sqlite_client, body):
+    resp = sqlite_client.post("/api/users/departments", json=body) if body is not None \
+        else sqlite_client.post("/api/users/departments")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+@pytest.mark.unit
+def test_departments_batch_limit(sqlite_client, monkeypatch):
+    monkeypatch.setattr("config.Config.USER_DEPARTMENTS_MAX", 1)
+    resp = sqlite_client.post("/api/users/departments", json={"departments": ["A", "B"]})
+    assert resp.status_code == 400
@@ -0,0 +1,104 @@
+import os
+import pytest
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Repositories.UserRepository import UserRepository
+
+
+@pytest.fixture
+def directory(sqlite_session, add_users):
+    add_users([
+        {"id": 1, "email": "john.doe@example.com", "first_name": "John", "last_name": "Doe", "department": "Engineering"},
+        {"id": 2, "email": "jane@example.com", "first_name": "Jane", "last_name": "Smith", "department": "HR", "role": "admin"},
+        {"id": 3, "email": "bob@example.com", "first_name": "Bob", "department": "Engineering", "is_active": False},
+        {"id": 4, "email": "alice@example.com", "last_name": "Johnson", "department": "Sales"},
+        {"id": 5, "email": "percent_100%@example.com", "first_name": "Per", "department": "Sales"},
+    ])
+    return UserRepository(sqlite_session)
+
+
+# ============ Repository Tests ============
+
+@pytest.mark.unit
+def test_search_pages_by_id(directory):
+    first = directory.search_users(limit=2)
+    second = directory.search_users(after_id=first[-1].id, limit=2)
+
+    assert [u.id for u in first] == [1, 2]
+    assert [u.id for u in second] == [3, 4]
+
+
+@pytest.mark.unit
+def test_search_prefix_on_email_and_name(directory):
+    assert [u.id for u in directory.search_users(q="ja")] == [2]
+    assert [u.id for u in directory.search_users(q="JO")] == [1]
+    assert [u.id for u in directory.search_users(q="bob@")] == [3]
+
+
+@pytest.mark.unit
+def test_search_substring_from_three_characters(directory):
+    assert [u.id for u in directory.search_users(q="smith")] == [2]
+    assert [u.id for u in directory.search_users(q="john")] == [1, 4]
+    # Two characters only match prefixes
+    assert [u.id for u in directory.search_users(q="oe")] == []
+
+
+@pytest.mark.unit
+def test_search_escapes_like_wildcards(directory):
+    assert [u.id for u in directory.search_users(q="percent_100%")] == [5]
+    assert [u.id for u in directory.search_users(q="%")] == []
+
+
+@pytest.mark.unit
+def test_search_filters(directory):
+    assert [u.id for u in directory.search_users(department="Engineering")] == [1, 3]
+    assert [u.id for u in directory.search_users(department="Engineering", is_active=True)] == [1]
+    assert [u.id for u in directory.search_users(role="admin")] == [2]
+    assert [u.id for u in directory.search_users(is_active=False)] == [3]
+
+
+@pytest.mark.unit
+def test_search_projection_selects_needed_columns(directory):
+    rows = directory.search_users(fields=["name"], limit=1)
+
+    assert rows[0]._fields == ("id", "first_name", "last_name")
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_directory_page_and_cursor(sqlite_client, directory):
+    first = sqlite_client.get("/api/users/?limit=3").get_json()
+    second = sqlite_client.get(f"/api/users/?limit=3&cursor={first['nextCursor']}").get_json()
+
+    assert [u["userId"] for u in first["items"]] == [1, 2, 3]
+    assert first["nextCursor"] == "3"
+    assert [u["userId"] for u in second["items"]] == [4, 5]
+    assert second["nextCursor"] is None
+
+
+@pytest.mark.unit
+def test_directory_search_filter_and_projection(sqlite_client, directory):
+    resp = sqlite_client.get("/api/users/?q=jo&department=Engineering&is_active=true&fields=name,email")
+
+    assert resp.status_code == 200
+    assert resp.get_json() == {"items": [{"name": "John Doe", "email": "john.doe@example.com"}], "nextCursor": None}
+
+
+@pytest.mark.unit
+def test_directory_without_params_returns_full_list(sqlite_client, directory):
+    resp = sqlite_client.get("/api/users/")
+
+    assert isinstance(resp.get_json(), list)
+    assert len(resp.get_json()) == 5
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["limit=abc", "cursor=x", "is_active=maybe", "fields=password"])
+def test_directory_validation(sqlite_client, directory, query):
+    resp = sqlite_client.get(f"/api/users/?{query}")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
@@ -0,0 +1,82 @@
+import os
+import pytest
+from datetime import datetime
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from Models.User import User, normalize_email
+from Repositories.UserRepository import UserRepository
+
+
+@pytest.fixture
+def repo(sqlite_session, add_users):
+    add_users([
+        {"id": 1, "email": " John.Doe@Example.com"},
+        {"id": 2, "email": "jane@example.com"},
+    ])
+    return UserRepository(sqlite_session)
+
+
+@pytest.mark.unit
+def test_normalize_email():
+    assert normalize_email("  Ann@Example.COM ") == "ann@example.com"
+    assert normalize_email(None) is None
+
+
+@pytest.mark.unit
+def test_email_stored_normalized(repo, sqlite_session):
+    assert sqlite_session.get(User, 1).email == "john.doe@example.com"
+
+
+@pytest.mark.unit
+def test_email_unique_ignoring_case(repo, sqlite_session):
+    # Raw SQL bypasses the model's normalization; the lower(email) index still applies
+    with pytest.raises(IntegrityError):
+        sqlite_session.execute(text(
+            "insert into users (email, created_at, updated_at) values ('JANE@example.com', :now, :now)"
+        ), {"now": datetime(2024, 1, 1)})
+
+
+@pytest.mark.unit
+def test_lookup_by_email_ignores_case(repo):
+    assert repo.get_user_by_email("JOHN.DOE@example.com ").id == 1
+    assert repo.get_user_by_email("nobody@example.com") is None
+
+
+@pytest.mark.unit
+def test_filter_by_emails_ignores_case(repo):
+    users = repo.get_users_by_filter(emails=["Jane@Example.com", "JOHN.DOE@EXAMPLE.COM", "jane@example.com"])
+    assert sorted(u.id for u in users) == [1, 2]
+
+
+@pytest.mark.unit
+def test_postgresql_lists_bind_one_array(repo, monkeypatch):
+    monkeypatch.setattr(UserRepository, "_is_postgresql", lambda self: True)
+    condition = repo._matches_any(User.id, list(range(1000)), User.id.type)
+
+    compiled = condition.compile(dialect=postgresql.dialect())
+
+    assert str(compiled) == "users.id = ANY (%(param_1)s::INTEGER[])"
+    assert compiled.params == {"param_1": list(range(1000))}
+
+
+@pytest.mark.unit
+def test_bulk_import_matches_legacy_mixed_case_email(sqlite_client, sqlite_session):
+    sqlite_session.execute(text(
+        "insert into users (id, email, first_name, role, is_active, created_at, updated_at) "
+        "values (7, 'Legacy@Example.com', 'Leg', 'admin', 1, :now, :now)"
+    ), {"now": datetime(2024, 1, 1)})
+    sqlite_session.commit()
+
+    resp = sqlite_client.post("/api/users/bulk", json=[{"email": "LEGACY@example.com", "department": "Ops"}])
+
+    assert resp.get_json()["updated"] == 1
+    sqlite_session.expire_all()
+    user = sqlite_session.get(User, 7)
+    assert (user.email, user.first_name, user.role, user.department) == ("legacy@example.com", "Leg", "admin", "Ops")
@@ -0,0 +1,185 @@
+import os
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db import Base
+from Models.User import User
+from Repositories import UserRepository as user_repository_module
+from Repositories.UserRepository import UserRepository
+from Services.LoginTracker import LoginTracker
+
+T0 = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def users(sqlite_session, add_users):
+    return add_users([
+        {"id": 1, "email": "a@example.com"},
+        {"id": 2, "email": "b@example.com", "last_login": datetime(2024, 6, 2)},
+        {"id": 3, "email": "c@example.com"},
+    ])
+
+
+@pytest.fixture
+def tracker(sqlite_session):
+    tracker = LoginTracker(session_factory=sessionmaker(bind=sqlite_session.get_bind()),
+                           flush_interval_seconds=3600, max_pending=100)
+    yield tracker
+    tracker.stop()
+
+
+def _last_logins(session):
+    session.expire_all()
+    return {u.id: u.last_login and u.last_login.replace(tzinfo=None) for u in session.query(User).order_by(User.id)}
+
+
+# ============ Repository Tests ============
+
+@pytest.mark.unit
+def test_update_last_logins_keeps_newer_and_bumps_updated_at(sqlite_session, users, monkeypatch):
+    monkeypatch.setattr(user_repository_module, "LAST_LOGIN_BATCH_SIZE", 1)
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    updated = UserRepository(sqlite_session).update_last_logins({1: T0, 2: T0, 99: T0})
+
+    assert updated == 1
+    assert _last_logins(sqlite_session) == {1: datetime(2024, 6, 1, 12), 2: datetime(2024, 6, 2), 3: None}
+    updated_at = {u.id: u.updated_at.replace(tzinfo=None) for u in sqlite_session.query(User)}
+    assert updated_at[1] >= before
+    assert updated_at[2] == updated_at[3] == datetime(2024, 1, 1)
+    # Snapshot deltas select by updated_at, so the sign-in is included
+    assert [row.id for row in UserRepository(sqlite_session).get_directory_rows(updated_since=before)] == [1]
+
+
+@pytest.mark.unit
+def test_postgresql_flush_is_update_from_values(sqlite_session, monkeypatch):
+    statements = []
+    monkeypatch.setattr(UserRepository, "_is_postgresql", lambda self: True)
+    monkeypatch.setattr(sqlite_session, "execute", lambda statement, *a: statements.append(statement) or
+                        type("Result", (), {"rowcount": 2})())
+
+    UserRepository(sqlite_session).update_last_logins({1: T0, 2: T0})
+
+    sql = str(statements[0].compile(dialect=postgresql.dialect())).replace("\n", " ")
+    assert len(statements) == 1
+    assert "last_login=logins.last_login" in sql
+    assert "updated_at=%(updated_at)s" in sql
+    assert "FROM (VALUES (%(param_1)s, %(param_2)s), (%(param_3)s, %(param_4)s)) AS logins (id, last_login)" in sql
+    assert "WHERE users.id = logins.id" in sql
+
+
+# ============ Tracker Tests ============
+
+@pytest.mark.unit
+def test_record_buffers_latest_login(tracker, sqlite_session, users):
+    tracker.record(1, T0)
+    tracker.record(1, T0 - timedelta(minutes=5))
+    tracker.record(3, T0)
+
+    assert _last_logins(sqlite_session)[1] is None
+    assert tracker.stats()["pending"] == 2
+
+    assert tracker.flush() == 2
+    assert _last_logins(sqlite_session) == {1: datetime(2024, 6, 1, 12), 2: datetime(2024, 6, 2),
+                                            3: datetime(2024, 6, 1, 12)}
+    assert tracker.stats()["pending"] == 0
+    assert tracker.stats()["recorded"] == 3
+
+
+@pytest.mark.unit
+def test_flush_invalidates_cached_users(tracker, users):
+    from Services.UserCache import user_cache
+
+    user_cache.clear()
+    try:
+        user_cache.put(users[0].to_dict())
+        user_cache.put(users[1].to_dict())
+        tracker.record(1, T0)
+
+        tracker.flush()
+
+        assert user_cache.get_by_id(1) is None
+        assert user_cache.get_by_id(2) is not None
+    finally:
+        user_cache.clear()
+
+
+@pytest.mark.unit
+def test_failed_flush_keeps_logins(tracker, users, monkeypatch):
+    tracker.record(1, T0)
+
+    def fail(self, logins):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(UserRepository, "update_last_logins", fail)
+    assert tracker.flush() == 0
+    tracker.record(1, T0 + timedelta(seconds=1))
+    tracker.record(2, T0)
+
+    monkeypatch.undo()
+    assert tracker.stats()["failedFlushes"] == 1
+    assert tracker.flush() == 2
+
+
+@pytest.mark.unit
+def test_background_flush_when_buffer_full():
+    # The flush runs on the tracker's thread, so the database must be shared across threads
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add_all([User(id=1, email="a@example.com"), User(id=2, email="b@example.com")])
+        session.commit()
+
+    tracker = LoginTracker(session_factory=factory, flush_interval_seconds=3600, max_pending=2)
+    try:
+        tracker.record(1, T0)
+        tracker.record(2, T0)
+        deadline = time.monotonic() + 5
+        while tracker.stats()["flushed"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert tracker.stats()["flushed"] == 2
+        with factory() as session:
+            assert all(u.last_login is not None for u in session.query(User))
+    finally:
+        tracker.stop()
+        engine.dispose()
+
+
+@pytest.mark.unit
+def test_stop_flushes_and_disabled_records_nothing(tracker, sqlite_session, users):
+    tracker.record(1, T0)
+    tracker.stop()
+    assert _last_logins(sqlite_session)[1] == datetime(2024, 6, 1, 12)
+
+    disabled = LoginTracker(enabled=False)
+    assert disabled.record(1, T0) == T0
+    assert disabled.stats()["pending"] == 0
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_login_endpoint_records_without_writing(sqlite_client, sqlite_session, tracker, users, monkeypatch):
+    monkeypatch.setattr("Controllers.UserController.login_tracker", tracker)
+
+    resp = sqlite_client.post("/api/users/1/login")
+
+    assert resp.status_code == 202
+    assert resp.get_json()["userId"] == 1
+    assert _last_logins(sqlite_session)[1] is None
+    assert sqlite_client.get("/api/users/logins/stats").get_json()["pending"] == 1
+
+    tracker.flush()
+    assert _last_logins(sqlite_session)[1] is not None
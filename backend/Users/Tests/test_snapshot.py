@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import pytest
+from datetime import datetime
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from Services.DirectorySnapshot import decode_version, encode_version
+
+
+@pytest.fixture
+def directory(sqlite_session, add_users):
+    return add_users([
+        {"id": 1, "email": "john@example.com", "first_name": "John", "last_name": "Doe", "department": "Engineering"},
+        {"id": 2, "email": "jane@example.com", "first_name": "Jane", "department": "HR", "role": "admin",
+         "updated_at": datetime(2024, 2, 1)},
+        {"id": 3, "email": "bob@example.com", "first_name": "Bob", "is_active": False},
+    ])
+
+
+def _touch(session, user, **changes):
+    for key, value in changes.items():
+        setattr(user, key, value)
+    user.updated_at = datetime(2024, 3, 1)
+    session.commit()
+
+
+# ============ Version Tests ============
+
+@pytest.mark.unit
+def test_version_round_trip():
+    version = encode_version(datetime(2024, 2, 1, 12, 30, 0, 123456), 7)
+    updated_at, count = decode_version(version)
+
+    assert updated_at.replace(tzinfo=None) == datetime(2024, 2, 1, 12, 30, 0, 123456)
+    assert count == 7
+    assert encode_version(None, 0) == "0-0"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("version", ["", "abc", "1", "1-x", "x-1"])
+def test_invalid_version(version):
+    with pytest.raises(ValueError):
+        decode_version(version)
+
+
+# ============ Snapshot Endpoint Tests ============
+
+@pytest.mark.unit
+def test_snapshot_is_columnar_and_active_only(sqlite_client, directory):
+    resp = sqlite_client.get("/api/users/snapshot")
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["count"] == 2
+    assert body["columns"] == {
+        "userId": [1, 2],
+        "name": ["John Doe", "Jane"],
+        "email": ["john@example.com", "jane@example.com"],
+        "department": ["Engineering", "HR"],
+        "role": ["user", "admin"],
+    }
+    assert resp.headers["ETag"] == f'"{body["version"]}"'
+    assert "no-cache" in resp.headers["Cache-Control"]
+
+
+@pytest.mark.unit
+def test_snapshot_not_modified_until_directory_changes(sqlite_client, sqlite_session, directory):
+    first = sqlite_client.get("/api/users/snapshot")
+    etag = first.headers["ETag"]
+
+    unchanged = sqlite_client.get("/api/users/snapshot", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+
+    _touch(sqlite_session, directory[0], department="Sales")
+    changed = sqlite_client.get("/api/users/snapshot", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["version"] != first.get_json()["version"]
+
+
+
+@pytest.mark.unit
+def test_compressed_snapshot_revalidates(sqlite_client, add_users):
+    add_users([{"id": i, "email": f"user{i}@example.com", "first_name": f"User{i}"} for i in range(1, 101)])
+
+    resp = sqlite_client.get("/api/users/snapshot", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.headers["ETag"].startswith('W/"')
+    assert len(json.loads(gzip.decompress(resp.data))["columns"]["userId"]) == 100
+
+    unchanged = sqlite_client.get("/api/users/snapshot",
+                                  headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]})
+    assert unchanged.status_code == 304
+
+@pytest.mark.unit
+def test_snapshot_msgpack(sqlite_client, directory):
+    msgpack = pytest.importorskip("msgpack")
+
+    resp = sqlite_client.get("/api/users/snapshot", headers={"Accept": "application/msgpack"})
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/msgpack"
+    body = msgpack.unpackb(resp.data)
+    assert body["columns"]["userId"] == [1, 2]
+    assert resp.headers["ETag"] != sqlite_client.get("/api/users/snapshot").headers["ETag"]
+
+
+# ============ Delta Endpoint Tests ============
+
+@pytest.mark.unit
+def test_delta_returns_changed_and_removed_users(sqlite_client, sqlite_session, directory):
+    version = sqlite_client.get("/api/users/snapshot").get_json()["version"]
+
+    _touch(sqlite_session, directory[0], role="admin")
+    _touch(sqlite_session, directory[1], is_active=False)
+    resp = sqlite_client.get(f"/api/users/snapshot/delta?since={version}")
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["since"] == version
+    assert body["count"] == 1
+    assert body["columns"]["userId"] == [1]
+    assert body["columns"]["role"] == ["admin"]
+    assert body["removed"] == [2]
+
+    latest = sqlite_client.get(f"/api/users/snapshot/delta?since={body['version']}").get_json()
+    assert latest["version"] == body["version"]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["", "?since=", "?since=nope"])
+def test_delta_validation(sqlite_client, query):
+    resp = sqlite_client.get(f"/api/users/snapshot/delta{query}")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
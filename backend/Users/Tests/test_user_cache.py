@@ -0,0 +1,325 @@
+import os
+import pytest
+from datetime import datetime
+
+# Ensure test mode
+os.environ["FLASK_ENV"] = "test"
+os.environ["ENV"] = "test"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import Base
+from Models.User import User
+from Services import UserCache as user_cache_module
+from Services.UserCache import UserCache, user_cache
+from app import create_app
+
+
+def _payload(user_id, email):
+    return {"userId": user_id, "email": email, "name": None}
+
+
+class CountingUserRepo:
+    """Mock repository that records how often the database would be queried"""
+    calls = []
+
+    def __init__(self, db_session=None):
+        pass
+
+    def _users(self):
+        return [
+            User(id=1, email="john@example.com", first_name="John", is_active=True,
+                 created_at=datetime.utcnow(), updated_at=datetime.utcnow()),
+            User(id=2, email="jane@example.com", first_name="Jane", is_active=True,
+                 created_at=datetime.utcnow(), updated_at=datetime.utcnow()),
+        ]
+
+    def get_user_by_id(self, user_id):
+        CountingUserRepo.calls.append(("id", user_id))
+        return next((u for u in self._users() if u.id == user_id), None)
+
+    def get_user_by_email(self, email):
+        CountingUserRepo.calls.append(("email", email))
+        return next((u for u in self._users() if u.email == email), None)
+
+    def get_users_by_filter(self, user_ids=None, emails=None):
+        CountingUserRepo.calls.append(("filter", list(user_ids or []), list(emails or [])))
+        return [u for u in self._users() if u.id in (user_ids or []) or u.email in (emails or [])]
+
+    # Cache sync: nothing changes underneath these tests
+    def get_directory_version(self):
+        return datetime(2024, 1, 1), 2
+
+    def get_changed_users(self, updated_since):
+        return []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr("Controllers.UserController.UserRepository", CountingUserRepo)
+    CountingUserRepo.calls = []
+    user_cache.clear()
+    app = create_app()
+    app.testing = True
+    with app.test_client() as client:
+        yield client
+    user_cache.clear()
+
+
+# ============ Cache Tests ============
+
+@pytest.mark.unit
+def test_cache_hit_by_id_and_email():
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.put(_payload(1, "John@Example.com"))
+
+    assert cache.get_by_id(1)["userId"] == 1
+    assert cache.get_by_email("john@example.COM")["userId"] == 1
+    assert cache.get_by_id(2) is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.unit
+def test_cache_evicts_least_recently_used():
+    cache = UserCache(max_entries=2, ttl_seconds=60)
+    cache.put(_payload(1, "a@example.com"))
+    cache.put(_payload(2, "b@example.com"))
+    cache.get_by_id(1)
+    cache.put(_payload(3, "c@example.com"))
+
+    assert cache.get_by_id(2) is None
+    assert cache.get_by_email("b@example.com") is None
+    assert cache.get_by_id(1) is not None
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.unit
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now[0])
+    cache = UserCache(max_entries=10, ttl_seconds=30)
+    cache.put(_payload(1, "a@example.com"))
+
+    now[0] += 29
+    assert cache.get_by_id(1) is not None
+    now[0] += 2
+    assert cache.get_by_id(1) is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+def test_cache_get_many_reports_misses():
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.put(_payload(1, "a@example.com"))
+    cache.put(_payload(2, "b@example.com"))
+
+    found, missing_ids, missing_emails = cache.get_many([1, 3], ["B@example.com", "z@example.com"])
+
+    assert sorted(p["userId"] for p in found) == [1, 2]
+    assert missing_ids == [3]
+    assert missing_emails == ["z@example.com"]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.unit
+def test_cache_invalidate_and_disabled():
+    cache = UserCache(max_entries=10, ttl_seconds=60)
+    cache.put(_payload(1, "a@example.com"))
+    cache.invalidate(email="A@example.com")
+    assert cache.get_by_id(1) is None
+
+    disabled = UserCache(enabled=False)
+    disabled.put(_payload(1, "a@example.com"))
+    assert disabled.get_by_id(1) is None
+    assert disabled.get_many([1], []) == ([], [1], [])
+
+
+@pytest.mark.unit
+def test_orm_writes_invalidate_cache():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    user_cache.clear()
+    try:
+        user = User(email="old@example.com", first_name="Old")
+        session.add(user)
+        session.commit()
+        user_cache.put(user.to_dict())
+
+        user.email = "new@example.com"
+        session.commit()
+
+        assert user_cache.get_by_id(user.id) is None
+        assert user_cache.get_by_email("old@example.com") is None
+
+        user_cache.put(user.to_dict())
+        session.delete(user)
+        session.commit()
+        assert user_cache.get_by_email("new@example.com") is None
+    finally:
+        session.close()
+        user_cache.clear()
+
+
+@pytest.mark.unit
+def test_sync_invalidates_changes_made_by_another_worker(sqlite_session, add_users, monkeypatch):
+    from Repositories.UserRepository import UserRepository
+
+    now = [1000.0]
+    monkeypatch.setattr(user_cache_module.time, "monotonic", lambda: now[0])
+    [john, jane] = add_users([{"email": "john@example.com"},
+                              {"email": "jane@example.com", "updated_at": datetime(2023, 12, 1)}])
+    repo = UserRepository(sqlite_session)
+    # Two gunicorn workers, each with its own cache
+    workers = [UserCache(ttl_seconds=600, sync_interval_seconds=1) for _ in range(2)]
+    for cache in workers:
+        cache.sync(repo)
+        cache.put(john.to_dict())
+        cache.put(jane.to_dict())
+
+    # One worker renames John; the ORM hook only reaches the module-level cache
+    john.first_name = "Johnny"
+    john.updated_at = datetime(2024, 1, 2)
+    sqlite_session.commit()
+
+    for cache in workers:
+        cache.sync(repo)
+        assert cache.get_by_id(john.id) is not None  # within the sync interval
+
+    now[0] += 1
+    for cache in workers:
+        cache.sync(repo)
+        assert cache.get_by_id(john.id) is None
+        assert cache.get_by_email("john@example.com") is None
+        assert cache.get_by_id(jane.id) is not None
+
+
+@pytest.mark.unit
+def test_sync_failure_is_retried_on_next_read(monkeypatch):
+    repo = CountingUserRepo()
+    failing = [True]
+
+    def version():
+        if failing[0]:
+            raise RuntimeError("database unavailable")
+        return datetime(2024, 1, 1), 2
+
+    monkeypatch.setattr(repo, "get_directory_version", version)
+    cache = UserCache(sync_interval_seconds=60)
+
+    with pytest.raises(RuntimeError):
+        cache.sync(repo)
+    failing[0] = False
+    cache.sync(repo)
+
+    assert cache._watermark == datetime(2024, 1, 1)
+
+
+# ============ Endpoint Tests ============
+
+@pytest.mark.unit
+def test_get_user_by_id_served_from_cache(client):
+    first = client.get("/api/users/1")
+    second = client.get("/api/users/1")
+
+    assert first.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert CountingUserRepo.calls == [("id", 1)]
+
+
+@pytest.mark.unit
+def test_get_user_by_email_uses_id_entry(client):
+    client.get("/api/users/1")
+    resp = client.get("/api/users/email/JOHN@example.com")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["userId"] == 1
+    assert CountingUserRepo.calls == [("id", 1)]
+
+
+@pytest.mark.unit
+def test_not_found_is_not_cached(client):
+    assert client.get("/api/users/99").status_code == 404
+    assert client.get("/api/users/99").status_code == 404
+    assert CountingUserRepo.calls == [("id", 99), ("id", 99)]
+
+
+@pytest.mark.unit
+def test_filter_only_queries_misses(client):
+    client.get("/api/users/1")
+
+    resp = client.post("/api/users/filter", json={"userIds": [1, 2], "emails": ["john@example.com"]})
+
+    assert resp.status_code == 200
+    assert sorted(u["userId"] for u in resp.get_json()) == [1, 2]
+    assert CountingUserRepo.calls[-1] == ("filter", [2], [])
+
+    client.post("/api/users/filter", json={"userIds": [1, 2]})
+    assert len(CountingUserRepo.calls) == 2
+
+
+@pytest.mark.unit
+def test_cache_stats_endpoint(client):
+    client.get("/api/users/1")
+    client.get("/api/users/1")
+
+    stats = client.get("/api/users/cache/stats").get_json()
+
+    assert stats["hits"] >= 1
+    assert stats["misses"] >= 1
+    assert stats["size"] == 1
+
+
+# ============ Batch Endpoint Tests ============
+
+@pytest.mark.unit
+def test_batch_canonicalizes_ids(client):
+    resp = client.get("/api/users/batch?ids=2,1,2,99")
+
+    assert resp.status_code == 200
+    assert [u["userId"] for u in resp.get_json()] == [1, 2]
+    assert resp.headers["Content-Location"] == "/api/users/batch?ids=1,2,99"
+    assert "public" in resp.headers["Cache-Control"]
+    assert "max-age=" in resp.headers["Cache-Control"]
+    assert resp.headers["ETag"]
+    assert resp.headers["Last-Modified"]
+    assert CountingUserRepo.calls == [("filter", [1, 2, 99], [])]
+
+
+@pytest.mark.unit
+def test_batch_same_set_same_etag(client):
+    first = client.get("/api/users/batch?ids=1,2")
+    second = client.get("/api/users/batch?ids=2,1")
+
+    assert first.headers["ETag"] == second.headers["ETag"]
+
+
+@pytest.mark.unit
+def test_batch_not_modified(client):
+    first = client.get("/api/users/batch?ids=1,2")
+
+    by_etag = client.get("/api/users/batch?ids=1,2", headers={"If-None-Match": first.headers["ETag"]})
+    by_date = client.get("/api/users/batch?ids=1,2", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    changed = client.get("/api/users/batch?ids=1,2", headers={"If-None-Match": '"stale"'})
+
+    assert by_etag.status_code == 304
+    assert by_etag.data == b""
+    assert by_date.status_code == 304
+    assert changed.status_code == 200
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("query", ["", "?ids=", "?ids=a,b", "?ids=1,,x"])
+def test_batch_validation(client, query):
+    resp = client.get(f"/api/users/batch{query}")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+@pytest.mark.unit
+def test_batch_limit(client, monkeypatch):
+    monkeypatch.setattr("config.Config.USER_BATCH_MAX_IDS", 2)
+    assert client.get("/api/users/batch?ids=1,2,3").status_code == 400
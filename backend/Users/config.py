@@ -14,3 +14,29 @@ class Config:
     ENV = os.getenv("ENV", "dev")
     FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+    # In-process cache of user payloads (Services/UserCache.py)
+    USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    # How often each worker checks users.updated_at for changes made by other workers
+    USER_CACHE_SYNC_SECONDS = float(os.getenv("USER_CACHE_SYNC_SECONDS", "1"))
+    # GET /api/users/batch: ids per request and how long clients/proxies may reuse a response
+    USER_BATCH_MAX_IDS = int(os.getenv("USER_BATCH_MAX_IDS", "500"))
+    USER_BATCH_MAX_AGE_SECONDS = int(os.getenv("USER_BATCH_MAX_AGE_SECONDS", "30"))
+    # GET /api/users/ pages
+    USER_PAGE_SIZE_DEFAULT = int(os.getenv("USER_PAGE_SIZE_DEFAULT", "50"))
+    USER_PAGE_SIZE_MAX = int(os.getenv("USER_PAGE_SIZE_MAX", "500"))
+    # POST /api/users/departments: departments resolved per request
+    USER_DEPARTMENTS_MAX = int(os.getenv("USER_DEPARTMENTS_MAX", "100"))
+    # POST /api/users/bulk: rows per import and per-row errors listed in the response
+    USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "100000"))
+    USER_IMPORT_MAX_ERRORS = int(os.getenv("USER_IMPORT_MAX_ERRORS", "1000"))
+    # POST /api/users/<id>/login: last_login is buffered and written every interval, or sooner at max pending
+    LOGIN_TRACKING_ENABLED = os.getenv("LOGIN_TRACKING_ENABLED", "true").lower() == "true"
+    LOGIN_FLUSH_INTERVAL_SECONDS = float(os.getenv("LOGIN_FLUSH_INTERVAL_SECONDS", "2"))
+    LOGIN_MAX_PENDING = int(os.getenv("LOGIN_MAX_PENDING", "10000"))
+    # Response compression (http_encoding.py)
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
@@ -0,0 +1,135 @@
+"""
+JSON encoding and response compression shared by every route of the app.
+
+init_http_encoding(app) installs an orjson-backed JSON provider (when orjson is
+installed) and an after_request hook that gzip- or brotli-compresses large
+textual responses the client accepts. Settings come from app.config:
+
+    COMPRESS_ENABLED         turn compression off entirely
+    COMPRESS_MIN_BYTES       smaller bodies are sent as they are
+    COMPRESS_GZIP_LEVEL      1 (fast) .. 9 (small)
+    COMPRESS_BROTLI_QUALITY  0 (fast) .. 11 (small); low values suit dynamic responses
+"""
+from decimal import Decimal
+import gzip
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib provider is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+))
+
+_NO_BODY_STATUSES = frozenset((204, 304))
+
+
+def _default(value):
+    # Types Flask's default provider handles that orjson does not
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson. datetime, date, UUID and dataclasses are
+    encoded natively (datetimes as ISO 8601); keys keep insertion order and may
+    be non-strings, as with the stdlib encoder.
+    """
+
+    def _options(self, kwargs) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys'):
+            options |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self._options(kwargs)).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _is_compressible(response: Response) -> bool:
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _negotiate(accept_encodings) -> str:
+    # Highest client quality wins; on a tie the earlier offer (brotli) does
+    offered = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return accept_encodings.best_match(offered)
+
+
+def _weak_etag(response: Response) -> None:
+    # The encoded bytes differ from the identity body, so a strong ETag no
+    # longer applies; a weak one still matches If-None-Match (weak comparison)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response: Response, config) -> Response:
+    """Compress `response` in place when it is worth it and the client accepts it."""
+    if (not config.get('COMPRESS_ENABLED', True)
+            or request.method == 'HEAD'
+            or response.status_code < 200
+            or response.status_code in _NO_BODY_STATUSES
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not _is_compressible(response)):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return response
+
+    data = response.get_data()
+    if len(data) < config.get('COMPRESS_MIN_BYTES', 1024):
+        return response
+
+    encoding = _negotiate(request.accept_encodings)
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+    elif encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=config.get('COMPRESS_GZIP_LEVEL', 6), mtime=0)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    _weak_etag(response)
+    return response
+
+
+def init_http_encoding(app: Flask) -> None:
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,14 @@
+"""
+WSGI entry point for production servers: gunicorn wsgi:app (see gunicorn.conf.py).
+main.py keeps serving with the development server.
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path for absolute imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+app = create_app()